@@ -0,0 +1,85 @@
+"""Cold-start import budget for each entry point.
+
+Runs `python -X importtime -c "import <module>"` in fresh interpreters and
+reports the best cumulative import time of each entry point's modules,
+plus any heavyweight module that should have stayed deferred. Exits
+non-zero if an entry point is over its budget in startup_budget.json, so
+it can gate CI:
+
+    python benchmarks/cold_start.py            # check against budgets
+    python benchmarks/cold_start.py --runs 20  # more samples
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent
+BUDGET_FILE = HERE / "startup_budget.json"
+
+
+def _importtime(modules: list[str]) -> tuple[float, set[str]]:
+    """Return (cumulative ms for modules, every module imported) for one cold run."""
+    code = "; ".join(f"import {m}" for m in modules)
+    env = {**os.environ, "PYTHONPATH": str(ROOT), "PYTHONDONTWRITEBYTECODE": ""}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    total_us = 0
+    imported = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        imported.add(name.strip())
+        # Top-level lines have no indentation in the name column.
+        if name.strip() in modules and name[1:2] != " ":
+            total_us += int(cumulative)
+    return total_us / 1000, imported
+
+
+def measure(modules: list[str], runs: int) -> tuple[float, set[str]]:
+    # The first run may compile bytecode; it is discarded.
+    _importtime(modules)
+    samples = [_importtime(modules) for _ in range(runs)]
+    return min(ms for ms, _ in samples), samples[0][1]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    budgets = json.loads(BUDGET_FILE.read_text())
+    failed = False
+    print(f"{'entry point':<12} {'best ms':>8} {'budget':>8}  status")
+    for name, spec in budgets.items():
+        try:
+            ms, imported = measure(spec["modules"], args.runs)
+        except subprocess.CalledProcessError as exc:
+            if spec.get("optional"):
+                print(f"{name:<12} {'-':>8} {spec['budget_ms']:>8}  skipped (import failed)")
+                continue
+            print(exc.stderr, file=sys.stderr)
+            return 2
+        leaked = sorted(set(spec.get("forbidden", [])) & imported)
+        status = "ok"
+        if ms > spec["budget_ms"]:
+            status = "OVER BUDGET"
+        if leaked:
+            status = f"imports {', '.join(leaked)}"
+        failed |= status != "ok"
+        print(f"{name:<12} {ms:>8.1f} {spec['budget_ms']:>8}  {status}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
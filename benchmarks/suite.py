@@ -0,0 +1,431 @@
+"""Micro-benchmarks for the stats, timeline, config and notification hot paths.
+
+Stats benchmarks run against synthetic history of 1 day, 1 year and 20
+years in a throwaway config directory. Results are per-call microseconds
+(best of several repeats) and are compared against baseline.json; any
+benchmark slower than the baseline by more than the tolerance factor, and
+by more than the noise floor in absolute terms, is flagged and the run
+exits non-zero:
+
+    python benchmarks/suite.py                  # compare against baseline
+    python benchmarks/suite.py -k summary       # only matching benchmarks
+    python benchmarks/suite.py --update         # record a new baseline
+
+Baselines are machine-specific; re-record them when changing hardware.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import timeit
+from collections import deque
+from collections.abc import Callable
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import breathebreak.aggregate as aggregate
+import breathebreak.config as config
+import breathebreak.export as export
+import breathebreak.metrics as metrics
+import breathebreak.quiet as quiet
+import breathebreak.report as report
+import breathebreak.stats as stats
+from breathebreak.api import ApiServer
+from breathebreak.config import Config
+from breathebreak.daytable import DayTable
+from breathebreak.dbusnotify import DBusBackend, FakeNotificationDaemon
+from breathebreak.events import EventBus
+from breathebreak.eventsocket import EventSocketServer
+from breathebreak.notifier import Dispatcher, Notification
+from breathebreak.stats import StatsStore
+from breathebreak.timeline import Event, Timeline
+
+HERE = Path(__file__).resolve().parent
+BASELINE_FILE = HERE / "baseline.json"
+DEFAULT_TOLERANCE = 2.0
+# Absolute slowdowns below this (us) are scheduler/disk noise, not regressions
+DEFAULT_NOISE_FLOOR_US = 50.0
+REPEAT = 5
+
+HISTORIES = {"1d": 1, "1y": 365, "20y": 20 * 365}
+# Encrypted storage benchmarks need the optional cryptography package.
+ENCRYPTION = importlib.util.find_spec("cryptography") is not None
+INCREMENTAL = ("sqlite", "encrypted") if ENCRYPTION else ("sqlite",)
+
+
+def history(days: int) -> DayTable:
+    """Dense daily history ending today with realistic counter values."""
+    start = date.today() - timedelta(days=days - 1)
+    return DayTable.from_rows(
+        {
+            (start + timedelta(days=i)).isoformat(): {
+                "reminders_sent": 20 + i % 7,
+                "breaks_acknowledged": 15 + i % 5,
+                "focus_seconds": 6 * 3600 + i % 3600,
+                "sessions_started": 1 + i % 2,
+            }
+            for i in range(days)
+        }
+    )
+
+
+def _use_dir(path: Path, keep_cache: bool = False) -> None:
+    """Point config and stats at path, as if it were ~/.config/breathebreak."""
+    config.CONFIG_DIR = path
+    config.CONFIG_FILE = path / "config.yaml"
+    stats.STATS_FILE = path / "stats.json"
+    if not keep_cache:
+        config._cache.clear()
+
+
+def _stats_benchmarks(
+    size: str, days: int, root: Path, writers: list[StatsStore]
+) -> dict[str, Callable[[], None]]:
+    table = history(days)
+    benches = {}
+    for storage in ("json", "paged", *INCREMENTAL):
+        path = root / f"{size}-{storage}"
+        path.mkdir()
+        _seed(path, table, storage)
+
+        def load(path=path, storage=storage):
+            _use_dir(path)
+            StatsStore.load(storage=storage).close()
+
+        benches[f"stats.load[{storage},{size}]"] = load
+
+    path = root / f"{size}-json"
+    _use_dir(path)
+    store = StatsStore.load()
+    benches[f"stats.summary[{size}]"] = store.summary
+    benches[f"report.build[{size}]"] = lambda: report.build(store.days)
+    first = date.today() - timedelta(days=days - 1)
+    benches[f"stats.totals[json,{size}]"] = lambda: store.totals(first, date.today())
+
+    _use_dir(root / f"{size}-paged")
+    paged = StatsStore.load(storage="paged")
+    benches[f"export.csv[paged,{size}]"] = lambda: deque(export.lines(paged.rows()), maxlen=0)
+
+    for storage in INCREMENTAL:
+        _use_dir(root / f"{size}-{storage}")
+        db = StatsStore.load(storage=storage)
+        writers.append(db)
+        benches[f"stats.summary[{storage},{size}]"] = db.summary
+        benches[f"stats.totals[{storage},{size}]"] = lambda db=db: db.totals(first, date.today())
+
+    for kind in ("snapshot", "journal", *INCREMENTAL):
+        path = root / f"{size}-record-{kind}"
+        path.mkdir()
+        _seed(path, table, "json")
+        if kind in INCREMENTAL:
+            writer = StatsStore.load(storage=kind)
+        else:
+            writer = StatsStore(days=history(days), journaled=kind == "journal")
+        writers.append(writer)
+
+        def record(path=path, writer=writer):
+            _use_dir(path)
+            writer.record_reminder()
+
+        benches[f"stats.record[{kind},{size}]"] = record
+    return benches
+
+
+def _seed(path: Path, table: DayTable, storage: str) -> None:
+    """Write table in path; incremental storage imports it from a json snapshot."""
+    _use_dir(path)
+    StatsStore(days=table, storage="json" if storage in INCREMENTAL else storage).compact()
+    if storage in INCREMENTAL:
+        StatsStore.load(storage=storage).close()
+
+
+def _config_benchmarks(root: Path) -> dict[str, Callable[[], None]]:
+    path = root / "config"
+    path.mkdir()
+    _use_dir(path)
+    cfg = Config(interval_minutes=30)
+    cfg.save()
+    flip = [Config(interval_minutes=31), Config(interval_minutes=32)]
+
+    def load_cached():
+        _use_dir(path, keep_cache=True)
+        Config.load()
+
+    def load_cold():
+        _use_dir(path)
+        Config.load()
+
+    def save_unchanged():
+        _use_dir(path, keep_cache=True)
+        cfg.save()
+
+    def save_changed():
+        _use_dir(path, keep_cache=True)
+        flip.reverse()
+        flip[0].save()
+
+    return {
+        "config.load[cached]": load_cached,
+        "config.load[cold]": load_cold,
+        "config.save[unchanged]": save_unchanged,
+        "config.save[changed]": save_changed,
+    }
+
+
+def _timeline_benchmarks(root: Path) -> dict[str, Callable[[], None]]:
+    timeline = Timeline(root / "timeline" / "timeline.dat")
+    start = date.today() - timedelta(days=10 * 365)
+    midnight = int(datetime.combine(start, datetime.min.time()).timestamp())
+    for year in range(10):
+        first = midnight + year * 365 * 86400
+        timeline.append(
+            Event(first + day * 86400 + 9 * 3600 + i * 1200, "reminder")
+            for day in range(365)
+            for i in range(27)
+        )
+    now = [int(time.time())]
+
+    def append():
+        now[0] += 1
+        timeline.append([Event(now[0], "reminder")])
+
+    month_start = midnight + 5 * 365 * 86400
+    return {
+        "timeline.append": append,
+        "timeline.scan[month,10y]": lambda: timeline.scan(month_start, month_start + 30 * 86400),
+    }
+
+
+def _api_benchmarks() -> dict[str, Callable[[], None]]:
+    store = StatsStore(days=history(365))
+    store._persist = lambda: None
+    server = ApiServer(store, port=0)
+    server.start()
+    conn = socket.create_connection((server.host, server.port))
+    request = f"GET /v1/summary HTTP/1.1\r\nHost: 127.0.0.1:{server.port}\r\n\r\n".encode()
+    etag = _roundtrip(conn, request).split(b"ETag: ", 1)[1].split(b"\r\n", 1)[0]
+    conditional = request[:-2] + b"If-None-Match: " + etag + b"\r\n\r\n"
+
+    def write_then_get():
+        store.record_reminder()
+        _roundtrip(conn, request)
+
+    return {
+        "api.get[summary]": lambda: _roundtrip(conn, request),
+        "api.get[304]": lambda: _roundtrip(conn, conditional),
+        "api.get[after write]": write_then_get,
+    }
+
+
+def _roundtrip(conn: socket.socket, request: bytes) -> bytes:
+    """Send one keep-alive request and read exactly its response."""
+    conn.sendall(request)
+    data = b""
+    while b"\r\n\r\n" not in data:
+        data += conn.recv(65536)
+    head, body = data.split(b"\r\n\r\n", 1)
+    length = int(head.split(b"Content-Length: ", 1)[1].split(b"\r\n", 1)[0])
+    while len(body) < length:
+        body += conn.recv(65536)
+    return head
+
+
+def _events_benchmarks() -> dict[str, Callable[[], None]]:
+    quiet = EventBus()
+    bus = EventBus()
+    # Unix socket paths are short; the benchmark root can be too deep.
+    server = EventSocketServer(bus, Path(tempfile.mkdtemp(prefix="bb")) / "events.sock")
+    server.start()
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.connect(str(server.path))
+    threading.Thread(target=lambda: all(iter(lambda: conn.recv(65536), b"")), daemon=True).start()
+    while not server.subscribers:
+        time.sleep(0.001)
+    return {
+        "events.publish[no subscribers]": lambda: quiet.publish("reminder"),
+        "events.publish[socket]": lambda: bus.publish("reminder"),
+    }
+
+
+def _notify_benchmarks() -> dict[str, Callable[[], None]]:
+    dispatcher = Dispatcher(lambda note: None)
+    notes = [Notification("BreatheBreak", f"n{i}", "Stretch") for i in range(8)]
+
+    def submit():
+        for note in notes:
+            dispatcher.submit(note)
+
+    def submit_and_deliver():
+        submit()
+        dispatcher.drain()
+
+    benches = {
+        "notify.submit[x8]": submit,
+        "notify.deliver[x8]": submit_and_deliver,
+    }
+    # One notification shown through a stand-in daemon on a private bus: over
+    # the backend's persistent connection, and as notify-send (or gdbus) does
+    # it, with a process and a bus handshake per message.
+    daemon = FakeNotificationDaemon(Path(tempfile.mkdtemp(prefix="bb")) / "bus")
+    backend = DBusBackend(daemon.address)
+    note = notes[0]
+    benches["notify.dbus[persistent]"] = lambda: backend.deliver(note)
+    env = {**os.environ, "DBUS_SESSION_BUS_ADDRESS": daemon.address}
+    if shutil.which("notify-send"):
+        command = ["notify-send", note.subtitle, note.message]
+    elif shutil.which("gdbus"):
+        command = [
+            "gdbus", "call", "--session",
+            "--dest", "org.freedesktop.Notifications",
+            "--object-path", "/org/freedesktop/Notifications",
+            "--method", "org.freedesktop.Notifications.Notify",
+            note.title, "uint32 0", "", note.subtitle, note.message,
+            "@as []", "@a{sv} {}", "int32 -1",
+        ]  # fmt: skip
+    else:
+        return benches
+    benches["notify.dbus[subprocess]"] = lambda: subprocess.run(
+        command, env=env, check=True, capture_output=True
+    )
+    return benches
+
+
+def _aggregate_benchmarks(root: Path) -> dict[str, Callable[[], None]]:
+    export = root / "export.json"
+    export.write_text(json.dumps(history(HISTORIES["1y"]).to_dict()))
+    merged = aggregate.fold([export])
+    return {
+        "aggregate.fold[1y export]": lambda: aggregate.fold([export]),
+        "aggregate.merge[1y]": lambda: aggregate.Aggregate().merge(merged),
+    }
+
+
+def _quiet_benchmarks(root: Path) -> dict[str, Callable[[], None]]:
+    # 2000 weekly meetings spread over working hours, recurring for years.
+    lines = ["BEGIN:VCALENDAR"]
+    for i in range(2000):
+        day, slot = i % 5, i % 16
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:m{i}",
+            f"DTSTART:2020010{6 + day}T{8 + slot // 2:02d}{30 * (slot % 2):02d}00",
+            "DURATION:PT25M",
+            "RRULE:FREQ=WEEKLY",
+            "END:VEVENT",
+        ]
+    lines.append("END:VCALENDAR")
+    calendar = root / "work.ics"
+    calendar.write_text("\r\n".join(lines))
+    schedule = quiet.QuietSchedule(["Mon-Fri 12:00-13:00", "22:00-07:00"], [str(calendar)])
+    now = time.time()
+    schedule.until(now)
+    return {"quiet.until[2000 weekly events]": lambda: schedule.until(now)}
+
+
+def _metrics_benchmarks() -> dict[str, Callable[[], None]]:
+    hist = metrics.Histogram("bench_observe_seconds", "", metrics.exponential_buckets(1e-5, 4, 11))
+
+    def observe_off():
+        metrics.disable()
+        hist.observe(0.001)
+
+    def observe_on():
+        metrics.enable()
+        hist.observe(0.001)
+        metrics.disable()
+
+    return {"metrics.observe[off]": observe_off, "metrics.observe[on]": observe_on}
+
+
+def collect(root: Path) -> tuple[dict[str, Callable[[], None]], Callable[[], None]]:
+    """Return (benchmarks by name, a hook that waits for background work)."""
+    benches = {}
+    writers: list[StatsStore] = []
+    for size, days in HISTORIES.items():
+        benches.update(_stats_benchmarks(size, days, root, writers))
+    benches.update(_config_benchmarks(root))
+    benches.update(_timeline_benchmarks(root))
+    benches.update(_api_benchmarks())
+    benches.update(_events_benchmarks())
+    benches.update(_notify_benchmarks())
+    benches.update(_metrics_benchmarks())
+    benches.update(_aggregate_benchmarks(root))
+    benches.update(_quiet_benchmarks(root))
+
+    def settle():
+        # Journal compaction runs on a thread and writes wherever STATS_FILE
+        # points when it finishes; let it land before switching directories.
+        for writer in writers:
+            writer.wait_for_compaction()
+
+    return benches, settle
+
+
+def measure(fn: Callable[[], None], repeat: int = REPEAT) -> float:
+    """Best per-call time in microseconds."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number * 1e6
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", dest="pattern", default="", help="only run names containing this")
+    parser.add_argument("--update", action="store_true", help="write results as the new baseline")
+    parser.add_argument("--tolerance", type=float, help="slowdown factor treated as a regression")
+    args = parser.parse_args(argv)
+
+    baseline = json.loads(BASELINE_FILE.read_text()) if BASELINE_FILE.exists() else {}
+    tolerance = args.tolerance or baseline.get("tolerance", DEFAULT_TOLERANCE)
+    noise_floor = baseline.get("noise_floor_us", DEFAULT_NOISE_FLOOR_US)
+    expected = baseline.get("results_us", {})
+    results = {}
+    regressed = False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        benches, settle = collect(Path(tmp))
+        print(f"{'benchmark':<32} {'us/call':>10} {'baseline':>10}  status")
+        for name, fn in benches.items():
+            if args.pattern not in name:
+                continue
+            us = results[name] = measure(fn)
+            settle()
+            base = expected.get(name)
+            if base is None:
+                status = "new"
+            elif us > base * tolerance and us - base > noise_floor:
+                status = f"REGRESSION x{us / base:.2f}"
+                regressed = True
+            else:
+                status = "ok"
+            shown = f"{base:>10.1f}" if base is not None else f"{'-':>10}"
+            print(f"{name:<32} {us:>10.1f} {shown}  {status}")
+
+    if args.update:
+        merged = {**expected, **results} if args.pattern else results
+        BASELINE_FILE.write_text(
+            json.dumps(
+                {
+                    "tolerance": tolerance,
+                    "noise_floor_us": noise_floor,
+                    "results_us": {k: round(v, 1) for k, v in sorted(merged.items())},
+                },
+                indent=2,
+            )
+            + "\n"
+        )
+        print(f"wrote {BASELINE_FILE.name}")
+        return 0
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
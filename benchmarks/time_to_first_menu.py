@@ -0,0 +1,62 @@
+"""Time-to-first-menu against history size, for each stats layout.
+
+Measures what BreatheBreakApp.__init__ and the first "Stats" click pay for
+stats: StatsStore.load() followed by summary(). Run with:
+
+    python benchmarks/time_to_first_menu.py
+"""
+
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import breathebreak.stats as stats
+from breathebreak.daytable import DayTable
+from breathebreak.stats import StatsStore
+
+YEARS = (1, 5, 10, 20)
+REPEAT = 7
+
+
+def _history(years: int) -> DayTable:
+    start = date.today() - timedelta(days=years * 365)
+    return DayTable.from_rows(
+        {
+            (start + timedelta(days=i)).isoformat(): {
+                "reminders_sent": 20,
+                "breaks_acknowledged": 15,
+                "focus_seconds": 6 * 3600,
+            }
+            for i in range(years * 365)
+        }
+    )
+
+
+def _best(fn) -> float:
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        stats.STATS_FILE = Path(tmp) / "stats.json"
+        print(f"{'years':>5}  {'json ms':>9}  {'paged ms':>9}  {'sqlite ms':>9}")
+        for years in YEARS:
+            table = _history(years)
+            row = []
+            stats.STATS_FILE.with_suffix(".db").unlink(missing_ok=True)
+            for storage in ("json", "paged", "sqlite"):
+                # sqlite imports the json snapshot written just before it.
+                StatsStore(days=table, storage=storage).compact()
+                seconds = _best(lambda s=storage: StatsStore.load(storage=s).summary())
+                row.append(seconds * 1000)
+            print(f"{years:>5}  {row[0]:>9.2f}  {row[1]:>9.2f}  {row[2]:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@
 
 import sys
 
-from breathebreak.app import main
+from breathebreak.cli import main
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,256 @@
+"""Team-wide aggregates over many people's stats.json exports.
+
+`breathebreak aggregate DIR` reads every *.json file under DIR, one
+stats.json export per person, and prints JSON lines. It writes one line
+per day with the team's totals, the number of people with data and
+percentiles of per-person compliance and focus time. A final line holds
+the overall totals. With --progress, the running totals also go to
+stderr after each batch.
+
+Files are parsed in a process pool, BATCH_FILES per task. Each worker
+folds its batch into a partial Aggregate and sends only that back. A
+partial holds per-day totals plus fixed-bucket histograms of compliance
+(whole percents) and focus time (FOCUS_BUCKET_SECONDS wide), so its size
+is bounded by the number of days, not people. The parent merges
+partials as they complete and keeps at most two batches per worker
+outstanding. Memory therefore stays flat however many files there are.
+Corrupt or unreadable files are skipped and counted, as
+StatsStore.load() skips a corrupt stats.json.
+"""
+
+import json
+import os
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import date
+from itertools import islice
+from pathlib import Path
+
+from breathebreak.backends import CORRUPT_ERRORS, SEQ_KEY
+from breathebreak.daytable import DayTable
+
+# Files parsed per worker task.
+BATCH_FILES = 64
+# Width of a focus-time histogram bucket; a day's focus is capped at 24h.
+FOCUS_BUCKET_SECONDS = 300
+_FOCUS_BUCKETS = 86400 // FOCUS_BUCKET_SECONDS
+_QUANTILES = {"p10": 10, "p50": 50, "p90": 90}
+
+
+@dataclass
+class TeamDay:
+    """One day's totals across everyone, with per-person histograms."""
+
+    people: int = 0
+    reminders_sent: int = 0
+    breaks_acknowledged: int = 0
+    focus_seconds: int = 0
+    # Whole-percent compliance -> people; only people who got reminders.
+    compliance: Counter = field(default_factory=Counter)
+    # Focus bucket -> people.
+    focus: Counter = field(default_factory=Counter)
+
+    def merge(self, other: "TeamDay") -> None:
+        self.people += other.people
+        self.reminders_sent += other.reminders_sent
+        self.breaks_acknowledged += other.breaks_acknowledged
+        self.focus_seconds += other.focus_seconds
+        self.compliance.update(other.compliance)
+        self.focus.update(other.focus)
+
+    def row(self, day: date) -> dict:
+        return {
+            "kind": "day",
+            "date": day.isoformat(),
+            "people": self.people,
+            "reminders_sent": self.reminders_sent,
+            "breaks_acknowledged": self.breaks_acknowledged,
+            "focus_seconds": self.focus_seconds,
+            "compliance": _rate(self.breaks_acknowledged, self.reminders_sent),
+            "compliance_percentiles": {
+                name: bucket / 100 for name, bucket in _percentiles(self.compliance).items()
+            },
+            "focus_percentiles": {
+                name: bucket * FOCUS_BUCKET_SECONDS
+                for name, bucket in _percentiles(self.focus).items()
+            },
+        }
+
+
+@dataclass
+class Aggregate:
+    """Merged results so far: file counts and a TeamDay per day ordinal."""
+
+    files: int = 0
+    skipped: int = 0
+    people: int = 0
+    days: dict[int, TeamDay] = field(default_factory=dict)
+
+    def add(self, table: DayTable, since: int = 0) -> None:
+        """Fold one person's table in, ignoring days before ordinal since."""
+        base, present, cols = table.columns()
+        reminders = cols["reminders_sent"]
+        breaks = cols["breaks_acknowledged"]
+        focus = cols["focus_seconds"]
+        days = self.days
+        counted = False
+        for row in range(max(0, since - base), len(present)):
+            if not present[row]:
+                continue
+            counted = True
+            day = days.get(base + row)
+            if day is None:
+                day = days[base + row] = TeamDay()
+            sent, taken, seconds = reminders[row], breaks[row], focus[row]
+            day.people += 1
+            day.reminders_sent += sent
+            day.breaks_acknowledged += taken
+            day.focus_seconds += seconds
+            if sent:
+                day.compliance[min(100, taken * 100 // sent)] += 1
+            day.focus[min(_FOCUS_BUCKETS, seconds // FOCUS_BUCKET_SECONDS)] += 1
+        self.people += counted
+
+    def merge(self, other: "Aggregate") -> None:
+        """Add other's results in; other's TeamDays may be reused, so drop it."""
+        self.files += other.files
+        self.skipped += other.skipped
+        self.people += other.people
+        days = self.days
+        for ordinal, day in other.days.items():
+            mine = days.get(ordinal)
+            if mine is None:
+                days[ordinal] = day
+            else:
+                mine.merge(day)
+
+    def progress(self) -> dict:
+        return {
+            "kind": "progress",
+            "files": self.files,
+            "skipped": self.skipped,
+            "people": self.people,
+            "days": len(self.days),
+        }
+
+    def lines(self) -> Iterator[dict]:
+        """Yield a row per day in date order, then the totals row."""
+        totals = TeamDay()
+        for ordinal in sorted(self.days):
+            day = self.days[ordinal]
+            totals.reminders_sent += day.reminders_sent
+            totals.breaks_acknowledged += day.breaks_acknowledged
+            totals.focus_seconds += day.focus_seconds
+            yield day.row(date.fromordinal(ordinal))
+        yield {
+            **self.progress(),
+            "kind": "total",
+            "reminders_sent": totals.reminders_sent,
+            "breaks_acknowledged": totals.breaks_acknowledged,
+            "focus_seconds": totals.focus_seconds,
+            "compliance": _rate(totals.breaks_acknowledged, totals.reminders_sent),
+        }
+
+
+def read_export(path: Path) -> DayTable | None:
+    """Parse one stats.json export; None when it is corrupt or unreadable."""
+    try:
+        with open(path) as f:
+            raw = json.load(f)
+        raw.pop(SEQ_KEY, None)
+        return DayTable.from_rows(raw)
+    except (*CORRUPT_ERRORS, OverflowError):
+        # OverflowError: a counter too large for the table's 64-bit columns.
+        return None
+
+
+def fold(paths: Iterable[Path], since: int = 0) -> Aggregate:
+    """Parse and merge a batch of files. Runs in a pool worker."""
+    partial = Aggregate()
+    for path in paths:
+        partial.files += 1
+        table = read_export(path)
+        if table is None:
+            partial.skipped += 1
+        else:
+            partial.add(table, since)
+    return partial
+
+
+def aggregate(
+    paths: Iterable[Path], workers: int | None = None, since: date | None = None
+) -> Iterator[Aggregate]:
+    """Merge paths in a process pool, yielding the running Aggregate per batch.
+
+    The same object is yielded each time, so the last one yielded is the
+    final result; nothing is yielded for no paths. paths is consumed lazily.
+    """
+    workers = workers or os.cpu_count() or 1
+    cutoff = since.toordinal() if since else 0
+    total = Aggregate()
+    paths = iter(paths)
+    with ProcessPoolExecutor(workers) as pool:
+        pending: set = set()
+        while True:
+            batch = list(islice(paths, BATCH_FILES))
+            if batch:
+                pending.add(pool.submit(fold, batch, cutoff))
+            if not pending:
+                break
+            if batch and len(pending) < 2 * workers:
+                continue
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                total.merge(future.result())
+                yield total
+
+
+def find_exports(directory: Path) -> Iterator[Path]:
+    """Every *.json file under directory, in a stable order."""
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.endswith(".json"):
+                yield Path(root, name)
+
+
+def run(
+    directory: str,
+    workers: int | None = None,
+    since: date | None = None,
+    progress: Callable[[str], None] | None = None,
+) -> Iterator[str]:
+    """Aggregate the exports under directory, yielding output lines."""
+    result = Aggregate()
+    for result in aggregate(find_exports(Path(directory)), workers, since):
+        if progress is not None:
+            progress(_encode(result.progress()))
+    for line in result.lines():
+        yield _encode(line)
+
+
+def _percentiles(histogram: Counter) -> dict:
+    """Nearest-rank percentiles of a bucket -> count histogram, as buckets."""
+    n = sum(histogram.values())
+    out = dict.fromkeys(_QUANTILES, 0)
+    if not n:
+        return out
+    targets = sorted((max(1, -(-n * pct // 100)), name) for name, pct in _QUANTILES.items())
+    seen = 0
+    for bucket in sorted(histogram):
+        seen += histogram[bucket]
+        while targets and seen >= targets[0][0]:
+            out[targets.pop(0)[1]] = bucket
+        if not targets:
+            break
+    return out
+
+
+def _rate(breaks: int, reminders: int) -> float:
+    return breaks / reminders if reminders else 0.0
+
+
+def _encode(data: dict) -> str:
+    return json.dumps(data, separators=(",", ":"))
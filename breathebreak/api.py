@@ -0,0 +1,234 @@
+"""Local read-only HTTP API for editor and dashboard integrations.
+
+With api_port set, ApiServer answers GET requests on 127.0.0.1 only:
+
+- /v1/state: whether reminders are running, paused for idle, the
+  interval and when the next reminder is due
+- /v1/today: today's DailyStats counters
+- /v1/summary: recent, week-to-date and month-to-date totals, as in
+  summary()
+
+The server runs an asyncio loop on its own daemon thread, away from the
+Cocoa run loop and the scheduler. Requests never touch stats files or
+take the stats lock on the hot path. Stats bodies come from
+StatsStore.snapshot(), which is rebuilt at most once per change. State is
+published by the app as a new immutable dict whenever it changes. Each
+encoded body is cached with its ETag until the next change, so a poll
+that hits the cache is a dict lookup and a write. Connections are
+kept alive, and If-None-Match answers 304 with no body.
+
+Requests with a Host header other than localhost or 127.0.0.1 are
+refused, so a web page using DNS rebinding cannot read the API through
+a browser.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+
+from breathebreak.stats import StatsStore
+
+log = logging.getLogger(__name__)
+
+API_HOST = "127.0.0.1"
+# Longest request head accepted; requests have no bodies.
+MAX_HEAD_BYTES = 8192
+# Seconds an idle keep-alive connection is held open.
+KEEPALIVE_TIMEOUT = 30.0
+_ALLOWED_HOSTS = ("127.0.0.1", "localhost")
+_REASONS = {
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+}
+
+
+class ApiServer:
+    """Serves stats snapshots and published app state over loopback HTTP."""
+
+    def __init__(self, stats: StatsStore, port: int, host: str = API_HOST):
+        self.stats = stats
+        self.host = host
+        self.port = port
+        # Distinguishes ETags across restarts, when versions start over.
+        self._epoch = os.urandom(4).hex()
+        self._state_version = 0
+        self._state = (self._etag("s", 0), _encode({}))
+        # (snapshot, {path: (etag, body)}) for the latest stats snapshot.
+        self._stats_cache: tuple = (None, {})
+        self._stats_version = 0
+        self._thread: threading.Thread | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stopping: asyncio.Event | None = None
+        self._writers: set = set()
+        self._ready = threading.Event()
+        self._error: OSError | None = None
+        self.requests = 0
+
+    def start(self) -> None:
+        """Bind and serve on a daemon thread. Raises OSError if the port is taken."""
+        self._thread = threading.Thread(target=self._run, name="breathebreak-api", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+        log.info("Stats API listening on http://%s:%d/v1/", self.host, self.port)
+
+    def stop(self) -> None:
+        """Close the listener and open connections. Safe to call twice."""
+        loop, self._loop = self._loop, None
+        if loop is not None:
+            loop.call_soon_threadsafe(self._stopping.set)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def publish_state(self, state: dict) -> None:
+        """Replace the /v1/state body. Callable from any thread."""
+        self._state_version += 1
+        self._state = (self._etag("s", self._state_version), _encode(state))
+
+    # -- serving --
+
+    def _run(self) -> None:
+        try:
+            asyncio.run(self._main())
+        except OSError as e:
+            self._error = e
+            self._ready.set()
+
+    async def _main(self) -> None:
+        server = await asyncio.start_server(self._serve, self.host, self.port, limit=MAX_HEAD_BYTES)
+        self.port = server.sockets[0].getsockname()[1]
+        self._loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        self._ready.set()
+        async with server:
+            await self._stopping.wait()
+            server.close()
+            for writer in list(self._writers):
+                writer.close()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._writers.add(writer)
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEPALIVE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    break
+                except asyncio.TimeoutError:
+                    break
+                response, keep_alive = self._respond(head)
+                writer.write(response)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    def _respond(self, head: bytes) -> tuple[bytes, bool]:
+        """Build the full response for one request head; returns (bytes, keep alive)."""
+        self.requests += 1
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ")
+            headers = {}
+            for line in lines[1:]:
+                if line:
+                    name, value = line.split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+        except ValueError:
+            return _response(400, b"", close=True), False
+        if headers.get("content-length", "0") != "0" or "transfer-encoding" in headers:
+            # No endpoint takes a body, and skipping one safely isn't worth it.
+            return _response(400, b"", close=True), False
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        host = headers.get("host")
+        if host is not None and _hostname(host) not in _ALLOWED_HOSTS:
+            return _response(403, b"", close=not keep_alive), keep_alive
+        if method not in ("GET", "HEAD"):
+            extra = {"Allow": "GET, HEAD"}
+            return _response(405, b"", extra, close=not keep_alive), keep_alive
+        found = self._resource(target.split("?", 1)[0])
+        if found is None:
+            return _response(404, _encode({"error": "not found"}), close=not keep_alive), keep_alive
+        etag, body = found
+        if etag in headers.get("if-none-match", ""):
+            return _response(304, b"", {"ETag": etag}, close=not keep_alive), keep_alive
+        return (
+            _response(200, body, {"ETag": etag}, close=not keep_alive, head=method == "HEAD"),
+            keep_alive,
+        )
+
+    def _resource(self, path: str) -> tuple[str, bytes] | None:
+        if path == "/v1/state":
+            return self._state
+        if path not in ("/v1/today", "/v1/summary"):
+            return None
+        snap = self.stats.snapshot()
+        cached_snap, bodies = self._stats_cache
+        if cached_snap is not snap:
+            # A new snapshot can share a table version (the day rolled over).
+            self._stats_version += 1
+            bodies = {}
+            self._stats_cache = (snap, bodies)
+        found = bodies.get(path)
+        if found is None:
+            data = snap.today if path == "/v1/today" else snap.summary
+            found = bodies[path] = (self._etag(path[4], self._stats_version), _encode(data))
+        return found
+
+    def _etag(self, kind: str, version: int) -> str:
+        return f'"{self._epoch}-{kind}{version}"'
+
+
+def reminder_state(scheduler, reminder, idle, interval_minutes: int) -> dict:
+    """The /v1/state body for a reminder job (None when reminders are off)."""
+    next_at = None
+    if reminder is not None and reminder.active:
+        next_at = datetime.fromtimestamp(scheduler.wall_time(reminder.due)).isoformat(
+            timespec="seconds"
+        )
+    return {
+        "reminders_on": reminder is not None,
+        "idle": idle is not None and idle.idle,
+        "interval_minutes": interval_minutes,
+        "next_reminder_at": next_at,
+    }
+
+
+def _hostname(host: str) -> str:
+    return host.rsplit(":", 1)[0] if host.count(":") == 1 else host
+
+
+def _encode(data: dict) -> bytes:
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+def _response(
+    status: int,
+    body: bytes,
+    extra: dict | None = None,
+    close: bool = False,
+    head: bool = False,
+) -> bytes:
+    lines = [
+        f"HTTP/1.1 {status} {_REASONS[status]}",
+        "Content-Type: application/json",
+        f"Content-Length: {len(body)}",
+        "Cache-Control: no-cache",
+        f"Connection: {'close' if close else 'keep-alive'}",
+    ]
+    lines += [f"{name}: {value}" for name, value in (extra or {}).items()]
+    out = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+    return out if head or status == 304 else out + body
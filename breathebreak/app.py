@@ -1,46 +1,72 @@
 """BreatheBreak — macOS menu bar application.
 
-Ties together config, stats, and notifications into a rumps menu bar app.
+Puts a rumps menu bar on the reminder Controller (see controller.py).
 The menu provides a single toggle for reminders, an interval setter, and
 a stats viewer. Break notifications rotate through practical tips to keep
 them useful rather than repetitive.
+
+All timing lives in a Scheduler (see scheduler.py); RumpsDriver is the
+only piece that touches rumps.Timer, re-arming one timer for whichever
+deadline is next.
 """
 
 import logging
 
 import rumps
 
+from breathebreak import idle
 from breathebreak.config import Config
-from breathebreak.notifier import notify
+from breathebreak.controller import Controller
+from breathebreak.notifier import RumpsBackend, notify, use_backend
+from breathebreak.scheduler import Scheduler
 from breathebreak.stats import StatsStore
 
 log = logging.getLogger(__name__)
 
-BREAK_TIPS = [
-    "Look at something 20 feet away for 20 seconds.",
-    "Stand up and stretch your arms overhead.",
-    "Roll your shoulders — forward, then backward.",
-    "Close your eyes and take 5 deep breaths.",
-    "Walk to the window. Natural light resets your focus.",
-    "Grab a glass of water. Hydration matters.",
-    "Do a quick posture check — shoulders back, feet flat.",
-    "Stretch your wrists and fingers. They do a lot of work.",
-    "Focus on something green. It reduces eye strain.",
-    "Take a short walk. Even 2 minutes helps.",
-]
+# Shortest delay handed to rumps.Timer; NSTimer rejects zero intervals.
+MIN_TIMER_DELAY = 0.01
+
+
+class RumpsDriver:
+    """Runs a Scheduler from a single rumps.Timer on the Cocoa run loop."""
+
+    def __init__(self, scheduler: Scheduler):
+        self.scheduler = scheduler
+        self._timer = rumps.Timer(self._fire, 1)
+        scheduler.on_change = self.rearm
+
+    def rearm(self) -> None:
+        """Point the timer at the scheduler's earliest deadline."""
+        self._timer.stop()
+        delay = self.scheduler.next_delay()
+        if delay is None:
+            return
+        self._timer.interval = max(delay, MIN_TIMER_DELAY)
+        self._timer.start()
+
+    def stop(self) -> None:
+        self.scheduler.on_change = None
+        self._timer.stop()
+
+    def _fire(self, _):
+        self.scheduler.run_due()
+        self.rearm()
 
 
 class BreatheBreakApp(rumps.App):
     """Menu bar break reminder with session tracking."""
 
-    def __init__(self, config: Config | None = None):
-        self.cfg = config or Config.load()
+    def __init__(
+        self,
+        config: Config | None = None,
+        stats: StatsStore | None = None,
+        scheduler: Scheduler | None = None,
+        idle_provider: idle.IdleProvider | None = None,
+    ):
         super().__init__("BreatheBreak", quit_button=None)
-
-        self.stats = StatsStore.load() if self.cfg.track_stats else StatsStore()
-        self._timer = rumps.Timer(self._on_tick, self.cfg.interval_minutes * 60)
-        self._active = False
-        self._tip_index = 0
+        self.controller = Controller(config, stats, scheduler, idle_provider)
+        self._driver = RumpsDriver(self.controller.scheduler)
+        self.controller.start()
 
         self.menu = [
             "Reminders",
@@ -51,29 +77,31 @@ class BreatheBreakApp(rumps.App):
             "Quit",
         ]
 
+    @property
+    def cfg(self) -> Config:
+        return self.controller.cfg
+
+    @property
+    def stats(self) -> StatsStore:
+        return self.controller.stats
+
     # -- menu callbacks --
 
     @rumps.clicked("Reminders")
     def toggle_reminders(self, sender):
-        if self._active:
-            self._timer.stop()
-            self._active = False
+        if self.controller.active:
+            self.controller.stop_reminders()
             sender.state = False
-            self.stats.end_focus_session()
-            log.info("Reminders paused")
         else:
-            self._timer.start()
-            self._active = True
+            self.controller.start_reminders()
             sender.state = True
-            self.stats.record_session_start()
-            self.stats.start_focus_session()
             notify(
-                "BreatheBreak",
+                self.cfg.notification_title,
                 "Reminders active",
                 f"Break every {self.cfg.interval_minutes} min.",
                 sound=self.cfg.sound_enabled,
+                kind="reminders-active",
             )
-            log.info("Reminders started — interval %d min", self.cfg.interval_minutes)
 
     @rumps.clicked("Set Interval")
     def set_interval(self, _):
@@ -90,31 +118,23 @@ class BreatheBreakApp(rumps.App):
         try:
             minutes = int(resp.text.strip())
         except ValueError:
-            notify("BreatheBreak", "", "Please enter a valid number.", sound=False)
+            notify(self.cfg.notification_title, "", "Please enter a valid number.", sound=False)
             return
 
         if not 1 <= minutes <= 480:
-            notify("BreatheBreak", "", "Choose between 1 and 480 minutes.", sound=False)
+            notify(
+                self.cfg.notification_title, "", "Choose between 1 and 480 minutes.", sound=False
+            )
             return
 
-        was_active = self._active
-        if self._active:
-            self._timer.stop()
-
-        self.cfg.interval_minutes = minutes
-        self._timer.interval = minutes * 60
-        self.cfg.save()
-
-        if was_active:
-            self._timer.start()
-
+        self.controller.set_interval(minutes)
         notify(
-            "BreatheBreak",
+            self.cfg.notification_title,
             "Interval updated",
             f"Reminders set to every {minutes} min.",
             sound=self.cfg.sound_enabled,
+            kind="interval",
         )
-        log.info("Interval changed to %d min", minutes)
 
     @rumps.clicked("Stats")
     def show_stats(self, _):
@@ -122,23 +142,13 @@ class BreatheBreakApp(rumps.App):
 
     @rumps.clicked("Quit")
     def quit_app(self, _):
-        if self._active:
-            self._timer.stop()
-            self.stats.end_focus_session()
+        self.shutdown()
         rumps.quit_application()
 
-    # -- timer --
-
-    def _on_tick(self, _):
-        tip = BREAK_TIPS[self._tip_index % len(BREAK_TIPS)]
-        self._tip_index += 1
-        self.stats.record_reminder()
-        notify(
-            "BreatheBreak",
-            "Time for a break",
-            tip,
-            sound=self.cfg.sound_enabled,
-        )
+    def shutdown(self) -> None:
+        """Stop all timers and flush buffered stats. Safe to call twice."""
+        self._driver.stop()
+        self.controller.shutdown()
 
 
 def main():
@@ -148,4 +158,9 @@ def main():
         format="%(asctime)s [%(name)s] %(levelname)s: %(message)s",
     )
     app = BreatheBreakApp()
-    app.run()
+    # app.run() starts the Cocoa run loop; show notifications from it.
+    use_backend(RumpsBackend(main_thread=True))
+    try:
+        app.run()
+    finally:
+        app.shutdown()
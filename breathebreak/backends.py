@@ -0,0 +1,703 @@
+"""Storage backends behind StatsStore.
+
+A backend owns the on-disk layout of the day table. There are two kinds:
+
+Snapshot backends (JsonBackend, PagedBackend) keep the whole table in one
+file that every write replaces. StatsStore pairs them with the optional
+journal and with the lock-and-merge logic for concurrent writers.
+
+SqliteBackend is incremental. Each write applies the pending counter
+deltas as upserts inside one transaction, so nothing is rewritten, and
+SQLite's own locking (WAL mode) keeps concurrent processes consistent.
+Days are keyed by ISO date in a WITHOUT ROWID table, so the primary key
+is a clustered date index and range totals run as SQL over it. Older
+days are paged into memory on demand through the same reader protocol as
+stats.dat (base/rows/last/count/read/read_raw).
+
+EncryptedBackend is incremental too. stats.enc/ holds one sealed chunk
+per calendar month (see sealed.py) and a sealed index of which days each
+month has. A write re-seals only the months its events fall in, and the
+index only when a day appears for the first time. Reads decrypt only the
+months they cover, and decrypted months are cached until their file
+changes. Processes take turns through a FileLock inside stats.enc.
+
+sqlite3 and cryptography are imported on first use so the json and paged
+paths never pay for them.
+"""
+
+import json
+import logging
+import os
+import threading
+from array import array
+from collections import defaultdict
+from datetime import date
+from pathlib import Path
+
+from breathebreak import sealed
+from breathebreak.daytable import COUNTERS, DayTable, le_bytes
+from breathebreak.filelock import FileLock
+from breathebreak.pagefile import PageFileError, PageReader, write_pages
+
+log = logging.getLogger(__name__)
+
+# Snapshot key holding the last journal sequence number folded into it.
+SEQ_KEY = "_seq"
+# What reading a malformed stats.json can raise; such a file loads as empty.
+CORRUPT_ERRORS = (json.JSONDecodeError, OSError, TypeError, KeyError, ValueError, AttributeError)
+# Seconds a SQLite writer waits for another process's transaction.
+SQLITE_BUSY_TIMEOUT = 5.0
+
+
+class JsonBackend:
+    """Readable stats.json, rewritten in full on each write."""
+
+    name = "json"
+    incremental = False
+
+    def __init__(self, stats_file: Path):
+        self.path = stats_file
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def load(self, window_start: int) -> tuple[DayTable, int]:
+        """Return (table, snapshot seq); empty on a corrupt file."""
+        try:
+            with open(self.path) as f:
+                raw = json.load(f)
+            seq = int(raw.pop(SEQ_KEY, 0))
+            return DayTable.from_rows(raw), seq
+        except CORRUPT_ERRORS:
+            return DayTable(), 0
+
+    def freeze(self, table: DayTable):
+        """Copy what write() needs while the caller holds the table lock."""
+        return table.to_dict()
+
+    def write(self, frozen, seq: int, keep_seq: bool) -> int:
+        """Atomically replace the snapshot. Returns bytes written."""
+        if keep_seq:
+            frozen[SEQ_KEY] = seq
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(frozen, f, indent=2)
+            written = f.tell()
+        os.chmod(tmp, 0o600)
+        tmp.replace(self.path)
+        return written
+
+
+class PagedBackend:
+    """Column-major stats.dat, memory-mapped and paged in lazily."""
+
+    name = "paged"
+    incremental = False
+
+    def __init__(self, stats_file: Path):
+        self.path = stats_file.with_suffix(".dat")
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def load(self, window_start: int) -> tuple[DayTable, int]:
+        try:
+            reader = PageReader(self.path)
+        except (PageFileError, OSError):
+            log.warning("Unreadable %s, starting empty", self.path, exc_info=True)
+            return DayTable(), 0
+        return DayTable.from_pages(reader, window_start), reader.seq
+
+    def freeze(self, table: DayTable):
+        return table.export()
+
+    def write(self, frozen, seq: int, keep_seq: bool) -> int:
+        first, present, columns = frozen
+        return write_pages(self.path, first, present, columns, seq)
+
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS days (
+    day TEXT NOT NULL PRIMARY KEY,
+    {", ".join(f"{name} INTEGER NOT NULL DEFAULT 0" for name in COUNTERS)}
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+_COLUMNS = ", ".join(COUNTERS)
+_UPSERT = (
+    f"INSERT INTO days (day, {_COLUMNS}) VALUES (?{', ?' * len(COUNTERS)}) "
+    "ON CONFLICT(day) DO UPDATE SET "
+    + ", ".join(f"{name} = {name} + excluded.{name}" for name in COUNTERS)
+)
+_SUMS = ", ".join(f"COALESCE(SUM({name}), 0)" for name in COUNTERS)
+
+
+class SqliteBackend:
+    """stats.db: one row per day, written as batched delta upserts."""
+
+    name = "sqlite"
+    incremental = True
+
+    def __init__(self, stats_file: Path):
+        self.path = stats_file.with_suffix(".db")
+        self._conn = None
+        # One connection is shared by the UI and write-behind threads.
+        self._lock = threading.Lock()
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    # -- writes --
+
+    def apply(self, records: list[dict]) -> int:
+        """Add every record's deltas in a single transaction. Returns days touched."""
+        per_day: dict[str, list[int]] = defaultdict(lambda: [0] * len(COUNTERS))
+        for record in records:
+            row = per_day[record["date"]]
+            for i, name in enumerate(COUNTERS):
+                row[i] += record.get(name, 0)
+        with self._transaction() as conn:
+            conn.executemany(_UPSERT, [(day, *row) for day, row in per_day.items()])
+        return len(per_day)
+
+    def imported(self) -> bool:
+        """True once legacy history has been migrated (or found absent)."""
+        with self._lock:
+            row = self._connect().execute("SELECT 1 FROM meta WHERE key = 'imported'").fetchone()
+        return row is not None
+
+    def import_table(self, table: DayTable, source: str) -> int:
+        """One-time bulk load of legacy history. Returns days imported."""
+        rows = [
+            (key, *(counts[name] for name in COUNTERS)) for key, counts in table.to_dict().items()
+        ]
+        with self._transaction() as conn:
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'imported'").fetchone():
+                return 0
+            conn.executemany(_UPSERT, rows)
+            conn.execute("INSERT INTO meta VALUES ('imported', ?)", (source,))
+        return len(rows)
+
+    def rollup(self, periods: list[tuple[int, int]]) -> None:
+        """Fold each (first, last) ordinal range into one row on first, in one transaction."""
+        with self._transaction() as conn:
+            for first, last in periods:
+                bounds = (_iso(first), _iso(last))
+                n, *sums = conn.execute(
+                    f"SELECT COUNT(*), {_SUMS} FROM days WHERE day BETWEEN ? AND ?", bounds
+                ).fetchone()
+                if not n:
+                    continue
+                conn.execute("DELETE FROM days WHERE day BETWEEN ? AND ?", bounds)
+                conn.execute(_UPSERT, (bounds[0], *sums))
+
+    # -- reads --
+
+    def load(self, window_start: int) -> tuple[DayTable, int]:
+        """Recent days in memory; older ones paged in from SQL on demand."""
+        return DayTable.from_pages(_SqlitePager(self), window_start), 0
+
+    def totals(self, first: int, last: int) -> dict:
+        """Per-counter sums over ordinals first..last, computed in SQL."""
+        with self._lock:
+            row = (
+                self._connect()
+                .execute(
+                    f"SELECT {_SUMS} FROM days WHERE day BETWEEN ? AND ?",
+                    (_iso(first), _iso(last)),
+                )
+                .fetchone()
+            )
+        return dict(zip(COUNTERS, row, strict=True))
+
+    def recent(self, n: int) -> tuple[int, int]:
+        """Return (first_ordinal, count) spanning the n most recent days with data."""
+        if n <= 0:
+            return 0, 0
+        with self._lock:
+            days = (
+                self._connect()
+                .execute("SELECT day FROM days ORDER BY day DESC LIMIT ?", (n,))
+                .fetchall()
+            )
+        if not days:
+            return 0, 0
+        return date.fromisoformat(days[-1][0]).toordinal(), len(days)
+
+    def last_ordinal(self) -> int | None:
+        with self._lock:
+            (day,) = self._connect().execute("SELECT MAX(day) FROM days").fetchone()
+        return date.fromisoformat(day).toordinal() if day else None
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # -- internals --
+
+    def _connect(self):
+        if self._conn is None:
+            import sqlite3
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fresh = not self.path.exists()
+            conn = sqlite3.connect(
+                self.path,
+                timeout=SQLITE_BUSY_TIMEOUT,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            if fresh:
+                # The -wal and -shm files inherit the database's mode.
+                os.chmod(self.path, 0o600)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # WAL + NORMAL: durable across app crashes, one fsync per checkpoint.
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _transaction(self):
+        return _Transaction(self)
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT under the backend's connection lock."""
+
+    def __init__(self, backend: SqliteBackend):
+        self._backend = backend
+
+    def __enter__(self):
+        self._backend._lock.acquire()
+        try:
+            conn = self._backend._connect()
+            conn.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            self._backend._lock.release()
+            raise
+        self._conn = conn
+        return conn
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            self._conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self._backend._lock.release()
+
+
+class _SqlitePager:
+    """Serves DayTable page-ins from SQL, like PageReader does from stats.dat."""
+
+    def __init__(self, backend: SqliteBackend):
+        self._backend = backend
+        with backend._lock:
+            lo, hi, count = (
+                backend._connect()
+                .execute("SELECT MIN(day), MAX(day), COUNT(*) FROM days")
+                .fetchone()
+            )
+        self.count = count
+        if count:
+            self.base = date.fromisoformat(lo).toordinal()
+            self.rows = date.fromisoformat(hi).toordinal() - self.base + 1
+        else:
+            self.base = self.rows = 0
+
+    @property
+    def last(self) -> int:
+        return self.base + self.rows - 1
+
+    def read(self, first: int, last: int) -> tuple[bytearray, dict]:
+        n = last - first + 1
+        present = bytearray(n)
+        cols = {name: array("q", bytes(8 * n)) for name in COUNTERS}
+        with self._backend._lock:
+            rows = (
+                self._backend._connect()
+                .execute(
+                    f"SELECT day, {_COLUMNS} FROM days WHERE day BETWEEN ? AND ?",
+                    (_iso(first), _iso(last)),
+                )
+                .fetchall()
+            )
+        targets = [cols[name] for name in COUNTERS]
+        for day, *values in rows:
+            row = date.fromisoformat(day).toordinal() - first
+            present[row] = 1
+            for col, value in zip(targets, values, strict=True):
+                col[row] = value
+        return present, cols
+
+    def read_raw(self, first: int, last: int) -> tuple[bytes, dict]:
+        present, cols = self.read(first, last)
+        return bytes(present), {name: le_bytes(col) for name, col in cols.items()}
+
+
+_INDEX = "index"
+_CHUNK_SUFFIX = ".chunk"
+
+
+class EncryptedBackend:
+    """stats.enc/: one sealed chunk per month, re-sealed only when touched."""
+
+    name = "encrypted"
+    incremental = True
+
+    def __init__(self, stats_file: Path, keyfile: str = ""):
+        self.path = stats_file.with_suffix(".enc")
+        self.keyfile = Path(keyfile).expanduser() if keyfile else stats_file.with_name("stats.key")
+        # Inside stats.enc, so it never nests with StatsStore's stats.lock.
+        self._lock = FileLock(self.path / "lock")
+        self._sealer: sealed.Sealer | None = None
+        # Month's first ordinal -> (file signature, present, columns).
+        self._months: dict[int, tuple] = {}
+        # Month's first ordinal -> (days present, first day, last day).
+        self._index: dict[int, tuple[int, int, int]] = {}
+        self._index_sig = None
+
+    def exists(self) -> bool:
+        return (self.path / _INDEX).exists()
+
+    # -- writes --
+
+    def apply(self, records: list[dict]) -> int:
+        """Add every record's deltas, re-sealing only the months they touch."""
+        per_day: dict[int, list[int]] = defaultdict(lambda: [0] * len(COUNTERS))
+        for record in records:
+            row = per_day[date.fromisoformat(record["date"]).toordinal()]
+            for i, name in enumerate(COUNTERS):
+                row[i] += record.get(name, 0)
+        with self._lock:
+            index = self._read_index()
+            touched = {}
+            for ordinal in sorted(per_day):
+                first = _month_start(ordinal)
+                if first not in touched:
+                    touched[first] = self._writable_month(first)
+                present, cols = touched[first]
+                present[ordinal - first] = 1
+                for name, delta in zip(COUNTERS, per_day[ordinal], strict=True):
+                    cols[name][ordinal - first] += delta
+            self._commit(touched, index)
+        return len(per_day)
+
+    def imported(self) -> bool:
+        """True once legacy history has been migrated (or found absent)."""
+        with self._lock:
+            return self.exists()
+
+    def import_table(self, table: DayTable, source: str) -> int:
+        """One-time bulk load of legacy history. Returns days imported."""
+        with self._lock:
+            if self.exists():
+                return 0
+            if any(self.path.glob("*" + _CHUNK_SUFFIX)):
+                # Only the index was lost; rebuild it rather than import over the chunks.
+                self._rebuild_index()
+                return 0
+            rows = [{"date": key, **counts} for key, counts in table.to_dict().items()]
+            imported = self.apply(rows) if rows else 0
+            if not self.exists():
+                self._commit({}, {}, force_index=True)
+        if imported:
+            log.info(
+                "Plaintext %s stats were left next to %s as a backup; delete them when done",
+                source,
+                self.path.name,
+            )
+        return imported
+
+    def rollup(self, periods: list[tuple[int, int]]) -> None:
+        """Fold each (first, last) ordinal range into one row on first."""
+        with self._lock:
+            index = self._read_index()
+            touched = {}
+            for first, last in periods:
+                sums = [0] * len(COUNTERS)
+                found = False
+                for month in self._months_between(first, last):
+                    if month not in touched:
+                        touched[month] = self._writable_month(month)
+                    present, cols = touched[month]
+                    lo, hi = (
+                        max(first, month) - month,
+                        min(last, month + len(present) - 1) - month + 1,
+                    )
+                    found = found or any(present[lo:hi])
+                    present[lo:hi] = bytes(hi - lo)
+                    for i, name in enumerate(COUNTERS):
+                        sums[i] += sum(cols[name][lo:hi])
+                        cols[name][lo:hi] = array("q", bytes(8 * (hi - lo)))
+                if found:
+                    month = _month_start(first)
+                    if month not in touched:
+                        touched[month] = self._writable_month(month)
+                    present, cols = touched[month]
+                    present[first - month] = 1
+                    for name, total in zip(COUNTERS, sums, strict=True):
+                        cols[name][first - month] = total
+            self._commit(touched, index)
+
+    # -- reads --
+
+    def load(self, window_start: int) -> tuple[DayTable, int]:
+        """Recent months decrypted into memory; older ones paged in on demand."""
+        return DayTable.from_pages(_ChunkPager(self), window_start), 0
+
+    def totals(self, first: int, last: int) -> dict:
+        """Per-counter sums over ordinals first..last, decrypting only those months."""
+        sums = [0] * len(COUNTERS)
+        with self._lock:
+            self._read_index()
+            for month in self._months_between(first, last):
+                present, cols = self._readable_month(month)
+                lo, hi = max(first, month) - month, min(last, month + len(present) - 1) - month + 1
+                for i, name in enumerate(COUNTERS):
+                    sums[i] += sum(cols[name][lo:hi])
+        return dict(zip(COUNTERS, sums, strict=True))
+
+    def recent(self, n: int) -> tuple[int, int]:
+        """Return (first_ordinal, count) spanning the n most recent days with data."""
+        if n <= 0:
+            return 0, 0
+        with self._lock:
+            index = self._read_index()
+            need = n
+            for month in sorted(index, reverse=True):
+                if index[month][0] < need:
+                    need -= index[month][0]
+                    continue
+                present, _ = self._readable_month(month)
+                days = [row for row, flag in enumerate(present) if flag]
+                if len(days) >= need:
+                    return month + days[-need], n
+                need -= len(days)
+            if not index:
+                return 0, 0
+            return index[min(index)][1], n - need
+
+    def last_ordinal(self) -> int | None:
+        with self._lock:
+            index = self._read_index()
+        return index[max(index)][2] if index else None
+
+    def close(self) -> None:
+        self._lock.close()
+        self._months.clear()
+
+    # -- internals --
+
+    def _get_sealer(self) -> sealed.Sealer:
+        if self._sealer is None:
+            # A key is only generated for a store that has nothing sealed yet.
+            fresh = not self.exists() and not any(self.path.glob("*" + _CHUNK_SUFFIX))
+            self._sealer = sealed.Sealer(self.keyfile, create=fresh)
+        return self._sealer
+
+    def _chunk_path(self, month: int) -> Path:
+        return self.path / f"{date.fromordinal(month):%Y-%m}{_CHUNK_SUFFIX}"
+
+    def _months_between(self, first: int, last: int) -> list[int]:
+        """Months in the index overlapping ordinals first..last."""
+        lo = _month_start(first)
+        return [month for month in sorted(self._index) if lo <= month <= last]
+
+    def _read_index(self) -> dict:
+        """The index, re-read only when its file has changed. Needs the lock."""
+        path = self.path / _INDEX
+        sig = _stat_signature(path)
+        if sig is None:
+            self._index, self._index_sig = {}, None
+        elif sig != self._index_sig:
+            rows, plaintext = self._get_sealer().open(path.read_bytes(), 0)
+            flat = array("q")
+            flat.frombytes(plaintext)
+            if len(flat) != 4 * rows:
+                raise sealed.SealError(f"{path} has the wrong size")
+            self._index = {
+                flat[i]: (flat[i + 1], flat[i + 2], flat[i + 3]) for i in range(0, len(flat), 4)
+            }
+            self._index_sig = sig
+        return self._index
+
+    def _month(self, month: int) -> tuple[bytearray, dict] | None:
+        """A decrypted month, cached until its file changes; None if absent."""
+        path = self._chunk_path(month)
+        sig = _stat_signature(path)
+        if sig is None:
+            return None
+        cached = self._months.get(month)
+        if cached is not None and cached[0] == sig:
+            return cached[1], cached[2]
+        rows, plaintext = self._get_sealer().open(path.read_bytes(), month)
+        if rows != _month_days(month):
+            raise sealed.SealError(f"{path} has the wrong number of days")
+        present, cols = sealed.decode_rows(rows, plaintext)
+        self._months[month] = (sig, present, cols)
+        return present, cols
+
+    def _readable_month(self, month: int) -> tuple[bytearray, dict]:
+        """The month for reading; a chunk that fails to open reads as empty."""
+        try:
+            found = self._month(month)
+        except sealed.SealError:
+            log.warning(
+                "Skipping unreadable stats chunk %s", self._chunk_path(month), exc_info=True
+            )
+            found = None
+        return found or _empty_month(month)
+
+    def _writable_month(self, month: int) -> tuple[bytearray, dict]:
+        """A private copy of the month to modify and commit.
+
+        A chunk that fails to open is moved aside rather than overwritten,
+        so its bytes survive for recovery.
+        """
+        try:
+            found = self._month(month)
+        except sealed.SealError:
+            path = self._chunk_path(month)
+            bad = path.with_name(path.name + ".bad")
+            log.warning("Unreadable stats chunk %s moved to %s", path, bad.name, exc_info=True)
+            path.replace(bad)
+            found = None
+        if found is None:
+            return _empty_month(month)
+        present, cols = found
+        return bytearray(present), {name: array("q", col) for name, col in cols.items()}
+
+    def _commit(self, months: dict, index: dict, force_index: bool = False) -> None:
+        """Seal months and, if it changed, the index. Needs the lock.
+
+        Every file is staged before any is renamed into place, so a failed
+        write changes nothing and the caller can retry the same events. The
+        index goes last; were the process to die just before it, the next
+        write to the same month puts the month's entry right.
+        """
+        sealer = self._get_sealer()
+        new_index = dict(index)
+        staged = []
+        # Months a rollup emptied, by moving their days into an earlier month.
+        emptied = [month for month, (present, _) in months.items() if not any(present)]
+        try:
+            for month, (present, cols) in months.items():
+                path = self._chunk_path(month)
+                if month in emptied:
+                    new_index.pop(month, None)
+                    continue
+                blob = sealer.seal(month, len(present), sealed.encode_rows(present, cols))
+                staged.append((sealed.stage(path, blob), path))
+                new_index[month] = (
+                    present.count(1),
+                    month + present.index(1),
+                    month + present.rindex(1),
+                )
+            if force_index or new_index != index:
+                flat = array("q")
+                for month in sorted(new_index):
+                    flat.extend((month, *new_index[month]))
+                blob = sealer.seal(0, len(new_index), le_bytes(flat))
+                staged.append((sealed.stage(self.path / _INDEX, blob), self.path / _INDEX))
+        except BaseException:
+            for tmp, _ in staged:
+                tmp.unlink(missing_ok=True)
+            raise
+        for tmp, path in staged:
+            tmp.replace(path)
+        for month in emptied:
+            self._chunk_path(month).unlink(missing_ok=True)
+            self._months.pop(month, None)
+        for month, (present, cols) in months.items():
+            if month not in emptied:
+                self._months[month] = (_stat_signature(self._chunk_path(month)), present, cols)
+        self._index = new_index
+        self._index_sig = _stat_signature(self.path / _INDEX)
+
+    def _rebuild_index(self) -> None:
+        """Recreate a lost index from the chunks. Needs the lock."""
+        months = {}
+        for path in sorted(self.path.glob("*" + _CHUNK_SUFFIX)):
+            month = date.fromisoformat(path.stem + "-01").toordinal()
+            found = self._month(month)
+            if found is not None and any(found[0]):
+                months[month] = found
+        log.warning("Rebuilt the stats index from %d chunks in %s", len(months), self.path)
+        self._commit(months, {}, force_index=True)
+
+
+class _ChunkPager:
+    """Serves DayTable page-ins by decrypting just the months asked for."""
+
+    def __init__(self, backend: EncryptedBackend):
+        self._backend = backend
+        with backend._lock:
+            index = backend._read_index()
+        self.count = sum(entry[0] for entry in index.values())
+        if index:
+            self.base = min(entry[1] for entry in index.values())
+            self.rows = max(entry[2] for entry in index.values()) - self.base + 1
+        else:
+            self.base = self.rows = 0
+
+    @property
+    def last(self) -> int:
+        return self.base + self.rows - 1
+
+    def read(self, first: int, last: int) -> tuple[bytearray, dict]:
+        n = last - first + 1
+        present = bytearray(n)
+        cols = {name: array("q", bytes(8 * n)) for name in COUNTERS}
+        backend = self._backend
+        with backend._lock:
+            backend._read_index()
+            for month in backend._months_between(first, last):
+                month_present, month_cols = backend._readable_month(month)
+                lo = max(first, month)
+                hi = min(last, month + len(month_present) - 1) + 1
+                present[lo - first : hi - first] = month_present[lo - month : hi - month]
+                for name in COUNTERS:
+                    cols[name][lo - first : hi - first] = month_cols[name][lo - month : hi - month]
+        return present, cols
+
+    def read_raw(self, first: int, last: int) -> tuple[bytes, dict]:
+        present, cols = self.read(first, last)
+        return bytes(present), {name: le_bytes(col) for name, col in cols.items()}
+
+
+BACKENDS = {cls.name: cls for cls in (JsonBackend, PagedBackend, SqliteBackend, EncryptedBackend)}
+
+
+def open_backend(storage: str, stats_file: Path, keyfile: str = ""):
+    """Backend for a config stats_storage value; unknown names fall back to json."""
+    if storage == EncryptedBackend.name:
+        return EncryptedBackend(stats_file, keyfile)
+    return BACKENDS.get(storage, JsonBackend)(stats_file)
+
+
+def _iso(ordinal: int) -> str:
+    return date.fromordinal(ordinal).isoformat()
+
+
+def _month_start(ordinal: int) -> int:
+    return date.fromordinal(ordinal).replace(day=1).toordinal()
+
+
+def _month_days(month: int) -> int:
+    day = date.fromordinal(month)
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1).toordinal() - month
+
+
+def _empty_month(month: int) -> tuple[bytearray, dict]:
+    days = _month_days(month)
+    return bytearray(days), {name: array("q", bytes(8 * days)) for name in COUNTERS}
+
+
+def _stat_signature(path: Path) -> tuple | None:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
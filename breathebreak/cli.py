@@ -0,0 +1,121 @@
+"""Command-line entry point.
+
+Parses arguments and imports only what the chosen mode needs: the menu
+bar app (and with it rumps/PyObjC) is imported only when it is actually
+launched.
+"""
+
+import argparse
+import os
+import signal
+import sys
+from collections.abc import Iterable
+from datetime import date
+
+
+def _exit_on_sigterm(signum, frame):
+    # Raise SystemExit so the runners' finally blocks flush buffered stats.
+    sys.exit(0)
+
+
+def _print_lines(lines: Iterable[str]) -> None:
+    """Print lines; a reader that stops early (`| head`) ends the command quietly."""
+    try:
+        for line in lines:
+            print(line)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # Python flushes stdout again on exit; send that to devnull so it
+        # doesn't fail a second time.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="breathebreak", description="Break reminders for developers."
+    )
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="run reminders without the menu bar (no rumps/PyObjC needed)",
+    )
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+    report = commands.add_parser("report", help="print analytics over the full stats history")
+    report.add_argument("--format", choices=("text", "json"), default="text")
+    aggregate = commands.add_parser(
+        "aggregate", help="merge a directory of stats.json exports into team-wide daily stats"
+    )
+    aggregate.add_argument("dir", help="directory searched recursively for *.json exports")
+    aggregate.add_argument("--workers", type=int, help="parser processes (default: CPU count)")
+    aggregate.add_argument(
+        "--since", type=date.fromisoformat, metavar="YYYY-MM-DD", help="ignore earlier days"
+    )
+    aggregate.add_argument(
+        "--progress", action="store_true", help="print running totals to stderr per batch"
+    )
+    export = commands.add_parser("export", help="stream the stats history as CSV or NDJSON")
+    export.add_argument("--format", choices=("csv", "ndjson"), default="csv")
+    export.add_argument(
+        "--since", type=date.fromisoformat, metavar="YYYY-MM-DD", help="first day to export"
+    )
+    export.add_argument(
+        "--until", type=date.fromisoformat, metavar="YYYY-MM-DD", help="last day to export"
+    )
+    export.add_argument(
+        "--cursor",
+        metavar="FILE",
+        help="resume from the date stored in FILE and advance it after a complete export",
+    )
+    simulate = commands.add_parser(
+        "simulate", help="run the menu bar app on a virtual clock with a scripted user"
+    )
+    simulate.add_argument("--days", type=int, default=30, help="simulated days (default: 30)")
+    simulate.add_argument("--seed", type=int, default=0, help="random seed for the user script")
+    simulate.add_argument(
+        "--storage", choices=("json", "paged", "sqlite", "encrypted"), default="json"
+    )
+    simulate.add_argument("--journal", action="store_true", help="persist via the stats journal")
+    simulate.add_argument("--format", choices=("text", "json"), default="text")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Launch BreatheBreak in the mode selected by argv."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    signal.signal(signal.SIGTERM, _exit_on_sigterm)
+
+    if args.command == "report":
+        from breathebreak.report import run as report
+
+        print(report(args.format))
+        return
+    if args.command == "aggregate":
+        if not os.path.isdir(args.dir):
+            parser.error(f"not a directory: {args.dir}")
+        from breathebreak.aggregate import run as aggregate
+
+        progress = (lambda line: print(line, file=sys.stderr)) if args.progress else None
+        _print_lines(aggregate(args.dir, args.workers, args.since, progress))
+        return
+    if args.command == "export":
+        from breathebreak.export import run as export
+
+        _print_lines(export(args.format, args.since, args.until, args.cursor))
+        return
+    if args.command == "simulate":
+        if args.days < 1:
+            parser.error("--days must be at least 1")
+        from breathebreak.simulate import run as simulate
+
+        out, ok = simulate(args.days, args.seed, args.storage, args.journal, args.format)
+        print(out)
+        if not ok:
+            sys.exit(1)
+        return
+    if args.headless:
+        from breathebreak.headless import main as run
+    else:
+        from breathebreak.app import main as run
+    run()
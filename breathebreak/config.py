@@ -4,13 +4,23 @@ Config lives at ~/.config/breathebreak/config.yaml and is created on first
 interval change. All values are bounds-checked before use. File permissions
 are restricted to owner-only (0600) to prevent other local users from
 tampering with app behavior.
+
+PyYAML is imported on first use rather than at module import, so the
+stats/notifier core and the headless runner start without it.
+
+Loads are cached per file on (inode, size, mtime) and, when that
+signature is too fresh to trust, on a hash of the contents, so repeated
+loads and no-op touches never re-parse. ConfigWatcher polls the same
+signature with exponential backoff so a running app picks up hand edits.
 """
 
+import hashlib
 import os
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, replace
 from pathlib import Path
 
-import yaml
+from breathebreak import events, metrics, quiet
 
 CONFIG_DIR = Path.home() / ".config" / "breathebreak"
 CONFIG_FILE = CONFIG_DIR / "config.yaml"
@@ -21,6 +31,29 @@ DEFAULT_INTERVAL = 20  # minutes — matches the 20-20-20 rule
 DEFAULT_BREAK_DURATION = 20  # seconds
 MIN_INTERVAL = 1
 MAX_INTERVAL = 480
+# Minutes without input before reminders pause (0 = never)
+DEFAULT_IDLE_MINUTES = 5
+# Most quiet-hour rules and calendar files read from the config
+MAX_QUIET_ENTRIES = 32
+# Write-behind bounds on stats data at risk if the process is killed;
+# 0 seconds (the default) writes every event through before returning
+DEFAULT_FLUSH_SECONDS = 0
+DEFAULT_MAX_PENDING = 50
+# Retention: daily rows kept before weekly rollups (0 = forever). When on,
+# at least MIN_KEEP_DAYS so month-to-date and the summary stay daily.
+MIN_KEEP_DAYS = 35
+DEFAULT_KEEP_WEEKS = 52
+# On-disk stats layouts; the first is the default
+STATS_STORAGE_FORMATS = ("json", "paged", "sqlite", "encrypted")
+# Config watcher polling bounds (seconds)
+WATCH_MIN_INTERVAL = 1.0
+WATCH_MAX_INTERVAL = 30.0
+# A file modified this recently may change again within the same mtime tick,
+# so its stat signature alone is not trusted.
+_RACY_NS = 2_000_000_000
+
+# path -> (stat signature, content hash, parsed Config, time read in ns)
+_cache: dict = {}
 
 
 @dataclass
@@ -30,49 +63,137 @@ class Config:
     interval_minutes: int = DEFAULT_INTERVAL
     break_duration_seconds: int = DEFAULT_BREAK_DURATION
     sound_enabled: bool = True
+    idle_threshold_minutes: int = DEFAULT_IDLE_MINUTES
+    quiet_hours: tuple[str, ...] = ()
+    calendar_files: tuple[str, ...] = ()
     track_stats: bool = True
     notification_title: str = "BreatheBreak"
+    stats_journal: bool = False
+    stats_storage: str = "json"
+    stats_keyfile: str = ""
+    stats_flush_seconds: int = DEFAULT_FLUSH_SECONDS
+    stats_max_pending: int = DEFAULT_MAX_PENDING
+    stats_timeline: bool = False
+    stats_keep_days: int = 0
+    stats_keep_weeks: int = DEFAULT_KEEP_WEEKS
+    metrics_export: str = "off"
+    api_port: int = 0
+    events_socket: bool = False
+    events_overflow: str = "drop"
 
     @classmethod
     def load(cls) -> "Config":
-        """Load config from YAML file, falling back to safe defaults."""
-        if not CONFIG_FILE.exists():
+        """Load config from YAML file, falling back to safe defaults.
+
+        Returns a fresh instance each time; unchanged files are served from
+        the cache without re-parsing.
+        """
+        path = CONFIG_FILE
+        try:
+            st = path.stat()
+        except OSError:
+            _cache.pop(path, None)
+            metrics.CONFIG_LOADS.inc("missing")
             return cls()
 
+        sig = _signature(st)
+        cached = _cache.get(path)
+        if cached and cached[0] == sig and st.st_mtime_ns + _RACY_NS < cached[3]:
+            metrics.CONFIG_LOADS.inc("cached")
+            return replace(cached[2])
+
+        read_ns = time.time_ns()
         try:
-            with open(CONFIG_FILE) as f:
-                raw = yaml.safe_load(f) or {}
-        except (yaml.YAMLError, OSError):
-            # Corrupt or unreadable config — don't crash, just use defaults.
+            content = path.read_bytes()
+        except OSError:
+            # Unreadable config — don't crash, just use defaults.
             return cls()
+        digest = hashlib.sha256(content).digest()
+        if cached and cached[1] == digest:
+            metrics.CONFIG_LOADS.inc("unchanged")
+            cfg = cached[2]
+        else:
+            start = time.perf_counter()
+            raw = _parse(content)
+            cfg = cls() if raw is None else cls._from_raw(raw)
+            metrics.CONFIG_PARSE_SECONDS.observe_since(start)
+            metrics.CONFIG_LOADS.inc("parsed" if raw is not None else "corrupt")
+        _cache[path] = (sig, digest, cfg, read_ns)
+        return replace(cfg)
 
+    @classmethod
+    def _from_raw(cls, raw: dict) -> "Config":
         return cls(
             interval_minutes=cls._clamp_interval(raw.get("interval_minutes", DEFAULT_INTERVAL)),
             break_duration_seconds=_clamp(
                 raw.get("break_duration_seconds", DEFAULT_BREAK_DURATION), 5, 300
             ),
             sound_enabled=bool(raw.get("sound_enabled", True)),
+            idle_threshold_minutes=_clamp(
+                raw.get("idle_threshold_minutes", DEFAULT_IDLE_MINUTES), 0, 120
+            ),
+            quiet_hours=_quiet_hours(raw.get("quiet_hours")),
+            calendar_files=_strings(raw.get("calendar_files")),
             track_stats=bool(raw.get("track_stats", True)),
             notification_title=str(raw.get("notification_title", "BreatheBreak"))[:64],
+            stats_journal=bool(raw.get("stats_journal", False)),
+            stats_storage=_choice(raw.get("stats_storage", "json"), STATS_STORAGE_FORMATS),
+            stats_keyfile=str(raw.get("stats_keyfile") or "").strip(),
+            stats_flush_seconds=_clamp(
+                raw.get("stats_flush_seconds", DEFAULT_FLUSH_SECONDS), 0, 300
+            ),
+            stats_max_pending=_clamp(raw.get("stats_max_pending", DEFAULT_MAX_PENDING), 1, 10000),
+            stats_timeline=bool(raw.get("stats_timeline", False)),
+            stats_keep_days=_keep_days(raw.get("stats_keep_days", 0)),
+            stats_keep_weeks=_clamp(raw.get("stats_keep_weeks", DEFAULT_KEEP_WEEKS), 0, 5200),
+            metrics_export=_choice(raw.get("metrics_export", "off"), metrics.EXPORT_FORMATS),
+            api_port=_port(raw.get("api_port", 0)),
+            events_socket=bool(raw.get("events_socket", False)),
+            events_overflow=_choice(raw.get("events_overflow", "drop"), events.OVERFLOW_POLICIES),
         )
 
     def save(self) -> None:
         """Write current config to disk with restricted permissions.
 
         Uses atomic write (tmp + rename) to avoid corruption if the process
-        is killed mid-write.
+        is killed mid-write. Skips the write entirely when the file already
+        holds exactly this config.
         """
-        CONFIG_DIR.mkdir(parents=True, exist_ok=True)
+        import yaml
+
         data = {
             "interval_minutes": self.interval_minutes,
             "break_duration_seconds": self.break_duration_seconds,
             "sound_enabled": self.sound_enabled,
+            "idle_threshold_minutes": self.idle_threshold_minutes,
+            "quiet_hours": list(self.quiet_hours),
+            "calendar_files": list(self.calendar_files),
             "track_stats": self.track_stats,
             "notification_title": self.notification_title,
+            "stats_journal": self.stats_journal,
+            "stats_storage": self.stats_storage,
+            "stats_keyfile": self.stats_keyfile,
+            "stats_flush_seconds": self.stats_flush_seconds,
+            "stats_max_pending": self.stats_max_pending,
+            "stats_timeline": self.stats_timeline,
+            "stats_keep_days": self.stats_keep_days,
+            "stats_keep_weeks": self.stats_keep_weeks,
+            "metrics_export": self.metrics_export,
+            "api_port": self.api_port,
+            "events_socket": self.events_socket,
+            "events_overflow": self.events_overflow,
         }
+        content = yaml.dump(data, default_flow_style=False).encode()
+        try:
+            if CONFIG_FILE.read_bytes() == content:
+                return
+        except OSError:
+            pass
+
+        CONFIG_DIR.mkdir(parents=True, exist_ok=True)
         tmp = CONFIG_FILE.with_suffix(".tmp")
-        with open(tmp, "w") as f:
-            yaml.dump(data, f, default_flow_style=False)
+        with open(tmp, "wb") as f:
+            f.write(content)
         os.chmod(tmp, 0o600)
         tmp.replace(CONFIG_FILE)
 
@@ -86,6 +207,101 @@ class Config:
         return max(MIN_INTERVAL, min(MAX_INTERVAL, minutes))
 
 
+class ConfigWatcher:
+    """Detects changes to the config file by polling its stat signature.
+
+    poll() is cheap (one stat call) and is meant to be driven by whatever
+    timer the caller already has. Each poll that sees no change doubles
+    `delay`, up to max_interval; a change resets it to min_interval.
+    """
+
+    def __init__(
+        self,
+        current: Config,
+        min_interval: float = WATCH_MIN_INTERVAL,
+        max_interval: float = WATCH_MAX_INTERVAL,
+    ):
+        self.current = replace(current)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.delay = min_interval
+        self._sig = self._stat()
+
+    def poll(self) -> Config | None:
+        """Return the new validated config if it changed since the last poll."""
+        sig = self._stat()
+        if sig == self._sig:
+            self.delay = min(self.delay * 2, self.max_interval)
+            return None
+        self._sig = sig
+        self.delay = self.min_interval
+        new = Config.load()
+        if new == self.current:
+            return None
+        self.current = replace(new)
+        return new
+
+    @staticmethod
+    def _stat():
+        try:
+            return _signature(CONFIG_FILE.stat())
+        except OSError:
+            return None
+
+
+def _signature(st: os.stat_result) -> tuple:
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def _parse(content: bytes) -> dict | None:
+    """Parse YAML with the libyaml C loader when available.
+
+    Returns None for corrupt files, {} for empty or non-mapping documents.
+    """
+    import yaml
+
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    try:
+        raw = yaml.load(content, Loader=loader)
+    except yaml.YAMLError:
+        # Corrupt config — don't crash, just use defaults.
+        return None
+    return raw if isinstance(raw, dict) else {}
+
+
+def _choice(value, allowed: tuple) -> str:
+    """Return value if it is one of allowed, else the first allowed value."""
+    value = str(value).strip().lower()
+    return value if value in allowed else allowed[0]
+
+
+def _strings(value) -> tuple[str, ...]:
+    """A list of non-empty strings (or a single string), capped in length."""
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list):
+        return ()
+    items = (str(item).strip() for item in value if isinstance(item, (str, int, float)))
+    return tuple(item for item in items if item)[:MAX_QUIET_ENTRIES]
+
+
+def _quiet_hours(value) -> tuple[str, ...]:
+    """The rules that parse, as written; see quiet.parse_rule."""
+    return tuple(rule for rule in _strings(value) if quiet.parse_rule(rule) is not None)
+
+
+def _keep_days(value) -> int:
+    """0 (keep daily rows forever) or a day count of at least MIN_KEEP_DAYS."""
+    days = _clamp(value, 0, 36500)
+    return max(days, MIN_KEEP_DAYS) if days else 0
+
+
+def _port(value) -> int:
+    """0 (API off) or an unprivileged TCP port."""
+    port = _clamp(value, 0, 65535)
+    return port if port >= 1024 else 0
+
+
 def _clamp(value, lo: int, hi: int) -> int:
     """Clamp a numeric value to [lo, hi], falling back to lo on bad input."""
     try:
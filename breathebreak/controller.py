@@ -0,0 +1,291 @@
+"""Reminder state machine shared by the menu bar app and the headless runner.
+
+Controller owns everything about reminders that does not depend on how
+the app is driven: the reminder job on the Scheduler, quiet-hour
+deferral, idle pauses, live config reloads, retention and metrics jobs,
+and the optional API and event socket. BreatheBreakApp (app.py) holds one
+and drives its scheduler from a rumps.Timer. HeadlessRunner
+(headless.py) is one and drives the scheduler's blocking loop.
+"""
+
+import logging
+from datetime import datetime
+
+from breathebreak import idle, metrics, quiet, retention
+from breathebreak.config import CONFIG_DIR, Config, ConfigWatcher
+from breathebreak.events import EventBus
+from breathebreak.notifier import notify
+from breathebreak.scheduler import Job, Scheduler
+from breathebreak.stats import StatsStore
+from breathebreak.tips import BREAK_TIPS
+
+log = logging.getLogger(__name__)
+
+
+class Controller:
+    """Schedules break reminders and keeps stats, events and services in step."""
+
+    def __init__(
+        self,
+        config: Config | None = None,
+        stats: StatsStore | None = None,
+        scheduler: Scheduler | None = None,
+        idle_provider: idle.IdleProvider | None = None,
+    ):
+        self.cfg = config or Config.load()
+        self.stats = stats if stats is not None else StatsStore.for_config(self.cfg)
+        self.scheduler = scheduler if scheduler is not None else Scheduler()
+        # Reminders, breaks and toggles, for in-process and socket subscribers.
+        self.events = EventBus()
+        self.stats.listeners.append(self.events.stats_listener)
+        self._reminder: Job | None = None
+        self._tip_index = 0
+        # Quiet hours and calendar meetings move reminders to their end.
+        self._quiet = quiet.QuietSchedule(self.cfg.quiet_hours, self.cfg.calendar_files)
+        # Hand edits to config.yaml are applied live; see apply_config().
+        self._watcher = ConfigWatcher(self.cfg)
+        self._idle_provider = idle_provider
+        self._idle: idle.IdleMonitor | None = None
+        self._api = None
+        self._event_socket = None
+
+    def start(self) -> None:
+        """Start config polling, retention, metrics, idle detection and services."""
+        self.scheduler.call_later(self._watcher.delay, self._poll_config, "config-watch")
+        self.scheduler.every(
+            retention.RETENTION_INTERVAL,
+            self._apply_retention,
+            "retention",
+            first=retention.RETENTION_DELAY,
+        )
+        if self.cfg.metrics_export != "off":
+            metrics.enable()
+            self.scheduler.every(metrics.EXPORT_INTERVAL, self._export_metrics, "metrics-export")
+        # Reminders and focus time pause while the user is away.
+        provider = self._idle_provider or idle.default_provider()
+        if provider is not None:
+            self._idle = idle.IdleMonitor(
+                self.scheduler,
+                provider,
+                self.cfg.idle_threshold_minutes * 60,
+                self._on_idle,
+                self._on_active,
+            )
+            self._idle.start()
+        # Optional loopback HTTP API for editor and dashboard tooling.
+        if self.cfg.api_port:
+            self._start_api()
+        if self.cfg.events_socket:
+            self._start_event_socket()
+        self._publish_state()
+
+    @property
+    def active(self) -> bool:
+        return self._reminder is not None
+
+    def start_reminders(self) -> None:
+        """Start a session: a reminder every interval, focus time counting."""
+        if self.active:
+            return
+        self._reminder = self.scheduler.every(
+            self.cfg.interval_minutes * 60, self._on_tick, "reminder"
+        )
+        self._defer_reminder()
+        self.stats.record_session_start()
+        self.stats.start_focus_session()
+        self._publish_state()
+        self.events.publish("reminders_on", interval_minutes=self.cfg.interval_minutes)
+        log.info("Reminders started — interval %d min", self.cfg.interval_minutes)
+
+    def stop_reminders(self) -> None:
+        """Cancel the reminder and end the focus session."""
+        if not self.active:
+            return
+        self.scheduler.cancel(self._reminder)
+        self._reminder = None
+        self.stats.end_focus_session()
+        self._publish_state()
+        self.events.publish("reminders_off")
+        log.info("Reminders paused")
+
+    def set_interval(self, minutes: int) -> None:
+        """Change the interval from the UI and save it to the config file."""
+        self.cfg.interval_minutes = minutes
+        if self.active:
+            self.scheduler.reschedule(self._reminder, interval=minutes * 60)
+            self._defer_reminder()
+        self.cfg.save()
+        self._publish_state()
+        self.events.publish("interval_changed", interval_minutes=minutes)
+        log.info("Interval changed to %d min", minutes)
+
+    def apply_config(self, new: Config) -> bool:
+        """Adopt a changed config without restarting. Returns True if the interval changed.
+
+        The reminder interval takes effect immediately (restarting the
+        countdown); stats storage options are read only at startup.
+        """
+        old, self.cfg = self.cfg, new
+        if self._idle is not None:
+            self._idle.set_threshold(new.idle_threshold_minutes * 60)
+        quiet_changed = (new.quiet_hours, new.calendar_files) != (
+            old.quiet_hours,
+            old.calendar_files,
+        )
+        if quiet_changed:
+            self._quiet.configure(new.quiet_hours, new.calendar_files)
+        changed = new.interval_minutes != old.interval_minutes
+        if changed:
+            if self.active and self._idle is not None and self._idle.idle:
+                # Paused; the new interval starts counting on return.
+                self._reminder.interval = new.interval_minutes * 60
+            elif self.active:
+                self.scheduler.reschedule(self._reminder, interval=new.interval_minutes * 60)
+                self._defer_reminder()
+            log.info("Config reloaded — interval %d min", new.interval_minutes)
+            self.events.publish("interval_changed", interval_minutes=new.interval_minutes)
+        elif quiet_changed:
+            self._defer_reminder()
+        self._publish_state()
+        if _startup_only(new) != _startup_only(old):
+            log.info("Stats storage, metrics, API and event socket changes apply on next launch")
+        return changed
+
+    def shutdown(self) -> None:
+        """End the focus session, stop services and flush stats. Safe to call twice."""
+        if self._api is not None:
+            self._api.stop()
+            self._api = None
+        if self.active:
+            self.scheduler.cancel(self._reminder)
+            self._reminder = None
+            self.stats.end_focus_session()
+        if self._event_socket is not None:
+            self._event_socket.stop()
+            self._event_socket = None
+        self.stats.close()
+        self._export_metrics()
+
+    def _after_reminder(self, tip: str) -> None:
+        """Called after each reminder is sent; runners may extend it."""
+
+    # -- scheduled jobs --
+
+    def _poll_config(self) -> None:
+        new = self._watcher.poll()
+        if new is not None:
+            self.apply_config(new)
+        # Back off while the file is quiet.
+        self.scheduler.call_later(self._watcher.delay, self._poll_config, "config-watch")
+
+    def _on_idle(self, since: float) -> None:
+        if self.active:
+            self.scheduler.cancel(self._reminder)
+            self.stats.end_focus_session(at=datetime.fromtimestamp(since))
+        self._publish_state()
+        self.events.publish("idle", since=since)
+
+    def _on_active(self, away: float) -> None:
+        # Time away counts as a break: the countdown restarts from zero.
+        if self.active:
+            self.scheduler.reschedule(self._reminder)
+            self._defer_reminder()
+            self.stats.start_focus_session()
+        self._publish_state()
+        self.events.publish("active", away=round(away))
+
+    def _on_tick(self) -> None:
+        # A calendar can gain a meeting after the reminder was scheduled.
+        if self._defer_reminder(self.scheduler.clock.time()):
+            return
+        if self._reminder is not None:
+            metrics.TICK_LATENESS.observe(self._reminder.lateness)
+        tip = BREAK_TIPS[self._tip_index % len(BREAK_TIPS)]
+        self._tip_index += 1
+        self.stats.record_reminder()
+        notify(
+            self.cfg.notification_title,
+            "Time for a break",
+            tip,
+            sound=self.cfg.sound_enabled,
+            kind="reminder",
+        )
+        self._publish_state()
+        self._after_reminder(tip)
+
+    def _defer_reminder(self, at: float | None = None) -> bool:
+        """Move the reminder to the end of a quiet stretch covering `at`.
+
+        at (epoch seconds) defaults to the reminder's next run. Returns
+        True if the reminder was moved.
+        """
+        job = self._reminder
+        if job is None or not job.active:
+            return False
+        until = self._quiet.until(self.scheduler.wall_time(job.due) if at is None else at)
+        if until is None:
+            return False
+        self.scheduler.reschedule_at_wall(job, until)
+        self._publish_state()
+        self.events.publish("quiet", until=until)
+        log.info("Quiet until %s", datetime.fromtimestamp(until).strftime("%H:%M"))
+        return True
+
+    def _apply_retention(self) -> None:
+        # Reads the live config, so retention edits apply without a restart.
+        policy = retention.RetentionPolicy.from_config(self.cfg)
+        self.stats.apply_retention(policy, background=True)
+
+    def _export_metrics(self) -> None:
+        if metrics.enabled():
+            metrics.export(CONFIG_DIR, self.cfg.metrics_export)
+
+    # -- services --
+
+    def _start_api(self) -> None:
+        from breathebreak.api import ApiServer
+
+        server = ApiServer(self.stats, self.cfg.api_port)
+        try:
+            server.start()
+        except OSError as e:
+            log.warning("Stats API not started on port %d: %s", self.cfg.api_port, e)
+            return
+        self._api = server
+
+    def _start_event_socket(self) -> None:
+        from breathebreak.eventsocket import EventSocketServer
+
+        server = EventSocketServer(
+            self.events, CONFIG_DIR / "events.sock", self.cfg.events_overflow
+        )
+        try:
+            server.start()
+        except OSError as e:
+            log.warning("Event socket not started: %s", e)
+            return
+        self._event_socket = server
+
+    def _publish_state(self) -> None:
+        if self._api is not None:
+            from breathebreak.api import reminder_state
+
+            self._api.publish_state(
+                reminder_state(
+                    self.scheduler, self._reminder, self._idle, self.cfg.interval_minutes
+                )
+            )
+
+
+def _startup_only(cfg: Config) -> tuple:
+    """Settings read once at launch."""
+    return (
+        cfg.stats_journal,
+        cfg.stats_storage,
+        cfg.stats_keyfile,
+        cfg.stats_timeline,
+        cfg.metrics_export != "off",
+        cfg.api_port,
+        cfg.events_socket,
+        cfg.events_overflow,
+    )
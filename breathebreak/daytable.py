@@ -0,0 +1,550 @@
+"""Columnar storage for per-day counters.
+
+A DayTable holds one packed int64 array per counter, indexed by the date's
+proleptic ordinal relative to the earliest stored day, plus a presence
+bitmap so days that were never touched stay distinguishable from days
+with all-zero counters. A decade of history is a few hundred kilobytes of
+flat arrays instead of thousands of Python objects.
+
+Each column also carries a lazily maintained prefix-sum array, so the
+total of any counter over any date range is two lookups. Writes only
+invalidate prefix entries from the touched row onward; since nearly every
+write lands on today, the last row, catching up is O(1) in practice.
+
+A table can also be backed by a page file (see pagefile.py) and hold only
+a recent window in memory. Anything that needs an older day pages it in
+first, a chunk at a time, so startup cost tracks the window rather than
+the length of the history.
+
+DailyStats is a lightweight view onto one row. Constructing one directly
+creates a detached single-row table, so existing code that builds
+DailyStats(date=..., reminders_sent=...) keeps working.
+"""
+
+import sys
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import Iterator, Mapping, MutableMapping
+from datetime import date
+from itertools import accumulate, count, pairwise
+
+COUNTERS = (
+    "reminders_sent",
+    "breaks_acknowledged",
+    "total_break_seconds",
+    "sessions_started",
+    "focus_seconds",
+)
+
+
+# Days pulled from a page file per page-in once the window is exhausted.
+PAGE_CHUNK_DAYS = 366
+
+# Shared by all tables, so a version never repeats even across tables.
+_versions = count(1)
+
+
+def _zeros(n: int) -> array:
+    return array("q", bytes(8 * n))
+
+
+def le_bytes(col: array) -> bytes:
+    """Serialize an int64 array as little-endian bytes."""
+    if sys.byteorder == "little":
+        return col.tobytes()
+    swapped = array("q", col)
+    swapped.byteswap()
+    return swapped.tobytes()
+
+
+class _Counter:
+    """Descriptor that reads and writes one column of the bound row."""
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        table = obj._table
+        return table._cols[self.name][obj._ordinal - table._base]
+
+    def __set__(self, obj, value):
+        table = obj._table
+        row = obj._ordinal - table._base
+        table._cols[self.name][row] = int(value)
+        table._touch(row)
+
+
+class DailyStats:
+    """Aggregated stats for a single calendar day."""
+
+    __slots__ = ("_table", "_ordinal")
+
+    reminders_sent = _Counter()
+    breaks_acknowledged = _Counter()
+    total_break_seconds = _Counter()
+    sessions_started = _Counter()
+    focus_seconds = _Counter()
+
+    def __init__(
+        self,
+        date: str,
+        reminders_sent: int = 0,
+        breaks_acknowledged: int = 0,
+        total_break_seconds: int = 0,
+        sessions_started: int = 0,
+        focus_seconds: int = 0,
+    ):
+        table = DayTable()
+        table.set_counts(
+            date,
+            {
+                "reminders_sent": reminders_sent,
+                "breaks_acknowledged": breaks_acknowledged,
+                "total_break_seconds": total_break_seconds,
+                "sessions_started": sessions_started,
+                "focus_seconds": focus_seconds,
+            },
+        )
+        self._table = table
+        self._ordinal = table._base
+
+    @classmethod
+    def _view(cls, table: "DayTable", ordinal: int) -> "DailyStats":
+        view = cls.__new__(cls)
+        view._table = table
+        view._ordinal = ordinal
+        return view
+
+    @property
+    def date(self) -> str:
+        return _iso(self._ordinal)
+
+    def to_dict(self) -> dict:
+        table = self._table
+        row = self._ordinal - table._base
+        out = {"date": self.date}
+        for name in COUNTERS:
+            out[name] = table._cols[name][row]
+        return out
+
+    def __eq__(self, other):
+        if not isinstance(other, DailyStats):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        fields = ", ".join(f"{k}={v!r}" for k, v in self.to_dict().items())
+        return f"DailyStats({fields})"
+
+
+class DayTable(MutableMapping):
+    """Mapping of ISO date string to DailyStats, stored as parallel arrays."""
+
+    def __init__(self, days: Mapping | None = None):
+        self._base = 0
+        self._present = bytearray()
+        self._cols = {name: array("q") for name in COUNTERS}
+        # Sorted ordinals of days with data, for "N most recent days" lookups.
+        self._ords = array("q")
+        # _prefix[name][i] == sum(_cols[name][:i]), valid for i <= _clean.
+        # Allocated on the first range query so plain loads stay lean.
+        self._prefix: dict | None = None
+        self._clean = 0
+        # Changes on every write; readers cache derived views against it.
+        self.version = next(_versions)
+        # Page file holding rows [_floor, _base) that are not in memory yet,
+        # and how many of those rows have data.
+        self._pager = None
+        self._floor = 0
+        self._paged_count = 0
+        if days:
+            for key, value in days.items():
+                self[key] = value
+
+    @classmethod
+    def from_rows(cls, rows: Mapping[str, Mapping]) -> "DayTable":
+        """Build a table from {iso_date: {counter: value}}, one column at a time."""
+        table = cls()
+        if not rows:
+            return table
+        keys = list(rows)
+        values = list(rows.values())
+        first = date.fromisoformat(keys[0]).toordinal()
+        last = date.fromisoformat(keys[-1]).toordinal()
+        # Stored histories are usually sorted and gap-free. ISO dates sort
+        # lexically, so that case needs no per-key parsing and each column is
+        # built by a single array() call.
+        if last - first + 1 == len(keys) and all(a < b for a, b in pairwise(keys)):
+            table._base = first
+            table._present = bytearray(b"\x01") * len(keys)
+            for name in COUNTERS:
+                table._cols[name] = array("q", [v.get(name, 0) for v in values])
+            table._ords = array("q", range(first, last + 1))
+            table._reset_prefix()
+            return table
+
+        ordinals = [date.fromisoformat(key).toordinal() for key in keys]
+        table._allocate(min(ordinals), max(ordinals))
+        rowids = [ordinal - table._base for ordinal in ordinals]
+        for name in COUNTERS:
+            col = table._cols[name]
+            for row, v in zip(rowids, values, strict=True):
+                col[row] = v.get(name, 0)
+        present = table._present
+        for row in rowids:
+            present[row] = 1
+        table._ords = array("q", sorted(set(ordinals)))
+        return table
+
+    @classmethod
+    def from_pages(cls, reader, window_start: int) -> "DayTable":
+        """Load rows from window_start onward; page older ones in on demand."""
+        table = cls()
+        if not reader.rows:
+            return table
+        first = max(reader.base, min(window_start, reader.last + 1))
+        if first <= reader.last:
+            present, cols = reader.read(first, reader.last)
+            table._base = first
+            table._present = present
+            table._cols = cols
+            table._ords = array("q", (first + row for row, f in enumerate(present) if f))
+        else:
+            table._base = first
+        if first > reader.base:
+            table._pager = reader
+            table._floor = reader.base
+            table._paged_count = reader.count - len(table._ords)
+        return table
+
+    # -- mapping protocol --
+
+    def __getitem__(self, key: str) -> DailyStats:
+        ordinal = self._ordinal_of(key)
+        if ordinal is not None:
+            self._ensure_loaded(ordinal)
+        if ordinal is None or not self._has(ordinal):
+            raise KeyError(key)
+        return DailyStats._view(self, ordinal)
+
+    def __setitem__(self, key: str, value: DailyStats) -> None:
+        self.set_counts(key, value.to_dict())
+
+    def __delitem__(self, key: str) -> None:
+        ordinal = self._ordinal_of(key)
+        if ordinal is not None:
+            self._ensure_loaded(ordinal)
+        if ordinal is None or not self._has(ordinal):
+            raise KeyError(key)
+        row = ordinal - self._base
+        self._present[row] = 0
+        for col in self._cols.values():
+            col[row] = 0
+        del self._ords[bisect_left(self._ords, ordinal)]
+        self._touch(row)
+
+    def __contains__(self, key) -> bool:
+        ordinal = self._ordinal_of(key)
+        if ordinal is None:
+            return False
+        self._ensure_loaded(ordinal)
+        return self._has(ordinal)
+
+    def __iter__(self) -> Iterator[str]:
+        self._load_all()
+        for ordinal in self._ords:
+            yield _iso(ordinal)
+
+    def __len__(self) -> int:
+        return self._paged_count + len(self._ords)
+
+    def __repr__(self):
+        return f"DayTable({len(self)} days)"
+
+    # -- bulk access --
+
+    def ensure(self, key: str) -> DailyStats:
+        """Return the view for key, creating an all-zero row if needed."""
+        ordinal = date.fromisoformat(key).toordinal()
+        self._ensure_loaded(ordinal)
+        self._mark(ordinal)
+        return DailyStats._view(self, ordinal)
+
+    def set_counts(self, key: str, values: Mapping) -> None:
+        ordinal = date.fromisoformat(key).toordinal()
+        self._ensure_loaded(ordinal)
+        self._mark(ordinal)
+        row = ordinal - self._base
+        for name in COUNTERS:
+            self._cols[name][row] = int(values.get(name, 0))
+        self._touch(row)
+
+    def add(self, key: str, deltas: Mapping) -> None:
+        """Add counter deltas to key's row, creating it if needed."""
+        ordinal = date.fromisoformat(key).toordinal()
+        self._ensure_loaded(ordinal)
+        self._mark(ordinal)
+        row = ordinal - self._base
+        for name in COUNTERS:
+            if name in deltas:
+                self._cols[name][row] += int(deltas[name])
+        self._touch(row)
+
+    def rollup(self, first: int, last: int) -> bool:
+        """Fold every row in ordinals first..last into one row on first.
+
+        Totals over any range that covers first..last are unchanged.
+        Returns False if there was nothing to fold.
+        """
+        self._ensure_loaded(first)
+        lo = bisect_left(self._ords, first)
+        hi = bisect_right(self._ords, last)
+        if hi == lo or (hi - lo == 1 and self._ords[lo] == first):
+            return False
+        sums = self.totals(first, last)
+        for ordinal in self._ords[lo:hi]:
+            row = ordinal - self._base
+            self._present[row] = 0
+            for col in self._cols.values():
+                col[row] = 0
+        del self._ords[lo:hi]
+        self._touch(max(first - self._base, 0))
+        self.set_counts(_iso(first), sums)
+        return True
+
+    # -- range aggregates --
+
+    def totals(self, first: int, last: int) -> dict:
+        """Sum every counter over ordinals first..last inclusive.
+
+        Days without data count as zero. Constant time once the prefix sums
+        have caught up with the latest writes.
+        """
+        self._ensure_loaded(first)
+        size = len(self._present)
+        lo = max(first - self._base, 0)
+        hi = min(last - self._base + 1, size)
+        if lo >= hi:
+            return dict.fromkeys(COUNTERS, 0)
+        self._catch_up()
+        return {name: p[hi] - p[lo] for name, p in self._prefix.items()}
+
+    def recent(self, n: int) -> tuple[int, int]:
+        """Return (first_ordinal, count) spanning the n most recent days with data."""
+        while self._pager is not None and len(self._ords) < n:
+            self._page_in(max(self._floor, self._base - PAGE_CHUNK_DAYS))
+        count = min(max(n, 0), len(self._ords))
+        if not count:
+            return 0, 0
+        return self._ords[-count], count
+
+    def last_ordinal(self) -> int | None:
+        if not self._ords and self._pager is not None:
+            self._load_all()
+        return self._ords[-1] if self._ords else None
+
+    def first_ordinal(self) -> int | None:
+        """Ordinal of the first stored row, whether or not it is paged in."""
+        if self._pager is not None:
+            return self._floor
+        return self._base if self._present else None
+
+    def bounds(self) -> tuple[int, int] | None:
+        """(first, last) ordinals that may hold data, without paging anything in."""
+        if self._ords:
+            return self.first_ordinal(), self._ords[-1]
+        if self._pager is not None:
+            return self._floor, self._pager.last
+        return None
+
+    def rows(self, first: int, last: int) -> Iterator[tuple[int, tuple]]:
+        """Yield (ordinal, counter values) for each day with data in first..last.
+
+        Rows still in the page file are read a chunk at a time and not kept,
+        so walking a long history leaves the table as lean as it was. The
+        table must not change while the generator runs.
+        """
+        if self._pager is not None:
+            lo, hi = max(first, self._floor), min(last, self._base - 1)
+            while lo <= hi:
+                top = min(hi, lo + PAGE_CHUNK_DAYS - 1)
+                present, cols = self._pager.read(lo, top)
+                yield from _present_rows(lo, present, cols, 0, len(present))
+                lo = top + 1
+        base = self._base
+        lo, hi = max(first, base) - base, min(last - base + 1, len(self._present))
+        yield from _present_rows(base, self._present, self._cols, lo, hi)
+
+    @property
+    def resident_days(self) -> int:
+        """Rows currently held in memory."""
+        return len(self._present)
+
+    def export(self) -> tuple[int, bytes, dict]:
+        """Return (first_ordinal, presence, {counter: little-endian int64 bytes}).
+
+        Rows that were never paged in are copied straight from the page file,
+        so writing a lazily loaded table does not load it.
+        """
+        first = self.first_ordinal()
+        if first is None:
+            return 0, b"", {name: b"" for name in COUNTERS}
+        present = bytes(self._present)
+        cols = {name: le_bytes(col) for name, col in self._cols.items()}
+        if self._pager is not None and self._floor < self._base:
+            old_present, old_cols = self._pager.read_raw(self._floor, self._base - 1)
+            present = old_present + present
+            cols = {name: old_cols[name] + cols[name] for name in COUNTERS}
+        return first, present, cols
+
+    def columns(self) -> tuple[int, bytearray, dict]:
+        """Return (first_ordinal, presence, {counter: array}) covering every row.
+
+        Pages in anything not yet resident. The buffers are the table's own,
+        for bulk read-only analysis; do not modify them.
+        """
+        self._load_all()
+        return self._base, self._present, self._cols
+
+    def to_dict(self) -> dict:
+        """Serialize as {iso_date: {"date": ..., counter: value}}."""
+        self._load_all()
+        base = self._base
+        cols = [(name, self._cols[name]) for name in COUNTERS]
+        out = {}
+        for row, flag in enumerate(self._present):
+            if flag:
+                key = _iso(base + row)
+                entry = {"date": key}
+                for name, col in cols:
+                    entry[name] = col[row]
+                out[key] = entry
+        return out
+
+    def nbytes(self) -> int:
+        """Approximate payload size of the column buffers."""
+        return len(self._present) + sum(col.itemsize * len(col) for col in self._cols.values())
+
+    # -- internals --
+
+    @staticmethod
+    def _ordinal_of(key) -> int | None:
+        try:
+            return date.fromisoformat(key).toordinal()
+        except (TypeError, ValueError):
+            return None
+
+    def _has(self, ordinal: int) -> bool:
+        row = ordinal - self._base
+        return 0 <= row < len(self._present) and self._present[row] == 1
+
+    def _allocate(self, first: int, last: int) -> None:
+        """Grow the columns so ordinals first..last have rows."""
+        size = len(self._present)
+        if not size:
+            self._base = first
+            n = last - first + 1
+            self._present = bytearray(n)
+            for name in COUNTERS:
+                self._cols[name] = _zeros(n)
+            self._reset_prefix()
+            return
+        if first < self._base:
+            k = self._base - first
+            self._present[:0] = bytearray(k)
+            for name in COUNTERS:
+                grown = _zeros(k)
+                grown.extend(self._cols[name])
+                self._cols[name] = grown
+            self._base = first
+            size += k
+            # Every row shifted; rebuild prefix sums from scratch on demand.
+            self._reset_prefix()
+        end = self._base + size - 1
+        if last > end:
+            k = last - end
+            self._present.extend(bytearray(k))
+            for col in self._cols.values():
+                col.extend(_zeros(k))
+            if self._prefix is not None:
+                for p in self._prefix.values():
+                    p.extend(_zeros(k))
+            self._clean = min(self._clean, size)
+
+    def _mark(self, ordinal: int) -> None:
+        if not self._has(ordinal):
+            self._allocate(ordinal, ordinal)
+            self._present[ordinal - self._base] = 1
+            if not self._ords or ordinal > self._ords[-1]:
+                self._ords.append(ordinal)
+            else:
+                insort(self._ords, ordinal)
+
+    def _ensure_loaded(self, ordinal: int) -> None:
+        """Page in every row from ordinal's chunk up to the resident window."""
+        if self._pager is None or ordinal >= self._base:
+            return
+        if ordinal < self._floor:
+            self._load_all()
+            return
+        lo = self._base - PAGE_CHUNK_DAYS
+        while lo > ordinal:
+            lo -= PAGE_CHUNK_DAYS
+        self._page_in(max(lo, self._floor))
+
+    def _load_all(self) -> None:
+        if self._pager is not None:
+            self._page_in(self._floor)
+
+    def _page_in(self, lo: int) -> None:
+        """Prepend rows lo.._base-1 from the page file."""
+        hi = self._base - 1
+        if lo <= hi:
+            present, cols = self._pager.read(lo, hi)
+            ords = array("q", (lo + row for row, flag in enumerate(present) if flag))
+            self._paged_count -= len(ords)
+            present.extend(self._present)
+            for name in COUNTERS:
+                cols[name].extend(self._cols[name])
+            ords.extend(self._ords)
+            self._present, self._cols, self._ords = present, cols, ords
+            self._base = lo
+            self._reset_prefix()
+        if lo <= self._floor:
+            self._pager = None
+            self._paged_count = 0
+
+    def _reset_prefix(self) -> None:
+        self._prefix = None
+        self._clean = 0
+
+    def _touch(self, row: int) -> None:
+        """Invalidate prefix sums that include row."""
+        self.version = next(_versions)
+        if row < self._clean:
+            self._clean = row
+
+    def _catch_up(self) -> None:
+        size = len(self._present)
+        if self._prefix is None:
+            self._prefix = {name: _zeros(size + 1) for name in COUNTERS}
+            self._clean = 0
+        start = self._clean
+        if start >= size:
+            return
+        for name, p in self._prefix.items():
+            p[start:] = array("q", accumulate(self._cols[name][start:], initial=p[start]))
+        self._clean = size
+
+
+def _present_rows(base: int, present, cols: dict, lo: int, hi: int) -> Iterator[tuple[int, tuple]]:
+    values = [cols[name] for name in COUNTERS]
+    for row in range(lo, hi):
+        if present[row]:
+            yield base + row, tuple(col[row] for col in values)
+
+
+def _iso(ordinal: int) -> str:
+    return date.fromordinal(ordinal).isoformat()
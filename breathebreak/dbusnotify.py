@@ -0,0 +1,578 @@
+"""Desktop notifications on Linux over one persistent D-Bus connection.
+
+DBusBackend calls org.freedesktop.Notifications.Notify, the interface
+behind libnotify and notify-send, on the session bus. It speaks the D-Bus
+wire protocol itself over the bus's Unix socket, so it needs neither
+libdbus nor a Python binding. The connection is opened and authenticated
+once, when the backend is created, and reused for every notification.
+Each delivery is then a single method call and reply, where notify-send
+spends a process launch and a bus handshake per message.
+
+The server returns an id for each notification. The id is remembered per
+Notification.kind and passed back as replaces_id the next time, so a new
+reminder replaces the one still on screen instead of stacking beside it.
+Notifications without a kind are always shown on their own. If the bus
+connection breaks, for example across a re-login, the next delivery
+reconnects once and carries on.
+
+Only the subset of the protocol a notification client needs is here:
+EXTERNAL authentication, method calls and replies, and marshalling of
+the basic, array, struct, dict-entry and variant types in little- or
+big-endian messages. Variants are written as (signature, value) pairs
+and read back as plain values.
+
+FakeNotificationDaemon is a stand-in for the session bus and a
+notification server in one, listening on a private socket. Tests and the
+benchmarks point DBusBackend at it instead of the real desktop.
+"""
+
+import logging
+import os
+import socket
+import struct
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import unquote
+
+from breathebreak.notifier import NotificationBackend
+
+log = logging.getLogger(__name__)
+
+BUS_NAME = "org.freedesktop.DBus"
+BUS_PATH = "/org/freedesktop/DBus"
+NOTIFY_NAME = "org.freedesktop.Notifications"
+NOTIFY_PATH = "/org/freedesktop/Notifications"
+NOTIFY_SIGNATURE = "susssasa{sv}i"
+# Seconds to wait for a reply; well inside the dispatcher's delivery timeout.
+CALL_TIMEOUT = 2.0
+# Notification ids remembered for replaces-id, one per notification kind.
+MAX_TRACKED = 64
+
+METHOD_CALL, METHOD_RETURN, ERROR, SIGNAL = 1, 2, 3, 4
+NO_REPLY_EXPECTED = 0x1
+# Header field codes and the type each one carries.
+PATH, INTERFACE, MEMBER, ERROR_NAME, REPLY_SERIAL, DESTINATION, SENDER, SIGNATURE = range(1, 9)
+_FIELD_TYPES = {PATH: "o", INTERFACE: "s", MEMBER: "s", ERROR_NAME: "s"}
+_FIELD_TYPES |= {REPLY_SERIAL: "u", DESTINATION: "s", SENDER: "s", SIGNATURE: "g"}
+
+# Fixed-size types as struct format characters; each aligns to its size.
+_FIXED = {"y": "B", "b": "I", "n": "h", "q": "H", "i": "i", "u": "I", "x": "q", "t": "Q", "d": "d"}
+_ALIGN = {code: struct.calcsize(fmt) for code, fmt in _FIXED.items()}
+_ALIGN |= {"s": 4, "o": 4, "g": 1, "a": 4, "(": 8, "{": 8, "v": 1}
+# endianness, type, flags, version, body length, serial, header fields length
+_PREAMBLE = "cBBBIII"
+_PREAMBLE_SIZE = 16
+MAX_MESSAGE = 1 << 27
+
+
+class DBusError(Exception):
+    """An error reply, or a bus that refused the connection."""
+
+    def __init__(self, name: str, message: str = ""):
+        super().__init__(f"{name}: {message}" if message else name)
+        self.name = name
+
+
+@dataclass
+class Message:
+    kind: int
+    serial: int
+    fields: dict = field(default_factory=dict)
+    body: tuple = ()
+    flags: int = 0
+
+    @property
+    def member(self) -> str | None:
+        return self.fields.get(MEMBER)
+
+    @property
+    def reply_serial(self) -> int | None:
+        return self.fields.get(REPLY_SERIAL)
+
+
+# -- wire format --
+
+
+def split_signature(signature: str) -> list[str]:
+    """The complete types in a signature, e.g. "sa{sv}i" -> ["s", "a{sv}", "i"]."""
+    types, i = [], 0
+    while i < len(signature):
+        end = _type_end(signature, i)
+        types.append(signature[i:end])
+        i = end
+    return types
+
+
+def _type_end(signature: str, i: int) -> int:
+    code = signature[i]
+    if code == "a":
+        return _type_end(signature, i + 1)
+    if code in "({":
+        close, depth = {"(": ")", "{": "}"}[code], 0
+        for j in range(i, len(signature)):
+            if signature[j] == code:
+                depth += 1
+            elif signature[j] == close:
+                depth -= 1
+                if not depth:
+                    return j + 1
+        raise ValueError(f"unbalanced signature {signature!r}")
+    if code not in _ALIGN:
+        raise ValueError(f"unsupported type {code!r} in {signature!r}")
+    return i + 1
+
+
+class _Writer:
+    """Little-endian marshalling into a buffer that starts 8-aligned."""
+
+    def __init__(self, initial: bytes = b""):
+        self.buf = bytearray(initial)
+
+    def pad(self, n: int) -> None:
+        self.buf += bytes(-len(self.buf) % n)
+
+    def write(self, code: str, value) -> None:
+        self.pad(_ALIGN[code[0]])
+        kind = code[0]
+        if kind in _FIXED:
+            self.buf += struct.pack("<" + _FIXED[kind], value)
+        elif kind in "so":
+            raw = value.encode()
+            self.buf += struct.pack("<I", len(raw)) + raw + b"\0"
+        elif kind == "g":
+            raw = value.encode()
+            self.buf += bytes((len(raw),)) + raw + b"\0"
+        elif kind == "v":
+            inner, data = value
+            self.write("g", inner)
+            self.write(inner, data)
+        elif kind == "a":
+            self.buf += bytes(4)
+            at = len(self.buf)
+            element = code[1:]
+            # Padding to the first element is not part of the array length.
+            self.pad(_ALIGN[element[0]])
+            start = len(self.buf)
+            for item in value.items() if element[0] == "{" else value:
+                self.write(element, item)
+            struct.pack_into("<I", self.buf, at - 4, len(self.buf) - start)
+        else:
+            for part, item in zip(split_signature(code[1:-1]), value, strict=True):
+                self.write(part, item)
+
+
+class _Reader:
+    def __init__(self, data: bytes, order: str, pos: int = 0):
+        self.data = data
+        self.order = order
+        self.pos = pos
+
+    def read(self, code: str):
+        kind = code[0]
+        self.pos += -self.pos % _ALIGN[kind]
+        if kind in _FIXED:
+            (value,) = struct.unpack_from(self.order + _FIXED[kind], self.data, self.pos)
+            self.pos += _ALIGN[kind]
+            return bool(value) if kind == "b" else value
+        if kind in "sog":
+            if kind == "g":
+                size = self.data[self.pos]
+                self.pos += 1
+            else:
+                size = self.read("u")
+            value = bytes(self.data[self.pos : self.pos + size]).decode()
+            self.pos += size + 1
+            return value
+        if kind == "v":
+            return self.read(self.read("g"))
+        if kind == "a":
+            size = self.read("u")
+            element = code[1:]
+            self.pos += -self.pos % _ALIGN[element[0]]
+            end = self.pos + size
+            items = []
+            while self.pos < end:
+                items.append(self.read(element))
+            return dict(items) if element[0] == "{" else items
+        return tuple(self.read(part) for part in split_signature(code[1:-1]))
+
+
+def encode(message: Message, signature: str = "") -> bytes:
+    """Serialize message; its body is marshalled according to signature."""
+    body = _Writer()
+    for code, value in zip(split_signature(signature), message.body, strict=True):
+        body.write(code, value)
+    fields = dict(message.fields)
+    if signature:
+        fields[SIGNATURE] = signature
+    head = _Writer(
+        struct.pack("<cBBBII", b"l", message.kind, message.flags, 1, len(body.buf), message.serial)
+    )
+    head.write("a(yv)", [(code, (_FIELD_TYPES[code], value)) for code, value in fields.items()])
+    head.pad(8)
+    return bytes(head.buf + body.buf)
+
+
+def message_size(preamble: bytes) -> int:
+    """Total size of the message whose first 16 bytes are preamble."""
+    order = {b"l": "<", b"B": ">"}.get(bytes(preamble[:1]))
+    if order is None:
+        raise DBusError("org.freedesktop.DBus.Error.InvalidArgs", "bad endianness marker")
+    body_len, _, fields_len = struct.unpack_from(order + "III", preamble, 4)
+    size = _PREAMBLE_SIZE + fields_len + (-fields_len % 8) + body_len
+    if size > MAX_MESSAGE:
+        raise DBusError("org.freedesktop.DBus.Error.LimitsExceeded", "message too large")
+    return size
+
+
+def decode(data: bytes) -> Message:
+    """Parse one complete message."""
+    order = "<" if data[:1] == b"l" else ">"
+    _, kind, flags, _, body_len, serial, _ = struct.unpack_from(order + _PREAMBLE, data)
+    reader = _Reader(data, order, 12)
+    fields = {code: value for code, value in reader.read("a(yv)")}
+    reader.pos += -reader.pos % 8
+    body = tuple(reader.read(code) for code in split_signature(fields.get(SIGNATURE, "")))
+    return Message(kind, serial, fields, body, flags)
+
+
+# -- client --
+
+
+def session_bus_address() -> str | None:
+    """The session bus address from the environment, as libdbus finds it."""
+    address = os.environ.get("DBUS_SESSION_BUS_ADDRESS")
+    if address:
+        return address
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime and Path(runtime, "bus").exists():
+        return f"unix:path={runtime}/bus"
+    return None
+
+
+def socket_addresses(address: str) -> list[str]:
+    """Unix socket addresses for a D-Bus address string, in order of preference."""
+    found = []
+    for entry in address.split(";"):
+        transport, _, params = entry.partition(":")
+        if transport != "unix":
+            continue
+        keys = dict(p.split("=", 1) for p in params.split(",") if "=" in p)
+        if "path" in keys:
+            found.append(unquote(keys["path"]))
+        elif "abstract" in keys:
+            found.append("\0" + unquote(keys["abstract"]))
+    return found
+
+
+class Connection:
+    """An authenticated connection to a message bus, with blocking method calls."""
+
+    def __init__(self, address: str, timeout: float = CALL_TIMEOUT):
+        targets = socket_addresses(address)
+        if not targets:
+            raise OSError(f"no usable unix transport in D-Bus address {address!r}")
+        self._sock = self._connect(targets, timeout)
+        self._buf = bytearray()
+        self._serial = 0
+        try:
+            self._authenticate()
+            (self.unique_name,) = self.call(BUS_NAME, BUS_PATH, BUS_NAME, "Hello")
+        except BaseException:
+            self._sock.close()
+            raise
+
+    @staticmethod
+    def _connect(targets: list[str], timeout: float) -> socket.socket:
+        error: OSError | None = None
+        for target in targets:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(timeout)
+            try:
+                sock.connect(target)
+                return sock
+            except OSError as e:
+                sock.close()
+                error = e
+        raise error
+
+    def _authenticate(self) -> None:
+        uid = str(os.getuid()).encode().hex()
+        self._sock.sendall(b"\0AUTH EXTERNAL " + uid.encode() + b"\r\n")
+        reply = self._readline()
+        if not reply.startswith(b"OK "):
+            raise DBusError("org.freedesktop.DBus.Error.AuthFailed", reply.decode(errors="replace"))
+        self._sock.sendall(b"BEGIN\r\n")
+
+    def _readline(self) -> bytes:
+        while b"\r\n" not in self._buf:
+            self._fill()
+        line, _, rest = bytes(self._buf).partition(b"\r\n")
+        self._buf[:] = rest
+        return line
+
+    def _fill(self) -> None:
+        chunk = self._sock.recv(65536)
+        if not chunk:
+            raise ConnectionResetError("D-Bus connection closed")
+        self._buf += chunk
+
+    def call(
+        self,
+        destination: str,
+        path: str,
+        interface: str,
+        member: str,
+        signature: str = "",
+        args: tuple = (),
+    ) -> tuple:
+        """Call a method and wait for its reply; raises DBusError on an error reply."""
+        self._serial += 1
+        fields = {PATH: path, INTERFACE: interface, MEMBER: member, DESTINATION: destination}
+        self._sock.sendall(encode(Message(METHOD_CALL, self._serial, fields, args), signature))
+        while True:
+            reply = self.receive()
+            if reply.reply_serial != self._serial:
+                # Signals such as NameAcquired, or a reply we stopped waiting for.
+                continue
+            if reply.kind == ERROR:
+                raise DBusError(reply.fields.get(ERROR_NAME, ""), *reply.body[:1])
+            return reply.body
+
+    def receive(self) -> Message:
+        while len(self._buf) < _PREAMBLE_SIZE:
+            self._fill()
+        size = message_size(self._buf)
+        while len(self._buf) < size:
+            self._fill()
+        data = bytes(self._buf[:size])
+        del self._buf[:size]
+        return decode(data)
+
+    def close(self) -> None:
+        self._sock.close()
+
+
+class DBusBackend(NotificationBackend):
+    """freedesktop notifications over one reused session-bus connection."""
+
+    name = "dbus"
+
+    def __init__(self, address: str | None = None, timeout: float = CALL_TIMEOUT):
+        self.address = address or session_bus_address()
+        if not self.address:
+            raise OSError("no D-Bus session bus")
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._ids: dict[str, int] = {}
+        self._conn: Connection | None = Connection(self.address, timeout)
+
+    def deliver(self, note) -> None:
+        summary = note.subtitle or note.title
+        hints = {} if note.sound else {"suppress-sound": ("b", True)}
+        with self._lock:
+            args = (
+                note.title,
+                self._ids.get(note.kind, 0) if note.kind else 0,
+                "",
+                summary,
+                note.message,
+                [],
+                hints,
+                -1,
+            )
+            reused = self._conn is not None
+            try:
+                (nid,) = self._notify(args)
+            except TimeoutError:
+                raise
+            except OSError:
+                if not reused:
+                    raise
+                log.info("D-Bus connection lost; reconnecting")
+                (nid,) = self._notify(args)
+            if note.kind:
+                self._ids.pop(note.kind, None)
+                self._ids[note.kind] = nid
+                if len(self._ids) > MAX_TRACKED:
+                    del self._ids[next(iter(self._ids))]
+
+    def _notify(self, args: tuple) -> tuple:
+        if self._conn is None:
+            self._conn = Connection(self.address, self.timeout)
+        try:
+            return self._conn.call(
+                NOTIFY_NAME, NOTIFY_PATH, NOTIFY_NAME, "Notify", NOTIFY_SIGNATURE, args
+            )
+        except OSError:
+            # A timed-out or broken connection may be mid-message; start over.
+            self._conn.close()
+            self._conn = None
+            raise
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# -- stand-in daemon --
+
+
+@dataclass
+class Shown:
+    """A notification as FakeNotificationDaemon received it."""
+
+    id: int
+    app_name: str
+    replaces_id: int
+    summary: str
+    body: str
+    hints: dict
+
+
+class FakeNotificationDaemon:
+    """A private message bus that is also a notification server.
+
+    Accepts connections on a Unix socket at path, answers Hello like a bus
+    and Notify like a notification server, and records what it was sent.
+    Set delay to make every Notify reply that many seconds late.
+    """
+
+    def __init__(self, path: Path, delay: float = 0.0):
+        self.path = Path(path)
+        self.delay = delay
+        self.received: list[Shown] = []
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._open: dict[int, Shown] = {}
+        self._next_id = 0
+        self._clients: list[socket.socket] = []
+        self._closed = threading.Event()
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(str(self.path))
+        self._server.listen()
+        threading.Thread(target=self._accept, name="fake-notifyd", daemon=True).start()
+
+    @property
+    def address(self) -> str:
+        return f"unix:path={self.path}"
+
+    @property
+    def on_screen(self) -> dict[int, str]:
+        """Summaries of the notifications currently shown, by id."""
+        with self._lock:
+            return {nid: shown.summary for nid, shown in self._open.items()}
+
+    def disconnect_all(self) -> None:
+        """Drop every client connection, as a restarted bus would."""
+        with self._lock:
+            clients, self._clients = self._clients, []
+        for client in clients:
+            try:
+                client.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            client.close()
+
+    def close(self) -> None:
+        self._closed.set()
+        self._server.close()
+        self.disconnect_all()
+        self.path.unlink(missing_ok=True)
+
+    def _accept(self) -> None:
+        while not self._closed.is_set():
+            try:
+                client, _ = self._server.accept()
+            except OSError:
+                return
+            with self._lock:
+                self.connections += 1
+                self._clients.append(client)
+                name = f":1.{self.connections}"
+            threading.Thread(target=self._serve, args=(client, name), daemon=True).start()
+
+    def _serve(self, client: socket.socket, name: str) -> None:
+        stream = client.makefile("rb")
+        try:
+            if stream.read(1) != b"\0" or not self._handshake(client, stream):
+                return
+            while True:
+                preamble = stream.read(_PREAMBLE_SIZE)
+                if len(preamble) < _PREAMBLE_SIZE:
+                    return
+                rest = stream.read(message_size(preamble) - _PREAMBLE_SIZE)
+                reply = self._handle(decode(preamble + rest), name)
+                if reply is not None:
+                    client.sendall(reply)
+        except (OSError, ValueError, DBusError):
+            return
+        finally:
+            with self._lock:
+                if client in self._clients:
+                    self._clients.remove(client)
+            stream.close()
+            client.close()
+
+    @staticmethod
+    def _handshake(client: socket.socket, stream) -> bool:
+        while True:
+            line = stream.readline().rstrip(b"\r\n")
+            if not line:
+                return False
+            if line == b"AUTH EXTERNAL":
+                # No initial response: ask for it, as libdbus and GDBus expect.
+                client.sendall(b"DATA\r\n")
+            elif line.startswith((b"AUTH EXTERNAL ", b"DATA")):
+                client.sendall(b"OK " + os.urandom(16).hex().encode() + b"\r\n")
+            elif line == b"BEGIN":
+                return True
+            elif line.startswith(b"AUTH"):
+                client.sendall(b"REJECTED EXTERNAL\r\n")
+            else:
+                client.sendall(b"ERROR\r\n")
+
+    def _handle(self, call: Message, name: str) -> bytes | None:
+        if call.kind != METHOD_CALL:
+            return None
+        body, signature, error = (), "", None
+        member = call.member
+        if call.fields.get(DESTINATION) == BUS_NAME and member == "Hello":
+            body, signature = (name,), "s"
+        elif call.fields.get(DESTINATION) == BUS_NAME:
+            error = "org.freedesktop.DBus.Error.UnknownMethod"
+        elif member == "Notify" and call.fields.get(SIGNATURE) != NOTIFY_SIGNATURE:
+            error = "org.freedesktop.DBus.Error.InvalidArgs"
+        elif member == "Notify":
+            if self.delay:
+                self._closed.wait(self.delay)
+            body, signature = (self._notify(*call.body),), "u"
+        elif member == "CloseNotification":
+            with self._lock:
+                self._open.pop(call.body[0], None)
+        elif member == "GetServerInformation":
+            body, signature = ("fake-notifyd", "breathebreak", "1.0", "1.2"), "ssss"
+        else:
+            error = "org.freedesktop.DBus.Error.UnknownMethod"
+        if call.flags & NO_REPLY_EXPECTED:
+            return None
+        fields = {REPLY_SERIAL: call.serial, DESTINATION: name}
+        if error is not None:
+            fields[ERROR_NAME] = error
+            message = Message(ERROR, call.serial, fields, (f"cannot handle {member}",))
+            return encode(message, "s")
+        return encode(Message(METHOD_RETURN, call.serial, fields, body), signature)
+
+    def _notify(self, app_name, replaces_id, icon, summary, body, actions, hints, timeout) -> int:
+        with self._lock:
+            nid = replaces_id
+            if nid not in self._open:
+                self._next_id += 1
+                nid = self._next_id
+            shown = Shown(nid, app_name, replaces_id, summary, body, hints)
+            self._open[nid] = shown
+            self.received.append(shown)
+            return nid
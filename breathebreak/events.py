@@ -0,0 +1,57 @@
+"""Event bus — in-process publish/subscribe for app and stats events.
+
+The app publishes toggles, interval changes, idle transitions and
+quiet-hour deferrals. StatsStore's record calls feed reminders, breaks,
+sessions and focus spans through its listener hook (see
+stats_listener()). Each event is a flat dict with "ts" (epoch seconds)
+and "kind" keys. Publishing with no subscribers returns immediately.
+
+eventsocket.py streams the bus to other local tools over a Unix socket.
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+
+log = logging.getLogger(__name__)
+
+# What the event socket does when a subscriber's buffer is full; see eventsocket.py.
+OVERFLOW_POLICIES = ("drop", "disconnect")
+
+
+class EventBus:
+    """Synchronous fan-out to in-process subscribers."""
+
+    def __init__(self):
+        self._subscribers: tuple = ()
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback: Callable[[dict], None]) -> Callable[[], None]:
+        """Call callback(event) for every event. Returns an unsubscribe function."""
+        with self._lock:
+            self._subscribers += (callback,)
+
+        def unsubscribe():
+            with self._lock:
+                self._subscribers = tuple(s for s in self._subscribers if s is not callback)
+
+        return unsubscribe
+
+    def publish(self, kind: str, **data) -> None:
+        subscribers = self._subscribers
+        if not subscribers:
+            return
+        event = {"ts": time.time(), "kind": kind, **data}
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception:
+                log.exception("Event subscriber %r failed", callback)
+
+    def stats_listener(self, kind: str, value: int) -> None:
+        """Adapter for StatsStore.listeners."""
+        if value:
+            self.publish(kind, value=value)
+        else:
+            self.publish(kind)
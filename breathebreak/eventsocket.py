@@ -0,0 +1,246 @@
+"""Event stream — bus events over a Unix domain socket as JSON lines.
+
+EventSocketServer subscribes to an EventBus (see events.py) and writes
+each event to every connected subscriber of events.sock, in the config
+directory. That directory is kept owner-only (0700), so no other user
+can reach the socket, even in the moment after it is bound. The stream
+is newline-delimited JSON, one event per line. The server runs an
+asyncio loop on its own daemon thread. Publishing is one
+call_soon_threadsafe, and none at all while nobody is connected, so the
+timer thread never waits on a subscriber.
+
+Each subscriber has a queue of SUBSCRIBER_BUFFER events. When a slow
+reader lets it fill up, the overflow policy applies:
+
+- "drop" (the default) discards the oldest queued event. The next line
+  the subscriber reads is {"kind": "dropped", "count": n}.
+- "disconnect" closes the connection.
+
+A subscriber may send one JSON line to choose its own settings, for
+example {"overflow": "disconnect", "kinds": ["reminder", "break"]}.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import stat
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from pathlib import Path
+
+from breathebreak.events import OVERFLOW_POLICIES, EventBus
+
+log = logging.getLogger(__name__)
+
+# Events queued per subscriber before the overflow policy applies.
+SUBSCRIBER_BUFFER = 256
+# Longest settings line a subscriber may send.
+MAX_SETTINGS_BYTES = 4096
+# Kernel-side write buffer per connection; beyond it events wait in the queue.
+_WRITE_HIGH_WATER = 16 * 1024
+
+
+class _Subscriber:
+    __slots__ = ("writer", "queue", "wakeup", "overflow", "kinds", "dropped", "task")
+
+    def __init__(self, writer: asyncio.StreamWriter, overflow: str):
+        self.writer = writer
+        self.queue: deque = deque()
+        self.wakeup = asyncio.Event()
+        self.overflow = overflow
+        self.kinds: frozenset | None = None
+        self.dropped = 0
+        self.task: asyncio.Task | None = None
+
+
+class EventSocketServer:
+    """Streams bus events to Unix socket subscribers as JSON lines."""
+
+    def __init__(self, bus: EventBus, path: Path, overflow: str = "drop"):
+        self.bus = bus
+        self.path = path
+        self.overflow = overflow
+        self.dropped = 0
+        self.disconnected = 0
+        self._clients: set[_Subscriber] = set()
+        self._unsubscribe: Callable[[], None] | None = None
+        self._thread: threading.Thread | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stopping: asyncio.Event | None = None
+        self._ready = threading.Event()
+        self._error: OSError | None = None
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._clients)
+
+    def start(self) -> None:
+        """Bind the socket and serve on a daemon thread. Raises OSError on failure."""
+        _claim_socket_path(self.path)
+        self._thread = threading.Thread(target=self._run, name="breathebreak-events", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+        self._unsubscribe = self.bus.subscribe(self._publish)
+        log.info("Event stream on %s", self.path)
+
+    def stop(self) -> None:
+        """Disconnect subscribers and remove the socket. Safe to call twice."""
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+        loop, self._loop = self._loop, None
+        if loop is not None:
+            loop.call_soon_threadsafe(self._stopping.set)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+
+    # -- publishing (any thread) --
+
+    def _publish(self, event: dict) -> None:
+        loop = self._loop
+        if loop is not None and self._clients:
+            loop.call_soon_threadsafe(self._fan_out, event)
+
+    # -- event loop thread --
+
+    def _run(self) -> None:
+        try:
+            asyncio.run(self._main())
+        except OSError as e:
+            self._error = e
+            self._ready.set()
+
+    async def _main(self) -> None:
+        # Bound inside an owner-only directory: private from the start,
+        # without touching the process-wide umask.
+        _private_dir(self.path.parent)
+        server = await asyncio.start_unix_server(
+            self._serve, str(self.path), limit=MAX_SETTINGS_BYTES
+        )
+        self._loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        self._ready.set()
+        async with server:
+            await self._stopping.wait()
+            server.close()
+            clients = list(self._clients)
+            for client in clients:
+                self._drop_client(client)
+            # Let each connection's task see it was dropped and finish.
+            await asyncio.gather(*(c.task for c in clients if c.task), return_exceptions=True)
+
+    def _fan_out(self, event: dict) -> None:
+        line = None
+        for client in list(self._clients):
+            if client.kinds is not None and event["kind"] not in client.kinds:
+                continue
+            if line is None:
+                line = json.dumps(event, separators=(",", ":")).encode() + b"\n"
+            if len(client.queue) >= SUBSCRIBER_BUFFER:
+                if client.overflow == "disconnect":
+                    self.disconnected += 1
+                    self._drop_client(client)
+                    continue
+                client.queue.popleft()
+                client.dropped += 1
+                self.dropped += 1
+            client.queue.append(line)
+            client.wakeup.set()
+
+    def _drop_client(self, client: _Subscriber) -> None:
+        self._clients.discard(client)
+        client.writer.transport.abort()
+        client.wakeup.set()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        writer.transport.set_write_buffer_limits(high=_WRITE_HIGH_WATER)
+        client = _Subscriber(writer, self.overflow)
+        client.task = asyncio.current_task()
+        self._clients.add(client)
+        settings = asyncio.ensure_future(self._read_settings(reader, client))
+        try:
+            while client in self._clients:
+                if not client.queue:
+                    client.wakeup.clear()
+                    await client.wakeup.wait()
+                    continue
+                if client.dropped:
+                    notice = {"ts": time.time(), "kind": "dropped", "count": client.dropped}
+                    client.dropped = 0
+                    writer.write(json.dumps(notice, separators=(",", ":")).encode() + b"\n")
+                writer.write(b"".join(client.queue))
+                client.queue.clear()
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            settings.cancel()
+            self._clients.discard(client)
+            writer.close()
+
+    async def _read_settings(self, reader: asyncio.StreamReader, client: _Subscriber) -> None:
+        """Apply a settings line if one arrives, then end the stream on hang-up."""
+        try:
+            line = await reader.readline()
+            if line:
+                _apply_settings(client, line)
+            while line and await reader.read(MAX_SETTINGS_BYTES):
+                pass
+        except (ValueError, ConnectionError):
+            # Oversized settings line or reset connection.
+            pass
+        self._clients.discard(client)
+        client.wakeup.set()
+
+
+def _apply_settings(client: _Subscriber, line: bytes) -> None:
+    try:
+        settings = json.loads(line)
+        overflow = settings.get("overflow", client.overflow)
+        kinds = settings.get("kinds")
+    except (ValueError, AttributeError):
+        log.debug("Ignoring malformed subscriber settings %r", line[:80])
+        return
+    if overflow in OVERFLOW_POLICIES:
+        client.overflow = overflow
+    if isinstance(kinds, list):
+        client.kinds = frozenset(map(str, kinds))
+
+
+def _private_dir(path: Path) -> None:
+    """Make path an owner-only directory, creating it if needed.
+
+    Raises OSError if it belongs to another user.
+    """
+    path.mkdir(mode=0o700, parents=True, exist_ok=True)
+    st = path.stat()
+    if st.st_uid != os.getuid():
+        raise OSError(f"{path} is owned by another user")
+    if stat.S_IMODE(st.st_mode) & 0o077:
+        os.chmod(path, 0o700)
+
+
+def _claim_socket_path(path: Path) -> None:
+    """Remove a stale socket left by a crash; refuse if another app is listening."""
+    if not path.exists():
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(str(path))
+    except OSError:
+        path.unlink()
+    else:
+        raise OSError(f"{path} is in use by another BreatheBreak")
+    finally:
+        probe.close()
@@ -0,0 +1,87 @@
+"""Streaming export of the stats history.
+
+`python -m breathebreak export` writes every stored row as CSV or NDJSON
+(one JSON object per line) to stdout. Rows come from StatsStore.rows(),
+which walks the history a chunk at a time, and each line is printed as
+soon as it is encoded. The export itself therefore holds one chunk of
+rows at most, however long the history is.
+
+--since and --until limit the range. --cursor FILE makes repeated runs
+incremental, e.g. from a nightly job: the last exported date is written
+to FILE once the output is complete, and the next run starts from that
+date. That day is sent again, because it may still have been in
+progress, so consumers should upsert rows by date.
+"""
+
+import json
+from collections.abc import Iterator
+from datetime import date
+from pathlib import Path
+
+from breathebreak.daytable import COUNTERS
+
+FORMATS = ("csv", "ndjson")
+FIELDS = ("date", "period", *COUNTERS)
+
+
+def lines(rows: Iterator[dict], fmt: str = "csv") -> Iterator[str]:
+    """Encode rows from StatsStore.rows() one line at a time."""
+    if fmt == "ndjson":
+        for row in rows:
+            yield json.dumps(row, separators=(",", ":"))
+        return
+    # Dates, period names and integers never need CSV quoting.
+    yield ",".join(FIELDS)
+    for row in rows:
+        yield ",".join(str(row[name]) for name in FIELDS)
+
+
+def read_cursor(path: Path) -> date | None:
+    """The date stored in a cursor file, or None if there is none yet."""
+    try:
+        return date.fromisoformat(path.read_text().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def write_cursor(path: Path, day: date) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(day.isoformat() + "\n")
+    tmp.replace(path)
+
+
+def run(
+    fmt: str = "csv",
+    since: date | None = None,
+    until: date | None = None,
+    cursor: str | None = None,
+) -> Iterator[str]:
+    """Load stats as configured and yield the export, line by line.
+
+    With a cursor file, export starts at the later of since and the stored
+    date, and the file is only advanced after the last line was consumed.
+    """
+    from breathebreak.config import Config
+    from breathebreak.stats import StatsStore
+
+    cursor_path = Path(cursor).expanduser() if cursor else None
+    if cursor_path is not None:
+        resume = read_cursor(cursor_path)
+        if resume is not None and (since is None or resume > since):
+            since = resume
+    last = None
+
+    def track(rows: Iterator[dict]) -> Iterator[dict]:
+        nonlocal last
+        for row in rows:
+            last = row["date"]
+            yield row
+
+    store = StatsStore.for_config(Config.load())
+    try:
+        yield from lines(track(store.rows(since, until)), fmt)
+    finally:
+        store.close()
+    if cursor_path is not None and last is not None:
+        write_cursor(cursor_path, date.fromisoformat(last))
@@ -0,0 +1,71 @@
+"""Advisory inter-process lock with a shared counter.
+
+Two BreatheBreak processes (the menu bar app and a CLI, say) share one
+stats directory. FileLock serializes their disk operations with flock(2)
+on a dedicated lock file, so it never interferes with the data files'
+atomic tmp + rename writes. The lock is re-entrant within a process and
+also excludes other threads.
+
+The lock file doubles as storage for one integer that must be allocated
+under the lock (the stats journal's global sequence number): read_int()
+and write_int() are only meaningful while the lock is held.
+"""
+
+import fcntl
+import os
+import struct
+import threading
+from pathlib import Path
+
+_INT = struct.Struct("<q")
+
+
+class FileLock:
+    """Exclusive flock() on path, held for the duration of a with-block."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd: int | None = None
+
+    def __enter__(self) -> "FileLock":
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                if self._fd is None:
+                    # Kept open between acquisitions; only flock() per use.
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            except BaseException:
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._depth -= 1
+        if self._depth == 0:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+    def close(self) -> None:
+        """Release the descriptor. The lock must not be held."""
+        with self._thread_lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def read_int(self) -> int:
+        data = os.pread(self._fd, _INT.size, 0)
+        return _INT.unpack(data)[0] if len(data) == _INT.size else 0
+
+    def write_int(self, value: int) -> None:
+        os.pwrite(self._fd, _INT.pack(value), 0)
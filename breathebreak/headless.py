@@ -0,0 +1,53 @@
+"""Headless runner — break reminders without the menu bar.
+
+Drives the same Controller as the rumps app (see controller.py) from the
+blocking loop of the deadline scheduler (see scheduler.py), so
+BreatheBreak can run on machines without PyObjC, under a service
+manager, or in CI. Nothing here imports rumps; notifications still go
+through notifier.notify, which logs and carries on if no backend is
+available.
+"""
+
+import logging
+
+from breathebreak.controller import Controller
+
+log = logging.getLogger(__name__)
+
+
+class HeadlessRunner(Controller):
+    """Fires break reminders every interval until stopped."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._ticks = 0
+        self._max_ticks: int | None = None
+
+    def run(self, max_ticks: int | None = None) -> None:
+        """Block, firing a reminder each interval, until stop() or max_ticks."""
+        self._max_ticks = max_ticks
+        self.start()
+        self.start_reminders()
+        self.scheduler.run()
+
+    def stop(self) -> None:
+        self.scheduler.stop()
+
+    def _after_reminder(self, tip: str) -> None:
+        log.info("Time for a break: %s", tip)
+        self._ticks += 1
+        if self._max_ticks is not None and self._ticks >= self._max_ticks:
+            self.scheduler.stop()
+
+
+def main() -> None:
+    """Launch BreatheBreak without the menu bar."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(name)s] %(levelname)s: %(message)s",
+    )
+    runner = HeadlessRunner()
+    try:
+        runner.run()
+    finally:
+        runner.shutdown()
@@ -0,0 +1,271 @@
+"""Idle detection — pause reminders and focus tracking while you're away.
+
+A provider reports how many seconds have passed since the last keyboard
+or mouse input. IdleMonitor samples it as a job on the app's Scheduler,
+so it adds no thread and no timer of its own:
+
+- While you're active it sleeps until the earliest moment you could
+  cross the threshold (threshold minus the current idle time). With a
+  5-minute threshold, someone typing steadily costs one sample every
+  few minutes.
+- Once you're idle it polls to notice your return, starting at
+  IDLE_POLL_MIN and doubling up to IDLE_POLL_MAX, so a machine left
+  overnight wakes about once a minute.
+
+Providers:
+
+- MacIdleProvider calls CGEventSourceSecondsSinceLastEventType from
+  CoreGraphics through ctypes, so it works without PyObjC.
+- LinuxIdleProvider asks the X11 screensaver extension (libXss) and
+  falls back to systemd-logind's IdleHint for Wayland or console
+  sessions.
+- FakeIdleProvider returns whatever a test sets.
+
+default_provider() picks one for the running platform, or returns None
+if none is available, in which case idle detection is simply off.
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import subprocess
+import sys
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+
+from breathebreak.scheduler import Job, Scheduler
+
+log = logging.getLogger(__name__)
+
+# Polling bounds (seconds) while idle, waiting for the user to come back.
+IDLE_POLL_MIN = 2.0
+IDLE_POLL_MAX = 60.0
+# Shortest sleep between samples while active, however close to the threshold.
+ACTIVE_POLL_MIN = 5.0
+
+
+class IdleProvider(ABC):
+    """Reports seconds since the last user input."""
+
+    name = "none"
+
+    @abstractmethod
+    def idle_seconds(self) -> float | None:
+        """Seconds since the last input, or None if it can't be read right now."""
+
+
+class FakeIdleProvider(IdleProvider):
+    """Returns whatever idle time a test sets."""
+
+    name = "fake"
+
+    def __init__(self, idle: float = 0.0):
+        self.idle = idle
+        self.calls = 0
+
+    def idle_seconds(self) -> float | None:
+        self.calls += 1
+        return self.idle
+
+
+class MacIdleProvider(IdleProvider):
+    """HID idle time from CoreGraphics, via ctypes."""
+
+    name = "macos"
+    _FRAMEWORK = "/System/Library/Frameworks/CoreGraphics.framework/CoreGraphics"
+    # kCGEventSourceStateCombinedSessionState, kCGAnyInputEventType
+    _COMBINED_SESSION = 0
+    _ANY_INPUT = 0xFFFFFFFF
+
+    def __init__(self):
+        cg = ctypes.cdll.LoadLibrary(self._FRAMEWORK)
+        self._since = cg.CGEventSourceSecondsSinceLastEventType
+        self._since.argtypes = [ctypes.c_int32, ctypes.c_uint32]
+        self._since.restype = ctypes.c_double
+
+    def idle_seconds(self) -> float | None:
+        return float(self._since(self._COMBINED_SESSION, self._ANY_INPUT))
+
+
+class _XScreenSaverInfo(ctypes.Structure):
+    _fields_ = [
+        ("window", ctypes.c_ulong),
+        ("state", ctypes.c_int),
+        ("kind", ctypes.c_int),
+        ("til_or_since", ctypes.c_ulong),
+        ("idle", ctypes.c_ulong),
+        ("event_mask", ctypes.c_ulong),
+    ]
+
+
+class LinuxIdleProvider(IdleProvider):
+    """X11 screensaver idle time, falling back to logind's IdleHint."""
+
+    name = "linux"
+
+    def __init__(self):
+        self._x11 = self._open_x11() if os.environ.get("DISPLAY") else None
+        self._session = os.environ.get("XDG_SESSION_ID")
+        if self._x11 is None and self._session is None:
+            raise OSError("no X11 display or logind session")
+
+    def idle_seconds(self) -> float | None:
+        if self._x11 is not None:
+            xss, display, root, info = self._x11
+            if xss.XScreenSaverQueryInfo(display, root, info):
+                return info.contents.idle / 1000.0
+        if self._session is not None:
+            return self._logind_idle()
+        return None
+
+    @staticmethod
+    def _open_x11():
+        xlib_name = ctypes.util.find_library("X11")
+        xss_name = ctypes.util.find_library("Xss")
+        if not xlib_name or not xss_name:
+            return None
+        xlib = ctypes.cdll.LoadLibrary(xlib_name)
+        xss = ctypes.cdll.LoadLibrary(xss_name)
+        xlib.XOpenDisplay.restype = ctypes.c_void_p
+        xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        xlib.XDefaultRootWindow.restype = ctypes.c_ulong
+        xlib.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        xss.XScreenSaverAllocInfo.restype = ctypes.POINTER(_XScreenSaverInfo)
+        xss.XScreenSaverQueryInfo.argtypes = [
+            ctypes.c_void_p,
+            ctypes.c_ulong,
+            ctypes.POINTER(_XScreenSaverInfo),
+        ]
+        display = xlib.XOpenDisplay(None)
+        if not display:
+            return None
+        return xss, display, xlib.XDefaultRootWindow(display), xss.XScreenSaverAllocInfo()
+
+    def _logind_idle(self) -> float | None:
+        try:
+            out = subprocess.run(
+                [
+                    "loginctl",
+                    "show-session",
+                    self._session,
+                    "-p",
+                    "IdleHint",
+                    "-p",
+                    "IdleSinceHintMonotonic",
+                ],
+                capture_output=True,
+                text=True,
+                timeout=2,
+                check=True,
+            ).stdout
+        except (OSError, subprocess.SubprocessError):
+            return None
+        props = dict(line.split("=", 1) for line in out.splitlines() if "=" in line)
+        if props.get("IdleHint") != "yes":
+            return 0.0
+        try:
+            since = int(props["IdleSinceHintMonotonic"]) / 1e6
+        except (KeyError, ValueError):
+            return None
+        return max(0.0, time.monotonic() - since)
+
+
+def default_provider() -> IdleProvider | None:
+    """The idle provider for this platform, or None if there isn't one."""
+    factory = {"darwin": MacIdleProvider, "linux": LinuxIdleProvider}.get(sys.platform)
+    if factory is None:
+        return None
+    try:
+        return factory()
+    except OSError as e:
+        log.info("Idle detection unavailable: %s", e)
+        return None
+
+
+class IdleMonitor:
+    """Samples a provider on a Scheduler and reports idle/active transitions.
+
+    on_idle(since) gets the wall-clock time input stopped; on_active(away)
+    gets how many seconds the user was gone. A threshold of 0 turns
+    sampling off.
+    """
+
+    def __init__(
+        self,
+        scheduler: Scheduler,
+        provider: IdleProvider,
+        threshold: float,
+        on_idle: Callable[[float], None],
+        on_active: Callable[[float], None],
+    ):
+        self.scheduler = scheduler
+        self.provider = provider
+        self.threshold = threshold
+        self.on_idle = on_idle
+        self.on_active = on_active
+        self.idle_since: float | None = None
+        self.samples = 0
+        self._backoff = IDLE_POLL_MIN
+        self._job: Job | None = None
+
+    @property
+    def idle(self) -> bool:
+        return self.idle_since is not None
+
+    def start(self) -> None:
+        if self.threshold > 0:
+            self._schedule(min(self.threshold, ACTIVE_POLL_MIN))
+
+    def stop(self) -> None:
+        if self._job is not None:
+            self.scheduler.cancel(self._job)
+            self._job = None
+
+    def set_threshold(self, threshold: float) -> None:
+        """Change the threshold; 0 stops sampling and ends any idle spell."""
+        if threshold == self.threshold:
+            return
+        self.threshold = threshold
+        if threshold > 0:
+            self._schedule(min(threshold, ACTIVE_POLL_MIN))
+            return
+        self.stop()
+        if self.idle_since is not None:
+            away = self.scheduler.clock.time() - self.idle_since
+            self.idle_since = None
+            self.on_active(away)
+
+    def sample(self) -> None:
+        """Read the provider once, fire any transition and schedule the next sample."""
+        self.samples += 1
+        seconds = self.provider.idle_seconds()
+        if seconds is None:
+            # Provider hiccup: keep the current state and look again later.
+            self._schedule(self.threshold)
+            return
+        now = self.scheduler.clock.time()
+        if seconds >= self.threshold:
+            if self.idle_since is None:
+                self.idle_since = now - seconds
+                self._backoff = IDLE_POLL_MIN
+                log.info("Idle for %ds; pausing reminders", seconds)
+                self.on_idle(self.idle_since)
+            delay = self._backoff
+            self._backoff = min(self._backoff * 2, IDLE_POLL_MAX)
+        else:
+            if self.idle_since is not None:
+                away = now - seconds - self.idle_since
+                self.idle_since = None
+                log.info("Back after %ds; resuming reminders", away)
+                self.on_active(away)
+            # Nothing can change until the idle time could reach the threshold.
+            delay = max(self.threshold - seconds, ACTIVE_POLL_MIN)
+        self._schedule(delay)
+
+    def _schedule(self, delay: float) -> None:
+        if self._job is None:
+            self._job = self.scheduler.call_later(delay, self.sample, "idle-sample")
+        else:
+            self.scheduler.reschedule(self._job, delay)
@@ -0,0 +1,86 @@
+"""Append-only event journal for stats persistence.
+
+Each stats event is one newline-terminated JSON record carrying a
+monotonically increasing sequence number. Appends are a single write() on
+an O_APPEND descriptor, so a crash can at worst leave one torn trailing
+line. Replay skips it, and the next append first ends it with a newline so
+the torn bytes can't run into a good record. Compaction folds records into
+the snapshot and then drops everything the snapshot already covers, using
+the sequence number to make replay idempotent if the process dies between
+the two steps.
+"""
+
+import json
+import logging
+import os
+import threading
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+
+class Journal:
+    """Line-oriented JSON journal with atomic truncation."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, records: Iterable[dict]) -> int:
+        """Append records in one write. Returns the number of bytes written."""
+        payload = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records)
+        if not payload:
+            return 0
+        data = payload.encode()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                size = os.fstat(fd).st_size
+                if size and os.pread(fd, 1, size - 1) != b"\n":
+                    # A crash tore the last append; keep it on a line of its own.
+                    data = b"\n" + data
+                os.write(fd, data)
+            finally:
+                os.close(fd)
+        return len(data)
+
+    def replay(self, after_seq: int = 0) -> Iterator[dict]:
+        """Yield well-formed records with a sequence number above after_seq."""
+        try:
+            f = open(self.path)
+        except FileNotFoundError:
+            return
+        with f:
+            for lineno, line in enumerate(f, 1):
+                try:
+                    record = json.loads(line)
+                    seq = int(record["seq"])
+                except (ValueError, TypeError, KeyError):
+                    # Torn write from a crash, or hand-edited garbage.
+                    log.warning("Skipping malformed journal line %d", lineno)
+                    continue
+                if seq > after_seq:
+                    yield record
+
+    def truncate_through(self, seq: int) -> None:
+        """Drop every record with a sequence number <= seq.
+
+        Records appended concurrently are preserved: the rewrite happens
+        under the append lock and uses tmp + rename like every other write.
+        """
+        with self._lock:
+            keep = list(self.replay(after_seq=seq))
+            if not keep:
+                self.path.unlink(missing_ok=True)
+                return
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp, "w") as f:
+                for record in keep:
+                    f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            os.chmod(tmp, 0o600)
+            tmp.replace(self.path)
+
+    def exists(self) -> bool:
+        return self.path.exists()
@@ -0,0 +1,220 @@
+"""In-process instrumentation with a local-only export.
+
+A handful of fixed histograms and counters cover the paths that decide
+whether the app feels responsive: stats writes, config parsing,
+notification delivery and reminder lateness. Instrumented code calls
+observe()/inc() unconditionally; while metrics are disabled (the default)
+those return after a single flag check, so the cost is a function call.
+
+export() writes a snapshot into a directory the caller chooses, either
+as JSON or in the Prometheus text exposition format (suitable for
+node_exporter's textfile collector). Nothing is ever sent anywhere.
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+EXPORT_FORMATS = ("off", "json", "prometheus")
+EXPORT_FILES = {"json": "metrics.json", "prometheus": "metrics.prom"}
+# Seconds between periodic exports while enabled
+EXPORT_INTERVAL = 60
+
+_enabled = False
+_registry: dict[str, "Histogram | Counter"] = {}
+
+
+def enable() -> None:
+    global _enabled
+    _enabled = True
+
+
+def disable() -> None:
+    global _enabled
+    _enabled = False
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def exponential_buckets(start: float, factor: float, count: int) -> tuple[float, ...]:
+    """Upper bounds start, start*factor, ... (count of them)."""
+    return tuple(start * factor**i for i in range(count))
+
+
+class Histogram:
+    """Fixed-bucket histogram; buckets are upper bounds, +Inf is implicit."""
+
+    def __init__(self, name: str, help: str, buckets: tuple[float, ...]):
+        self.name = name
+        self.help = help
+        self.bounds = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self.reset()
+        _registry[name] = self
+
+    def reset(self) -> None:
+        self._counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        if not _enabled:
+            return
+        i = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self._counts[i] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def observe_since(self, start: float) -> None:
+        """Observe the seconds elapsed since a time.perf_counter() reading."""
+        if _enabled:
+            self.observe(time.perf_counter() - start)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (max if in +Inf)."""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = q * self.count
+            seen = 0
+            for bound, n in zip(self.bounds, self._counts, strict=False):
+                seen += n
+                if seen >= rank:
+                    return min(bound, self.max)
+            return self.max
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            cumulative, seen = {}, 0
+            for bound, n in zip(self.bounds, self._counts, strict=False):
+                seen += n
+                cumulative[_fmt(bound)] = seen
+            cumulative["+Inf"] = self.count
+            data = {"count": self.count, "sum": self.sum, "max": self.max}
+        data.update(p50=self.quantile(0.5), p99=self.quantile(0.99), buckets=cumulative)
+        return data
+
+    def _prometheus(self) -> list[str]:
+        snap = self.snapshot()
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for le, n in snap["buckets"].items():
+            lines.append(f'{self.name}_bucket{{le="{le}"}} {n}')
+        lines.append(f"{self.name}_sum {_fmt(snap['sum'])}")
+        lines.append(f"{self.name}_count {snap['count']}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter, optionally split by one label."""
+
+    def __init__(self, name: str, help: str, label: str | None = None):
+        self.name = name
+        self.help = help
+        self.label = label
+        self._lock = threading.Lock()
+        self.reset()
+        _registry[name] = self
+
+    def reset(self) -> None:
+        self._values: dict[str, int] = {}
+
+    def inc(self, value: str = "", n: int = 1) -> None:
+        if not _enabled:
+            return
+        with self._lock:
+            self._values[value] = self._values.get(value, 0) + n
+
+    def snapshot(self) -> dict[str, int] | int:
+        with self._lock:
+            if self.label is None:
+                return self._values.get("", 0)
+            return dict(self._values)
+
+    def _prometheus(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        snap = self.snapshot()
+        if self.label is None:
+            lines.append(f"{self.name} {snap}")
+        else:
+            for value, n in sorted(snap.items()):
+                lines.append(f'{self.name}{{{self.label}="{value}"}} {n}')
+        return lines
+
+
+def snapshot() -> dict:
+    """Every metric's current values, keyed by name."""
+    return {name: metric.snapshot() for name, metric in sorted(_registry.items())}
+
+
+def prometheus_text() -> str:
+    lines = []
+    for _, metric in sorted(_registry.items()):
+        lines.extend(metric._prometheus())
+    return "\n".join(lines) + "\n"
+
+
+def export(directory: Path, fmt: str) -> Path | None:
+    """Atomically write the current snapshot to directory. Returns the path."""
+    if fmt not in EXPORT_FILES:
+        return None
+    if fmt == "json":
+        content = json.dumps({"time": time.time(), "metrics": snapshot()}, indent=2)
+    else:
+        content = prometheus_text()
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / EXPORT_FILES[fmt]
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w") as f:
+        f.write(content)
+    os.chmod(tmp, 0o600)
+    tmp.replace(path)
+    return path
+
+
+def reset() -> None:
+    """Zero every metric (used by tests)."""
+    for metric in _registry.values():
+        with metric._lock:
+            metric.reset()
+
+
+def _fmt(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+_SECONDS = exponential_buckets(1e-5, 4, 11)  # 10us .. ~10s
+
+PERSIST_SECONDS = Histogram(
+    "breathebreak_stats_persist_seconds", "Time spent writing stats to disk.", _SECONDS
+)
+PERSIST_BYTES = Histogram(
+    "breathebreak_stats_persist_bytes",
+    "Bytes written per stats write.",
+    exponential_buckets(64, 4, 10),  # 64B .. 16MiB
+)
+CONFIG_PARSE_SECONDS = Histogram(
+    "breathebreak_config_parse_seconds", "Time spent parsing and validating config.yaml.", _SECONDS
+)
+CONFIG_LOADS = Counter(
+    "breathebreak_config_loads_total", "Config.load() calls by outcome.", label="result"
+)
+NOTIFY_SECONDS = Histogram(
+    "breathebreak_notify_delivery_seconds", "Notification backend call duration.", _SECONDS
+)
+NOTIFY_OUTCOMES = Counter(
+    "breathebreak_notifications_total", "Notifications by outcome.", label="outcome"
+)
+TICK_LATENESS = Histogram(
+    "breathebreak_tick_lateness_seconds",
+    "How long after its deadline each reminder fired.",
+    exponential_buckets(1e-3, 4, 9),  # 1ms .. ~65s
+)
@@ -1,19 +1,320 @@
-"""Notification dispatch — thin wrapper around rumps.notification.
+"""Notification dispatch — a queue in front of a platform backend.
 
 Isolates the rest of the codebase from notification failures so a
-single bad notification can't crash the app.
+single bad notification can't crash the app. A NotificationBackend shows
+the notification:
+
+- RumpsBackend goes through rumps.notification (macOS). The menu bar
+  app uses it with main_thread=True, which hands each call to the Cocoa
+  run loop as NSUserNotificationCenter requires; without a running loop
+  (--headless) it calls rumps directly.
+- DBusBackend (see dbusnotify.py) calls the freedesktop notification
+  service over one persistent session-bus connection (Linux).
+
+default_backend() picks one on the first notification and the choice is
+cached, so importing this module stays cheap and later calls skip the
+import machinery and the connection setup. A driver that knows better
+installs its own with use_backend().
+
+notify() only enqueues; a Dispatcher worker thread does the delivery, so
+a hung notification center can't stall a timer callback. The queue is
+bounded and coalesces on Notification.kind: a newer notification replaces
+a queued one of the same kind, one without a kind is never merged, and
+when the queue is full the oldest entry is dropped. Deliveries run on one
+long-lived delivery thread under a timeout; a delivery that hangs is
+abandoned and, while it stays hung, later ones fail fast instead of
+piling up threads. Counters for every outcome are available from
+counts().
 """
 
+import atexit
 import logging
+import queue
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from breathebreak import metrics
 
 log = logging.getLogger(__name__)
 
+QUEUE_SIZE = 16
+DELIVERY_TIMEOUT = 5.0
+# Seconds to wait for the run loop; inside DELIVERY_TIMEOUT, so a stalled
+# loop fails one delivery instead of leaving the dispatcher hung.
+MAIN_THREAD_TIMEOUT = 2.0
 
-def notify(title: str, subtitle: str, message: str, sound: bool = True) -> None:
-    """Send a macOS notification. Logs and swallows errors."""
-    try:
+_backend: "NotificationBackend | None" = None
+_dispatcher: "Dispatcher | None" = None
+_dispatcher_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class Notification:
+    title: str
+    subtitle: str
+    message: str
+    sound: bool = True
+    # Notifications of one kind supersede each other, queued or on screen;
+    # an empty kind marks a one-off message that stands on its own.
+    kind: str = ""
+
+
+class NotificationBackend(ABC):
+    """Shows notifications on the desktop."""
+
+    name = "none"
+
+    @abstractmethod
+    def deliver(self, note: Notification) -> None:
+        """Show note; may raise, and may block up to the dispatcher's timeout."""
+
+    def close(self) -> None:  # noqa: B027 - optional; most backends hold nothing
+        """Release any connection the backend holds."""
+
+
+class RumpsBackend(NotificationBackend):
+    """macOS notifications through rumps.
+
+    With main_thread=True (create it on the main thread) each notification
+    is shown from the Cocoa run loop while NSApplication is running.
+    """
+
+    name = "rumps"
+
+    def __init__(self, main_thread: bool = False, timeout: float = MAIN_THREAD_TIMEOUT):
         import rumps
 
-        rumps.notification(title, subtitle, message, sound=sound)
+        self._notify = rumps.notification
+        self._app = None
+        self.timeout = timeout
+        if main_thread:
+            from AppKit import NSApplication
+            from PyObjCTools import AppHelper
+
+            self._app = NSApplication.sharedApplication()
+            self._call_after = AppHelper.callAfter
+
+    def deliver(self, note: Notification) -> None:
+        if self._app is None or not self._app.isRunning():
+            self._notify(note.title, note.subtitle, note.message, sound=note.sound)
+            return
+        # Cocoa notification APIs are main-thread only: hand the call to the
+        # run loop and wait for it, so failures still reach the dispatcher.
+        done = threading.Event()
+        error: list[BaseException] = []
+
+        def show():
+            try:
+                self._notify(note.title, note.subtitle, note.message, sound=note.sound)
+            except Exception as exc:
+                error.append(exc)
+            finally:
+                done.set()
+
+        self._call_after(show)
+        if not done.wait(self.timeout):
+            raise TimeoutError("main thread did not show the notification")
+        if error:
+            raise error[0]
+
+
+def default_backend() -> NotificationBackend:
+    """The notification backend for this platform.
+
+    On Linux the session bus is tried first. Elsewhere, or without a bus,
+    this is RumpsBackend, which raises ImportError if rumps is missing.
+    """
+    if sys.platform.startswith("linux"):
+        from breathebreak.dbusnotify import DBusBackend, DBusError
+
+        try:
+            return DBusBackend()
+        except (OSError, DBusError) as e:
+            log.info("D-Bus notifications unavailable: %s", e)
+    return RumpsBackend()
+
+
+class _Attempt:
+    """One notification handed to the delivery thread."""
+
+    def __init__(self, note: Notification):
+        self.note = note
+        self.done = threading.Event()
+        self.error: BaseException | None = None
+
+
+class Dispatcher:
+    """Delivers notifications from a bounded, coalescing queue on a daemon thread."""
+
+    COUNTERS = ("submitted", "delivered", "coalesced", "dropped", "failed", "timed_out")
+
+    def __init__(
+        self,
+        deliver: Callable[[Notification], None] | None = None,
+        maxsize: int = QUEUE_SIZE,
+        timeout: float = DELIVERY_TIMEOUT,
+        name: str = "breathebreak-notifier",
+    ):
+        self._deliver = deliver or _deliver_default
+        self.maxsize = max(1, maxsize)
+        self.timeout = timeout
+        self._name = name
+        self._cond = threading.Condition()
+        self._queue: OrderedDict = OrderedDict()
+        self._busy = False
+        self._closed = False
+        self._thread: threading.Thread | None = None
+        # Deliveries run here, so the queue worker can give up on a hung one.
+        self._inbox: queue.SimpleQueue = queue.SimpleQueue()
+        self._deliverer: threading.Thread | None = None
+        self._hung: _Attempt | None = None
+        self._counts = dict.fromkeys(self.COUNTERS, 0)
+
+    def submit(self, note: Notification) -> bool:
+        """Queue note for delivery. Never blocks; returns False if closed."""
+        with self._cond:
+            if self._closed:
+                self._count("dropped")
+                return False
+            self._count("submitted")
+            if note.kind and note.kind in self._queue:
+                self._count("coalesced")
+                self._queue[note.kind] = note
+            else:
+                if len(self._queue) >= self.maxsize:
+                    self._queue.popitem(last=False)
+                    self._count("dropped")
+                self._queue[note.kind or object()] = note
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+                self._thread.start()
+                atexit.register(self._close_at_exit)
+            self._cond.notify_all()
+        return True
+
+    def counts(self) -> dict[str, int]:
+        """Snapshot of the outcome counters plus the current queue depth."""
+        with self._cond:
+            return {**self._counts, "queued": len(self._queue)}
+
+    def drain(self, timeout: float | None = None) -> bool:
+        """Wait until everything queued so far is handled. False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue and not self._busy, timeout)
+
+    def close(self, timeout: float | None = DELIVERY_TIMEOUT) -> None:
+        """Deliver what is queued (within timeout), then stop the worker."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            atexit.unregister(self._close_at_exit)
+        if self._deliverer is not None:
+            self._inbox.put(None)
+        with self._cond:
+            self._count("dropped", len(self._queue))
+            self._queue.clear()
+
+    def _close_at_exit(self) -> None:
+        self.close(timeout=1.0)
+
+    def _count(self, outcome: str, n: int = 1) -> None:
+        # Caller holds self._cond.
+        self._counts[outcome] += n
+        if n:
+            metrics.NOTIFY_OUTCOMES.inc(outcome, n)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                _, note = self._queue.popitem(last=False)
+                self._busy = True
+            outcome = self._deliver_with_timeout(note)
+            with self._cond:
+                self._count(outcome)
+                self._busy = False
+                self._cond.notify_all()
+
+    def _deliver_with_timeout(self, note: Notification) -> str:
+        if self._hung is not None:
+            if not self._hung.done.is_set():
+                log.warning("Notification backend still hung; dropping %r", note.subtitle)
+                return "failed"
+            self._hung = None
+        if self._deliverer is None:
+            self._deliverer = threading.Thread(
+                target=self._deliver_loop, name=f"{self._name}-deliver", daemon=True
+            )
+            self._deliverer.start()
+
+        attempt = _Attempt(note)
+        start = time.perf_counter()
+        self._inbox.put(attempt)
+        finished = attempt.done.wait(self.timeout)
+        metrics.NOTIFY_SECONDS.observe_since(start)
+        if not finished:
+            log.warning("Notification delivery timed out after %.1fs", self.timeout)
+            self._hung = attempt
+            return "timed_out"
+        if attempt.error is not None:
+            log.warning("Failed to deliver notification", exc_info=attempt.error)
+            return "failed"
+        return "delivered"
+
+    def _deliver_loop(self) -> None:
+        while (attempt := self._inbox.get()) is not None:
+            try:
+                self._deliver(attempt.note)
+            except Exception as exc:
+                attempt.error = exc
+            attempt.done.set()
+
+
+def _deliver_default(note: Notification) -> None:
+    global _backend
+    if _backend is None:
+        _backend = default_backend()
+    _backend.deliver(note)
+
+
+def use_backend(backend: NotificationBackend) -> None:
+    """Deliver notify()'s notifications through backend from now on."""
+    global _backend
+    _backend = backend
+
+
+def get_dispatcher() -> Dispatcher:
+    """The process-wide dispatcher used by notify(), created on first use."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = Dispatcher()
+        return _dispatcher
+
+
+def counts() -> dict[str, int]:
+    """Outcome counters of the process-wide dispatcher."""
+    return get_dispatcher().counts()
+
+
+def notify(title: str, subtitle: str, message: str, sound: bool = True, kind: str = "") -> None:
+    """Queue a desktop notification. Returns immediately; never raises.
+
+    A notification with a kind replaces an earlier one of the same kind.
+    """
+    try:
+        get_dispatcher().submit(Notification(title, subtitle, message, sound, kind))
     except Exception:
-        log.warning("Failed to deliver notification", exc_info=True)
+        log.warning("Failed to queue notification", exc_info=True)
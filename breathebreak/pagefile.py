@@ -0,0 +1,119 @@
+"""Seekable, column-major on-disk layout for daily stats.
+
+stats.dat is a fixed header followed by a presence byte per day and then
+one contiguous little-endian int64 array per counter, all indexed by the
+day's ordinal relative to the first stored day:
+
+    header | present[rows] | pad to 8 | col0[rows] | col1[rows] | ...
+
+Any day range of any column is therefore one slice at a computable offset.
+The reader memory-maps the file so startup can pull in just the recent
+window and page older rows in later without parsing anything else. Writes
+go through tmp + rename like the JSON snapshot, so a mapped reader keeps
+seeing a consistent (old) file until it reopens.
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+
+from breathebreak.daytable import COUNTERS, le_bytes
+
+MAGIC = b"BBPG"
+VERSION = 1
+# magic, version, column count, base ordinal, rows, present count, journal seq
+HEADER = struct.Struct("<4sHHqqqq")
+
+
+class PageFileError(ValueError):
+    """Raised when stats.dat is truncated or not in the expected format."""
+
+
+def _pad8(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def write_pages(path: Path, base: int, present: bytes, columns: dict, seq: int) -> int:
+    """Atomically write a page file. Returns the number of bytes written."""
+    rows = len(present)
+    header = HEADER.pack(MAGIC, VERSION, len(COUNTERS), base, rows, present.count(1), seq)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    written = 0
+    with open(tmp, "wb") as f:
+        written += f.write(header)
+        written += f.write(present)
+        written += f.write(bytes(_pad8(rows) - rows))
+        for name in COUNTERS:
+            written += f.write(columns[name])
+    os.chmod(tmp, 0o600)
+    tmp.replace(path)
+    return written
+
+
+class PageReader:
+    """Random access to the rows of a page file through mmap."""
+
+    def __init__(self, path: Path):
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER.size:
+                raise PageFileError(f"{path} is truncated")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, ncols, base, rows, count, seq = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION or ncols != len(COUNTERS):
+            self.close()
+            raise PageFileError(f"{path} is not a BreatheBreak page file")
+        self.base = base
+        self.rows = rows
+        self.count = count
+        self.seq = seq
+        self._cols_off = HEADER.size + _pad8(rows)
+        if size < self._cols_off + len(COUNTERS) * rows * 8:
+            self.close()
+            raise PageFileError(f"{path} is truncated")
+
+    @classmethod
+    def open(cls, path: Path) -> "PageReader | None":
+        """Open path, or return None if it does not exist."""
+        try:
+            return cls(path)
+        except FileNotFoundError:
+            return None
+
+    @property
+    def last(self) -> int:
+        """Ordinal of the last stored row."""
+        return self.base + self.rows - 1
+
+    def read(self, first: int, last: int) -> tuple[bytearray, dict]:
+        """Rows for ordinals first..last, zero-filled outside the file's range."""
+        n = last - first + 1
+        present = bytearray(n)
+        cols = {name: array("q", bytes(8 * n)) for name in COUNTERS}
+        lo = max(first, self.base)
+        hi = min(last, self.last)
+        if lo > hi:
+            return present, cols
+        r0, r1 = lo - self.base, hi - self.base + 1
+        at = lo - first
+        present[at : at + r1 - r0] = self._map[HEADER.size + r0 : HEADER.size + r1]
+        for i, name in enumerate(COUNTERS):
+            off = self._cols_off + i * self.rows * 8
+            chunk = array("q")
+            chunk.frombytes(self._map[off + r0 * 8 : off + r1 * 8])
+            if sys.byteorder != "little":
+                chunk.byteswap()
+            cols[name][at : at + r1 - r0] = chunk
+        return present, cols
+
+    def read_raw(self, first: int, last: int) -> tuple[bytes, dict]:
+        """Like read(), but as little-endian bytes ready to be written back."""
+        present, cols = self.read(first, last)
+        return bytes(present), {name: le_bytes(col) for name, col in cols.items()}
+
+    def close(self) -> None:
+        self._map.close()
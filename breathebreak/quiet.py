@@ -0,0 +1,489 @@
+"""Quiet hours — suppress reminders during set hours and calendar meetings.
+
+Two sources mark time as quiet:
+
+- quiet_hours rules from the config, such as "22:00-08:00" or
+  "Mon-Fri 12:00-13:00". A window that ends at or before its start runs
+  past midnight; the days name the day it starts.
+- busy events in local .ics files (calendar_files). Timed events that
+  are not transparent or cancelled count, including daily, weekly,
+  monthly and yearly recurrences with INTERVAL, COUNT, UNTIL, BYDAY,
+  EXDATE and moved instances (RECURRENCE-ID). All-day events mark days,
+  not meetings, and are ignored.
+
+Both are expanded over a rolling HORIZON_DAYS window into an
+IntervalIndex: sorted, disjoint spans with overlapping and touching ones
+merged. "Is this moment quiet, and until when?" is then one bisect,
+however many recurring events were expanded, and the answer is already
+the end of the whole quiet stretch. The runners use it to move the
+reminder straight to that end instead of firing suppressed ticks.
+
+Calendar files are read line by line, never whole, and each file's
+events are cached on its (inode, size, mtime). A tick costs one stat per
+calendar. Only a changed file is parsed again, and the index is rebuilt
+only when a source changes or the horizon runs out.
+"""
+
+import logging
+import os
+import re
+from array import array
+from bisect import bisect_right
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, timezone, tzinfo
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+# Days of quiet windows and calendar events expanded ahead of now.
+HORIZON_DAYS = 7
+# Rebuild once less than this much of the horizon is left.
+_REFILL = 86400.0
+_DAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+_BYDAY = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+_RULE = re.compile(
+    r"^(?:(?P<days>[A-Za-z,\- ]+?)\s+)?(?P<start>\d{1,2}:\d{2})\s*-\s*(?P<end>\d{1,2}:\d{2})$"
+)
+_DURATION = re.compile(
+    r"^(?P<sign>[+-])?P(?:(?P<w>\d+)W)?(?:(?P<d>\d+)D)?"
+    r"(?:T(?:(?P<h>\d+)H)?(?:(?P<m>\d+)M)?(?:(?P<s>\d+)S)?)?$"
+)
+
+# path -> (stat signature, events)
+_calendars: dict = {}
+
+
+class IntervalIndex:
+    """Sorted, disjoint [start, end) spans; overlapping or touching spans merge."""
+
+    def __init__(self, spans: Iterable[tuple[float, float]] = ()):
+        starts, ends = array("d"), array("d")
+        for start, end in sorted(spans):
+            if end <= start:
+                continue
+            if ends and start <= ends[-1]:
+                if end > ends[-1]:
+                    ends[-1] = end
+            else:
+                starts.append(start)
+                ends.append(end)
+        self._starts = starts
+        self._ends = ends
+
+    def until(self, t: float) -> float | None:
+        """End of the span containing t, or None when t is outside every span."""
+        i = bisect_right(self._starts, t) - 1
+        if i >= 0 and t < self._ends[i]:
+            return self._ends[i]
+        return None
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+
+@dataclass(frozen=True)
+class QuietRule:
+    """A daily window, in local minutes since midnight, on some weekdays."""
+
+    days: frozenset
+    start: int
+    end: int
+
+    def spans(self, first: date, last: date) -> Iterator[tuple[float, float]]:
+        """Epoch spans for windows starting on each day in [first, last]."""
+        length = (self.end - self.start) % 1440 or 1440
+        day = first
+        while day <= last:
+            if day.weekday() in self.days:
+                start = datetime.combine(day, time()) + timedelta(minutes=self.start)
+                yield start.timestamp(), (start + timedelta(minutes=length)).timestamp()
+            day += timedelta(days=1)
+
+
+def parse_rule(text: str) -> QuietRule | None:
+    """Parse "[days] HH:MM-HH:MM"; None if malformed.
+
+    days is a comma list of names or ranges ("Mon-Fri", "Sat,Sun",
+    "Fri-Mon"); every day when omitted. 24:00 is allowed as an end.
+    """
+    m = _RULE.match(str(text).strip())
+    if m is None:
+        return None
+    start, end = _minutes(m["start"]), _minutes(m["end"])
+    if start is None or end is None or start == 1440 or start == end:
+        return None
+    days = _weekdays(m["days"]) if m["days"] else frozenset(range(7))
+    if not days:
+        return None
+    return QuietRule(days, start, end)
+
+
+@dataclass
+class BusyEvent:
+    """A timed VEVENT; start is timezone-aware or naive local time."""
+
+    start: datetime
+    duration: timedelta
+    uid: str = ""
+    rrule: dict = field(default_factory=dict)
+    exdates: set = field(default_factory=set)
+    # Start of the instance this one replaces, as a timestamp.
+    recurrence_id: float | None = None
+
+    def spans(self, lo: float, hi: float) -> Iterator[tuple[float, float]]:
+        """Occurrence spans overlapping [lo, hi)."""
+        seconds = self.duration.total_seconds()
+        for start in _occurrences(self, lo - seconds, hi):
+            ts = start.timestamp()
+            if ts in self.exdates or ts + seconds <= lo:
+                continue
+            yield ts, ts + seconds
+
+
+def read_calendar(path: Path) -> list[BusyEvent]:
+    """Busy events in an .ics file, cached until the file changes.
+
+    A missing or unreadable file has no events.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        _calendars.pop(path, None)
+        return []
+    sig = (st.st_ino, st.st_size, st.st_mtime_ns)
+    cached = _calendars.get(path)
+    if cached is not None and cached[0] == sig:
+        return cached[1]
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            events = list(parse_ics(f))
+    except OSError:
+        log.warning("Could not read calendar %s", path, exc_info=True)
+        events = []
+    # A moved instance replaces the occurrence it names in its series.
+    moved = {(e.uid, e.recurrence_id) for e in events if e.recurrence_id is not None}
+    if moved:
+        for event in events:
+            if event.rrule and event.recurrence_id is None:
+                event.exdates.update(ts for uid, ts in moved if uid == event.uid)
+    _calendars[path] = (sig, events)
+    return events
+
+
+def parse_ics(lines: Iterable[str]) -> Iterator[BusyEvent]:
+    """Yield busy events from iCalendar lines as they are read."""
+    props: dict | None = None
+    depth = 0
+    for name, params, value in _properties(lines):
+        if name == "BEGIN":
+            if value.upper() == "VEVENT" and depth == 0:
+                props = {}
+            elif props is not None:
+                depth += 1
+        elif name == "END":
+            if props is not None and depth:
+                depth -= 1
+            elif props is not None and value.upper() == "VEVENT":
+                event = _event(props)
+                if event is not None:
+                    yield event
+                props = None
+        elif props is not None and not depth:
+            if name == "EXDATE":
+                props.setdefault(name, []).append((params, value))
+            else:
+                props.setdefault(name, (params, value))
+
+
+class QuietSchedule:
+    """Answers whether a moment is quiet, from rules and calendar files."""
+
+    def __init__(self, rules: Iterable[str] = (), calendars: Iterable[str] = ()):
+        self._index = IntervalIndex()
+        self._horizon = (0.0, 0.0)
+        self._sigs: tuple = ()
+        self.configure(rules, calendars)
+
+    def configure(self, rules: Iterable[str], calendars: Iterable[str]) -> None:
+        """Replace the rules and calendars; the index rebuilds on next use."""
+        self._rules = [rule for rule in map(parse_rule, rules) if rule is not None]
+        self._paths = [Path(p).expanduser() for p in calendars]
+        self._horizon = (0.0, 0.0)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._rules or self._paths)
+
+    def until(self, t: float) -> float | None:
+        """End of the quiet stretch containing t (epoch seconds), if any."""
+        if not self.enabled:
+            return None
+        sigs = tuple(_signature(path) for path in self._paths)
+        lo, hi = self._horizon
+        if sigs != self._sigs or not lo <= t < hi - _REFILL:
+            self._sigs = sigs
+            self._rebuild(t)
+        return self._index.until(t)
+
+    def _rebuild(self, t: float) -> None:
+        today = date.fromtimestamp(t)
+        first = today - timedelta(days=1)
+        last = today + timedelta(days=HORIZON_DAYS)
+        lo = datetime.combine(first, time()).timestamp()
+        hi = datetime.combine(last, time()).timestamp()
+        spans: list = []
+        for rule in self._rules:
+            spans.extend(rule.spans(first, last))
+        for path in self._paths:
+            for event in read_calendar(path):
+                spans.extend(event.spans(lo, hi))
+        self._index = IntervalIndex(spans)
+        self._horizon = (lo, hi)
+        log.debug("Quiet index rebuilt: %d spans", len(self._index))
+
+
+def _signature(path: Path) -> tuple | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def _minutes(text: str) -> int | None:
+    hours, minutes = map(int, text.split(":"))
+    if minutes >= 60 or hours * 60 + minutes > 1440:
+        return None
+    return hours * 60 + minutes
+
+
+def _weekdays(spec: str) -> frozenset:
+    days: set = set()
+    for part in spec.replace(" ", "").lower().split(","):
+        first, _, last = part.partition("-")
+        if first[:3] not in _DAYS or (last and last[:3] not in _DAYS):
+            return frozenset()
+        a = _DAYS.index(first[:3])
+        b = _DAYS.index(last[:3]) if last else a
+        days.update((a + i) % 7 for i in range((b - a) % 7 + 1))
+    return frozenset(days)
+
+
+def _properties(lines: Iterable[str]) -> Iterator[tuple[str, dict, str]]:
+    """Unfold content lines and split them into (NAME, params, value)."""
+    pending = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t"):
+            if pending is not None:
+                pending += line[1:]
+            continue
+        if pending is not None:
+            yield _split(pending)
+        pending = line
+    if pending is not None:
+        yield _split(pending)
+
+
+def _split(line: str) -> tuple[str, dict, str]:
+    head, _, value = line.partition(":")
+    name, *rest = head.split(";")
+    params = {}
+    for param in rest:
+        key, _, val = param.partition("=")
+        params[key.upper()] = val.strip('"')
+    return name.upper(), params, value
+
+
+def _event(props: dict) -> BusyEvent | None:
+    if "DTSTART" not in props:
+        return None
+    if props.get("TRANSP", ({}, ""))[1].upper() == "TRANSPARENT":
+        return None
+    if props.get("STATUS", ({}, ""))[1].upper() == "CANCELLED":
+        return None
+    try:
+        start = _datetime(*props["DTSTART"])
+        if start is None:
+            return None
+        if "DTEND" in props:
+            end = _datetime(*props["DTEND"])
+            duration = end - start if end is not None else timedelta()
+        elif "DURATION" in props:
+            duration = _duration(props["DURATION"][1])
+        else:
+            duration = timedelta()
+        if duration <= timedelta():
+            return None
+        rrule = _rrule(props["RRULE"][1], start) if "RRULE" in props else {}
+        exdates = set()
+        for params, value in props.get("EXDATE", ()):
+            for item in value.split(","):
+                when = _datetime(params, item)
+                if when is not None:
+                    exdates.add(when.timestamp())
+        recurrence_id = None
+        if "RECURRENCE-ID" in props:
+            when = _datetime(*props["RECURRENCE-ID"])
+            recurrence_id = when.timestamp() if when is not None else None
+    except (ValueError, OverflowError):
+        log.debug("Skipping malformed event %s", props.get("UID"))
+        return None
+    return BusyEvent(
+        start=start,
+        duration=duration,
+        uid=props.get("UID", ({}, ""))[1],
+        rrule=rrule,
+        exdates=exdates,
+        recurrence_id=recurrence_id,
+    )
+
+
+def _datetime(params: dict, value: str) -> datetime | None:
+    """A DATE-TIME value; None for all-day DATE values."""
+    value = value.strip()
+    if params.get("VALUE", "").upper() == "DATE" or len(value) == 8:
+        return None
+    if value.endswith("Z"):
+        return datetime.strptime(value[:-1], "%Y%m%dT%H%M%S").replace(tzinfo=timezone.utc)
+    naive = datetime.strptime(value, "%Y%m%dT%H%M%S")
+    tz = _zone(params["TZID"]) if "TZID" in params else None
+    # Floating times, and zones this system doesn't know, are local time.
+    return naive.replace(tzinfo=tz) if tz is not None else naive
+
+
+def _zone(name: str) -> tzinfo | None:
+    try:
+        from zoneinfo import ZoneInfo
+
+        return ZoneInfo(name)
+    except (ValueError, OSError, ImportError, KeyError):
+        return None
+
+
+def _duration(value: str) -> timedelta:
+    m = _DURATION.match(value.strip())
+    if m is None:
+        raise ValueError(f"bad duration {value!r}")
+    parts = {k: int(v) for k, v in m.groupdict().items() if v and k != "sign"}
+    delta = timedelta(
+        weeks=parts.get("w", 0),
+        days=parts.get("d", 0),
+        hours=parts.get("h", 0),
+        minutes=parts.get("m", 0),
+        seconds=parts.get("s", 0),
+    )
+    return -delta if m["sign"] == "-" else delta
+
+
+def _rrule(value: str, start: datetime) -> dict:
+    """RRULE parts, with INTERVAL, COUNT and UNTIL converted; ValueError if malformed."""
+    rule = {}
+    for part in value.split(";"):
+        key, _, val = part.partition("=")
+        rule[key.upper()] = val.upper()
+    if "INTERVAL" in rule:
+        rule["INTERVAL"] = max(1, int(rule["INTERVAL"] or 1))
+    if "COUNT" in rule:
+        rule["COUNT"] = int(rule["COUNT"])
+    if "UNTIL" in rule:
+        rule["UNTIL"] = _until(rule["UNTIL"], start)
+    return rule
+
+
+def _occurrences(event: BusyEvent, lo: float, hi: float) -> Iterator[datetime]:
+    """Start times of event from lo (roughly) until hi, in the event's zone."""
+    start = event.start
+    rule = event.rrule
+    if not rule:
+        if start.timestamp() < hi:
+            yield start
+        return
+    freq = rule.get("FREQ")
+    interval = rule.get("INTERVAL", 1)
+    count = rule.get("COUNT")
+    until = rule.get("UNTIL")
+    byday = {_BYDAY.index(d) for d in rule.get("BYDAY", "").split(",") if d in _BYDAY}
+    if any(key in rule for key in ("BYMONTHDAY", "BYSETPOS", "BYMONTH", "BYHOUR")) or (
+        rule.get("BYDAY") and len(byday) != len(rule["BYDAY"].split(","))
+    ):
+        # Rules such as "second Tuesday" are not expanded; keep the first.
+        log.debug("Unsupported RRULE %s for %s", rule, event.uid)
+        if start.timestamp() < hi:
+            yield start
+        return
+
+    if freq == "DAILY":
+        step, periods = timedelta(days=interval), _skip(start, lo, interval, count)
+    elif freq == "WEEKLY":
+        step, periods = timedelta(weeks=interval), _skip(start, lo, 7 * interval, count)
+        if not byday:
+            byday = {start.weekday()}
+    elif freq in ("MONTHLY", "YEARLY"):
+        step, periods = None, 0
+    else:
+        if start.timestamp() < hi:
+            yield start
+        return
+
+    emitted = 0
+    period = periods
+    while True:
+        if step is not None:
+            anchor = start + step * period
+            if freq == "WEEKLY":
+                monday = anchor - timedelta(days=anchor.weekday())
+                candidates = [monday + timedelta(days=d) for d in sorted(byday)]
+            else:
+                candidates = [anchor]
+        else:
+            months = period * interval * (12 if freq == "YEARLY" else 1)
+            candidates = [c for c in [_add_months(start, months)] if c is not None]
+        period += 1
+        for when in candidates:
+            if when < start:
+                continue
+            if byday and freq == "DAILY" and when.weekday() not in byday:
+                continue
+            if until is not None and when > until:
+                return
+            emitted += 1
+            if count is not None and emitted > count:
+                return
+            if when.timestamp() >= hi:
+                return
+            yield when
+        if step is None and months > 12 * 200:
+            return
+
+
+def _skip(start: datetime, lo: float, days: int, count: int | None) -> int:
+    """Whole periods that end before lo; none when COUNT needs every one."""
+    if count is not None:
+        return 0
+    behind = (lo - start.timestamp()) // (days * 86400)
+    return max(0, int(behind) - 1)
+
+
+def _until(value: str, start: datetime) -> datetime:
+    value = value.strip()
+    if len(value) == 8:
+        end = datetime.strptime(value, "%Y%m%d") + timedelta(days=1) - timedelta(seconds=1)
+    elif value.endswith("Z"):
+        end = datetime.strptime(value[:-1], "%Y%m%dT%H%M%S").replace(tzinfo=timezone.utc)
+    else:
+        end = datetime.strptime(value, "%Y%m%dT%H%M%S")
+    # Compare in the event's own terms: both aware, or both naive local.
+    if start.tzinfo is None:
+        return end.astimezone().replace(tzinfo=None) if end.tzinfo else end
+    return end if end.tzinfo else end.replace(tzinfo=start.tzinfo)
+
+
+def _add_months(when: datetime, months: int) -> datetime | None:
+    """when moved by whole months; None where that day doesn't exist."""
+    month = when.month - 1 + months
+    try:
+        return when.replace(year=when.year + month // 12, month=month % 12 + 1)
+    except ValueError:
+        return None
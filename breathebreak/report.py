@@ -0,0 +1,223 @@
+"""Historical analytics over the full stats history.
+
+`python -m breathebreak report` prints weekly and monthly rollups,
+compliance trends, focus-time percentiles, compliance streaks and
+day-of-week patterns, as text or JSON.
+
+Everything is computed from whole DayTable columns at once: prefix sums
+from itertools.accumulate, weekday buckets as stride-7 slices, and
+element-wise comparisons through map() over operator functions. Per-day
+work therefore runs inside C builtins rather than in a Python loop, and
+twenty years of history reports in a few milliseconds. Python-level
+loops only run per week or per month.
+"""
+
+import json
+import operator
+import statistics
+from array import array
+from datetime import date
+from itertools import accumulate, compress, repeat
+
+from breathebreak.daytable import DayTable
+
+# A day counts toward a streak when at least this share of reminders got a break.
+COMPLIANT_RATE = (4, 5)
+# Weekly compliance points used for the "recent" trend.
+TREND_WEEKS = 12
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+_TOTALS = ("reminders_sent", "breaks_acknowledged", "focus_seconds")
+
+
+def build(table: DayTable, daily_from: date | None = None) -> dict:
+    """Compute the full report for table as plain JSON-ready data.
+
+    Rows before daily_from are retention rollups (see retention.py). They
+    count toward totals, rollups and trends, but not toward per-day
+    figures such as percentiles, streaks and weekday patterns.
+    """
+    base, present, cols = table.columns()
+    if not present.count(1):
+        return {"days": 0}
+    prefix = {name: array("q", accumulate(cols[name], initial=0)) for name in _TOTALS}
+    first = base + present.index(1)
+    last = base + len(present) - 1 - present[::-1].index(1)
+    weeks = _weekly(base, len(present), prefix, present)
+    # Per-day figures only look at rows still stored per day.
+    cut = max(0, daily_from.toordinal() - base) if daily_from else 0
+    daily_base, daily_present = base + cut, present[cut:]
+    daily = {name: col[cut:] for name, col in cols.items()} if cut else cols
+    return {
+        "days": daily_present.count(1),
+        "daily_from": daily_from.isoformat() if daily_from else None,
+        "first": date.fromordinal(first).isoformat(),
+        "last": date.fromordinal(last).isoformat(),
+        "totals": {name: prefix[name][-1] for name in _TOTALS},
+        "compliance": _rate(prefix["breaks_acknowledged"][-1], prefix["reminders_sent"][-1]),
+        "trend": {
+            "all": _slope([w["compliance"] for w in weeks if w["reminders_sent"]]),
+            "recent": _slope(
+                [w["compliance"] for w in weeks[-TREND_WEEKS:] if w["reminders_sent"]]
+            ),
+        },
+        "focus_percentiles": _percentiles(compress(daily["focus_seconds"], daily_present)),
+        "streaks": _streaks(daily["reminders_sent"], daily["breaks_acknowledged"]),
+        "weekdays": _weekdays(daily_base, daily_present, daily),
+        "weekly": weeks,
+        "monthly": _monthly(base, len(present), prefix, present),
+    }
+
+
+def render_text(report: dict, weeks: int = 8, months: int = 12) -> str:
+    if "totals" not in report:
+        return "No break data recorded yet."
+    totals = report["totals"]
+    focus_h = totals["focus_seconds"] // 3600
+    streaks = report["streaks"]
+    pct = report["focus_percentiles"]
+    lines = [
+        f"History: {report['first']} to {report['last']} ({report['days']} days with data)",
+        *(
+            [f"  Rolled up into weeks/months before {report['daily_from']}"]
+            if report["daily_from"]
+            else []
+        ),
+        f"  Reminders sent: {totals['reminders_sent']}",
+        f"  Breaks taken:   {totals['breaks_acknowledged']}",
+        f"  Compliance:     {report['compliance']:.0%}",
+        f"  Focus time:     {focus_h}h",
+        f"  Trend:          {_fmt_slope(report['trend']['all'])} overall, "
+        f"{_fmt_slope(report['trend']['recent'])} over the last {TREND_WEEKS} weeks",
+        f"  Focus per day:  p50 {_hm(pct['p50'])}, p90 {_hm(pct['p90'])}, max {_hm(pct['max'])}",
+        f"  Streaks:        longest {streaks['longest']} days, current {streaks['current']} days",
+        "",
+        "Day of week      compliance  avg focus",
+    ]
+    for name, row in report["weekdays"].items():
+        lines.append(f"  {name:<14} {row['compliance']:>10.0%}  {_hm(row['avg_focus_seconds']):>9}")
+    lines += ["", "Week of          reminders  breaks  compliance  focus"]
+    for row in report["weekly"][-weeks:]:
+        lines.append(_period_line(row["start"], row))
+    lines += ["", "Month            reminders  breaks  compliance  focus"]
+    for row in report["monthly"][-months:]:
+        lines.append(_period_line(row["month"], row))
+    return "\n".join(lines)
+
+
+def run(fmt: str = "text") -> str:
+    """Load stats as configured and render the report."""
+    from breathebreak.config import Config
+    from breathebreak.stats import StatsStore
+
+    cfg = Config.load()
+    store = StatsStore.for_config(cfg)
+    try:
+        report = build(store.days, store.daily_from())
+    finally:
+        store.close()
+    if fmt == "json":
+        return json.dumps(report, indent=2)
+    return render_text(report)
+
+
+# -- computations --
+
+
+def _weekly(base: int, size: int, prefix: dict, present: bytearray) -> list[dict]:
+    # Rows start on Mondays: ordinal 1 (0001-01-01) was a Monday.
+    monday = -((base - 1) % 7)
+    return [
+        dict(
+            start=date.fromordinal(base + lo).isoformat(),
+            **_period(prefix, present, max(lo, 0), min(lo + 7, size)),
+        )
+        for lo in range(monday, size, 7)
+    ]
+
+
+def _monthly(base: int, size: int, prefix: dict, present: bytearray) -> list[dict]:
+    first = date.fromordinal(base)
+    month = first.replace(day=1)
+    rows = []
+    while month.toordinal() < base + size:
+        following = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+        lo = max(0, month.toordinal() - base)
+        hi = min(size, following.toordinal() - base)
+        rows.append(dict(month=month.strftime("%Y-%m"), **_period(prefix, present, lo, hi)))
+        month = following
+    return rows
+
+
+def _period(prefix: dict, present: bytearray, lo: int, hi: int) -> dict:
+    sums = {name: p[hi] - p[lo] for name, p in prefix.items()}
+    sums["days"] = present.count(1, lo, hi)
+    sums["compliance"] = _rate(sums["breaks_acknowledged"], sums["reminders_sent"])
+    return sums
+
+
+def _streaks(reminders: array, breaks: array) -> dict:
+    """Longest and current runs of compliant days, skipping days without reminders."""
+    num, den = COMPLIANT_RATE
+    ok = map(
+        operator.ge,
+        map(operator.mul, breaks, repeat(den)),
+        map(operator.mul, reminders, repeat(num)),
+    )
+    flags = bytes(compress(ok, reminders))
+    runs = flags.split(b"\x00")
+    return {"longest": max(map(len, runs)), "current": len(runs[-1])}
+
+
+def _weekdays(base: int, present: bytearray, cols: dict) -> dict:
+    out = {}
+    for weekday, name in enumerate(WEEKDAYS):
+        # Row offset of the first day falling on this weekday.
+        offset = (weekday - (base - 1) % 7) % 7
+        days = present[offset::7].count(1)
+        reminders = sum(cols["reminders_sent"][offset::7])
+        breaks = sum(cols["breaks_acknowledged"][offset::7])
+        focus = sum(cols["focus_seconds"][offset::7])
+        out[name] = {
+            "days": days,
+            "reminders_sent": reminders,
+            "breaks_acknowledged": breaks,
+            "compliance": _rate(breaks, reminders),
+            "avg_focus_seconds": focus // days if days else 0,
+        }
+    return out
+
+
+def _percentiles(values) -> dict:
+    data = sorted(values)
+    if len(data) < 2:
+        only = data[0] if data else 0
+        return {"p50": only, "p90": only, "p99": only, "max": only}
+    cuts = statistics.quantiles(data, n=100, method="inclusive")
+    return {"p50": int(cuts[49]), "p90": int(cuts[89]), "p99": int(cuts[98]), "max": data[-1]}
+
+
+def _slope(points: list[float]) -> float:
+    """Least-squares change in compliance per week (0.01 == one point)."""
+    if len(points) < 2:
+        return 0.0
+    return statistics.linear_regression(range(len(points)), points).slope
+
+
+def _rate(breaks: int, reminders: int) -> float:
+    return breaks / reminders if reminders else 0.0
+
+
+def _hm(seconds: int) -> str:
+    hours, minutes = divmod(seconds // 60, 60)
+    return f"{hours}h {minutes:02d}m"
+
+
+def _fmt_slope(slope: float) -> str:
+    return f"{slope * 100:+.1f} pts/week"
+
+
+def _period_line(label: str, row: dict) -> str:
+    return (
+        f"  {label:<14} {row['reminders_sent']:>9}  {row['breaks_acknowledged']:>6}"
+        f"  {row['compliance']:>10.0%}  {_hm(row['focus_seconds']):>9}"
+    )
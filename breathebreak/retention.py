@@ -0,0 +1,122 @@
+"""Tiered retention — old daily rows folded into weekly, then monthly rows.
+
+Daily rows older than keep_days are folded into one row per ISO week,
+stored on the week's Monday. Once a week is more than keep_weeks further
+back, its row is folded into one row per month, stored on the 1st. Every
+fold moves counts within the range it covers, so totals over whole
+periods (and over the full history) are exactly what they were. A range
+that cuts through a rolled-up period sees that period's counts on its
+first day.
+
+Progress is kept as two watermarks in stats.retention. Rows on or after
+days_from are daily. Rows from weeks_from up to days_from are weekly, and
+rows before weeks_from are monthly. The stats file is written before the
+watermarks. Folding a range that is already a single row changes nothing,
+so a crash between the two writes only repeats work.
+
+plan() turns a policy and the current watermarks into the next batch of
+ranges to fold. StatsStore.apply_retention() runs those batches, one
+write per batch, on a background thread.
+"""
+
+import json
+import os
+from dataclasses import asdict, dataclass
+from datetime import date
+from pathlib import Path
+
+# Periods folded per write; keeps each lock hold and rewrite short.
+BATCH_PERIODS = 16
+# Seconds a background pass sleeps between batches, leaving the lock free.
+BATCH_PAUSE = 0.05
+# Seconds between retention passes (the first runs shortly after launch).
+RETENTION_INTERVAL = 6 * 3600
+RETENTION_DELAY = 60
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """keep_days=0 keeps daily rows forever; keep_weeks=0 never folds weeks into months."""
+
+    keep_days: int = 0
+    keep_weeks: int = 0
+
+    @property
+    def active(self) -> bool:
+        return self.keep_days > 0
+
+    @classmethod
+    def from_config(cls, cfg) -> "RetentionPolicy":
+        return cls(cfg.stats_keep_days, cfg.stats_keep_weeks)
+
+
+@dataclass(frozen=True)
+class Watermarks:
+    days_from: int = 0
+    weeks_from: int = 0
+
+
+def plan(
+    marks: Watermarks,
+    policy: RetentionPolicy,
+    first: int | None,
+    today: int,
+    limit: int = BATCH_PERIODS,
+) -> tuple[list[tuple[int, int]], Watermarks, bool]:
+    """Return (ranges to fold, watermarks after folding them, more work left).
+
+    first is the ordinal of the oldest stored row, None for an empty table.
+    """
+    if first is None or not policy.active:
+        return [], marks, False
+    periods = []
+    # Whole weeks strictly before the daily window's first Monday.
+    day_target = monday(today - policy.keep_days)
+    days_from = max(marks.days_from, monday(first))
+    while days_from < day_target and len(periods) < limit:
+        periods.append((days_from, days_from + 6))
+        days_from += 7
+    weeks_from = marks.weeks_from
+    more_weeks = False
+    if policy.keep_weeks:
+        # Whole months that are entirely weekly rows and old enough.
+        month_target = month_start(min(days_from, day_target - 7 * policy.keep_weeks))
+        weeks_from = max(weeks_from, month_start(monday(first)))
+        while weeks_from < month_target and len(periods) < limit:
+            following = next_month(weeks_from)
+            periods.append((weeks_from, following - 1))
+            weeks_from = following
+        more_weeks = weeks_from < month_target
+    more = days_from < day_target or more_weeks
+    return periods, Watermarks(days_from, weeks_from), more
+
+
+def monday(ordinal: int) -> int:
+    """Ordinal of the Monday on or before ordinal (0001-01-01 was a Monday)."""
+    return ordinal - (ordinal - 1) % 7
+
+
+def month_start(ordinal: int) -> int:
+    return date.fromordinal(ordinal).replace(day=1).toordinal()
+
+
+def next_month(ordinal: int) -> int:
+    d = date.fromordinal(ordinal)
+    return date(d.year + d.month // 12, d.month % 12 + 1, 1).toordinal()
+
+
+def load_marks(path: Path) -> Watermarks:
+    try:
+        raw = json.loads(path.read_text())
+        return Watermarks(int(raw["days_from"]), int(raw["weeks_from"]))
+    except (OSError, ValueError, KeyError, TypeError):
+        return Watermarks()
+
+
+def save_marks(path: Path, marks: Watermarks) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(asdict(marks), f)
+    os.chmod(tmp, 0o600)
+    tmp.replace(path)
@@ -0,0 +1,285 @@
+"""Deadline scheduler — many timers on one monotonic clock.
+
+Jobs live in a min-heap keyed on their next deadline, so the driver only
+ever has to wake for the earliest one. Periodic jobs advance by whole
+intervals from their previous deadline rather than from when their
+callback happened to run, so late wake-ups never accumulate into drift.
+
+The clock is injectable (anything with monotonic() and time()) so tests
+can step time by hand. Two drivers exist: run() blocks on a condition
+variable for the headless runner, and the menu bar app re-arms a single
+rumps.Timer from next_delay() after each run_due().
+
+Monotonic clocks stop while the machine sleeps. Each pass compares how
+far wall time and monotonic time moved; if wall time jumped ahead by more
+than SUSPEND_SLACK, the gap is added to the scheduler's notion of now, so
+deadlines that passed during sleep come due. Missed periods are coalesced
+into a single run. Jobs scheduled for a wall-clock time are re-derived
+from the wall clock whenever such a jump is seen.
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections.abc import Callable
+
+log = logging.getLogger(__name__)
+
+# Wall/monotonic disagreement (seconds) treated as a suspend or clock change
+SUSPEND_SLACK = 5.0
+
+
+class SystemClock:
+    """The real clocks."""
+
+    monotonic = staticmethod(time.monotonic)
+    time = staticmethod(time.time)
+
+
+class Job:
+    """A scheduled callback. Returned by Scheduler so callers can cancel it."""
+
+    __slots__ = (
+        "name",
+        "callback",
+        "interval",
+        "due",
+        "wall_due",
+        "runs",
+        "missed",
+        "lateness",
+        "_token",
+    )
+
+    def __init__(self, name: str, callback: Callable[[], None], interval: float | None):
+        self.name = name
+        self.callback = callback
+        self.interval = interval
+        self.due = 0.0
+        self.wall_due: float | None = None
+        self.runs = 0
+        self.missed = 0
+        # Seconds between the deadline and the start of the latest run
+        self.lateness = 0.0
+        self._token = 0
+
+    @property
+    def active(self) -> bool:
+        return self._token > 0
+
+    def __repr__(self) -> str:
+        return f"Job({self.name!r}, due={self.due:.3f}, interval={self.interval})"
+
+
+class Scheduler:
+    """Min-heap of deadlines on a suspend-aware monotonic clock."""
+
+    def __init__(self, clock=None, on_change: Callable[[], None] | None = None):
+        self.clock = clock or SystemClock()
+        # Called when a job is added, moved or cancelled outside run_due(),
+        # so a timer-based driver can re-arm for the new earliest deadline.
+        self.on_change = on_change
+        self._heap: list = []
+        self._tokens = itertools.count(1)
+        self._cond = threading.Condition(threading.RLock())
+        self._offset = 0.0
+        self._last_mono = self.clock.monotonic()
+        self._last_wall = self.clock.time()
+        self._running = False
+        self._stopped = False
+
+    # -- scheduling --
+
+    def call_later(self, delay: float, callback: Callable[[], None], name: str = "") -> Job:
+        """Run callback once, delay seconds from now."""
+        job = Job(name or _name(callback), callback, None)
+        self._push(job, self.now() + max(0.0, delay))
+        return job
+
+    def call_at_wall(self, timestamp: float, callback: Callable[[], None], name: str = "") -> Job:
+        """Run callback once at a wall-clock time (seconds since the epoch)."""
+        job = Job(name or _name(callback), callback, None)
+        with self._cond:
+            job.wall_due = timestamp
+            self._push(job, self.now() + max(0.0, timestamp - self.clock.time()))
+        return job
+
+    def every(
+        self,
+        interval: float,
+        callback: Callable[[], None],
+        name: str = "",
+        first: float | None = None,
+    ) -> Job:
+        """Run callback every interval seconds; the first run after `first`."""
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        job = Job(name or _name(callback), callback, interval)
+        self._push(job, self.now() + (interval if first is None else max(0.0, first)))
+        return job
+
+    def reschedule(self, job: Job, delay: float | None = None, interval: float | None = None):
+        """Move job's next run to delay seconds from now (default: one interval).
+
+        Passing interval also changes the period of a periodic job. Works on
+        cancelled or finished jobs too, re-activating them.
+        """
+        with self._cond:
+            if interval is not None:
+                if interval <= 0:
+                    raise ValueError("interval must be positive")
+                job.interval = interval
+            if delay is None:
+                delay = job.interval or 0.0
+            job.wall_due = None
+            self._push(job, self.now() + max(0.0, delay))
+
+    def reschedule_at_wall(self, job: Job, timestamp: float) -> None:
+        """Move job's next run to a wall-clock time.
+
+        A periodic job carries on every interval from there. Like
+        reschedule(), this re-activates cancelled or finished jobs.
+        """
+        with self._cond:
+            job.wall_due = timestamp
+            self._push(job, self.now() + max(0.0, timestamp - self.clock.time()))
+
+    def cancel(self, job: Job) -> None:
+        """Stop job from running again. Safe to call on inactive jobs."""
+        with self._cond:
+            if not job.active:
+                return
+            job._token = 0
+            self._changed()
+
+    # -- queries --
+
+    def now(self) -> float:
+        """Monotonic time, advanced by any detected suspend."""
+        return self.clock.monotonic() + self._offset
+
+    def wall_time(self, due: float) -> float:
+        """Convert a deadline on this scheduler's clock to epoch seconds."""
+        return self.clock.time() + (due - self.now())
+
+    def next_delay(self) -> float | None:
+        """Seconds until the earliest deadline, or None if nothing is scheduled."""
+        with self._cond:
+            self._check_clock()
+            self._prune()
+            if not self._heap:
+                return None
+            return max(0.0, self._heap[0][0] - self.now())
+
+    def jobs(self) -> list[Job]:
+        """Active jobs, earliest first."""
+        with self._cond:
+            return [e[2] for e in sorted(self._heap) if e[1] == e[2]._token]
+
+    def __len__(self) -> int:
+        return len(self.jobs())
+
+    # -- driving --
+
+    def run_due(self) -> int:
+        """Run every job whose deadline has passed. Returns how many ran."""
+        ran = 0
+        with self._cond:
+            self._check_clock()
+            self._running = True
+        try:
+            while True:
+                with self._cond:
+                    job = self._pop_due(self.now())
+                if job is None:
+                    return ran
+                try:
+                    job.callback()
+                except Exception:
+                    log.exception("Scheduled job %s failed", job.name)
+                ran += 1
+        finally:
+            with self._cond:
+                self._running = False
+
+    def run(self) -> None:
+        """Run jobs as they come due until stop() is called."""
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                delay = self.next_delay()
+                self._cond.wait(delay)
+                if self._stopped:
+                    return
+            self.run_due()
+
+    def stop(self) -> None:
+        """Make run() return. Takes effect even if called before run()."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    # -- internals --
+
+    def _push(self, job: Job, due: float) -> None:
+        with self._cond:
+            job.due = due
+            job._token = next(self._tokens)
+            heapq.heappush(self._heap, (due, job._token, job))
+            self._changed()
+
+    def _pop_due(self, now: float) -> Job | None:
+        self._prune()
+        if not self._heap or self._heap[0][0] > now:
+            return None
+        _, _, job = heapq.heappop(self._heap)
+        job.runs += 1
+        job.lateness = now - job.due
+        if job.interval is None:
+            job._token = 0
+            return job
+        # Advance on the original grid; skip (and count) periods already past.
+        behind = int((now - job.due) // job.interval)
+        job.missed += behind
+        due = job.due + (behind + 1) * job.interval
+        job.due = due
+        job.wall_due = None
+        job._token = next(self._tokens)
+        heapq.heappush(self._heap, (due, job._token, job))
+        return job
+
+    def _prune(self) -> None:
+        heap = self._heap
+        while heap and heap[0][1] != heap[0][2]._token:
+            heapq.heappop(heap)
+
+    def _changed(self) -> None:
+        self._cond.notify_all()
+        if self.on_change is not None and not self._running:
+            self.on_change()
+
+    def _check_clock(self) -> None:
+        mono, wall = self.clock.monotonic(), self.clock.time()
+        skew = (wall - self._last_wall) - (mono - self._last_mono)
+        self._last_mono, self._last_wall = mono, wall
+        if abs(skew) <= SUSPEND_SLACK:
+            return
+        if skew > 0:
+            log.info("Clock jumped %.0fs ahead (suspend?); catching up", skew)
+            self._offset += skew
+        self._rebase_wall_jobs(wall)
+
+    def _rebase_wall_jobs(self, wall: float) -> None:
+        now = self.now()
+        for i, (_, token, job) in enumerate(self._heap):
+            if token == job._token and job.wall_due is not None:
+                job.due = now + max(0.0, job.wall_due - wall)
+                self._heap[i] = (job.due, token, job)
+        heapq.heapify(self._heap)
+
+
+def _name(callback) -> str:
+    return getattr(callback, "__qualname__", None) or repr(callback)
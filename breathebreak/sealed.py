@@ -0,0 +1,139 @@
+"""Encrypted, authenticated chunks for stats at rest.
+
+With stats_storage: encrypted, history lives in stats.enc/ as one file per
+calendar month plus a small index (see EncryptedBackend in backends.py).
+Every file is sealed the same way:
+
+    header | nonce[12] | AES-256-GCM ciphertext + tag[16]
+
+The header (magic, version, column count, first ordinal, rows) is not
+encrypted, but it is authenticated as associated data. A chunk therefore
+cannot be truncated, edited, or passed off as another month without
+open() noticing. Each seal uses a fresh random nonce.
+
+A month's plaintext is laid out like a stats.dat page: a presence byte
+per day, padding to 8 bytes, then one little-endian int64 column per
+counter. A month is under 2 KB, so re-sealing one costs the same however
+long the history is.
+
+The 256-bit key is read from a local keyfile, by default stats.key next
+to the stats. It is created with mode 0600 when a new store is started.
+Without the keyfile the history cannot be read, so keep a copy somewhere
+safe. Point stats_keyfile elsewhere to keep copies of the config
+directory unreadable on their own.
+
+cryptography is an optional dependency and is imported on first use.
+"""
+
+import logging
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+
+from breathebreak.daytable import COUNTERS, le_bytes
+
+log = logging.getLogger(__name__)
+
+MAGIC = b"BBSC"
+VERSION = 1
+# magic, version, column count, first ordinal, rows
+HEADER = struct.Struct("<4sHHqq")
+KEY_BYTES = 32
+NONCE_BYTES = 12
+TAG_BYTES = 16
+INSTALL_HINT = "pip install 'breathebreak[encryption]'"
+
+
+class SealError(ValueError):
+    """Raised when a chunk fails to authenticate or no key or cipher is available."""
+
+
+def load_key(path: Path, create: bool) -> bytes:
+    """The key in path; with create=True a missing keyfile is generated."""
+    try:
+        key = path.read_bytes()
+    except FileNotFoundError:
+        if not create:
+            raise SealError(f"Stats keyfile {path} is missing") from None
+        key = os.urandom(KEY_BYTES)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "wb") as f:
+            f.write(key)
+        log.info("Created stats keyfile %s", path)
+        return key
+    except OSError as e:
+        raise SealError(f"Stats keyfile {path} is unreadable: {e}") from e
+    if len(key) != KEY_BYTES:
+        raise SealError(f"Stats keyfile {path} does not hold a {KEY_BYTES}-byte key")
+    if path.stat().st_mode & 0o077:
+        log.warning("Stats keyfile %s is readable by other users; chmod 600 it", path)
+    return key
+
+
+class Sealer:
+    """Seals and opens chunks with the key in keyfile."""
+
+    def __init__(self, keyfile: Path, create: bool = False):
+        try:
+            from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+        except ImportError as e:
+            raise SealError(f"Encrypted stats need the cryptography package: {INSTALL_HINT}") from e
+        # Checked first, so a missing package never leaves a fresh keyfile behind.
+        self._aead = AESGCM(load_key(keyfile, create))
+
+    def seal(self, first: int, rows: int, plaintext: bytes) -> bytes:
+        header = HEADER.pack(MAGIC, VERSION, len(COUNTERS), first, rows)
+        nonce = os.urandom(NONCE_BYTES)
+        return header + nonce + self._aead.encrypt(nonce, plaintext, header)
+
+    def open(self, blob: bytes, first: int) -> tuple[int, bytes]:
+        """Return (rows, plaintext) of a chunk that must start at ordinal first."""
+        body = HEADER.size + NONCE_BYTES
+        if len(blob) < body + TAG_BYTES:
+            raise SealError("chunk is truncated")
+        magic, version, ncols, got, rows = HEADER.unpack_from(blob)
+        if magic != MAGIC or version != VERSION or ncols != len(COUNTERS) or got != first:
+            raise SealError("not a BreatheBreak chunk for this position")
+        from cryptography.exceptions import InvalidTag
+
+        try:
+            plaintext = self._aead.decrypt(
+                blob[HEADER.size : body], blob[body:], blob[: HEADER.size]
+            )
+        except InvalidTag:
+            raise SealError("chunk failed to authenticate (wrong key or tampered)") from None
+        return rows, plaintext
+
+
+def encode_rows(present: bytes, columns: dict) -> bytes:
+    """Plaintext for a run of rows: presence bytes, padding, then each column."""
+    pad = bytes(-len(present) % 8)
+    return b"".join((present, pad, *(le_bytes(columns[name]) for name in COUNTERS)))
+
+
+def decode_rows(rows: int, plaintext: bytes) -> tuple[bytearray, dict]:
+    """Inverse of encode_rows()."""
+    off = rows + (-rows % 8)
+    if len(plaintext) != off + 8 * rows * len(COUNTERS):
+        raise SealError("chunk has the wrong size")
+    present = bytearray(plaintext[:rows])
+    columns = {}
+    for name in COUNTERS:
+        col = array("q")
+        col.frombytes(plaintext[off : off + 8 * rows])
+        if sys.byteorder != "little":
+            col.byteswap()
+        columns[name] = col
+        off += 8 * rows
+    return present, columns
+
+
+def stage(path: Path, data: bytes) -> Path:
+    """Write data to a 0600 temporary file beside path, to be renamed onto it."""
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.chmod(tmp, 0o600)
+    return tmp
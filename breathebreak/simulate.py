@@ -0,0 +1,384 @@
+"""Accelerated simulation of the menu bar app on a virtual clock.
+
+`breathebreak simulate --days 365` builds a real BreatheBreakApp and runs
+months or years of use in seconds. Ticks, menu callbacks, idle handling,
+config polling and stats persistence all run as in the app. Only the
+edges are replaced:
+
+- rumps is a stub module. Its Timer records when RumpsDriver wants to
+  wake, Window answers from the script, and alert just counts.
+- notify() is a synchronous recorder instead of the notifier queue.
+- the scheduler, idle monitor and StatsStore share a SimClock, which
+  jumps straight to the next timer deadline or scripted action.
+- config and stats live in a throwaway directory, with write-behind off,
+  so every write happens at a deterministic point.
+
+A seeded Behavior scripts the user. On workdays they turn reminders on
+when they arrive and off when they leave, and they are away over lunch,
+long enough for idle detection to pause things. They take a break after
+some reminders, and now and then change the interval or open Stats.
+The same seed always gives the same run.
+
+The report covers throughput (timer wake-ups and simulated days per
+real second), persisted writes and bytes, and final totals both in memory
+and as reloaded from disk. It also includes checks that the totals
+agree with what the script did. run_checks() fails on any mismatch, so CI
+can gate on correctness and watch the throughput.
+"""
+
+import importlib
+import json
+import random
+import sys
+import tempfile
+import time
+import types
+from bisect import insort
+from collections import Counter
+from collections.abc import Callable
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
+from datetime import date, datetime, timedelta
+from itertools import count
+from pathlib import Path
+
+import breathebreak
+from breathebreak import config, metrics, stats
+from breathebreak.config import Config
+from breathebreak.scheduler import Scheduler
+from breathebreak.stats import StatsStore
+
+# Monday, so the first simulated week is a full one.
+DEFAULT_START = date(2024, 1, 1)
+INTERVAL_CHOICES = (15, 20, 25, 30, 45)
+
+
+class SimClock:
+    """Monotonic and wall time that only move when the simulation says so."""
+
+    def __init__(self, wall: float):
+        self.wall = wall
+        self.mono = 0.0
+
+    def monotonic(self) -> float:
+        return self.mono
+
+    def time(self) -> float:
+        return self.wall
+
+    def advance_to(self, wall: float) -> None:
+        if wall > self.wall:
+            self.mono += wall - self.wall
+            self.wall = wall
+
+
+@dataclass
+class Behavior:
+    """How the simulated user works. Times are minutes after midnight."""
+
+    arrive: int = 9 * 60
+    leave: int = 17 * 60 + 30
+    # Uniform jitter added to arrival and departure.
+    jitter: int = 45
+    lunch: int = 12 * 60
+    lunch_minutes: int = 45
+    workdays: frozenset = frozenset(range(5))
+    # Chance of taking a break after each reminder.
+    break_rate: float = 0.7
+    break_seconds: int = 30
+    # Per-workday chances of changing the interval and of opening Stats.
+    interval_change_rate: float = 0.02
+    stats_view_rate: float = 0.1
+
+
+class SimUser:
+    """Idle provider for the app: idle since the user last left the desk."""
+
+    def __init__(self, clock: SimClock):
+        self.clock = clock
+        self.left_at: float | None = None
+
+    def idle_seconds(self) -> float:
+        return 0.0 if self.left_at is None else self.clock.time() - self.left_at
+
+
+@dataclass
+class Simulation:
+    """One deterministic run of the app over `days` days."""
+
+    days: int
+    seed: int = 0
+    behavior: Behavior = field(default_factory=Behavior)
+    config: Config = field(default_factory=Config)
+    start: date = DEFAULT_START
+
+    def run(self) -> dict:
+        """Run to the end and return the report."""
+        with tempfile.TemporaryDirectory(prefix="breathebreak-sim-") as root:
+            with _sandbox(Path(root), self) as app_module:
+                return self._run(app_module, Path(root))
+
+    def _run(self, app_module, root: Path) -> dict:
+        rng = random.Random(self.seed)
+        begin = datetime.combine(self.start, datetime.min.time()).timestamp()
+        end = datetime.combine(
+            self.start + timedelta(days=self.days), datetime.min.time()
+        ).timestamp()
+        self.clock = SimClock(begin)
+        self.user = SimUser(self.clock)
+        self.user.left_at = begin
+        self.timer = None
+        self.answers: list[str] = []
+        self.alerts = 0
+        self.notes: Counter = Counter()
+        self.did: Counter = Counter()
+        actions: list[tuple[float, int, Callable[[], None]]] = []
+        order = count()
+
+        def at(when: float, action: Callable[[], None]) -> None:
+            # A handful of actions per day, so a sorted list is enough.
+            insort(actions, (when, next(order), action))
+
+        cfg = replace(self.config, stats_flush_seconds=0)
+        scheduler = Scheduler(clock=self.clock)
+        store = StatsStore.for_config(cfg)
+        store.clock = self.clock
+        app = app_module.BreatheBreakApp(
+            cfg, stats=store, scheduler=scheduler, idle_provider=self.user
+        )
+        menu_item = types.SimpleNamespace(state=False)
+        b = self.behavior
+
+        def notify(
+            title: str, subtitle: str, message: str, sound: bool = True, kind: str = ""
+        ) -> None:
+            self.notes[subtitle or message] += 1
+            if subtitle == "Time for a break" and rng.random() < b.break_rate:
+                at(self.clock.time() + rng.uniform(5, 120), take_break)
+
+        def take_break() -> None:
+            if self.user.left_at is None:
+                app.stats.record_break(duration_seconds=b.break_seconds)
+                self.did["breaks"] += 1
+
+        def arrive() -> None:
+            self.user.left_at = None
+            if not app.controller.active:
+                app.toggle_reminders(menu_item)
+                self.did["sessions"] += 1
+
+        def leave() -> None:
+            if app.controller.active:
+                app.toggle_reminders(menu_item)
+            self.user.left_at = self.clock.time()
+
+        def lunch_out() -> None:
+            self.user.left_at = self.clock.time()
+
+        def lunch_back() -> None:
+            self.user.left_at = None
+
+        def change_interval() -> None:
+            minutes = rng.choice(INTERVAL_CHOICES)
+            self.answers.append(str(minutes))
+            app.set_interval(None)
+            self.did["interval_changes"] += 1
+
+        def view_stats() -> None:
+            app.show_stats(None)
+
+        def plan(day: date) -> None:
+            midnight = datetime.combine(day, datetime.min.time()).timestamp()
+            at(midnight + 86400, lambda: plan(day + timedelta(days=1)))
+            if day.weekday() not in b.workdays:
+                return
+            minute = 60.0
+            arrival = midnight + (b.arrive + rng.uniform(0, b.jitter)) * minute
+            departure = midnight + (b.leave + rng.uniform(0, b.jitter)) * minute
+            lunch = midnight + b.lunch * minute
+            at(arrival, arrive)
+            at(lunch, lunch_out)
+            at(lunch + b.lunch_minutes * minute, lunch_back)
+            at(departure, leave)
+            if rng.random() < b.interval_change_rate:
+                at(rng.uniform(arrival, departure), change_interval)
+            if rng.random() < b.stats_view_rate:
+                at(rng.uniform(arrival, departure), view_stats)
+
+        app_module.notify = notify
+        sys.modules["breathebreak.controller"].notify = notify
+        plan(self.start)
+        wakeups = 0
+        started = time.perf_counter()
+        while True:
+            timer_due = self.timer.due if self.timer is not None else None
+            action_due = actions[0][0] if actions else None
+            if timer_due is not None and (action_due is None or timer_due <= action_due):
+                if timer_due >= end:
+                    break
+                self.clock.advance_to(timer_due)
+                self.timer.due = None
+                self.timer.callback(self.timer)
+                wakeups += 1
+            elif action_due is not None and action_due < end:
+                self.clock.advance_to(action_due)
+                actions.pop(0)[2]()
+            else:
+                break
+        self.clock.advance_to(end)
+        app.shutdown()
+        elapsed = time.perf_counter() - started
+
+        first, last = self.start, self.start + timedelta(days=self.days - 1)
+        memory = app.stats.days.totals(first.toordinal(), last.toordinal())
+        reloaded = StatsStore.for_config(cfg)
+        try:
+            disk = reloaded.days.totals(first.toordinal(), last.toordinal())
+        finally:
+            reloaded.close()
+        return {
+            "days": self.days,
+            "seed": self.seed,
+            "storage": cfg.stats_storage,
+            "journal": cfg.stats_journal,
+            "elapsed_seconds": round(elapsed, 3),
+            "wakeups": wakeups,
+            "wakeups_per_second": round(wakeups / elapsed) if elapsed else 0,
+            "simulated_days_per_second": round(self.days / elapsed, 1) if elapsed else 0,
+            "persisted": {
+                "writes": metrics.PERSIST_BYTES.count,
+                "bytes": int(metrics.PERSIST_BYTES.sum),
+                "p99_write_seconds": metrics.PERSIST_SECONDS.quantile(0.99),
+                "on_disk_bytes": sum(p.stat().st_size for p in root.rglob("*") if p.is_file()),
+            },
+            "notifications": dict(self.notes),
+            "stats_views": self.alerts,
+            "script": dict(self.did),
+            "totals": memory,
+            "reloaded_totals": disk,
+            "checks": {
+                "reminders_match_notifications": memory["reminders_sent"]
+                == self.notes["Time for a break"],
+                "breaks_match_script": memory["breaks_acknowledged"] == self.did["breaks"],
+                "sessions_match_script": memory["sessions_started"] == self.did["sessions"],
+                "disk_matches_memory": disk == memory,
+            },
+        }
+
+
+def run_checks(report: dict) -> list[str]:
+    """Names of the report's checks that failed."""
+    return [name for name, ok in report["checks"].items() if not ok]
+
+
+def render_text(report: dict) -> str:
+    persisted = report["persisted"]
+    totals = report["totals"]
+    failed = run_checks(report)
+    lines = [
+        f"Simulated {report['days']} days (seed {report['seed']}, {report['storage']} storage)"
+        f" in {report['elapsed_seconds']:.2f}s",
+        f"  Throughput:    {report['wakeups_per_second']} timer wake-ups/s, "
+        f"{report['simulated_days_per_second']} days/s",
+        f"  Persisted:     {persisted['writes']} writes, {persisted['bytes']} bytes, "
+        f"{persisted['on_disk_bytes']} bytes on disk",
+        f"  Reminders:     {totals['reminders_sent']}",
+        f"  Breaks:        {totals['breaks_acknowledged']}",
+        f"  Sessions:      {totals['sessions_started']}",
+        f"  Focus time:    {totals['focus_seconds'] // 3600}h",
+        f"  Checks:        {'all passed' if not failed else 'FAILED: ' + ', '.join(failed)}",
+    ]
+    return "\n".join(lines)
+
+
+def run(
+    days: int, seed: int = 0, storage: str = "json", journal: bool = False, fmt: str = "text"
+) -> tuple[str, bool]:
+    """Run a simulation; returns (rendered report, whether all checks passed)."""
+    cfg = Config(stats_storage=storage, stats_journal=journal)
+    report = Simulation(days=days, seed=seed, config=cfg).run()
+    out = json.dumps(report, indent=2) if fmt == "json" else render_text(report)
+    return out, not run_checks(report)
+
+
+def _stub_rumps(sim: Simulation) -> types.ModuleType:
+    """Just enough of rumps for BreatheBreakApp and RumpsDriver."""
+    rumps = types.ModuleType("rumps")
+
+    class App:
+        def __init__(self, name, *args, **kwargs):
+            self.name = name
+            self.menu = []
+
+    class Timer:
+        def __init__(self, callback, interval):
+            self.callback = callback
+            self.interval = interval
+            self.due = None
+            sim.timer = self
+
+        def start(self):
+            self.due = sim.clock.time() + self.interval
+
+        def stop(self):
+            self.due = None
+
+    class Window:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def run(self):
+            text = sim.answers.pop(0) if sim.answers else ""
+            return types.SimpleNamespace(clicked=bool(text), text=text)
+
+    def alert(*args, **kwargs):
+        sim.alerts += 1
+
+    rumps.App = App
+    rumps.Timer = Timer
+    rumps.Window = Window
+    rumps.alert = alert
+    rumps.clicked = lambda *names: lambda fn: fn
+    rumps.notification = lambda *args, **kwargs: None
+    rumps.quit_application = lambda: None
+    return rumps
+
+
+# Modules imported afresh per run, so they see the sandbox paths and stubs.
+_PRIVATE = ("breathebreak.app", "breathebreak.controller")
+
+
+@contextmanager
+def _sandbox(root: Path, sim: Simulation):
+    """Import a private copy of the app against stub rumps and a temp config dir."""
+    saved_modules = {name: sys.modules.get(name) for name in ("rumps", *_PRIVATE)}
+    saved_attrs = {name: getattr(breathebreak, name.rpartition(".")[2], None) for name in _PRIVATE}
+    saved_paths = (config.CONFIG_DIR, config.CONFIG_FILE, stats.STATS_FILE)
+    was_enabled = metrics.enabled()
+    config.CONFIG_DIR = root
+    config.CONFIG_FILE = root / "config.yaml"
+    stats.STATS_FILE = root / "stats.json"
+    config._cache.clear()
+    metrics.reset()
+    metrics.enable()
+    sys.modules["rumps"] = _stub_rumps(sim)
+    for name in _PRIVATE:
+        sys.modules.pop(name, None)
+    try:
+        yield importlib.import_module("breathebreak.app")
+    finally:
+        config.CONFIG_DIR, config.CONFIG_FILE, stats.STATS_FILE = saved_paths
+        config._cache.clear()
+        if not was_enabled:
+            metrics.disable()
+        for name, module in saved_modules.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+        for name, attr in saved_attrs.items():
+            name = name.rpartition(".")[2]
+            if attr is None:
+                breathebreak.__dict__.pop(name, None)
+            else:
+                setattr(breathebreak, name, attr)
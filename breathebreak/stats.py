@@ -3,86 +3,210 @@
 Tracks daily break compliance and focus time in a JSON file at
 ~/.config/breathebreak/stats.json. No data ever leaves the machine.
 File permissions are restricted to owner-only (0600).
+
+In journaled mode each event is appended to stats.journal instead of
+rewriting the whole snapshot. Once the journal grows past a threshold a
+background thread folds it back into stats.json. The snapshot records the
+last sequence number it covers, so replay stays exact even if the process
+dies halfway through a compaction.
+
+With storage="paged" the snapshot is stats.dat instead (see pagefile.py).
+load() then maps the file and materializes only the last LAZY_WINDOW_DAYS;
+reports that reach further back page older rows in on demand. An existing
+stats.json is imported the first time the paged layout is used.
+
+With storage="sqlite" the days live in stats.db instead (see backends.py).
+Writes are batched delta upserts, not snapshot rewrites, so the journal
+and the merge-on-write below do not apply. summary() and totals() run as
+SQL range queries. Existing json or paged history, plus any journal, is
+imported once on first use and the old files are left as a backup.
+
+With storage="encrypted" the days live in stats.enc/, one AES-GCM sealed
+chunk per month (see sealed.py and backends.py). It is incremental like
+sqlite: a write re-seals only the months it touches, and summary() and
+totals() decrypt only the months they cover. The key comes from keyfile,
+or stats.key next to the stats. The timeline is plaintext, so
+for_config() turns it off for this layout.
+
+Several processes may share the stats directory. Every load and write
+takes an flock on stats.lock (see filelock.py). Journal sequence numbers
+are allocated from a counter kept in that file, so they are unique
+across processes. A snapshot write first checks whether the snapshot or
+journal changed since this store last synced. If it did, the write
+re-reads the disk and adds only this store's unsaved events, so no
+process overwrites another's counts.
+
+With timeline=True every reminder, break, session start and focus
+start/end is also appended, with its timestamp, to the compact event
+timeline next to the stats file (see timeline.py). The timeline is
+written with the counters, under the same lock.
+
+apply_retention() folds daily rows older than a RetentionPolicy allows
+into weekly and then monthly rollup rows (see retention.py), a batch at a
+time, optionally on a background thread. Totals over whole periods are
+preserved exactly, so summary() and totals() need no special handling.
+
+snapshot() returns an immutable copy of today's counters and recent
+totals for readers on other threads, such as the HTTP API (see api.py).
+It is rebuilt at most once per change to the table, so polling it is a
+version check.
+
+With a non-zero flush_interval, writes are deferred to a write-behind
+thread (see writebehind.py) so record_* calls never block on disk. Call
+flush() or close() before exiting.
 """
 
-import json
 import logging
-import os
-from dataclasses import asdict, dataclass, field
-from datetime import date, datetime
+import threading
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
 
-from breathebreak.config import CONFIG_DIR, STATS_FILE
+from breathebreak import backends, metrics, retention
+from breathebreak.config import STATS_FILE
+from breathebreak.daytable import COUNTERS, PAGE_CHUNK_DAYS, DailyStats, DayTable
+from breathebreak.filelock import FileLock
+from breathebreak.journal import Journal
+from breathebreak.scheduler import SystemClock
+from breathebreak.timeline import Event, Timeline
+from breathebreak.writebehind import WriteBehind
 
 log = logging.getLogger(__name__)
 
+# Journal records before a background compaction is kicked off.
+JOURNAL_COMPACT_THRESHOLD = 500
 
-@dataclass
-class DailyStats:
-    """Aggregated stats for a single calendar day."""
+# Days materialized at startup with the paged layout. Covers month-to-date
+# and a week of summary even with sparse usage.
+LAZY_WINDOW_DAYS = 62
+
+# Snapshot key holding the last journal sequence number folded into it.
+_SEQ_KEY = backends.SEQ_KEY
 
-    date: str
-    reminders_sent: int = 0
-    breaks_acknowledged: int = 0
-    total_break_seconds: int = 0
-    sessions_started: int = 0
-    focus_seconds: int = 0
+# Days with data covered by summary() and the snapshot's "recent" totals.
+SUMMARY_DAYS = 7
+
+
+@dataclass(frozen=True)
+class StatsSnapshot:
+    """Read-only view of today and recent totals, as of one table version."""
+
+    version: int
+    day: str
+    today: dict
+    summary: dict
 
 
 @dataclass
 class StatsStore:
     """Manages per-day break statistics with JSON persistence."""
 
-    days: dict = field(default_factory=dict)
+    days: DayTable = field(default_factory=DayTable)
+    journaled: bool = False
+    storage: str = "json"
+    # Key for storage="encrypted"; empty means stats.key next to the stats.
+    keyfile: str = ""
+    flush_interval: float = 0.0
+    max_pending: int = 50
+    timeline: bool = False
     _focus_start: datetime | None = field(default=None, repr=False)
+    _seq: int = field(default=0, repr=False)
+    _pending: list = field(default_factory=list, repr=False)
+    _events: list = field(default_factory=list, repr=False)
+    _journal_size: int = field(default=0, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+    _compactor: threading.Thread | None = field(default=None, repr=False, compare=False)
+    _retainer: threading.Thread | None = field(default=None, repr=False, compare=False)
+    _retain_stop: threading.Event = field(
+        default_factory=threading.Event, repr=False, compare=False
+    )
+    _journal: Journal | None = field(default=None, repr=False, compare=False)
+    _timeline: Timeline | None = field(default=None, repr=False, compare=False)
+    _writer: WriteBehind | None = field(default=None, repr=False, compare=False)
+    _file_lock: FileLock | None = field(default=None, repr=False, compare=False)
+    _backend: object = field(default=None, repr=False, compare=False)
+    # Snapshot/journal stat signatures when this store last matched the disk;
+    # None for stores that were never loaded, which own the file outright.
+    _disk_sig: tuple | None = field(default=None, repr=False, compare=False)
+    _snapshot: StatsSnapshot | None = field(default=None, repr=False, compare=False)
+    # Called as listener(kind, value) after each recorded event; see events.py.
+    listeners: list = field(default_factory=list, repr=False, compare=False)
+    # Wall clock for event dates and times (anything with time()); see simulate.py.
+    clock: object = field(default=SystemClock, repr=False, compare=False)
+
+    def __post_init__(self):
+        if not isinstance(self.days, DayTable):
+            self.days = DayTable(self.days)
 
     # -- recording --
 
     def record_reminder(self) -> None:
-        self._today().reminders_sent += 1
+        self._record(reminders_sent=1)
+        self._event("reminder")
         self._persist()
 
     def record_break(self, duration_seconds: int = 0) -> None:
-        today = self._today()
-        today.breaks_acknowledged += 1
-        today.total_break_seconds += duration_seconds
+        self._record(breaks_acknowledged=1, total_break_seconds=duration_seconds)
+        self._event("break", duration_seconds)
         self._persist()
 
     def record_session_start(self) -> None:
-        self._today().sessions_started += 1
+        self._record(sessions_started=1)
+        self._event("session_start")
         self._persist()
 
     def start_focus_session(self) -> None:
         """Mark the beginning of a focus session for time tracking."""
-        self._focus_start = datetime.now()
+        self._focus_start = self._now()
+        self._event("focus_start")
+        if self.timeline:
+            self._persist()
         log.debug("Focus session started at %s", self._focus_start.isoformat())
 
-    def end_focus_session(self) -> None:
-        """End the current focus session and log elapsed time."""
+    def end_focus_session(self, at: datetime | None = None) -> None:
+        """End the current focus session and log elapsed time.
+
+        at backdates the end, e.g. to when the user went idle.
+        """
         if self._focus_start is None:
             return
-        elapsed = int((datetime.now() - self._focus_start).total_seconds())
-        self._today().focus_seconds += elapsed
+        end = max(at or self._now(), self._focus_start)
+        elapsed = int((end - self._focus_start).total_seconds())
+        self._record(focus_seconds=elapsed)
+        self._event("focus_end", elapsed, end.timestamp() if at else None)
         self._focus_start = None
         self._persist()
         log.debug("Focus session ended, +%ds", elapsed)
 
     # -- reporting --
 
-    def summary(self, last_n_days: int = 7) -> str:
+    def summary(self, last_n_days: int = SUMMARY_DAYS) -> str:
         """Human-readable summary of recent break activity."""
-        keys = sorted(self.days.keys(), reverse=True)[:last_n_days]
-        if not keys:
-            return "No break data recorded yet."
+        backend = self._get_backend()
+        if backend.incremental:
+            # Answer from the database, which also has other processes' events.
+            self._apply_pending()
+            first, count = backend.recent(last_n_days)
+            if not count:
+                return "No break data recorded yet."
+            totals = backend.totals(first, backend.last_ordinal())
+        else:
+            with self._lock:
+                first, count = self.days.recent(last_n_days)
+                if not count:
+                    return "No break data recorded yet."
+                totals = self.days.totals(first, self.days.last_ordinal())
 
-        reminders = sum(self.days[k].reminders_sent for k in keys)
-        breaks = sum(self.days[k].breaks_acknowledged for k in keys)
-        focus = sum(self.days[k].focus_seconds for k in keys)
+        reminders = totals["reminders_sent"]
+        breaks = totals["breaks_acknowledged"]
+        focus = totals["focus_seconds"]
         rate = (breaks / reminders * 100) if reminders else 0
 
         focus_h, focus_m = divmod(focus // 60, 60)
 
         lines = [
-            f"Last {len(keys)} day(s):",
+            f"Last {count} day(s):",
             f"  Reminders sent: {reminders}",
             f"  Breaks taken:   {breaks}",
             f"  Compliance:     {rate:.0f}%",
@@ -90,36 +214,487 @@ class StatsStore:
         ]
         return "\n".join(lines)
 
+    def totals(self, start: date, end: date) -> dict:
+        """Per-counter totals over the calendar range start..end inclusive."""
+        backend = self._get_backend()
+        if backend.incremental:
+            self._apply_pending()
+            return backend.totals(start.toordinal(), end.toordinal())
+        with self._lock:
+            return self.days.totals(start.toordinal(), end.toordinal())
+
+    def rows(self, start: date | None = None, end: date | None = None) -> Iterator[dict]:
+        """Yield each stored row in start..end, oldest first, as a flat dict.
+
+        Rows carry "date", "period" ("day", or "week"/"month" for rows
+        folded by retention) and every counter. History is walked a chunk
+        of days at a time under the lock, and rows paged in for the walk are
+        dropped again, so memory stays flat however long the range is.
+        """
+        with self._lock:
+            bounds = self.days.bounds()
+        if bounds is None:
+            return
+        marks = retention.load_marks(self._marks_file())
+        lo = max(bounds[0], start.toordinal()) if start else bounds[0]
+        hi = min(bounds[1], end.toordinal()) if end else bounds[1]
+        while lo <= hi:
+            top = min(hi, lo + PAGE_CHUNK_DAYS - 1)
+            with self._lock:
+                batch = list(self.days.rows(lo, top))
+            for ordinal, values in batch:
+                if ordinal >= marks.days_from:
+                    period = "day"
+                elif ordinal >= marks.weeks_from:
+                    period = "week"
+                else:
+                    period = "month"
+                row = {"date": date.fromordinal(ordinal).isoformat(), "period": period}
+                row.update(zip(COUNTERS, values, strict=True))
+                yield row
+            lo = top + 1
+
+    def events(self, start: datetime, end: datetime) -> list[Event]:
+        """Timeline events between start and end inclusive, oldest first."""
+        if not self.timeline:
+            return []
+        self._write_events()
+        with self._locked():
+            return self._get_timeline().scan(start.timestamp(), end.timestamp())
+
+    def snapshot(self) -> StatsSnapshot:
+        """Today's counters and recent totals from memory; safe from any thread.
+
+        Returns the previous snapshot unless the table changed or the day
+        rolled over since, so frequent polling never contends with writers.
+        With sqlite storage, events other processes recorded are not included.
+        """
+        today = self._date()
+        key = today.isoformat()
+        snap = self._snapshot
+        if snap is not None and snap.version == self.days.version and snap.day == key:
+            return snap
+        with self._lock:
+            days = self.days
+            version = days.version
+            row = days[key].to_dict() if key in days else DailyStats(date=key).to_dict()
+            first, count = days.recent(SUMMARY_DAYS)
+            recent = days.totals(first, days.last_ordinal()) if count else days.totals(1, 0)
+            end = today.toordinal()
+            week = days.totals(end - today.weekday(), end)
+            month = days.totals(today.replace(day=1).toordinal(), end)
+        summary = {
+            "recent_days": count,
+            "recent": _with_rate(recent),
+            "week_to_date": _with_rate(week),
+            "month_to_date": _with_rate(month),
+        }
+        snap = StatsSnapshot(version, key, row, summary)
+        self._snapshot = snap
+        return snap
+
+    def week_to_date(self, today: date | None = None) -> dict:
+        """Totals from Monday of the current week through today."""
+        today = today or self._date()
+        return self.totals(today - timedelta(days=today.weekday()), today)
+
+    def month_to_date(self, today: date | None = None) -> dict:
+        """Totals from the first of the current month through today."""
+        today = today or self._date()
+        return self.totals(today.replace(day=1), today)
+
     # -- persistence --
 
+    def flush(self) -> None:
+        """Write any buffered events to disk on the calling thread."""
+        if self._writer is not None:
+            self._writer.flush()
+
+    def close(self) -> None:
+        """Flush and stop the write-behind thread. Safe to call twice."""
+        self._retain_stop.set()
+        if self._writer is not None:
+            self._writer.close()
+        self.wait_for_compaction()
+        if self._retainer is not None:
+            self._retainer.join()
+        if self._file_lock is not None:
+            self._file_lock.close()
+        if self._backend is not None and self._backend.incremental:
+            self._backend.close()
+
     def _persist(self) -> None:
-        CONFIG_DIR.mkdir(parents=True, exist_ok=True)
-        data = {k: asdict(v) for k, v in self.days.items()}
-        tmp = STATS_FILE.with_suffix(".tmp")
-        with open(tmp, "w") as f:
-            json.dump(data, f, indent=2)
-        os.chmod(tmp, 0o600)
-        tmp.replace(STATS_FILE)
+        if self.flush_interval > 0:
+            if self._writer is None:
+                self._writer = WriteBehind(self._write, self.flush_interval, self.max_pending)
+            self._writer.mark_dirty(len(self._pending) + len(self._events))
+        else:
+            self._write()
 
-    @classmethod
-    def load(cls) -> "StatsStore":
-        """Load stats from disk. Returns empty store on any error."""
-        if not STATS_FILE.exists():
-            return cls()
+    def _write(self) -> None:
+        start = time.perf_counter()
+        # A focus start queues a timeline event but no counters.
+        written = self._write_counters() if self._pending else 0
+        written += self._write_events()
+        metrics.PERSIST_SECONDS.observe_since(start)
+        metrics.PERSIST_BYTES.observe(written)
+
+    def _write_counters(self) -> int:
+        if self._get_backend().incremental:
+            return self._apply_pending()
+        if self.journaled:
+            return self._append_journal()
+        return self._write_snapshot()
+
+    def _write_events(self) -> int:
+        with self._lock:
+            events, self._events = self._events, []
+        if not events:
+            return 0
         try:
-            with open(STATS_FILE) as f:
-                raw = json.load(f)
-            days = {}
-            for key, val in raw.items():
-                days[key] = DailyStats(**val)
-            return cls(days=days)
-        except (json.JSONDecodeError, OSError, TypeError, KeyError):
+            with self._locked():
+                return self._get_timeline().append(events)
+        except Exception:
+            with self._lock:
+                self._events[:0] = events
+            raise
+
+    def _append_journal(self) -> int:
+        with self._locked() as lock:
+            # Taken under the file lock so a concurrent compaction either
+            # absorbs these records or sees them already in the journal.
+            with self._lock:
+                pending, self._pending = self._pending, []
+            if not pending:
+                return 0
+            before = self._disk_signature()
+            seq = max(lock.read_int(), self._seq)
+            for record in pending:
+                seq += 1
+                record["seq"] = seq
+            lock.write_int(seq)
+            written = self._get_journal().append(pending)
+            self._seq = seq
+            if self._disk_sig == before:
+                # Only our own append happened since the last sync.
+                self._disk_sig = (before[0], _stat_signature(self._get_journal().path))
+        self._journal_size += len(pending)
+        if self._journal_size >= JOURNAL_COMPACT_THRESHOLD:
+            self.compact(background=True)
+        return written
+
+    def _apply_pending(self) -> int:
+        """Upsert buffered events into an incremental backend. Returns days written."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return 0
+        try:
+            return self._get_backend().apply(pending)
+        except Exception:
+            with self._lock:
+                # Nothing was committed; keep the events for the next write.
+                self._pending[:0] = pending
+            raise
+
+    def _write_snapshot(self) -> int:
+        """Write the full snapshot. Returns the number of bytes written.
+
+        Runs under the stats file lock. If another process has written since
+        this store last synced, the snapshot and journal are re-read and only
+        this store's unsaved events are added on top; otherwise memory is
+        already exact and is written as-is.
+        """
+        backend = self._get_backend()
+        if backend.incremental:
+            return self._apply_pending()
+        with self._locked() as lock:
+            journal = self._get_journal()
+            merge = self._disk_changed()
+            if merge:
+                disk = StatsStore(storage=self.storage)
+                disk._load_disk()
+            with self._lock:
+                pending, self._pending = self._pending, []
+                if merge:
+                    for record in pending:
+                        disk.days.add(record["date"], record)
+                    table, seq = disk.days, max(disk._seq, self._seq)
+                else:
+                    table, seq = self.days, self._seq
+                seq = max(seq, lock.read_int())
+                frozen = backend.freeze(table)
+            has_journal = journal.exists()
+            written = backend.write(frozen, seq, keep_seq=has_journal or self.journaled)
+            if has_journal:
+                # Everything up to seq is now in the snapshot.
+                journal.truncate_through(seq)
+                self._journal_size = 0
+            lock.write_int(seq)
+            self._disk_sig = self._disk_signature()
+            with self._lock:
+                self._seq = seq
+                if merge:
+                    # Pick up other writers' counts; re-apply events recorded
+                    # while the snapshot was being written.
+                    for record in self._pending:
+                        table.add(record["date"], record)
+                    self.days = table
+        return written
+
+    def compact(self, background: bool = False) -> None:
+        """Fold the journal into the snapshot and drop the folded records.
+
+        With background=True the work runs on a daemon thread; a compaction
+        already in flight is not started twice.
+        """
+        if not background:
+            self._write_snapshot()
+            return
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(
+            target=self._compact_quietly, name="breathebreak-compact", daemon=True
+        )
+        self._compactor.start()
+
+    def wait_for_compaction(self, timeout: float | None = None) -> None:
+        """Block until a background compaction, if any, has finished."""
+        if self._compactor is not None:
+            self._compactor.join(timeout)
+
+    def _compact_quietly(self) -> None:
+        try:
+            self._write_snapshot()
+        except OSError:
+            # The journal is still intact, so the next compaction retries.
+            log.warning("Stats compaction failed", exc_info=True)
+
+    def apply_retention(self, policy: retention.RetentionPolicy, background: bool = False) -> None:
+        """Fold rows older than policy allows into weekly and monthly rollups.
+
+        Works a batch of periods at a time with one write each. With
+        background=True the batches run on a daemon thread, pausing between
+        them; a pass already in flight is not started twice.
+        """
+        if not policy.active:
+            return
+        if not background:
+            while self._retention_step(policy):
+                pass
+            return
+        if self._retainer is not None and self._retainer.is_alive():
+            return
+        self._retainer = threading.Thread(
+            target=self._retain_quietly, args=(policy,), name="breathebreak-retention", daemon=True
+        )
+        self._retainer.start()
+
+    def daily_from(self) -> date | None:
+        """First day still stored at daily resolution, or None if nothing is rolled up."""
+        marks = retention.load_marks(self._marks_file())
+        return date.fromordinal(marks.days_from) if marks.days_from else None
+
+    def _retain_quietly(self, policy: retention.RetentionPolicy) -> None:
+        try:
+            while not self._retain_stop.is_set() and self._retention_step(policy):
+                self._retain_stop.wait(retention.BATCH_PAUSE)
+        except Exception:
+            # Folds are idempotent; the next pass picks up where this one stopped.
+            log.warning("Stats retention pass failed", exc_info=True)
+
+    def _retention_step(self, policy: retention.RetentionPolicy, today: date | None = None) -> bool:
+        """Fold one batch of expired periods. Returns True if more remain."""
+        backend = self._get_backend()
+        path = self._marks_file()
+        with self._locked():
+            if not backend.incremental and (self._pending or self._disk_changed()):
+                # Fold what is on disk, not a stale copy of it.
+                self._write_snapshot()
+            before = retention.load_marks(path)
+            with self._lock:
+                first = self.days.first_ordinal()
+            today = (today or self._date()).toordinal()
+            periods, marks, more = retention.plan(before, policy, first, today)
+            with self._lock:
+                changed = [p for p in periods if self.days.rollup(*p)]
+            if backend.incremental:
+                backend.rollup(periods)
+            elif changed:
+                self._write_snapshot()
+            if marks != before:
+                retention.save_marks(path, marks)
+        return more
+
+    @classmethod
+    def for_config(cls, cfg) -> "StatsStore":
+        """Load the store the way cfg asks for, or an empty one if tracking is off."""
+        if not cfg.track_stats:
             return cls()
+        return cls.load(
+            journaled=cfg.stats_journal,
+            storage=cfg.stats_storage,
+            keyfile=cfg.stats_keyfile,
+            # The timeline is plaintext; don't keep one beside encrypted stats.
+            timeline=cfg.stats_timeline and cfg.stats_storage != "encrypted",
+            flush_interval=cfg.stats_flush_seconds,
+            max_pending=cfg.stats_max_pending,
+        )
+
+    @classmethod
+    def load(
+        cls,
+        journaled: bool = False,
+        flush_interval: float = 0.0,
+        max_pending: int = 50,
+        storage: str = "json",
+        timeline: bool = False,
+        keyfile: str = "",
+    ) -> "StatsStore":
+        """Load stats from disk. Returns empty store on any error.
+
+        Journal records newer than the snapshot are replayed on top of it,
+        whether or not journaling is still enabled. Encrypted stats with a
+        missing or wrong key raise sealed.SealError instead, so they are
+        never replaced by an empty history.
+        """
+        store = cls(
+            journaled=journaled,
+            storage=storage,
+            keyfile=keyfile,
+            flush_interval=flush_interval,
+            max_pending=max_pending,
+            timeline=timeline,
+        )
+        backend = store._get_backend()
+        with store._locked():
+            if backend.incremental:
+                store._import_legacy(backend)
+                store.days, _ = backend.load(_window_start())
+                return store
+            store._load_disk()
+            if storage == "paged" and not backend.exists() and STATS_FILE.exists():
+                # One-time import; stats.json is left in place as a backup.
+                store._write_snapshot()
+            store._disk_sig = store._disk_signature()
+        return store
+
+    def _load_disk(self) -> None:
+        """Read the snapshot and replay newer journal records. Needs the file lock."""
+        backend = self._get_backend()
+        if not backend.exists() and backend.name != "json":
+            backend = backends.JsonBackend(STATS_FILE)
+        if backend.exists():
+            self.days, self._seq = backend.load(_window_start())
+        for record in self._get_journal().replay(after_seq=self._seq):
+            self._apply(record)
+            self._journal_size += 1
+
+    def _import_legacy(self, backend) -> None:
+        """Copy json/paged history and the journal into a fresh database, once.
+
+        Runs under the file lock so two processes starting together cannot
+        both import. The legacy files are left in place as a backup.
+        """
+        if backend.imported():
+            return
+        paged = backends.PagedBackend(STATS_FILE)
+        legacy = StatsStore(storage="paged" if paged.exists() else "json")
+        legacy._load_disk()
+        legacy.days._load_all()
+        imported = backend.import_table(legacy.days, legacy.storage)
+        if imported:
+            log.info("Imported %d days of %s stats into %s", imported, legacy.storage, backend.path)
 
     # -- internals --
 
     def _today(self) -> DailyStats:
-        key = date.today().isoformat()
-        if key not in self.days:
-            self.days[key] = DailyStats(date=key)
-        return self.days[key]
+        return self._day(self._date().isoformat())
+
+    def _now(self) -> datetime:
+        return datetime.fromtimestamp(self.clock.time())
+
+    def _date(self) -> date:
+        return date.fromtimestamp(self.clock.time())
+
+    def _day(self, key: str) -> DailyStats:
+        return self.days.ensure(key)
+
+    def _get_journal(self) -> Journal:
+        if self._journal is None:
+            self._journal = Journal(STATS_FILE.with_suffix(".journal"))
+        return self._journal
+
+    def _get_backend(self):
+        if self._backend is None:
+            self._backend = backends.open_backend(self.storage, STATS_FILE, self.keyfile)
+        return self._backend
+
+    def _get_timeline(self) -> Timeline:
+        if self._timeline is None:
+            self._timeline = Timeline(STATS_FILE.with_name("timeline.dat"))
+        return self._timeline
+
+    def _locked(self) -> FileLock:
+        """The inter-process stats lock, shared by every write and load."""
+        if self._file_lock is None:
+            self._file_lock = FileLock(STATS_FILE.with_suffix(".lock"))
+        return self._file_lock
+
+    def _marks_file(self):
+        return STATS_FILE.with_suffix(".retention")
+
+    def _disk_changed(self) -> bool:
+        """True if another process wrote since this store last synced."""
+        return self._disk_sig is not None and self._disk_sig != self._disk_signature()
+
+    def _disk_signature(self) -> tuple:
+        return (
+            _stat_signature(self._get_backend().path),
+            _stat_signature(self._get_journal().path),
+        )
+
+    def _record(self, **deltas: int) -> None:
+        """Apply counter deltas to today and queue them for persistence.
+
+        Sequence numbers are assigned when the record is written, under the
+        file lock, so they stay unique across processes.
+        """
+        with self._lock:
+            record = {"date": self._date().isoformat(), **deltas}
+            self.days.add(record["date"], record)
+            self._pending.append(record)
+
+    def _event(self, kind: str, value: int = 0, ts: float | None = None) -> None:
+        """Tell listeners about an event and queue it for the timeline, if on."""
+        for listener in self.listeners:
+            try:
+                listener(kind, value)
+            except Exception:
+                log.exception("Stats listener %r failed", listener)
+        if self.timeline:
+            with self._lock:
+                now = self.clock.time() if ts is None else ts
+                self._events.append(Event(int(now), kind, value))
+
+    def _apply(self, record: dict) -> None:
+        self.days.add(record["date"], record)
+        self._seq = max(self._seq, int(record["seq"]))
+
+
+def _with_rate(totals: dict) -> dict:
+    reminders = totals["reminders_sent"]
+    rate = totals["breaks_acknowledged"] / reminders if reminders else 0.0
+    return {**totals, "compliance": rate}
+
+
+def _stat_signature(path) -> tuple | None:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def _window_start() -> int:
+    return date.today().toordinal() - LAZY_WINDOW_DAYS
@@ -0,0 +1,319 @@
+"""Timestamped event timeline in a compact, delta-encoded file.
+
+DailyStats only keeps per-day totals. The timeline keeps every reminder,
+acknowledged break, session start and focus start/end with its time, so
+questions like "which hours do I skip breaks" or "how long after a
+reminder do I actually break" have an answer.
+
+Events are grouped into one chunk per local calendar day:
+
+    ordinal | base time | event count | payload length | payload
+
+All header fields are unsigned LEB128 varints. The payload has one token
+per event: the zigzag-encoded seconds since the previous event (the first
+event is relative to the base time), shifted left past a 3-bit kind and a
+has-value bit. A varint value follows when the bit is set (a break's or a
+focus session's duration). Reminders 20 minutes apart cost 3 bytes each.
+
+Finished days live in timeline.dat, which is append-only. The current day
+goes to timeline.tail as a short header plus raw tokens. It is sealed into
+timeline.dat when an event for a later day arrives. A crash between
+sealing and clearing the tail leaves a tail whose day is already sealed;
+it is recognised and ignored. scan() reads the chunk headers once to build
+an index, then decodes only the chunks whose days overlap the range.
+
+Timeline does no locking of its own; StatsStore calls it under the stats
+file lock.
+"""
+
+import bisect
+import os
+from collections.abc import Iterable
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import NamedTuple
+
+KINDS = ("reminder", "break", "session_start", "focus_start", "focus_end")
+_KIND_CODE = {kind: code for code, kind in enumerate(KINDS)}
+_TOKEN_SHIFT = 4  # 3 kind bits + 1 has-value bit
+
+
+class Event(NamedTuple):
+    # A tuple rather than a dataclass: scans build thousands of these.
+    ts: int
+    kind: str
+    value: int = 0
+
+    @property
+    def day(self) -> int:
+        """Local calendar day as a date ordinal."""
+        return date.fromtimestamp(self.ts).toordinal()
+
+    @property
+    def hour(self) -> int:
+        return datetime.fromtimestamp(self.ts).hour
+
+
+class Timeline:
+    """Append events and scan time ranges of timeline.dat + timeline.tail."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.tail_path = path.with_suffix(".tail")
+        # Sealed chunks in file order: (ordinal, base, count, offset, length)
+        self._index: list[tuple[int, int, int, int, int]] = []
+        self._days: list[int] = []
+        self._indexed = 0  # bytes of timeline.dat covered by _index
+        self._tail: tuple | None = None  # (inode, size, parsed state)
+        self.chunks_decoded = 0
+
+    def append(self, events: Iterable[Event]) -> int:
+        """Record events, oldest first. Returns bytes written."""
+        events = sorted(events, key=lambda e: e.ts)
+        if not events:
+            return 0
+        day, base, prev, count, payload = self._read_tail()
+        rewrite = day is None
+        start = len(payload)
+        written = 0
+        for event in events:
+            if day is not None and event.day > day:
+                written += self._seal(day, base, count, payload)
+                day = None
+            if day is None:
+                day, base, prev, count, payload = event.day, event.ts, event.ts, 0, bytearray()
+                rewrite, start = True, 0
+            prev = _encode(payload, event, prev)
+            count += 1
+        if rewrite:
+            header = bytearray()
+            _put(header, day)
+            _put(header, base)
+            written += _replace(self.tail_path, bytes(header + payload))
+        else:
+            fd = os.open(self.tail_path, os.O_WRONLY | os.O_APPEND)
+            try:
+                written += os.write(fd, payload[start:])
+            finally:
+                os.close(fd)
+        st = self.tail_path.stat()
+        self._tail = (st.st_ino, st.st_size, (day, base, prev, count, payload))
+        return written
+
+    def scan(self, start: float, end: float) -> list[Event]:
+        """Events with start <= ts <= end, oldest first."""
+        lo = date.fromtimestamp(start).toordinal()
+        hi = date.fromtimestamp(end).toordinal()
+        self._refresh_index()
+        found = []
+        first = bisect.bisect_left(self._days, lo)
+        last = bisect.bisect_right(self._days, hi)
+        if first < last:
+            with open(self.path, "rb") as f:
+                for _, base, count, offset, length in self._index[first:last]:
+                    f.seek(offset)
+                    events, _ = _decode(f.read(length), 0, base, count)
+                    self.chunks_decoded += 1
+                    found.extend(e for e in events if start <= e.ts <= end)
+        day, base, _, count, payload = self._read_tail()
+        if day is not None and lo <= day <= hi:
+            events, _ = _decode(payload, 0, base, count)
+            found.extend(e for e in events if start <= e.ts <= end)
+        found.sort(key=lambda e: e.ts)
+        return found
+
+    def day(self, day: date) -> list[Event]:
+        """Every event on a local calendar day."""
+        start = datetime.combine(day, datetime.min.time())
+        end = datetime.combine(day + timedelta(days=1), datetime.min.time())
+        return self.scan(start.timestamp(), end.timestamp() - 1)
+
+    def __len__(self) -> int:
+        self._refresh_index()
+        return sum(entry[2] for entry in self._index) + self._read_tail()[3]
+
+    @property
+    def nbytes(self) -> int:
+        """On-disk size of the sealed file and the tail."""
+        total = 0
+        for path in (self.path, self.tail_path):
+            try:
+                total += path.stat().st_size
+            except OSError:
+                pass
+        return total
+
+    # -- internals --
+
+    def _refresh_index(self) -> None:
+        try:
+            size = self.path.stat().st_size
+        except OSError:
+            size = 0
+        if size < self._indexed:
+            # Replaced or truncated under us; index from scratch.
+            self._index, self._days, self._indexed = [], [], 0
+        if size == self._indexed:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._indexed)
+            buf = f.read()
+        pos = 0
+        while pos < len(buf):
+            try:
+                ordinal, p = _get(buf, pos)
+                base, p = _get(buf, p)
+                count, p = _get(buf, p)
+                length, p = _get(buf, p)
+            except IndexError:
+                break
+            if p + length > len(buf):
+                break  # torn final chunk from a crash mid-seal
+            self._index.append((ordinal, base, count, self._indexed + p, length))
+            self._days.append(ordinal)
+            pos = p + length
+        self._indexed += pos
+
+    def _seal(self, day: int, base: int, count: int, payload: bytes) -> int:
+        self._refresh_index()
+        chunk = bytearray()
+        for field in (day, base, count, len(payload)):
+            _put(chunk, field)
+        chunk += payload
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_WRONLY | os.O_CREAT, 0o600)
+        try:
+            # Drop any torn chunk before appending the new one.
+            os.ftruncate(fd, self._indexed)
+            os.lseek(fd, self._indexed, os.SEEK_SET)
+            written = os.write(fd, chunk)
+        finally:
+            os.close(fd)
+        return written
+
+    def _read_tail(self) -> tuple[int | None, int, int, int, bytearray]:
+        """(day, base, last ts, count, payload) of the open day, if any."""
+        self._refresh_index()
+        try:
+            st = self.tail_path.stat()
+        except OSError:
+            return None, 0, 0, 0, bytearray()
+        cached = self._tail
+        if cached is not None and cached[:2] == (st.st_ino, st.st_size):
+            day, base, prev, count, payload = cached[2]
+        else:
+            day, base, prev, count, payload = self._parse_tail()
+            # The parse may have truncated a torn token.
+            st = self.tail_path.stat()
+            self._tail = (st.st_ino, st.st_size, (day, base, prev, count, payload))
+        if day is None or (self._days and day <= self._days[-1]):
+            return None, 0, 0, 0, bytearray()  # empty, or already sealed
+        return day, base, prev, count, bytearray(payload)
+
+    def _parse_tail(self) -> tuple[int | None, int, int, int, bytearray]:
+        raw = self.tail_path.read_bytes()
+        try:
+            day, pos = _get(raw, 0)
+            base, pos = _get(raw, pos)
+        except IndexError:
+            return None, 0, 0, 0, bytearray()
+        events, good = _decode(raw, pos, base, None)
+        if good < len(raw):
+            os.truncate(self.tail_path, good)  # torn final token
+        prev = events[-1].ts if events else base
+        return day, base, prev, len(events), bytearray(raw[pos:good])
+
+
+def by_hour(events: Iterable[Event], kind: str) -> list[int]:
+    """Count of kind events in each local hour of the day (24 buckets)."""
+    hours = [0] * 24
+    for event in events:
+        if event.kind == kind:
+            hours[event.hour] += 1
+    return hours
+
+
+def break_latencies(events: Iterable[Event]) -> list[int]:
+    """Seconds from each reminder to the break that answered it.
+
+    A reminder followed by another reminder before any break is unanswered
+    and contributes nothing.
+    """
+    latencies = []
+    pending = None
+    for event in events:
+        if event.kind == "reminder":
+            pending = event.ts
+        elif event.kind == "break" and pending is not None:
+            latencies.append(event.ts - pending)
+            pending = None
+    return latencies
+
+
+def _put(out: bytearray, n: int) -> None:
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _get(buf, pos: int) -> tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _encode(out: bytearray, event: Event, prev: int) -> int:
+    delta = event.ts - prev
+    zigzag = delta * 2 if delta >= 0 else -delta * 2 - 1
+    value = max(0, event.value)
+    _put(out, zigzag << _TOKEN_SHIFT | _KIND_CODE[event.kind] << 1 | (1 if value else 0))
+    if value:
+        _put(out, value)
+    return event.ts
+
+
+def _decode(buf, pos: int, prev: int, count: int | None) -> tuple[list[Event], int]:
+    """Decode count tokens (or all complete ones) from pos. Returns (events, end)."""
+    events = []
+    append = events.append
+    end = len(buf)
+    limit = end if count is None else count
+    # The varint loop is inlined: this is the hot path of every scan.
+    while len(events) < limit and pos < end:
+        try:
+            token = shift = 0
+            p = pos
+            while True:
+                byte = buf[p]
+                p += 1
+                token |= (byte & 0x7F) << shift
+                if byte < 0x80:
+                    break
+                shift += 7
+            value = 0
+            if token & 1:
+                value, p = _get(buf, p)
+            kind = KINDS[(token >> 1) & 0b111]
+        except IndexError:
+            break  # torn or corrupt final token
+        zigzag = token >> _TOKEN_SHIFT
+        prev += (zigzag >> 1) ^ -(zigzag & 1)
+        append(Event(prev, kind, value))
+        pos = p
+    return events, pos
+
+
+def _replace(path: Path, content: bytes) -> int:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(content)
+    os.chmod(tmp, 0o600)
+    tmp.replace(path)
+    return len(content)
@@ -0,0 +1,18 @@
+"""Break tips shown in reminder notifications.
+
+Kept free of GUI imports so the menu bar app and the headless runner
+rotate through the same list.
+"""
+
+BREAK_TIPS = [
+    "Look at something 20 feet away for 20 seconds.",
+    "Stand up and stretch your arms overhead.",
+    "Roll your shoulders — forward, then backward.",
+    "Close your eyes and take 5 deep breaths.",
+    "Walk to the window. Natural light resets your focus.",
+    "Grab a glass of water. Hydration matters.",
+    "Do a quick posture check — shoulders back, feet flat.",
+    "Stretch your wrists and fingers. They do a lot of work.",
+    "Focus on something green. It reduces eye strain.",
+    "Take a short walk. Even 2 minutes helps.",
+]
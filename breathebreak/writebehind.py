@@ -0,0 +1,119 @@
+"""Write-behind flushing for stores that persist on every update.
+
+Callers mark the store dirty after each change; a background thread calls
+the flush function once the oldest unflushed change is `interval` seconds
+old, or straight away once `max_pending` changes are buffered. A burst of
+updates therefore costs one write, and the UI thread never touches the disk.
+
+The data at risk on a hard kill is bounded by both knobs: at most
+`interval` seconds or `max_pending` events, whichever is hit first.
+Normal shutdown goes through `close()`, which always flushes.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections.abc import Callable
+
+log = logging.getLogger(__name__)
+
+
+class WriteBehind:
+    """Debounces flush calls onto a daemon thread."""
+
+    def __init__(
+        self,
+        flush_fn: Callable[[], None],
+        interval: float,
+        max_pending: int,
+        name: str = "breathebreak-writer",
+    ):
+        self._flush_fn = flush_fn
+        self.interval = interval
+        self.max_pending = max(1, max_pending)
+        self._name = name
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._dirty = False
+        self._urgent = False
+        self._dirty_since = 0.0
+        self._closed = False
+        self._thread: threading.Thread | None = None
+        self.flush_count = 0
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    def mark_dirty(self, pending: int = 1) -> None:
+        """Record that `pending` changes are waiting to be written."""
+        with self._cond:
+            if not self._dirty:
+                self._dirty = True
+                self._dirty_since = time.monotonic()
+            if pending >= self.max_pending:
+                self._urgent = True
+            if self._closed:
+                return
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+                self._thread.start()
+                atexit.register(self._close_at_exit)
+            self._cond.notify()
+
+    def flush(self) -> None:
+        """Write now if anything is pending. Runs on the caller's thread."""
+        with self._flush_lock:
+            with self._cond:
+                if not self._dirty:
+                    return
+                self._dirty = False
+                self._urgent = False
+            try:
+                self._flush_fn()
+            except BaseException:
+                with self._cond:
+                    self._dirty = True
+                raise
+            self.flush_count += 1
+
+    def close(self, timeout: float | None = 5.0) -> None:
+        """Stop the background thread and flush whatever is still pending."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            atexit.unregister(self._close_at_exit)
+        self.flush()
+
+    def _close_at_exit(self) -> None:
+        try:
+            self.close()
+        except Exception:
+            log.warning("Final flush at exit failed", exc_info=True)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._dirty and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                deadline = self._dirty_since + self.interval
+                while self._dirty and not self._urgent and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except Exception:
+                # Still dirty; retry after another interval rather than spin.
+                log.warning("Background flush failed", exc_info=True)
+                with self._cond:
+                    self._dirty_since = time.monotonic()
+                    self._urgent = False
@@ -0,0 +1,136 @@
+"""Tests for the team-wide stats aggregator."""
+
+import json
+from datetime import date, timedelta
+
+import pytest
+
+from breathebreak import aggregate as agg
+from breathebreak.aggregate import Aggregate, TeamDay, aggregate, fold, read_export
+from breathebreak.cli import main
+
+DAY = date(2024, 3, 4)
+
+
+def _export(path, rows: dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({day.isoformat(): counts for day, counts in rows.items()}))
+    return path
+
+
+def _person(path, reminders, breaks, focus, days=1):
+    rows = {
+        DAY + timedelta(days=i): {
+            "reminders_sent": reminders,
+            "breaks_acknowledged": breaks,
+            "focus_seconds": focus,
+        }
+        for i in range(days)
+    }
+    return _export(path, rows)
+
+
+class TestFold:
+    def test_totals_and_people_per_day(self, tmp_path):
+        a = _person(tmp_path / "a.json", 10, 5, 3600, days=2)
+        b = _person(tmp_path / "b.json", 10, 10, 7200)
+        result = fold([a, b])
+        rows = list(result.lines())
+        assert [r["date"] for r in rows[:-1]] == ["2024-03-04", "2024-03-05"]
+        assert rows[0]["people"] == 2
+        assert rows[0]["reminders_sent"] == 20
+        assert rows[0]["compliance"] == 0.75
+        assert rows[1]["people"] == 1
+        assert rows[-1]["kind"] == "total"
+        assert rows[-1]["people"] == 2
+        assert rows[-1]["reminders_sent"] == 30
+
+    def test_corrupt_files_are_skipped(self, tmp_path):
+        good = _person(tmp_path / "good.json", 4, 4, 60)
+        truncated = tmp_path / "truncated.json"
+        truncated.write_text('{"2024-03-04": {"reminders_')
+        wrong_shape = tmp_path / "list.json"
+        wrong_shape.write_text("[1, 2, 3]")
+        missing = tmp_path / "missing.json"
+        too_big = tmp_path / "too_big.json"
+        too_big.write_text('{"2024-03-04": {"reminders_sent": 99999999999999999999999}}')
+        assert read_export(truncated) is None
+        assert read_export(too_big) is None
+        result = fold([good, truncated, wrong_shape, missing, too_big])
+        assert (result.files, result.skipped, result.people) == (5, 4, 1)
+        assert result.days[DAY.toordinal()].reminders_sent == 4
+
+    def test_since_drops_earlier_days(self, tmp_path):
+        path = _person(tmp_path / "a.json", 1, 1, 0, days=5)
+        result = fold([path], since=(DAY + timedelta(days=3)).toordinal())
+        assert sorted(result.days) == [(DAY + timedelta(days=i)).toordinal() for i in (3, 4)]
+
+    def test_seq_key_is_ignored(self, tmp_path):
+        path = tmp_path / "a.json"
+        path.write_text(json.dumps({"_seq": 9, DAY.isoformat(): {"reminders_sent": 2}}))
+        assert fold([path]).days[DAY.toordinal()].reminders_sent == 2
+
+
+class TestPercentiles:
+    def test_per_person_percentiles(self, tmp_path):
+        paths = [
+            _person(tmp_path / f"p{i}.json", 10, i, i * 3600)
+            for i in range(1, 11)  # compliance 10%..100%, focus 1h..10h
+        ]
+        row = next(fold(paths).lines())
+        assert row["compliance_percentiles"] == {"p10": 0.1, "p50": 0.5, "p90": 0.9}
+        assert row["focus_percentiles"] == {"p10": 3600, "p50": 5 * 3600, "p90": 9 * 3600}
+
+    def test_people_without_reminders_have_no_compliance(self):
+        day = TeamDay()
+        day.focus[0] += 1
+        day.people = 1
+        assert day.row(DAY)["compliance_percentiles"] == {"p10": 0, "p50": 0, "p90": 0}
+
+    def test_histograms_stay_bounded(self, tmp_path):
+        paths = [_person(tmp_path / f"p{i}.json", 50, i % 51, i * 997) for i in range(500)]
+        day = fold(paths).days[DAY.toordinal()]
+        assert day.people == 500
+        assert len(day.compliance) <= 101
+        assert len(day.focus) <= 86400 // agg.FOCUS_BUCKET_SECONDS + 1
+
+    def test_merge_matches_a_single_fold(self, tmp_path):
+        paths = [_person(tmp_path / f"p{i}.json", 10, i % 11, i * 600) for i in range(30)]
+        merged = Aggregate()
+        for start in range(0, 30, 7):
+            merged.merge(fold(paths[start : start + 7]))
+        assert list(merged.lines()) == list(fold(paths).lines())
+
+
+class TestPool:
+    def test_pool_matches_a_single_fold(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(agg, "BATCH_FILES", 8)
+        for i in range(50):
+            _person(tmp_path / f"p{i}.json", 10, i % 11, i * 60, days=3)
+        (tmp_path / "bad.json").write_text("nope")
+        found = list(agg.find_exports(tmp_path))
+        seen = []
+        for result in aggregate(found, workers=2):
+            seen.append(result.files)
+        assert seen == sorted(seen) and seen[-1] == 51
+        assert len(seen) == 7
+        assert result.skipped == 1
+        assert list(result.lines()) == list(fold(found).lines())
+
+    def test_no_files(self, tmp_path):
+        assert list(aggregate([], workers=1)) == []
+
+    def test_cli_streams_json_lines(self, tmp_path, capsys):
+        _person(tmp_path / "team" / "a.json", 10, 5, 60)
+        _person(tmp_path / "team" / "nested" / "b.json", 10, 10, 60)
+        (tmp_path / "team" / "notes.txt").write_text("not an export")
+        main(["aggregate", str(tmp_path / "team"), "--workers", "1", "--progress"])
+        out, err = capsys.readouterr()
+        lines = [json.loads(line) for line in out.splitlines()]
+        assert [line["kind"] for line in lines] == ["day", "total"]
+        assert lines[0]["people"] == 2
+        assert json.loads(err.splitlines()[-1])["files"] == 2
+
+    def test_cli_rejects_missing_directory(self, tmp_path):
+        with pytest.raises(SystemExit):
+            main(["aggregate", str(tmp_path / "nope")])
@@ -0,0 +1,186 @@
+"""Tests for the local HTTP stats API."""
+
+import http.client
+import json
+import threading
+from datetime import date
+
+import pytest
+
+from breathebreak.api import ApiServer, reminder_state
+from breathebreak.config import Config
+from breathebreak.headless import HeadlessRunner
+from breathebreak.scheduler import Scheduler
+from breathebreak.stats import StatsStore
+
+
+def _store():
+    store = StatsStore()
+    store._persist = lambda: None
+    return store
+
+
+@pytest.fixture
+def server():
+    server = ApiServer(_store(), port=0)
+    server.start()
+    yield server
+    server.stop()
+
+
+def _get(conn, path, headers=None):
+    conn.request("GET", path, headers=headers or {})
+    resp = conn.getresponse()
+    return resp, resp.read()
+
+
+class TestEndpoints:
+    def test_today_serves_daily_stats(self, server):
+        server.stats.record_reminder()
+        conn = http.client.HTTPConnection("127.0.0.1", server.port)
+        resp, body = _get(conn, "/v1/today")
+        assert resp.status == 200
+        assert resp.getheader("Content-Type") == "application/json"
+        today = json.loads(body)
+        assert today["date"] == date.today().isoformat()
+        assert today["reminders_sent"] == 1
+
+    def test_summary_matches_totals(self, server):
+        server.stats.record_reminder()
+        server.stats.record_reminder()
+        server.stats.record_break()
+        conn = http.client.HTTPConnection("127.0.0.1", server.port)
+        summary = json.loads(_get(conn, "/v1/summary")[1])
+        assert summary["recent_days"] == 1
+        assert summary["recent"]["reminders_sent"] == 2
+        assert summary["week_to_date"]["compliance"] == 0.5
+        assert summary["month_to_date"]["breaks_acknowledged"] == 1
+
+    def test_state_is_whatever_was_published(self, server):
+        server.publish_state({"reminders_on": True})
+        conn = http.client.HTTPConnection("127.0.0.1", server.port)
+        assert json.loads(_get(conn, "/v1/state")[1]) == {"reminders_on": True}
+
+    def test_unknown_path_and_method(self, server):
+        conn = http.client.HTTPConnection("127.0.0.1", server.port)
+        assert _get(conn, "/v1/nope")[0].status == 404
+        conn.request("DELETE", "/v1/today")
+        resp = conn.getresponse()
+        resp.read()
+        assert resp.status == 405
+        assert resp.getheader("Allow") == "GET, HEAD"
+
+    def test_foreign_host_header_is_refused(self, server):
+        conn = http.client.HTTPConnection("127.0.0.1", server.port)
+        resp, _ = _get(conn, "/v1/today", {"Host": "attacker.example:8080"})
+        assert resp.status == 403
+        resp, _ = _get(conn, "/v1/today", {"Host": f"localhost:{server.port}"})
+        assert resp.status == 200
+
+    def test_request_body_is_rejected(self, server):
+        conn = http.client.HTTPConnection("127.0.0.1", server.port)
+        conn.request("GET", "/v1/today", body=b"x")
+        resp = conn.getresponse()
+        resp.read()
+        assert resp.status == 400
+        assert resp.getheader("Connection") == "close"
+
+    def test_port_in_use_raises(self, server):
+        with pytest.raises(OSError):
+            ApiServer(_store(), port=server.port).start()
+
+
+class TestCaching:
+    def test_etag_and_not_modified(self, server):
+        conn = http.client.HTTPConnection("127.0.0.1", server.port)
+        resp, _ = _get(conn, "/v1/today")
+        etag = resp.getheader("ETag")
+        resp, body = _get(conn, "/v1/today", {"If-None-Match": etag})
+        assert resp.status == 304
+        assert body == b""
+        server.stats.record_break()
+        resp, body = _get(conn, "/v1/today", {"If-None-Match": etag})
+        assert resp.status == 200
+        assert resp.getheader("ETag") != etag
+        assert json.loads(body)["breaks_acknowledged"] == 1
+
+    def test_state_etag_changes_on_publish(self, server):
+        conn = http.client.HTTPConnection("127.0.0.1", server.port)
+        etag = _get(conn, "/v1/state")[0].getheader("ETag")
+        server.publish_state({"idle": True})
+        resp, _ = _get(conn, "/v1/state", {"If-None-Match": etag})
+        assert resp.status == 200
+
+    def test_snapshot_is_reused_until_a_write(self):
+        store = _store()
+        first = store.snapshot()
+        assert store.snapshot() is first
+        store.record_reminder()
+        second = store.snapshot()
+        assert second is not first
+        assert first.today["reminders_sent"] == 0
+        assert second.today["reminders_sent"] == 1
+
+    def test_keep_alive_reuses_one_connection(self, server):
+        conn = http.client.HTTPConnection("127.0.0.1", server.port)
+        _get(conn, "/v1/today")
+        sock = conn.sock
+        for _ in range(20):
+            resp, _ = _get(conn, "/v1/summary")
+            assert resp.status == 200
+        assert conn.sock is sock
+        assert resp.getheader("Connection") == "keep-alive"
+
+
+class TestConcurrency:
+    def test_polling_does_not_block_writers(self, server):
+        stop = threading.Event()
+        errors = []
+
+        def poll():
+            conn = http.client.HTTPConnection("127.0.0.1", server.port)
+            while not stop.is_set():
+                resp, body = _get(conn, "/v1/today")
+                if resp.status != 200:
+                    errors.append(resp.status)
+                json.loads(body)
+
+        pollers = [threading.Thread(target=poll) for _ in range(4)]
+        for t in pollers:
+            t.start()
+        for _ in range(500):
+            server.stats.record_reminder()
+        stop.set()
+        for t in pollers:
+            t.join()
+        assert errors == []
+        conn = http.client.HTTPConnection("127.0.0.1", server.port)
+        assert json.loads(_get(conn, "/v1/today")[1])["reminders_sent"] == 500
+
+
+class TestRunnerIntegration:
+    def test_headless_publishes_state(self, monkeypatch):
+        monkeypatch.setattr("breathebreak.controller.notify", lambda *args, **kwargs: None)
+        runner = HeadlessRunner(config=Config(api_port=0), stats=_store(), scheduler=Scheduler())
+        runner._api = ApiServer(runner.stats, port=0)
+        runner._api.start()
+        monkeypatch.setattr(runner.scheduler, "run", lambda: None)
+        runner.run()
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", runner._api.port)
+            state = json.loads(_get(conn, "/v1/state")[1])
+            assert state["reminders_on"] is True
+            assert state["interval_minutes"] == runner.cfg.interval_minutes
+            assert state["next_reminder_at"] is not None
+        finally:
+            runner.shutdown()
+        assert runner._api is None
+
+    def test_state_without_reminder(self):
+        state = reminder_state(Scheduler(), None, None, 20)
+        assert state == {
+            "reminders_on": False,
+            "idle": False,
+            "interval_minutes": 20,
+            "next_reminder_at": None,
+        }
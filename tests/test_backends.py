@@ -0,0 +1,152 @@
+"""Tests for the stats storage backends, mainly SQLite."""
+
+import sqlite3
+from datetime import date, timedelta
+
+import pytest
+
+from breathebreak.backends import SqliteBackend, open_backend
+from breathebreak.daytable import DayTable
+from breathebreak.stats import StatsStore
+
+
+def _history(days: int, start: date = date(2010, 1, 1), every: int = 1) -> DayTable:
+    rows = {}
+    for i in range(0, days, every):
+        key = (start + timedelta(days=i)).isoformat()
+        rows[key] = {"reminders_sent": i % 30, "focus_seconds": i}
+    return DayTable.from_rows(rows)
+
+
+@pytest.fixture
+def stats_file(tmp_path, monkeypatch):
+    path = tmp_path / "stats.json"
+    monkeypatch.setattr("breathebreak.stats.STATS_FILE", path)
+    return path
+
+
+class TestSqliteBackend:
+    def test_apply_batches_deltas_per_day(self, tmp_path):
+        backend = SqliteBackend(tmp_path / "stats.json")
+        days = backend.apply(
+            [
+                {"date": "2024-03-01", "reminders_sent": 1},
+                {"date": "2024-03-01", "reminders_sent": 1, "focus_seconds": 60},
+                {"date": "2024-03-02", "breaks_acknowledged": 1},
+            ]
+        )
+        backend.apply([{"date": "2024-03-01", "reminders_sent": 1}])
+        assert days == 2
+        first = date(2024, 3, 1).toordinal()
+        totals = backend.totals(first, first)
+        assert totals["reminders_sent"] == 3
+        assert totals["focus_seconds"] == 60
+        assert backend.totals(first, first + 1)["breaks_acknowledged"] == 1
+
+    def test_wal_mode_and_private_file(self, tmp_path):
+        backend = SqliteBackend(tmp_path / "stats.json")
+        backend.apply([{"date": "2024-03-01", "reminders_sent": 1}])
+        conn = sqlite3.connect(backend.path)
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert backend.path.stat().st_mode & 0o777 == 0o600
+
+    def test_range_query_uses_the_date_key(self, tmp_path):
+        backend = SqliteBackend(tmp_path / "stats.json")
+        backend.import_table(_history(400), "json")
+        conn = backend._connect()
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT SUM(reminders_sent) FROM days WHERE day BETWEEN ? AND ?",
+            ("2010-02-01", "2010-02-28"),
+        ).fetchall()
+        assert "USING PRIMARY KEY" in " ".join(row[-1] for row in plan)
+
+    def test_pager_matches_snapshot_table(self, tmp_path):
+        table = _history(500, every=3)
+        backend = SqliteBackend(tmp_path / "stats.json")
+        backend.import_table(table, "json")
+        lazy, _ = backend.load(window_start=date(2011, 1, 1).toordinal())
+        assert lazy.resident_days < len(table)
+        first, last = table.first_ordinal(), table.last_ordinal()
+        assert lazy.totals(first, last) == table.totals(first, last)
+        assert lazy.to_dict() == table.to_dict()
+
+    def test_recent_spans_days_with_data(self, tmp_path):
+        backend = SqliteBackend(tmp_path / "stats.json")
+        assert backend.recent(7) == (0, 0)
+        assert backend.last_ordinal() is None
+        backend.import_table(_history(30, every=5), "json")
+        first, count = backend.recent(3)
+        assert count == 3
+        assert first == date(2010, 1, 16).toordinal()
+
+    def test_unknown_storage_falls_back_to_json(self, tmp_path):
+        assert open_backend("nope", tmp_path / "stats.json").name == "json"
+
+
+class TestSqliteStore:
+    def test_records_survive_reload(self, stats_file):
+        store = StatsStore.load(storage="sqlite")
+        store.record_reminder()
+        store.record_break(30)
+        store.close()
+        loaded = StatsStore.load(storage="sqlite")
+        today = loaded.days[date.today().isoformat()]
+        assert today.reminders_sent == 1
+        assert today.total_break_seconds == 30
+        assert not stats_file.exists()
+
+    def test_imports_json_and_journal_once(self, stats_file):
+        StatsStore(days=_history(60)).compact()
+        journaled = StatsStore.load(journaled=True)
+        journaled.record_reminder()
+
+        store = StatsStore.load(storage="sqlite")
+        today = date.today()
+        assert store.totals(today, today)["reminders_sent"] == 1
+        assert store.days["2010-01-10"].reminders_sent == 9
+        store.record_reminder()
+        store.close()
+
+        # A second start must not add the legacy counts again.
+        again = StatsStore.load(storage="sqlite")
+        assert again.totals(today, today)["reminders_sent"] == 2
+        assert again.days["2010-01-10"].reminders_sent == 9
+        assert stats_file.exists()
+
+    def test_imports_paged_history(self, stats_file):
+        StatsStore(days=_history(90), storage="paged").compact()
+        store = StatsStore.load(storage="sqlite")
+        first = date(2010, 1, 1)
+        assert store.totals(first, first + timedelta(days=89)) == _history(90).totals(
+            first.toordinal(), first.toordinal() + 89
+        )
+
+    def test_summary_includes_unflushed_events(self, stats_file):
+        store = StatsStore.load(storage="sqlite", flush_interval=60)
+        store.record_reminder()
+        store.record_break()
+        assert "Compliance:     100%" in store.summary()
+        store.close()
+
+    def test_totals_see_other_writers(self, stats_file):
+        first = StatsStore.load(storage="sqlite")
+        second = StatsStore.load(storage="sqlite")
+        first.record_reminder()
+        second.record_reminder()
+        today = date.today()
+        assert first.totals(today, today)["reminders_sent"] == 2
+
+    def test_failed_write_keeps_events(self, stats_file, monkeypatch):
+        store = StatsStore.load(storage="sqlite")
+
+        def fail(records):
+            raise sqlite3.OperationalError("database is locked")
+
+        monkeypatch.setattr(store._get_backend(), "apply", fail)
+        with pytest.raises(sqlite3.OperationalError):
+            store.record_reminder()
+        monkeypatch.undo()
+        monkeypatch.setattr("breathebreak.stats.STATS_FILE", stats_file)
+        store.record_reminder()
+        today = date.today()
+        assert store.totals(today, today)["reminders_sent"] == 2
@@ -1,12 +1,19 @@
 """Tests for configuration management."""
 
+import os
+
 import yaml
 
+import breathebreak.config as config_module
 from breathebreak.config import (
+    DEFAULT_FLUSH_SECONDS,
     DEFAULT_INTERVAL,
+    DEFAULT_MAX_PENDING,
     MAX_INTERVAL,
     MIN_INTERVAL,
+    MIN_KEEP_DAYS,
     Config,
+    ConfigWatcher,
 )
 
 
@@ -77,6 +84,27 @@ class TestConfigLoad:
         cfg = Config.load()
         assert cfg.interval_minutes == MAX_INTERVAL
 
+    def test_idle_threshold_is_clamped(self, tmp_path, monkeypatch):
+        cfg_file = tmp_path / "config.yaml"
+        cfg_file.write_text(yaml.dump({"idle_threshold_minutes": -3}))
+        monkeypatch.setattr("breathebreak.config.CONFIG_FILE", cfg_file)
+        assert Config.load().idle_threshold_minutes == 0
+
+    def test_privileged_api_port_turns_api_off(self, tmp_path, monkeypatch):
+        cfg_file = tmp_path / "config.yaml"
+        cfg_file.write_text(yaml.dump({"api_port": 80}))
+        monkeypatch.setattr("breathebreak.config.CONFIG_FILE", cfg_file)
+        assert Config.load().api_port == 0
+
+    def test_invalid_quiet_hours_are_dropped(self, tmp_path, monkeypatch):
+        cfg_file = tmp_path / "config.yaml"
+        rules = ["22:00-07:00", "Mon-Fri 12:00-13:00", "lunch", "25:00-26:00", 5]
+        cfg_file.write_text(yaml.dump({"quiet_hours": rules, "calendar_files": "~/work.ics"}))
+        monkeypatch.setattr("breathebreak.config.CONFIG_FILE", cfg_file)
+        cfg = Config.load()
+        assert cfg.quiet_hours == ("22:00-07:00", "Mon-Fri 12:00-13:00")
+        assert cfg.calendar_files == ("~/work.ics",)
+
     def test_title_is_length_capped(self, tmp_path, monkeypatch):
         cfg_file = tmp_path / "config.yaml"
         cfg_file.write_text(yaml.dump({"notification_title": "A" * 200}))
@@ -110,3 +138,156 @@ class TestConfigSave:
         loaded = Config.load()
         assert loaded.interval_minutes == 42
         assert loaded.sound_enabled is False
+
+
+class TestStatsPersistenceSettings:
+    def test_defaults(self):
+        cfg = Config()
+        assert cfg.stats_flush_seconds == DEFAULT_FLUSH_SECONDS
+        assert cfg.stats_max_pending == DEFAULT_MAX_PENDING
+        assert cfg.stats_timeline is False
+
+    def test_out_of_range_values_are_clamped(self, tmp_path, monkeypatch):
+        cfg_file = tmp_path / "config.yaml"
+        cfg_file.write_text(yaml.dump({"stats_flush_seconds": 9999, "stats_max_pending": 0}))
+        monkeypatch.setattr("breathebreak.config.CONFIG_FILE", cfg_file)
+        cfg = Config.load()
+        assert cfg.stats_flush_seconds == 300
+        assert cfg.stats_max_pending == 1
+
+    def test_keep_days_is_off_or_at_least_the_minimum(self, tmp_path, monkeypatch):
+        cfg_file = tmp_path / "config.yaml"
+        monkeypatch.setattr("breathebreak.config.CONFIG_FILE", cfg_file)
+        cfg_file.write_text(yaml.dump({"stats_keep_days": 3, "stats_keep_weeks": -1}))
+        cfg = Config.load()
+        assert cfg.stats_keep_days == MIN_KEEP_DAYS
+        assert cfg.stats_keep_weeks == 0
+        cfg_file.write_text(yaml.dump({"stats_keep_days": 0}))
+        assert Config.load().stats_keep_days == 0
+
+    def test_encrypted_storage_and_keyfile(self, tmp_path, monkeypatch):
+        cfg_file = tmp_path / "config.yaml"
+        monkeypatch.setattr("breathebreak.config.CONFIG_FILE", cfg_file)
+        cfg_file.write_text(
+            yaml.dump({"stats_storage": "Encrypted", "stats_keyfile": " ~/keys/stats.key "})
+        )
+        cfg = Config.load()
+        assert cfg.stats_storage == "encrypted"
+        assert cfg.stats_keyfile == "~/keys/stats.key"
+        cfg_file.write_text(yaml.dump({"stats_keyfile": None}))
+        assert Config.load().stats_keyfile == ""
+
+
+class TestConfigCache:
+    def _setup(self, tmp_path, monkeypatch, content):
+        cfg_file = tmp_path / "config.yaml"
+        cfg_file.write_text(content)
+        monkeypatch.setattr("breathebreak.config.CONFIG_FILE", cfg_file)
+        monkeypatch.setattr("breathebreak.config.CONFIG_DIR", tmp_path)
+        parses = []
+        real_parse = config_module._parse
+        monkeypatch.setattr(
+            "breathebreak.config._parse", lambda content: parses.append(1) or real_parse(content)
+        )
+        return cfg_file, parses
+
+    def _age(self, path, seconds=10):
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns - seconds * 1_000_000_000))
+
+    def test_unchanged_file_is_not_reparsed(self, tmp_path, monkeypatch):
+        cfg_file, parses = self._setup(tmp_path, monkeypatch, "interval_minutes: 30\n")
+        self._age(cfg_file)
+        assert Config.load().interval_minutes == 30
+        assert Config.load().interval_minutes == 30
+        assert len(parses) == 1
+
+    def test_touch_without_change_is_not_reparsed(self, tmp_path, monkeypatch):
+        cfg_file, parses = self._setup(tmp_path, monkeypatch, "interval_minutes: 30\n")
+        Config.load()
+        os.utime(cfg_file)
+        Config.load()
+        assert len(parses) == 1
+
+    def test_changed_file_is_reparsed(self, tmp_path, monkeypatch):
+        cfg_file, parses = self._setup(tmp_path, monkeypatch, "interval_minutes: 30\n")
+        Config.load()
+        cfg_file.write_text("interval_minutes: 45\n")
+        assert Config.load().interval_minutes == 45
+        assert len(parses) == 2
+
+    def test_loads_are_independent_copies(self, tmp_path, monkeypatch):
+        self._setup(tmp_path, monkeypatch, "interval_minutes: 30\n")
+        first = Config.load()
+        first.interval_minutes = 99
+        assert Config.load().interval_minutes == 30
+
+    def test_non_mapping_document_returns_defaults(self, tmp_path, monkeypatch):
+        self._setup(tmp_path, monkeypatch, "- just\n- a list\n")
+        assert Config.load() == Config()
+
+
+class TestSaveSkipsNoOp:
+    def test_identical_save_does_not_rewrite(self, tmp_path, monkeypatch):
+        config_file = tmp_path / "config.yaml"
+        monkeypatch.setattr("breathebreak.config.CONFIG_DIR", tmp_path)
+        monkeypatch.setattr("breathebreak.config.CONFIG_FILE", config_file)
+
+        Config(interval_minutes=30).save()
+        before = config_file.stat()
+        Config(interval_minutes=30).save()
+        after = config_file.stat()
+        assert (before.st_ino, before.st_mtime_ns) == (after.st_ino, after.st_mtime_ns)
+
+    def test_changed_save_rewrites(self, tmp_path, monkeypatch):
+        config_file = tmp_path / "config.yaml"
+        monkeypatch.setattr("breathebreak.config.CONFIG_DIR", tmp_path)
+        monkeypatch.setattr("breathebreak.config.CONFIG_FILE", config_file)
+
+        Config(interval_minutes=30).save()
+        Config(interval_minutes=31).save()
+        assert Config.load().interval_minutes == 31
+
+
+class TestConfigWatcher:
+    def _setup(self, tmp_path, monkeypatch):
+        config_file = tmp_path / "config.yaml"
+        monkeypatch.setattr("breathebreak.config.CONFIG_DIR", tmp_path)
+        monkeypatch.setattr("breathebreak.config.CONFIG_FILE", config_file)
+        Config(interval_minutes=20).save()
+        return ConfigWatcher(Config.load(), min_interval=1, max_interval=8)
+
+    def test_quiet_file_backs_off(self, tmp_path, monkeypatch):
+        watcher = self._setup(tmp_path, monkeypatch)
+        delays = []
+        for _ in range(5):
+            assert watcher.poll() is None
+            delays.append(watcher.delay)
+        assert delays == [2, 4, 8, 8, 8]
+
+    def test_detects_edit_and_resets_backoff(self, tmp_path, monkeypatch):
+        watcher = self._setup(tmp_path, monkeypatch)
+        watcher.poll()
+        watcher.poll()
+        Config(interval_minutes=45).save()
+        new = watcher.poll()
+        assert new.interval_minutes == 45
+        assert watcher.delay == 1
+
+    def test_rewrite_with_same_values_is_not_a_change(self, tmp_path, monkeypatch):
+        watcher = self._setup(tmp_path, monkeypatch)
+        path = tmp_path / "config.yaml"
+        path.write_text("interval_minutes: 20\n# a comment\n")
+        assert watcher.poll() is None
+
+    def test_edits_are_validated(self, tmp_path, monkeypatch):
+        watcher = self._setup(tmp_path, monkeypatch)
+        (tmp_path / "config.yaml").write_text("interval_minutes: 100000\n")
+        assert watcher.poll().interval_minutes == MAX_INTERVAL
+
+    def test_deleted_file_reverts_to_defaults(self, tmp_path, monkeypatch):
+        watcher = self._setup(tmp_path, monkeypatch)
+        (tmp_path / "config.yaml").write_text("interval_minutes: 30\n")
+        watcher.poll()
+        (tmp_path / "config.yaml").unlink()
+        assert watcher.poll() == Config()
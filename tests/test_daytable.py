@@ -0,0 +1,203 @@
+"""Tests for the columnar per-day counter table."""
+
+import json
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+import pytest
+
+from breathebreak.daytable import DailyStats, DayTable
+
+
+@dataclass
+class _LegacyDailyStats:
+    """The pre-columnar representation, kept here as a baseline."""
+
+    date: str
+    reminders_sent: int = 0
+    breaks_acknowledged: int = 0
+    total_break_seconds: int = 0
+    sessions_started: int = 0
+    focus_seconds: int = 0
+
+
+def _synthetic_history(years: int) -> dict:
+    start = date(2010, 1, 1)
+    rows = {}
+    for i in range(years * 366):
+        key = (start + timedelta(days=i)).isoformat()
+        rows[key] = {
+            "date": key,
+            "reminders_sent": 18 + i % 7,
+            "breaks_acknowledged": 12 + i % 5,
+            "total_break_seconds": 240 + i % 300,
+            "sessions_started": 1 + i % 3,
+            "focus_seconds": 21_600 + i,
+        }
+    return rows
+
+
+class TestDailyStatsView:
+    def test_detached_construction(self):
+        day = DailyStats(date="2024-03-01", reminders_sent=3)
+        assert day.date == "2024-03-01"
+        assert day.reminders_sent == 3
+        assert day.focus_seconds == 0
+
+    def test_view_writes_through(self):
+        table = DayTable()
+        table.ensure("2024-03-01").reminders_sent += 2
+        assert table["2024-03-01"].reminders_sent == 2
+
+    def test_equality_and_repr(self):
+        a = DailyStats(date="2024-03-01", breaks_acknowledged=1)
+        b = DailyStats(date="2024-03-01", breaks_acknowledged=1)
+        assert a == b
+        assert "breaks_acknowledged=1" in repr(a)
+
+    def test_view_survives_growth_to_earlier_dates(self):
+        table = DayTable()
+        view = table.ensure("2024-03-10")
+        view.sessions_started = 4
+        table.ensure("2023-01-01")
+        assert view.sessions_started == 4
+
+
+class TestDayTableMapping:
+    def test_missing_day_not_present(self):
+        table = DayTable()
+        table.ensure("2024-01-01")
+        table.ensure("2024-01-05")
+        assert "2024-01-03" not in table
+        assert len(table) == 2
+        with pytest.raises(KeyError):
+            table["2024-01-03"]
+
+    def test_iterates_in_date_order(self):
+        table = DayTable()
+        for key in ("2024-02-01", "2023-12-31", "2024-01-15"):
+            table.ensure(key)
+        assert list(table) == ["2023-12-31", "2024-01-15", "2024-02-01"]
+
+    def test_setitem_copies_counts(self):
+        table = DayTable()
+        table["2024-01-01"] = DailyStats(date="2024-01-01", focus_seconds=60)
+        assert table["2024-01-01"].focus_seconds == 60
+
+    def test_delete(self):
+        table = DayTable()
+        table.ensure("2024-01-01").reminders_sent = 5
+        del table["2024-01-01"]
+        assert "2024-01-01" not in table
+        assert table.ensure("2024-01-01").reminders_sent == 0
+
+    def test_invalid_key_is_not_contained(self):
+        assert "not-a-date" not in DayTable()
+        assert None not in DayTable()
+
+    def test_add(self):
+        table = DayTable()
+        table.add("2024-01-01", {"reminders_sent": 1, "seq": 9})
+        table.add("2024-01-01", {"reminders_sent": 2})
+        assert table["2024-01-01"].reminders_sent == 3
+
+
+class TestFromRows:
+    def test_dense_roundtrip(self):
+        rows = _synthetic_history(1)
+        assert DayTable.from_rows(rows).to_dict() == rows
+
+    def test_sparse_unsorted_rows(self):
+        rows = {
+            "2024-03-01": {"reminders_sent": 1},
+            "2023-01-01": {"focus_seconds": 5},
+        }
+        table = DayTable.from_rows(rows)
+        assert list(table) == ["2023-01-01", "2024-03-01"]
+        assert table["2024-03-01"].reminders_sent == 1
+        assert table["2023-01-01"].focus_seconds == 5
+
+    def test_survives_json_roundtrip(self):
+        rows = _synthetic_history(1)
+        table = DayTable.from_rows(json.loads(json.dumps(rows)))
+        assert len(table) == len(rows)
+
+
+class TestFootprint:
+    """Ten-plus years of history must be clearly cheaper than a dataclass dict."""
+
+    YEARS = 12
+
+    def test_memory_drops(self):
+        text = json.dumps(_synthetic_history(self.YEARS))
+
+        # Measure what stays resident after loading, as StatsStore.load() would.
+        tracemalloc.start()
+        legacy = {k: _LegacyDailyStats(**v) for k, v in json.loads(text).items()}
+        legacy_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        tracemalloc.start()
+        table = DayTable.from_rows(json.loads(text))
+        table_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        assert len(table) == len(legacy)
+        assert table_bytes * 4 < legacy_bytes
+
+    def test_load_time_drops(self):
+        rows = _synthetic_history(self.YEARS)
+
+        def best_of(fn, repeat=7):
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                fn()
+                timings.append(time.perf_counter() - start)
+            return min(timings)
+
+        legacy = best_of(lambda: {k: _LegacyDailyStats(**v) for k, v in rows.items()})
+        columnar = best_of(lambda: DayTable.from_rows(rows))
+        assert columnar < legacy
+
+
+class TestRangeTotals:
+    def test_totals_match_naive_sum(self):
+        rows = _synthetic_history(2)
+        table = DayTable.from_rows(rows)
+        keys = list(rows)
+        first = date.fromisoformat(keys[100]).toordinal()
+        last = date.fromisoformat(keys[400]).toordinal()
+        expected = sum(rows[k]["focus_seconds"] for k in keys[100:401])
+        assert table.totals(first, last)["focus_seconds"] == expected
+
+    def test_totals_clamp_to_stored_range(self):
+        table = DayTable()
+        table.ensure("2024-01-02").reminders_sent = 3
+        first = date(2000, 1, 1).toordinal()
+        last = date(2100, 1, 1).toordinal()
+        assert table.totals(first, last)["reminders_sent"] == 3
+
+    def test_prefix_sums_follow_writes(self):
+        table = DayTable()
+        day = table.ensure("2024-01-01")
+        ordinal = date(2024, 1, 1).toordinal()
+        assert table.totals(ordinal, ordinal + 5)["reminders_sent"] == 0
+        day.reminders_sent += 2
+        table.add("2024-01-03", {"reminders_sent": 5})
+        assert table.totals(ordinal, ordinal + 5)["reminders_sent"] == 7
+        table.ensure("2023-12-31").reminders_sent = 1
+        assert table.totals(ordinal - 1, ordinal + 5)["reminders_sent"] == 8
+        del table["2024-01-03"]
+        assert table.totals(ordinal - 1, ordinal + 5)["reminders_sent"] == 3
+
+    def test_recent(self):
+        table = DayTable()
+        for key in ("2024-01-01", "2024-01-09", "2024-01-04"):
+            table.ensure(key)
+        assert table.recent(2) == (date(2024, 1, 4).toordinal(), 2)
+        assert table.recent(10) == (date(2024, 1, 1).toordinal(), 3)
+        assert table.recent(0) == (0, 0)
+        assert DayTable().recent(7) == (0, 0)
@@ -0,0 +1,163 @@
+"""Tests for the D-Bus notification backend, against a stand-in daemon."""
+
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from breathebreak.dbusnotify import (
+    BUS_NAME,
+    BUS_PATH,
+    METHOD_CALL,
+    NOTIFY_SIGNATURE,
+    Connection,
+    DBusBackend,
+    DBusError,
+    FakeNotificationDaemon,
+    Message,
+    decode,
+    encode,
+    socket_addresses,
+    split_signature,
+)
+from breathebreak.notifier import Dispatcher, Notification
+
+
+@pytest.fixture
+def daemon():
+    # Unix socket paths are limited to ~104 bytes; pytest's tmp_path can be longer.
+    root = Path(tempfile.mkdtemp(prefix="bb", dir="/tmp"))
+    daemon = FakeNotificationDaemon(root / "bus")
+    yield daemon
+    daemon.close()
+    shutil.rmtree(root, ignore_errors=True)
+
+
+def _note(subtitle="Time for a break", message="Stretch", sound=True, kind="reminder"):
+    return Notification("BreatheBreak", subtitle, message, sound, kind)
+
+
+class TestWireFormat:
+    def test_split_signature(self):
+        assert split_signature(NOTIFY_SIGNATURE) == [
+            "s", "u", "s", "s", "s", "as", "a{sv}", "i"
+        ]  # fmt: skip
+        assert split_signature("a(ya{sv})x") == ["a(ya{sv})", "x"]
+        with pytest.raises(ValueError):
+            split_signature("a{sv")
+
+    def test_round_trip(self):
+        hints = {"urgency": ("y", 1), "x": ("b", True)}
+        body = ("app", 7, "", "Summary", "ünïcode", [], hints, -1)
+        fields = {1: "/a/b", 2: "org.example.I", 3: "M", 6: "org.example"}
+        raw = encode(Message(METHOD_CALL, 42, fields, body), NOTIFY_SIGNATURE)
+        message = decode(raw)
+        assert (message.kind, message.serial, message.member) == (METHOD_CALL, 42, "M")
+        # Variants come back as plain values.
+        assert message.body == (*body[:6], {"urgency": 1, "x": True}, -1)
+
+    def test_addresses(self):
+        address = "tcp:host=localhost,port=1;unix:abstract=/tmp/dbus-x,guid=ab;unix:path=/run/a%20b"
+        assert socket_addresses(address) == ["\0/tmp/dbus-x", "/run/a b"]
+        assert socket_addresses("tcp:host=localhost,port=1") == []
+
+
+class TestConnection:
+    def test_hello_and_error_replies(self, daemon):
+        conn = Connection(daemon.address)
+        assert conn.unique_name == ":1.1"
+        with pytest.raises(DBusError) as err:
+            conn.call(BUS_NAME, BUS_PATH, BUS_NAME, "ListNames")
+        assert err.value.name == "org.freedesktop.DBus.Error.UnknownMethod"
+        conn.close()
+
+    def test_no_unix_transport(self):
+        with pytest.raises(OSError):
+            Connection("tcp:host=localhost,port=1")
+
+
+class TestDBusBackend:
+    def test_one_connection_for_many_notifications(self, daemon):
+        backend = DBusBackend(daemon.address)
+        for i in range(20):
+            backend.deliver(_note(f"n{i}"))
+        assert len(daemon.received) == 20
+        assert daemon.connections == 1
+        backend.close()
+
+    def test_superseded_notification_is_replaced_in_place(self, daemon):
+        backend = DBusBackend(daemon.address)
+        backend.deliver(_note(message="Stretch"))
+        backend.deliver(_note("Interval updated", "20 min", kind="interval"))
+        backend.deliver(_note(message="Look away", sound=False))
+        first, other, again = daemon.received
+        assert again.replaces_id == first.id and again.id == first.id
+        assert other.replaces_id == 0 and other.id != first.id
+        assert again.hints == {"suppress-sound": True} and first.hints == {}
+        assert daemon.on_screen == {first.id: "Time for a break", other.id: "Interval updated"}
+        backend.close()
+
+    def test_one_off_notifications_stack(self, daemon):
+        backend = DBusBackend(daemon.address)
+        backend.deliver(_note("", "Please enter a valid number.", kind=""))
+        backend.deliver(_note("", "Choose between 1 and 480 minutes.", kind=""))
+        first, second = daemon.received
+        assert second.replaces_id == 0 and second.id != first.id
+        assert len(daemon.on_screen) == 2
+        backend.close()
+
+    def test_dismissed_notification_gets_a_new_id(self, daemon):
+        backend = DBusBackend(daemon.address)
+        backend.deliver(_note())
+        conn = Connection(daemon.address)
+        conn.call(
+            "org.freedesktop.Notifications",
+            "/org/freedesktop/Notifications",
+            "org.freedesktop.Notifications",
+            "CloseNotification",
+            "u",
+            (daemon.received[0].id,),
+        )
+        conn.close()
+        backend.deliver(_note())
+        assert daemon.received[1].id != daemon.received[0].id
+        backend.close()
+
+    def test_reconnects_after_the_bus_drops_it(self, daemon):
+        backend = DBusBackend(daemon.address)
+        backend.deliver(_note())
+        daemon.disconnect_all()
+        backend.deliver(_note())
+        assert daemon.connections == 2
+        # The server forgot nothing, so the id still replaces the old one.
+        assert daemon.received[1].replaces_id == daemon.received[0].id
+        backend.close()
+
+    def test_timeout_drops_the_connection(self, daemon):
+        backend = DBusBackend(daemon.address, timeout=0.2)
+        daemon.delay = 1.0
+        with pytest.raises(TimeoutError):
+            backend.deliver(_note())
+        daemon.delay = 0.0
+        backend.deliver(_note("next"))
+        assert daemon.connections == 2
+        backend.close()
+
+    def test_no_bus(self, monkeypatch, tmp_path):
+        monkeypatch.delenv("DBUS_SESSION_BUS_ADDRESS", raising=False)
+        monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+        with pytest.raises(OSError):
+            DBusBackend()
+
+    def test_through_the_dispatcher(self, daemon):
+        backend = DBusBackend(daemon.address)
+        dispatcher = Dispatcher(backend.deliver)
+        for minutes in (10, 15, 20):
+            dispatcher.submit(_note("Interval updated", f"{minutes} min", kind="interval"))
+        assert dispatcher.drain(2)
+        assert dispatcher.counts()["failed"] == 0
+        assert daemon.received[-1].body == "20 min"
+        assert len(daemon.on_screen) == 1
+        dispatcher.close()
+        backend.close()
@@ -0,0 +1,185 @@
+"""Tests for the event bus and the Unix socket event stream."""
+
+import json
+import os
+import shutil
+import socket
+import stat
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+from breathebreak.config import Config
+from breathebreak.events import EventBus
+from breathebreak.eventsocket import SUBSCRIBER_BUFFER, EventSocketServer
+from breathebreak.headless import HeadlessRunner
+from breathebreak.stats import StatsStore
+
+
+def _store():
+    store = StatsStore()
+    store._persist = lambda: None
+    return store
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def sock_path():
+    # Unix socket paths are limited to ~104 bytes; pytest's tmp_path can be longer.
+    root = Path(tempfile.mkdtemp(prefix="bb", dir="/tmp"))
+    yield root / "events.sock"
+    shutil.rmtree(root, ignore_errors=True)
+
+
+@pytest.fixture
+def server(sock_path):
+    server = EventSocketServer(EventBus(), sock_path)
+    server.start()
+    yield server
+    server.stop()
+
+
+def _subscribe(server, settings: dict | None = None):
+    # Counted before connecting: the server may register us before connect() returns.
+    expected = server.subscribers + 1
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.connect(str(server.path))
+    conn.settimeout(5)
+    if settings is not None:
+        conn.sendall(json.dumps(settings).encode() + b"\n")
+    _wait_for(lambda: server.subscribers == expected)
+    return conn, conn.makefile("rb")
+
+
+class TestEventBus:
+    def test_subscribers_get_events_until_unsubscribed(self):
+        bus = EventBus()
+        seen = []
+        unsubscribe = bus.subscribe(seen.append)
+        bus.publish("reminders_on", interval_minutes=20)
+        unsubscribe()
+        bus.publish("reminders_off")
+        assert [e["kind"] for e in seen] == ["reminders_on"]
+        assert seen[0]["interval_minutes"] == 20
+        assert isinstance(seen[0]["ts"], float)
+
+    def test_failing_subscriber_does_not_stop_others(self):
+        bus = EventBus()
+        seen = []
+        bus.subscribe(lambda event: 1 / 0)
+        bus.subscribe(seen.append)
+        bus.publish("break")
+        assert len(seen) == 1
+
+    def test_stats_record_calls_feed_the_bus(self):
+        bus = EventBus()
+        seen = []
+        bus.subscribe(seen.append)
+        store = _store()
+        store.listeners.append(bus.stats_listener)
+        store.record_reminder()
+        store.record_break(duration_seconds=20)
+        store.start_focus_session()
+        assert [e["kind"] for e in seen] == ["reminder", "break", "focus_start"]
+        assert seen[1]["value"] == 20
+
+    def test_headless_publishes_reminders(self, monkeypatch):
+        monkeypatch.setattr("breathebreak.controller.notify", lambda *args, **kwargs: None)
+        runner = HeadlessRunner(config=Config(), stats=_store())
+        seen = []
+        runner.events.subscribe(seen.append)
+        runner._on_tick()
+        runner.apply_config(Config(interval_minutes=30))
+        assert [e["kind"] for e in seen] == ["reminder", "interval_changed"]
+        assert seen[1]["interval_minutes"] == 30
+
+
+class TestEventSocket:
+    def test_streams_json_lines(self, server):
+        conn, stream = _subscribe(server)
+        server.bus.publish("reminder")
+        server.bus.publish("break", value=20)
+        first, second = json.loads(stream.readline()), json.loads(stream.readline())
+        assert (first["kind"], second["kind"], second["value"]) == ("reminder", "break", 20)
+        conn.close()
+
+    def test_socket_directory_is_private(self, sock_path):
+        root = sock_path.parent
+        root.chmod(0o755)
+        for path in (sock_path, root / "new" / "events.sock"):
+            server = EventSocketServer(EventBus(), path)
+            server.start()
+            server.stop()
+            assert stat.S_IMODE(os.stat(path.parent).st_mode) == 0o700
+
+    def test_kinds_filter(self, server):
+        conn, stream = _subscribe(server, {"kinds": ["break"]})
+        _wait_for(lambda: next(iter(server._clients)).kinds is not None)
+        server.bus.publish("reminder")
+        server.bus.publish("break")
+        assert json.loads(stream.readline())["kind"] == "break"
+        conn.close()
+
+    def test_slow_subscriber_drops_oldest(self, server):
+        conn, stream = _subscribe(server)
+        padding = "x" * 1000
+        start = time.perf_counter()
+        for i in range(SUBSCRIBER_BUFFER * 20):
+            server.bus.publish("reminder", n=i, padding=padding)
+        # Publishing never waited on the subscriber.
+        assert time.perf_counter() - start < 2.0
+        _wait_for(lambda: server.dropped > 0)
+        kinds = []
+        while "dropped" not in kinds:
+            kinds.append(json.loads(stream.readline())["kind"])
+        assert server.subscribers == 1
+        conn.close()
+
+    def test_slow_subscriber_can_ask_to_be_disconnected(self, server):
+        conn, stream = _subscribe(server, {"overflow": "disconnect"})
+        _wait_for(lambda: next(iter(server._clients)).overflow == "disconnect")
+        padding = "x" * 1000
+        for i in range(SUBSCRIBER_BUFFER * 20):
+            server.bus.publish("reminder", n=i, padding=padding)
+        _wait_for(lambda: server.disconnected == 1)
+        assert server.subscribers == 0
+        with pytest.raises((ConnectionError, ValueError, json.JSONDecodeError)):
+            while True:
+                line = stream.readline()
+                if not line:
+                    raise ConnectionError
+                json.loads(line)
+        conn.close()
+
+    def test_hang_up_removes_subscriber(self, server):
+        conn, stream = _subscribe(server)
+        stream.close()
+        conn.close()
+        _wait_for(lambda: server.subscribers == 0)
+
+    def test_stop_removes_socket(self, sock_path):
+        server = EventSocketServer(EventBus(), sock_path)
+        server.start()
+        server.stop()
+        assert not sock_path.exists()
+
+    def test_stale_socket_is_replaced_but_live_one_is_not(self, sock_path):
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(str(sock_path))
+        stale.close()
+        server = EventSocketServer(EventBus(), sock_path)
+        server.start()
+        try:
+            with pytest.raises(OSError):
+                EventSocketServer(EventBus(), sock_path).start()
+        finally:
+            server.stop()
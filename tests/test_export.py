@@ -0,0 +1,130 @@
+"""Tests for the streaming stats export."""
+
+import json
+import os
+import subprocess
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+
+from breathebreak.cli import main
+from breathebreak.daytable import COUNTERS, DayTable
+from breathebreak.export import FIELDS, lines, read_cursor
+from breathebreak.retention import RetentionPolicy
+from breathebreak.stats import StatsStore
+
+TODAY = date.today()
+
+
+def _history(days: int, end: date = TODAY, every: int = 1) -> DayTable:
+    rows = {}
+    for i in range(0, days, every):
+        key = (end - timedelta(days=i)).isoformat()
+        rows[key] = {"reminders_sent": 10 + i % 7, "breaks_acknowledged": i % 5, "focus_seconds": i}
+    return DayTable.from_rows(rows)
+
+
+@pytest.fixture
+def stats_file(tmp_path, monkeypatch):
+    monkeypatch.setattr("breathebreak.config.CONFIG_FILE", tmp_path / "config.yaml")
+    path = tmp_path / "stats.json"
+    monkeypatch.setattr("breathebreak.stats.STATS_FILE", path)
+    return path
+
+
+class TestRows:
+    def test_range_and_order(self):
+        store = StatsStore(days=_history(30, every=2))
+        rows = list(store.rows(TODAY - timedelta(days=10), TODAY - timedelta(days=3)))
+        assert [row["date"] for row in rows] == [
+            (TODAY - timedelta(days=i)).isoformat() for i in (10, 8, 6, 4)
+        ]
+        assert rows[0] == {
+            "date": (TODAY - timedelta(days=10)).isoformat(),
+            "period": "day",
+            **dict.fromkeys(COUNTERS, 0),
+            "reminders_sent": 13,
+            "focus_seconds": 10,
+        }
+        assert list(StatsStore().rows()) == []
+
+    def test_paged_history_is_streamed_not_loaded(self, stats_file):
+        table = _history(2000, every=3)
+        StatsStore(days=table, storage="paged").compact()
+        store = StatsStore.load(storage="paged")
+        resident = store.days.resident_days
+        rows = list(store.rows())
+        assert store.days.resident_days == resident < len(rows)
+        assert {row["date"]: row["focus_seconds"] for row in rows} == {
+            day: counts["focus_seconds"] for day, counts in table.to_dict().items()
+        }
+
+    def test_rolled_up_rows_are_labelled(self, stats_file):
+        StatsStore(days=_history(400)).compact()
+        store = StatsStore.load()
+        while store._retention_step(RetentionPolicy(keep_days=35, keep_weeks=8)):
+            pass
+        rows = list(store.rows())
+        periods = [row["period"] for row in rows]
+        assert periods == sorted(periods, key=["month", "week", "day"].index)
+        assert periods.count("week") in (8, 9)
+        assert rows[-1]["date"] == TODAY.isoformat()
+        assert sum(row["reminders_sent"] for row in rows) == sum(10 + i % 7 for i in range(400))
+
+
+class TestLines:
+    def test_csv(self):
+        out = list(lines(StatsStore(days=_history(3)).rows()))
+        assert out[0] == ",".join(FIELDS)
+        assert out[-1].split(",")[:3] == [TODAY.isoformat(), "day", "10"]
+        assert len(out) == 4
+
+    def test_ndjson(self):
+        out = list(lines(StatsStore(days=_history(3)).rows(), "ndjson"))
+        assert [json.loads(line)["focus_seconds"] for line in out] == [2, 1, 0]
+
+
+class TestExportCommand:
+    def test_cursor_resumes_from_the_last_exported_day(self, stats_file, tmp_path, capsys):
+        StatsStore(days=_history(10)).compact()
+        cursor = tmp_path / "state" / "export.cursor"
+        main(["export", "--format", "ndjson", "--cursor", str(cursor)])
+        first = capsys.readouterr().out.splitlines()
+        assert len(first) == 10
+        assert read_cursor(cursor) == TODAY
+
+        store = StatsStore.load()
+        store.record_reminder()
+        store.close()
+        main(["export", "--format", "ndjson", "--cursor", str(cursor)])
+        (again,) = capsys.readouterr().out.splitlines()
+        assert json.loads(again)["reminders_sent"] == json.loads(first[-1])["reminders_sent"] + 1
+
+    def test_reader_closing_early_is_not_an_error(self, tmp_path, monkeypatch):
+        stats_file = tmp_path / ".config" / "breathebreak" / "stats.json"
+        monkeypatch.setattr("breathebreak.stats.STATS_FILE", stats_file)
+        StatsStore(days=_history(5000)).compact()
+        root = Path(__file__).resolve().parents[1]
+        env = {**os.environ, "HOME": str(tmp_path), "PYTHONPATH": str(root)}
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "breathebreak", "export"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=env,
+        )
+        # Like `breathebreak export | head -1`.
+        assert proc.stdout.readline().startswith(b"date,")
+        proc.stdout.close()
+        assert proc.wait(30) == 1
+        assert proc.stderr.read() == b""
+        proc.stderr.close()
+
+    def test_since_and_until(self, stats_file, capsys):
+        StatsStore(days=_history(10)).compact()
+        since = (TODAY - timedelta(days=5)).isoformat()
+        until = (TODAY - timedelta(days=4)).isoformat()
+        main(["export", "--since", since, "--until", until])
+        out = capsys.readouterr().out.splitlines()
+        assert [line.split(",")[0] for line in out] == ["date", since, until]
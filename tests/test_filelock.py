@@ -0,0 +1,65 @@
+"""Tests for the inter-process file lock."""
+
+import fcntl
+import os
+import threading
+
+from breathebreak.filelock import FileLock
+
+
+def _held_elsewhere(path) -> bool:
+    """True if a separate open file description can't take the lock."""
+    fd = os.open(path, os.O_RDWR)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return True
+    finally:
+        os.close(fd)
+    return False
+
+
+class TestFileLock:
+    def test_excludes_other_descriptors(self, tmp_path):
+        lock = FileLock(tmp_path / "stats.lock")
+        with lock:
+            assert _held_elsewhere(lock.path)
+        assert not _held_elsewhere(lock.path)
+
+    def test_reentrant(self, tmp_path):
+        lock = FileLock(tmp_path / "stats.lock")
+        with lock:
+            with lock:
+                pass
+            assert _held_elsewhere(lock.path)
+
+    def test_excludes_other_threads(self, tmp_path):
+        lock = FileLock(tmp_path / "stats.lock")
+        inside = []
+
+        def worker():
+            with lock:
+                inside.append("worker")
+
+        with lock:
+            thread = threading.Thread(target=worker)
+            thread.start()
+            thread.join(0.1)
+            assert inside == []
+        thread.join(5)
+        assert inside == ["worker"]
+
+    def test_counter_is_shared_through_the_file(self, tmp_path):
+        path = tmp_path / "stats.lock"
+        with FileLock(path) as lock:
+            assert lock.read_int() == 0
+            lock.write_int(41)
+        with FileLock(path) as other:
+            assert other.read_int() == 41
+
+    def test_creates_private_file(self, tmp_path):
+        lock = FileLock(tmp_path / "sub" / "stats.lock")
+        with lock:
+            pass
+        assert oct(lock.path.stat().st_mode & 0o777) == "0o600"
+        lock.close()
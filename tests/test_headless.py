@@ -0,0 +1,78 @@
+"""Tests for the headless runner."""
+
+from datetime import date
+
+from breathebreak.config import Config
+from breathebreak.headless import HeadlessRunner
+from breathebreak.stats import StatsStore
+from breathebreak.tips import BREAK_TIPS
+
+
+def _runner(monkeypatch):
+    sent = []
+    monkeypatch.setattr("breathebreak.controller.notify", lambda *args, **kwargs: sent.append(args))
+    stats = StatsStore()
+    stats._persist = lambda: None
+    return HeadlessRunner(config=Config(), stats=stats), sent
+
+
+class TestHeadlessRunner:
+    def test_tick_records_and_notifies(self, monkeypatch):
+        runner, sent = _runner(monkeypatch)
+        runner._on_tick()
+        assert runner.stats.days[date.today().isoformat()].reminders_sent == 1
+        assert sent[0][1] == "Time for a break"
+        assert sent[0][2] == BREAK_TIPS[0]
+
+    def test_tips_rotate(self, monkeypatch):
+        runner, sent = _runner(monkeypatch)
+        for _ in range(len(BREAK_TIPS) + 1):
+            runner._on_tick()
+        assert sent[-1][2] == BREAK_TIPS[0]
+        assert sent[1][2] == BREAK_TIPS[1]
+
+    def test_stop_ends_run(self, monkeypatch):
+        runner, sent = _runner(monkeypatch)
+        runner.stop()
+        runner.run()
+        runner.shutdown()
+        today = runner.stats.days[date.today().isoformat()]
+        assert today.sessions_started == 1
+        assert sent == []
+
+
+class TestHeadlessApplyConfig:
+    def test_interval_change_is_reported(self, monkeypatch):
+        runner, _ = _runner(monkeypatch)
+        assert runner.apply_config(Config(interval_minutes=45)) is True
+        assert runner.cfg.interval_minutes == 45
+
+    def test_other_changes_keep_countdown(self, monkeypatch):
+        runner, _ = _runner(monkeypatch)
+        assert runner.apply_config(Config(sound_enabled=False)) is False
+        assert runner.cfg.sound_enabled is False
+
+
+class TestHeadlessScheduling:
+    def test_max_ticks_stops_run(self, monkeypatch):
+        sent = []
+        monkeypatch.setattr(
+            "breathebreak.controller.notify", lambda *args, **kwargs: sent.append(args)
+        )
+        stats = StatsStore()
+        stats._persist = lambda: None
+        runner = HeadlessRunner(config=Config(), stats=stats)
+        monkeypatch.setattr(runner.scheduler, "every", _fast_every(runner.scheduler))
+        runner.run(max_ticks=3)
+        assert len(sent) == 3
+
+    def test_interval_change_reschedules_reminder(self, monkeypatch):
+        runner, _ = _runner(monkeypatch)
+        runner._reminder = runner.scheduler.every(20 * 60, runner._on_tick)
+        runner.apply_config(Config(interval_minutes=45))
+        assert runner._reminder.interval == 45 * 60
+
+
+def _fast_every(scheduler):
+    real_every = scheduler.every
+    return lambda interval, callback, name="", **kwargs: real_every(0.001, callback, name, **kwargs)
@@ -0,0 +1,195 @@
+"""Tests for idle detection."""
+
+import time
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from breathebreak.config import Config
+from breathebreak.headless import HeadlessRunner
+from breathebreak.idle import (
+    ACTIVE_POLL_MIN,
+    IDLE_POLL_MAX,
+    FakeIdleProvider,
+    IdleMonitor,
+    IdleProvider,
+)
+from breathebreak.scheduler import Scheduler
+from breathebreak.stats import StatsStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.mono = 1000.0
+        self.wall = 1_700_000_000.0
+
+    def monotonic(self):
+        return self.mono
+
+    def time(self):
+        return self.wall
+
+    def advance(self, seconds):
+        self.mono += seconds
+        self.wall += seconds
+
+
+class UserAt:
+    """Idle provider driven by the fake clock: idle since the last input."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.last_input = clock.wall
+
+    def touch(self):
+        self.last_input = self.clock.wall
+
+    def idle_seconds(self):
+        return self.clock.wall - self.last_input
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def sched(clock):
+    return Scheduler(clock=clock)
+
+
+def _step(clock, sched, seconds, every=1.0, on_tick=None):
+    """Advance in small steps, running due jobs like a real driver would."""
+    for _ in range(int(seconds / every)):
+        clock.advance(every)
+        if on_tick:
+            on_tick()
+        sched.run_due()
+
+
+def _monitor(sched, provider, threshold=300):
+    events = []
+    monitor = IdleMonitor(
+        sched,
+        provider,
+        threshold,
+        lambda since: events.append(("idle", since)),
+        lambda away: events.append(("active", away)),
+    )
+    monitor.start()
+    return monitor, events
+
+
+class TestIdleMonitor:
+    def test_active_user_is_sampled_rarely(self, clock, sched):
+        user = UserAt(clock)
+        monitor, events = _monitor(sched, user)
+        # Typing every 30 seconds for an hour.
+        _step(clock, sched, 3600, on_tick=lambda: clock.wall % 30 or user.touch())
+        assert events == []
+        assert monitor.samples <= 3600 / (300 - 30) + 2
+
+    def test_goes_idle_with_the_time_input_stopped(self, clock, sched):
+        user = UserAt(clock)
+        monitor, events = _monitor(sched, user)
+        stopped = clock.wall
+        _step(clock, sched, 400)
+        assert monitor.idle
+        assert events == [("idle", stopped)]
+
+    def test_idle_polling_backs_off(self, clock, sched):
+        provider = FakeIdleProvider(idle=600)
+        monitor, _ = _monitor(sched, provider)
+        _step(clock, sched, 6 * 3600, every=0.5)
+        # Doubling from IDLE_POLL_MIN reaches the cap in a handful of samples.
+        assert monitor.samples < 6 * 3600 / IDLE_POLL_MAX + 10
+        assert monitor._backoff == IDLE_POLL_MAX
+        assert sched.jobs()[0].due - sched.now() <= IDLE_POLL_MAX
+
+    def test_return_reports_time_away(self, clock, sched):
+        user = UserAt(clock)
+        monitor, events = _monitor(sched, user)
+        _step(clock, sched, 1000)
+        user.touch()
+        back = clock.wall
+        _step(clock, sched, IDLE_POLL_MAX)
+        assert not monitor.idle
+        assert events[1] == ("active", back - events[0][1])
+
+    def test_unreadable_provider_keeps_state(self, clock, sched):
+        provider = FakeIdleProvider(idle=None)
+        monitor, events = _monitor(sched, provider)
+        _step(clock, sched, 1000)
+        assert events == [] and not monitor.idle
+        assert provider.calls >= 1
+
+    def test_zero_threshold_stops_and_ends_idle(self, clock, sched):
+        provider = FakeIdleProvider(idle=600)
+        monitor, events = _monitor(sched, provider)
+        _step(clock, sched, 10)
+        assert monitor.idle
+        monitor.set_threshold(0)
+        assert [e[0] for e in events] == ["idle", "active"]
+        assert sched.jobs() == []
+        calls = provider.calls
+        _step(clock, sched, 600)
+        assert provider.calls == calls
+
+    def test_never_samples_faster_than_the_floor(self, clock, sched):
+        provider = FakeIdleProvider(idle=299)
+        monitor, _ = _monitor(sched, provider)
+        _step(clock, sched, 60)
+        assert monitor.samples <= 60 / ACTIVE_POLL_MIN + 1
+
+    def test_providers_must_implement_idle_seconds(self):
+        with pytest.raises(TypeError):
+            IdleProvider()
+
+
+class TestHeadlessIdle:
+    def _runner(self, monkeypatch, clock, provider):
+        monkeypatch.setattr("breathebreak.controller.notify", lambda *args, **kwargs: None)
+        stats = StatsStore()
+        stats._persist = lambda: None
+        runner = HeadlessRunner(
+            config=Config(interval_minutes=20, idle_threshold_minutes=5),
+            stats=stats,
+            scheduler=Scheduler(clock=clock),
+            idle_provider=provider,
+        )
+        # Set up the jobs run() would, without blocking.
+        monkeypatch.setattr(runner.scheduler, "run", lambda: None)
+        runner.run()
+        return runner
+
+    def test_idle_pauses_reminder_and_backdates_focus(self, monkeypatch, clock):
+        clock.wall = time.time()
+        provider = FakeIdleProvider()
+        runner = self._runner(monkeypatch, clock, provider)
+        runner.stats._focus_start = datetime.now() - timedelta(minutes=30)
+        provider.idle = 600
+        _step(clock, runner.scheduler, 10)
+        assert not runner._reminder.active
+        focus = runner.stats.days[date.today().isoformat()].focus_seconds
+        assert 19 * 60 <= focus <= 21 * 60
+        assert runner.stats._focus_start is None
+
+    def test_return_restarts_the_countdown(self, monkeypatch, clock):
+        provider = FakeIdleProvider()
+        runner = self._runner(monkeypatch, clock, provider)
+        provider.idle = 600
+        _step(clock, runner.scheduler, 3 * 3600, every=5)
+        assert runner._ticks == 0
+        provider.idle = 0
+        _step(clock, runner.scheduler, IDLE_POLL_MAX)
+        assert runner._reminder.active
+        assert runner._reminder.due - runner.scheduler.now() > 19 * 60
+        assert runner.stats._focus_start is not None
+
+    def test_interval_change_while_idle_stays_paused(self, monkeypatch, clock):
+        provider = FakeIdleProvider(idle=600)
+        runner = self._runner(monkeypatch, clock, provider)
+        _step(clock, runner.scheduler, 10)
+        runner.apply_config(Config(interval_minutes=45, idle_threshold_minutes=5))
+        assert not runner._reminder.active
+        assert runner._reminder.interval == 45 * 60
@@ -0,0 +1,80 @@
+"""Tests for the append-only stats journal."""
+
+import json
+
+from breathebreak.journal import Journal
+
+
+class TestJournalAppend:
+    def test_append_and_replay(self, tmp_path):
+        journal = Journal(tmp_path / "stats.journal")
+        journal.append([{"seq": 1, "date": "2024-01-01", "reminders_sent": 1}])
+        journal.append([{"seq": 2, "date": "2024-01-01", "reminders_sent": 1}])
+        assert [r["seq"] for r in journal.replay()] == [1, 2]
+
+    def test_append_returns_bytes_written(self, tmp_path):
+        path = tmp_path / "stats.journal"
+        written = Journal(path).append([{"seq": 1}, {"seq": 2}])
+        assert written == path.stat().st_size
+
+    def test_empty_append_creates_nothing(self, tmp_path):
+        path = tmp_path / "stats.journal"
+        assert Journal(path).append([]) == 0
+        assert not path.exists()
+
+    def test_file_permissions(self, tmp_path):
+        path = tmp_path / "stats.journal"
+        Journal(path).append([{"seq": 1}])
+        assert oct(path.stat().st_mode & 0o777) == "0o600"
+
+
+class TestJournalReplay:
+    def test_missing_file_yields_nothing(self, tmp_path):
+        assert list(Journal(tmp_path / "missing.journal").replay()) == []
+
+    def test_skips_records_at_or_below_seq(self, tmp_path):
+        journal = Journal(tmp_path / "stats.journal")
+        journal.append([{"seq": n} for n in range(1, 6)])
+        assert [r["seq"] for r in journal.replay(after_seq=3)] == [4, 5]
+
+    def test_torn_trailing_line_is_skipped(self, tmp_path):
+        path = tmp_path / "stats.journal"
+        journal = Journal(path)
+        journal.append([{"seq": 1}])
+        with open(path, "a") as f:
+            f.write('{"seq": 2, "da')
+        assert [r["seq"] for r in journal.replay()] == [1]
+
+    def test_append_after_torn_line(self, tmp_path):
+        path = tmp_path / "stats.journal"
+        journal = Journal(path)
+        journal.append([{"seq": 1}])
+        with open(path, "a") as f:
+            f.write('{"seq": 2, "da')
+        journal.append([{"seq": 3}, {"seq": 4}])
+        assert [r["seq"] for r in journal.replay()] == [1, 3, 4]
+        journal.truncate_through(1)
+        assert path.read_text() == '{"seq":3}\n{"seq":4}\n'
+
+
+class TestJournalTruncate:
+    def test_keeps_newer_records(self, tmp_path):
+        journal = Journal(tmp_path / "stats.journal")
+        journal.append([{"seq": n} for n in range(1, 6)])
+        journal.truncate_through(3)
+        assert [r["seq"] for r in journal.replay()] == [4, 5]
+
+    def test_removes_file_when_fully_folded(self, tmp_path):
+        path = tmp_path / "stats.journal"
+        journal = Journal(path)
+        journal.append([{"seq": 1}])
+        journal.truncate_through(1)
+        assert not path.exists()
+
+    def test_rewritten_file_is_valid_json_lines(self, tmp_path):
+        path = tmp_path / "stats.journal"
+        journal = Journal(path)
+        journal.append([{"seq": 1}, {"seq": 2}])
+        journal.truncate_through(1)
+        lines = path.read_text().splitlines()
+        assert [json.loads(line) for line in lines] == [{"seq": 2}]
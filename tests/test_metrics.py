@@ -0,0 +1,132 @@
+"""Tests for in-process metrics and their local export."""
+
+import json
+import stat
+import threading
+
+import pytest
+
+from breathebreak import metrics
+from breathebreak.config import Config
+from breathebreak.metrics import Counter, Histogram
+from breathebreak.notifier import Dispatcher, Notification
+from breathebreak.stats import StatsStore
+
+
+@pytest.fixture(autouse=True)
+def _private_registry(monkeypatch):
+    # Metrics created by tests shouldn't leak into the shared export.
+    monkeypatch.setattr(metrics, "_registry", dict(metrics._registry))
+
+
+@pytest.fixture
+def enabled():
+    metrics.reset()
+    metrics.enable()
+    yield
+    metrics.disable()
+    metrics.reset()
+
+
+class TestHistogram:
+    def test_buckets_are_upper_bounds(self, enabled):
+        hist = Histogram("test_bounds", "", (1, 10, 100))
+        for value in (0.5, 1, 5, 50, 500):
+            hist.observe(value)
+        snap = hist.snapshot()
+        assert snap["buckets"] == {"1": 2, "10": 3, "100": 4, "+Inf": 5}
+        assert snap["count"] == 5
+        assert snap["max"] == 500
+
+    def test_quantiles(self, enabled):
+        hist = Histogram("test_quantiles", "", (1, 10, 100))
+        for value in [0.5] * 90 + [50] * 10:
+            hist.observe(value)
+        assert hist.quantile(0.5) == 1
+        assert hist.quantile(0.99) == 50
+
+    def test_disabled_is_a_no_op(self):
+        hist = Histogram("test_disabled", "", (1,))
+        hist.observe(0.5)
+        hist.observe_since(0.0)
+        assert hist.count == 0
+
+    def test_concurrent_observations_are_not_lost(self, enabled):
+        hist = Histogram("test_threads", "", (1,))
+
+        def work():
+            for _ in range(2000):
+                hist.observe(0.5)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert hist.count == 8000
+
+
+class TestCounter:
+    def test_labelled_counts(self, enabled):
+        counter = Counter("test_labelled", "", label="outcome")
+        counter.inc("ok")
+        counter.inc("ok")
+        counter.inc("failed", 3)
+        assert counter.snapshot() == {"ok": 2, "failed": 3}
+
+    def test_unlabelled_count(self, enabled):
+        counter = Counter("test_plain", "")
+        counter.inc()
+        assert counter.snapshot() == 1
+
+
+class TestExport:
+    def test_prometheus_text(self, enabled):
+        metrics.NOTIFY_OUTCOMES.inc("delivered")
+        metrics.PERSIST_SECONDS.observe(0.002)
+        text = metrics.prometheus_text()
+        assert "# TYPE breathebreak_stats_persist_seconds histogram" in text
+        assert 'breathebreak_stats_persist_seconds_bucket{le="+Inf"} 1' in text
+        assert 'breathebreak_notifications_total{outcome="delivered"} 1' in text
+        assert text.endswith("\n")
+
+    def test_json_export_is_private(self, enabled, tmp_path):
+        metrics.TICK_LATENESS.observe(0.01)
+        path = metrics.export(tmp_path, "json")
+        assert stat.S_IMODE(path.stat().st_mode) == 0o600
+        data = json.loads(path.read_text())
+        assert data["metrics"]["breathebreak_tick_lateness_seconds"]["count"] == 1
+
+    def test_off_writes_nothing(self, tmp_path):
+        assert metrics.export(tmp_path, "off") is None
+        assert list(tmp_path.iterdir()) == []
+
+
+class TestInstrumentation:
+    def test_stats_writes_are_timed_and_sized(self, enabled, tmp_path, monkeypatch):
+        monkeypatch.setattr("breathebreak.stats.STATS_FILE", tmp_path / "stats.json")
+        StatsStore().record_reminder()
+        assert metrics.PERSIST_SECONDS.count == 1
+        assert metrics.PERSIST_BYTES.sum == (tmp_path / "stats.json").stat().st_size
+
+    def test_config_parse_is_timed(self, enabled, tmp_path, monkeypatch):
+        cfg_file = tmp_path / "config.yaml"
+        cfg_file.write_text("interval_minutes: 30\n")
+        monkeypatch.setattr("breathebreak.config.CONFIG_FILE", cfg_file)
+        Config.load()
+        assert metrics.CONFIG_PARSE_SECONDS.count == 1
+        assert metrics.CONFIG_LOADS.snapshot() == {"parsed": 1}
+
+    def test_notification_outcomes(self, enabled):
+        dispatcher = Dispatcher(lambda note: None)
+        dispatcher.submit(Notification("BreatheBreak", "a", "b"))
+        assert dispatcher.drain(2)
+        dispatcher.close()
+        assert metrics.NOTIFY_OUTCOMES.snapshot()["delivered"] == 1
+        assert metrics.NOTIFY_SECONDS.count == 1
+
+    def test_new_option_is_validated(self, tmp_path, monkeypatch):
+        cfg_file = tmp_path / "config.yaml"
+        cfg_file.write_text("metrics_export: graphite\n")
+        monkeypatch.setattr("breathebreak.config.CONFIG_FILE", cfg_file)
+        assert Config.load().metrics_export == "off"
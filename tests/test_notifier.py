@@ -0,0 +1,266 @@
+"""Tests for the notification dispatch queue."""
+
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import types
+from pathlib import Path
+
+import pytest
+
+import breathebreak.notifier as notifier
+from breathebreak.dbusnotify import FakeNotificationDaemon
+from breathebreak.notifier import Dispatcher, Notification
+
+
+class _Backend:
+    """Records deliveries; optionally blocks until released."""
+
+    def __init__(self, gate: threading.Event | None = None):
+        self.delivered = []
+        self.gate = gate
+        self.entered = threading.Event()
+
+    def __call__(self, note):
+        self.entered.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.delivered.append(note)
+
+
+def _note(subtitle="Time for a break", message="Stretch", kind=""):
+    return Notification("BreatheBreak", subtitle, message, kind=kind)
+
+
+def _fake_cocoa(monkeypatch, running: bool, call_after) -> list:
+    """Stand-ins for rumps, AppKit and AppHelper; returns the showing threads."""
+    shown = []
+    rumps = types.ModuleType("rumps")
+    rumps.notification = lambda *args, **kwargs: shown.append(threading.current_thread())
+    app = types.SimpleNamespace(isRunning=lambda: running)
+    appkit = types.ModuleType("AppKit")
+    appkit.NSApplication = types.SimpleNamespace(sharedApplication=lambda: app)
+    objc_tools = types.ModuleType("PyObjCTools")
+    objc_tools.AppHelper = types.SimpleNamespace(callAfter=call_after)
+    monkeypatch.setitem(sys.modules, "rumps", rumps)
+    monkeypatch.setitem(sys.modules, "AppKit", appkit)
+    monkeypatch.setitem(sys.modules, "PyObjCTools", objc_tools)
+    return shown
+
+
+class TestDelivery:
+    def test_delivers_in_order(self):
+        backend = _Backend()
+        dispatcher = Dispatcher(backend)
+        dispatcher.submit(_note("a"))
+        dispatcher.submit(_note("b"))
+        assert dispatcher.drain(2)
+        assert [n.subtitle for n in backend.delivered] == ["a", "b"]
+        assert dispatcher.counts()["delivered"] == 2
+        dispatcher.close()
+
+    def test_submit_does_not_wait_for_backend(self):
+        gate = threading.Event()
+        dispatcher = Dispatcher(_Backend(gate))
+        for i in range(5):
+            assert dispatcher.submit(_note(str(i)))
+        gate.set()
+        assert dispatcher.drain(2)
+        dispatcher.close()
+
+    def test_failures_are_counted_not_raised(self):
+        def broken(note):
+            raise RuntimeError("notification center unavailable")
+
+        dispatcher = Dispatcher(broken)
+        dispatcher.submit(_note())
+        assert dispatcher.drain(2)
+        assert dispatcher.counts()["failed"] == 1
+        dispatcher.close()
+
+
+class TestCoalescing:
+    def test_queued_notification_is_superseded(self):
+        gate = threading.Event()
+        backend = _Backend(gate)
+        dispatcher = Dispatcher(backend)
+        dispatcher.submit(_note("busy"))
+        assert backend.entered.wait(2)
+        for minutes in (10, 15, 25):
+            dispatcher.submit(_note("Interval updated", f"Every {minutes} min.", "interval"))
+        gate.set()
+        assert dispatcher.drain(2)
+        assert [n.message for n in backend.delivered] == ["Stretch", "Every 25 min."]
+        counts = dispatcher.counts()
+        assert counts["coalesced"] == 2
+        assert counts["delivered"] == 2
+        dispatcher.close()
+
+    def test_one_off_notifications_are_not_merged(self):
+        gate = threading.Event()
+        backend = _Backend(gate)
+        dispatcher = Dispatcher(backend)
+        dispatcher.submit(_note("busy"))
+        assert backend.entered.wait(2)
+        dispatcher.submit(_note("", "Please enter a valid number."))
+        dispatcher.submit(_note("", "Choose between 1 and 480 minutes."))
+        gate.set()
+        assert dispatcher.drain(2)
+        assert [n.message for n in backend.delivered][1:] == [
+            "Please enter a valid number.",
+            "Choose between 1 and 480 minutes.",
+        ]
+        assert dispatcher.counts()["coalesced"] == 0
+        dispatcher.close()
+
+    def test_full_queue_drops_oldest(self):
+        gate = threading.Event()
+        backend = _Backend(gate)
+        dispatcher = Dispatcher(backend, maxsize=2)
+        dispatcher.submit(_note("busy"))
+        assert backend.entered.wait(2)
+        for subtitle in ("a", "b", "c"):
+            dispatcher.submit(_note(subtitle))
+        gate.set()
+        assert dispatcher.drain(2)
+        assert [n.subtitle for n in backend.delivered] == ["busy", "b", "c"]
+        assert dispatcher.counts()["dropped"] == 1
+        dispatcher.close()
+
+
+class TestTimeouts:
+    def test_hung_delivery_times_out_and_later_ones_fail_fast(self):
+        gate = threading.Event()
+        dispatcher = Dispatcher(_Backend(gate), timeout=0.05)
+        dispatcher.submit(_note("a"))
+        dispatcher.submit(_note("b"))
+        assert dispatcher.drain(2)
+        counts = dispatcher.counts()
+        assert counts["timed_out"] == 1
+        assert counts["failed"] == 1
+        gate.set()
+        dispatcher.close()
+
+    def test_recovers_once_hung_delivery_returns(self):
+        gate = threading.Event()
+        backend = _Backend(gate)
+        dispatcher = Dispatcher(backend, timeout=0.05)
+        dispatcher.submit(_note("a"))
+        assert dispatcher.drain(2)
+        gate.set()
+        assert dispatcher._hung.done.wait(2)
+        dispatcher.submit(_note("b"))
+        assert dispatcher.drain(2)
+        assert dispatcher.counts()["delivered"] == 1
+        dispatcher.close()
+
+
+class TestDeliveryThread:
+    def test_one_thread_delivers_everything(self):
+        threads = []
+        dispatcher = Dispatcher(lambda note: threads.append(threading.current_thread()))
+        for i in range(10):
+            dispatcher.submit(_note(str(i)))
+            assert dispatcher.drain(2)
+        assert len(threads) == 10 and len(set(threads)) == 1
+        assert threads[0] is not threading.current_thread()
+        dispatcher.close()
+        threads[0].join(2)
+        assert not threads[0].is_alive()
+
+    def test_rumps_backend_shows_notifications_on_the_main_thread(self, monkeypatch):
+        main = []
+        shown = _fake_cocoa(monkeypatch, running=True, call_after=main.append)
+        dispatcher = Dispatcher(notifier.RumpsBackend(main_thread=True).deliver)
+        dispatcher.submit(_note())
+        # Stand in for the Cocoa run loop on this (the main) thread.
+        while not main:
+            time.sleep(0.01)
+        main.pop()()
+        assert dispatcher.drain(2)
+        assert shown == [threading.current_thread()]
+        assert dispatcher.counts()["delivered"] == 1
+        dispatcher.close()
+
+    def test_stalled_run_loop_fails_deliveries_without_hanging(self, monkeypatch):
+        _fake_cocoa(monkeypatch, running=True, call_after=lambda fn: None)
+        backend = notifier.RumpsBackend(main_thread=True, timeout=0.05)
+        dispatcher = Dispatcher(backend.deliver, timeout=1.0)
+        dispatcher.submit(_note("a"))
+        dispatcher.submit(_note("b"))
+        assert dispatcher.drain(5)
+        counts = dispatcher.counts()
+        assert (counts["failed"], counts["timed_out"]) == (2, 0)
+        assert dispatcher._hung is None
+        dispatcher.close()
+
+    def test_without_a_run_loop_rumps_is_called_directly(self, monkeypatch):
+        shown = _fake_cocoa(monkeypatch, running=False, call_after=lambda fn: None)
+        dispatcher = Dispatcher(notifier.RumpsBackend(main_thread=True).deliver)
+        dispatcher.submit(_note())
+        assert dispatcher.drain(2)
+        assert dispatcher.counts()["delivered"] == 1
+        assert len(shown) == 1 and shown[0] is not threading.current_thread()
+        dispatcher.close()
+
+
+class TestLifecycle:
+    def test_close_delivers_pending(self):
+        backend = _Backend()
+        dispatcher = Dispatcher(backend)
+        dispatcher.submit(_note("a"))
+        dispatcher.close()
+        assert len(backend.delivered) == 1
+
+    def test_submit_after_close_is_dropped(self):
+        dispatcher = Dispatcher(_Backend())
+        dispatcher.close()
+        assert not dispatcher.submit(_note())
+        assert dispatcher.counts()["dropped"] == 1
+
+    def test_notify_keeps_fire_and_forget_signature(self, monkeypatch):
+        backend = _Backend()
+        dispatcher = Dispatcher(lambda note: backend(note))
+        monkeypatch.setattr(notifier, "_dispatcher", dispatcher)
+        notifier.notify("BreatheBreak", "Reminders active", "Break every 20 min.", sound=False)
+        assert dispatcher.drain(2)
+        assert backend.delivered == [
+            Notification("BreatheBreak", "Reminders active", "Break every 20 min.", False)
+        ]
+        dispatcher.close()
+
+
+class TestBackendChoice:
+    class _Rumps(notifier.NotificationBackend):
+        name = "rumps"
+
+        def deliver(self, note):
+            pass
+
+    def test_linux_uses_the_session_bus(self, monkeypatch):
+        root = Path(tempfile.mkdtemp(prefix="bb", dir="/tmp"))
+        daemon = FakeNotificationDaemon(root / "bus")
+        monkeypatch.setattr(sys, "platform", "linux")
+        monkeypatch.setenv("DBUS_SESSION_BUS_ADDRESS", daemon.address)
+        backend = notifier.default_backend()
+        assert backend.name == "dbus"
+        backend.close()
+        daemon.close()
+        shutil.rmtree(root, ignore_errors=True)
+
+    def test_falls_back_without_a_bus(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(sys, "platform", "linux")
+        monkeypatch.setattr(notifier, "RumpsBackend", self._Rumps)
+        monkeypatch.setenv("DBUS_SESSION_BUS_ADDRESS", f"unix:path={tmp_path}/missing")
+        assert notifier.default_backend().name == "rumps"
+
+    def test_backends_must_implement_deliver(self):
+        with pytest.raises(TypeError):
+            notifier.NotificationBackend()
+
+    def test_macos_uses_rumps(self, monkeypatch):
+        monkeypatch.setattr(sys, "platform", "darwin")
+        monkeypatch.setattr(notifier, "RumpsBackend", self._Rumps)
+        assert notifier.default_backend().name == "rumps"
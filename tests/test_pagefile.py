@@ -0,0 +1,121 @@
+"""Tests for the seekable page-file stats layout."""
+
+from datetime import date, timedelta
+
+import pytest
+
+from breathebreak.daytable import DayTable
+from breathebreak.pagefile import PageFileError, PageReader, write_pages
+
+
+def _table(days: int, start: date = date(2010, 1, 1), every: int = 1) -> DayTable:
+    rows = {}
+    for i in range(0, days, every):
+        key = (start + timedelta(days=i)).isoformat()
+        rows[key] = {"reminders_sent": i % 30, "focus_seconds": i}
+    return DayTable.from_rows(rows)
+
+
+def _write(path, table, seq=0):
+    first, present, columns = table.export()
+    return write_pages(path, first, present, columns, seq)
+
+
+class TestPageFile:
+    def test_roundtrip_header(self, tmp_path):
+        path = tmp_path / "stats.dat"
+        table = _table(100, every=3)
+        size = _write(path, table, seq=42)
+        reader = PageReader(path)
+        assert size == path.stat().st_size
+        assert reader.base == date(2010, 1, 1).toordinal()
+        assert reader.count == len(table)
+        assert reader.seq == 42
+
+    def test_read_zero_fills_outside_range(self, tmp_path):
+        path = tmp_path / "stats.dat"
+        _write(path, _table(10))
+        reader = PageReader(path)
+        present, cols = reader.read(reader.base - 2, reader.base + 1)
+        assert list(present) == [0, 0, 1, 1]
+        assert list(cols["focus_seconds"]) == [0, 0, 0, 1]
+
+    def test_file_permissions(self, tmp_path):
+        path = tmp_path / "stats.dat"
+        _write(path, _table(3))
+        assert oct(path.stat().st_mode & 0o777) == "0o600"
+
+    def test_missing_file(self, tmp_path):
+        assert PageReader.open(tmp_path / "missing.dat") is None
+
+    def test_garbage_is_rejected(self, tmp_path):
+        path = tmp_path / "stats.dat"
+        path.write_bytes(b"not a page file at all, just some bytes")
+        with pytest.raises(PageFileError):
+            PageReader(path)
+
+    def test_truncated_file_is_rejected(self, tmp_path):
+        path = tmp_path / "stats.dat"
+        _write(path, _table(50))
+        path.write_bytes(path.read_bytes()[:-8])
+        with pytest.raises(PageFileError):
+            PageReader(path)
+
+
+class TestLazyTable:
+    def _lazy(self, tmp_path, days=1000, window=30, every=1):
+        path = tmp_path / "stats.dat"
+        full = _table(days, every=every)
+        _write(path, full)
+        reader = PageReader(path)
+        return full, DayTable.from_pages(reader, reader.last - window + 1)
+
+    def test_only_window_is_resident(self, tmp_path):
+        full, lazy = self._lazy(tmp_path)
+        assert lazy.resident_days == 30
+        assert len(lazy) == len(full)
+
+    def test_old_day_pages_in_on_access(self, tmp_path):
+        full, lazy = self._lazy(tmp_path)
+        key = (date(2010, 1, 1) + timedelta(days=800)).isoformat()
+        assert lazy[key].focus_seconds == 800
+        assert 30 < lazy.resident_days < 1000
+        assert len(lazy) == len(full)
+
+    def test_recent_pages_in_until_enough_days(self, tmp_path):
+        full, lazy = self._lazy(tmp_path, every=10)
+        first, count = lazy.recent(7)
+        assert count == 7
+        assert (first, count) == full.recent(7)
+
+    def test_totals_match_fully_loaded_table(self, tmp_path):
+        full, lazy = self._lazy(tmp_path)
+        first, last = full.first_ordinal(), full.last_ordinal()
+        assert lazy.totals(first + 3, last) == full.totals(first + 3, last)
+
+    def test_iteration_and_dict_match(self, tmp_path):
+        full, lazy = self._lazy(tmp_path, every=7)
+        assert lazy.to_dict() == full.to_dict()
+
+    def test_export_copies_unloaded_rows(self, tmp_path):
+        full, lazy = self._lazy(tmp_path)
+        lazy.add(date(2012, 9, 26).isoformat(), {"reminders_sent": 5})
+        full.add(date(2012, 9, 26).isoformat(), {"reminders_sent": 5})
+        assert lazy.resident_days < 1000
+        assert lazy.export() == full.export()
+
+    def test_write_before_first_stored_day(self, tmp_path):
+        full, lazy = self._lazy(tmp_path)
+        lazy.ensure("2009-12-31").sessions_started = 1
+        assert list(lazy)[0] == "2009-12-31"
+        assert len(lazy) == len(full) + 1
+
+    def test_gap_between_file_and_today(self, tmp_path):
+        path = tmp_path / "stats.dat"
+        _write(path, _table(10))
+        reader = PageReader(path)
+        lazy = DayTable.from_pages(reader, reader.last + 100)
+        assert lazy.resident_days == 0
+        lazy.ensure((date(2010, 1, 1) + timedelta(days=200)).isoformat())
+        assert len(lazy) == 11
+        assert lazy.recent(11)[1] == 11
@@ -0,0 +1,260 @@
+"""Tests for quiet hours, calendar parsing and reminder deferral."""
+
+import os
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+import breathebreak.quiet as quiet
+from breathebreak.config import Config
+from breathebreak.headless import HeadlessRunner
+from breathebreak.quiet import IntervalIndex, QuietSchedule, parse_ics, parse_rule
+from breathebreak.scheduler import Scheduler
+from breathebreak.stats import StatsStore
+
+MONDAY = date(2024, 3, 4)
+
+
+def _at(day: date, hh: int, mm: int = 0) -> float:
+    """Local wall time as epoch seconds."""
+    return datetime(day.year, day.month, day.day, hh, mm).timestamp()
+
+
+def _ics(*events: str) -> list[str]:
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0"]
+    for event in events:
+        lines += ["BEGIN:VEVENT", *event.strip().splitlines(), "END:VEVENT"]
+    lines.append("END:VCALENDAR")
+    return [line.strip() + "\r\n" for line in lines]
+
+
+def _spans(event, day=MONDAY, days=14):
+    lo = _at(day, 0)
+    return list(event.spans(lo, lo + days * 86400))
+
+
+class FakeClock:
+    def __init__(self, wall):
+        self.mono = 1000.0
+        self.wall = wall
+
+    def monotonic(self):
+        return self.mono
+
+    def time(self):
+        return self.wall
+
+    def advance(self, seconds):
+        self.mono += seconds
+        self.wall += seconds
+
+
+class TestIntervalIndex:
+    def test_overlapping_and_touching_spans_merge(self):
+        index = IntervalIndex([(10, 20), (40, 50), (15, 30), (30, 35)])
+        assert len(index) == 2
+        assert index.until(12) == 35
+        assert index.until(35) is None
+        assert index.until(45) == 50
+        assert index.until(5) is None
+
+    def test_many_spans(self):
+        index = IntervalIndex((i * 100.0, i * 100.0 + 10) for i in range(100_000))
+        assert index.until(4_200_005) == 4_200_010
+        assert index.until(4_200_050) is None
+
+
+class TestRules:
+    def test_parse(self):
+        rule = parse_rule("Mon-Fri 12:00-13:30")
+        assert rule.days == frozenset(range(5))
+        assert (rule.start, rule.end) == (720, 810)
+        assert parse_rule("Fri-Mon 00:00-24:00").days == frozenset({4, 5, 6, 0})
+        assert parse_rule("22:00-07:00").days == frozenset(range(7))
+
+    @pytest.mark.parametrize("text", ["lunch", "12:00-12:00", "25:00-26:00", "Xyz 1:00-2:00"])
+    def test_malformed(self, text):
+        assert parse_rule(text) is None
+
+    def test_window_past_midnight_belongs_to_its_start_day(self):
+        rule = parse_rule("Fri 22:00-07:00")
+        friday = MONDAY + timedelta(days=4)
+        spans = list(rule.spans(MONDAY, MONDAY + timedelta(days=6)))
+        assert spans == [(_at(friday, 22), _at(friday + timedelta(days=1), 7))]
+
+
+class TestCalendar:
+    def test_timed_event_in_utc(self):
+        (event,) = parse_ics(_ics("DTSTART:20240304T090000Z\nDTEND:20240304T093000Z\nUID:a"))
+        start = datetime(2024, 3, 4, 9, tzinfo=timezone.utc).timestamp()
+        assert _spans(event) == [(start, start + 1800)]
+
+    def test_folded_lines_and_nested_alarm(self):
+        lines = _ics(
+            "DTSTART;TZID=Europe/Berlin:20240304T100000\n"
+            "DURATION:PT1H\n"
+            "SUMMARY:Long\n"
+            " title\n"
+            "BEGIN:VALARM\nTRIGGER:-PT5M\nEND:VALARM"
+        )
+        (event,) = parse_ics(lines)
+        assert event.duration == timedelta(hours=1)
+        assert event.start.utcoffset() == timedelta(hours=1)
+
+    def test_all_day_transparent_and_cancelled_are_not_busy(self):
+        lines = _ics(
+            "DTSTART;VALUE=DATE:20240304\nDTEND;VALUE=DATE:20240305",
+            "DTSTART:20240304T090000\nDTEND:20240304T100000\nTRANSP:TRANSPARENT",
+            "DTSTART:20240304T090000\nDTEND:20240304T100000\nSTATUS:CANCELLED",
+            "DTSTART:20240304T090000",
+        )
+        assert list(parse_ics(lines)) == []
+
+    def test_weekly_byday_with_count_and_exdate(self):
+        (event,) = parse_ics(
+            _ics(
+                "DTSTART:20240304T100000\nDTEND:20240304T101500\n"
+                "RRULE:FREQ=WEEKLY;BYDAY=MO,WE;COUNT=4\n"
+                "EXDATE:20240306T100000"
+            )
+        )
+        starts = [date.fromtimestamp(s) for s, _ in _spans(event)]
+        wednesday = MONDAY + timedelta(days=2)
+        assert wednesday not in starts
+        assert starts == [MONDAY, MONDAY + timedelta(days=7), MONDAY + timedelta(days=9)]
+
+    def test_daily_until_and_moved_instance(self, tmp_path):
+        path = tmp_path / "work.ics"
+        path.write_text(
+            "".join(
+                _ics(
+                    "UID:standup\nDTSTART:20240304T093000\nDTEND:20240304T094500\n"
+                    "RRULE:FREQ=DAILY;UNTIL=20240307",
+                    "UID:standup\nRECURRENCE-ID:20240305T093000\n"
+                    "DTSTART:20240305T150000\nDTEND:20240305T151500",
+                )
+            )
+        )
+        spans = sorted(s for e in quiet.read_calendar(path) for s, _ in _spans(e))
+        tuesday = MONDAY + timedelta(days=1)
+        assert spans == [
+            _at(MONDAY, 9, 30),
+            _at(tuesday, 15),
+            _at(MONDAY + timedelta(days=2), 9, 30),
+            _at(MONDAY + timedelta(days=3), 9, 30),
+        ]
+
+    def test_long_running_series_expands_only_the_window(self):
+        (event,) = parse_ics(
+            _ics("DTSTART:20100104T100000\nDTEND:20100104T103000\nRRULE:FREQ=WEEKLY;BYDAY=MO")
+        )
+        assert [date.fromtimestamp(s) for s, _ in _spans(event, days=7)] == [MONDAY]
+
+    def test_monthly_skips_missing_days(self):
+        (event,) = parse_ics(
+            _ics("DTSTART:20240131T100000\nDTEND:20240131T110000\nRRULE:FREQ=MONTHLY;COUNT=3")
+        )
+        starts = [date.fromtimestamp(s) for s, _ in _spans(event, date(2024, 1, 1), 200)]
+        # February has no 31st; COUNT still counts only real occurrences.
+        assert starts == [date(2024, 1, 31), date(2024, 3, 31), date(2024, 5, 31)]
+
+    @pytest.mark.parametrize("bad", ["COUNT=abc", "UNTIL=2025", "INTERVAL=x"])
+    def test_malformed_rrule_skips_only_that_event(self, tmp_path, bad):
+        path = tmp_path / "cal.ics"
+        path.write_text(
+            "".join(
+                _ics(
+                    f"DTSTART:20240304T090000\nDTEND:20240304T100000\nRRULE:FREQ=DAILY;{bad}",
+                    "DTSTART:20240304T120000\nDTEND:20240304T130000",
+                )
+            )
+        )
+        schedule = QuietSchedule((), [str(path)])
+        assert schedule.until(_at(MONDAY, 9, 30)) is None
+        assert schedule.until(_at(MONDAY, 12, 30)) == _at(MONDAY, 13)
+
+    def test_parsed_once_until_the_file_changes(self, tmp_path, monkeypatch):
+        path = tmp_path / "cal.ics"
+        path.write_text("".join(_ics("DTSTART:20240304T090000\nDTEND:20240304T100000")))
+        calls = []
+        real = quiet.parse_ics
+        monkeypatch.setattr(quiet, "parse_ics", lambda f: calls.append(1) or real(f))
+        first = quiet.read_calendar(path)
+        assert quiet.read_calendar(path) is first
+        path.write_text("".join(_ics("DTSTART:20240304T110000\nDTEND:20240304T120000")))
+        os.utime(path, ns=(0, path.stat().st_mtime_ns + 1_000_000_000))
+        assert quiet.read_calendar(path)[0].start.hour == 11
+        assert len(calls) == 2
+
+
+class TestQuietSchedule:
+    def test_rules_and_calendar_combine(self, tmp_path):
+        path = tmp_path / "cal.ics"
+        path.write_text("".join(_ics("DTSTART:20240304T130000\nDTEND:20240304T140000")))
+        schedule = QuietSchedule(["Mon-Fri 12:00-13:00"], [str(path)])
+        # Lunch runs straight into the meeting: one stretch.
+        assert schedule.until(_at(MONDAY, 12, 30)) == _at(MONDAY, 14)
+        assert schedule.until(_at(MONDAY, 14)) is None
+        assert schedule.until(_at(MONDAY + timedelta(days=5), 12, 30)) is None
+
+    def test_horizon_rolls_forward(self):
+        schedule = QuietSchedule(["03:00-04:00"])
+        later = MONDAY + timedelta(days=30)
+        assert schedule.until(_at(MONDAY, 3, 30)) == _at(MONDAY, 4)
+        assert schedule.until(_at(later, 3, 30)) == _at(later, 4)
+
+    def test_calendar_edit_is_picked_up(self, tmp_path):
+        path = tmp_path / "cal.ics"
+        path.write_text("".join(_ics()))
+        schedule = QuietSchedule([], [str(path)])
+        assert schedule.until(_at(MONDAY, 9, 30)) is None
+        path.write_text("".join(_ics("DTSTART:20240304T090000\nDTEND:20240304T100000")))
+        os.utime(path, ns=(0, path.stat().st_mtime_ns + 1_000_000_000))
+        assert schedule.until(_at(MONDAY, 9, 30)) == _at(MONDAY, 10)
+
+
+class TestRunnerDeferral:
+    def _runner(self, monkeypatch, clock, cfg):
+        monkeypatch.setattr("breathebreak.controller.notify", lambda *args, **kwargs: None)
+        stats = StatsStore()
+        stats._persist = lambda: None
+        runner = HeadlessRunner(
+            config=cfg, stats=stats, scheduler=Scheduler(clock=clock), idle_provider=None
+        )
+        monkeypatch.setattr("breathebreak.idle.default_provider", lambda: None)
+        monkeypatch.setattr(runner.scheduler, "run", lambda: None)
+        runner.run()
+        return runner
+
+    def _step(self, clock, sched, seconds):
+        for _ in range(int(seconds // 30)):
+            clock.advance(30)
+            sched.run_due()
+
+    def test_reminder_jumps_to_the_end_of_quiet_hours(self, monkeypatch):
+        clock = FakeClock(_at(MONDAY, 11, 50))
+        cfg = Config(interval_minutes=20, quiet_hours=("12:00-13:00",))
+        runner = self._runner(monkeypatch, clock, cfg)
+        sched = runner.scheduler
+        assert sched.wall_time(runner._reminder.due) == _at(MONDAY, 13)
+        self._step(clock, sched, 70 * 60)
+        assert runner._ticks == 1
+        assert sched.wall_time(runner._reminder.due) == _at(MONDAY, 13, 20)
+
+    def test_tick_inside_a_new_quiet_window_is_suppressed(self, monkeypatch):
+        clock = FakeClock(_at(MONDAY, 11, 50))
+        runner = self._runner(monkeypatch, clock, Config(interval_minutes=20))
+        runner._quiet.configure(["12:00-13:00"], [])
+        seen = []
+        runner.events.subscribe(seen.append)
+        self._step(clock, runner.scheduler, 21 * 60)
+        assert runner._ticks == 0
+        assert runner.stats.days[date.today().isoformat()].reminders_sent == 0
+        assert [e["kind"] for e in seen] == ["quiet"]
+        assert runner.scheduler.wall_time(runner._reminder.due) == _at(MONDAY, 13)
+
+    def test_config_reload_defers_immediately(self, monkeypatch):
+        clock = FakeClock(_at(MONDAY, 11, 50))
+        runner = self._runner(monkeypatch, clock, Config(interval_minutes=20))
+        runner.apply_config(Config(interval_minutes=20, quiet_hours=("12:00-12:30",)))
+        assert runner.scheduler.wall_time(runner._reminder.due) == _at(MONDAY, 12, 30)
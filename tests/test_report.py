@@ -0,0 +1,106 @@
+"""Tests for the historical analytics report."""
+
+import json
+import time
+from datetime import date, timedelta
+
+from breathebreak.cli import main
+from breathebreak.daytable import DayTable
+from breathebreak.report import build, render_text
+from breathebreak.stats import StatsStore
+
+
+def _table(rows: dict) -> DayTable:
+    return DayTable.from_rows({day.isoformat(): counts for day, counts in rows.items()})
+
+
+MONDAY = date(2024, 1, 1)
+
+
+class TestReport:
+    def test_empty_history(self):
+        report = build(DayTable())
+        assert report == {"days": 0}
+        assert render_text(report) == "No break data recorded yet."
+
+    def test_weekly_and_monthly_rollups(self):
+        rows = {
+            MONDAY + timedelta(days=i): {"reminders_sent": 10, "breaks_acknowledged": 5}
+            for i in range(40)
+        }
+        report = build(_table(rows))
+        assert report["weekly"][0]["start"] == "2024-01-01"
+        assert report["weekly"][0]["reminders_sent"] == 70
+        assert [m["month"] for m in report["monthly"]] == ["2024-01", "2024-02"]
+        assert report["monthly"][0]["days"] == 31
+        assert report["monthly"][1]["breaks_acknowledged"] == 45
+        assert report["compliance"] == 0.5
+
+    def test_weeks_start_on_monday(self):
+        wednesday = MONDAY + timedelta(days=2)
+        report = build(_table({wednesday: {"reminders_sent": 1}}))
+        assert report["weekly"][0]["start"] == "2024-01-01"
+
+    def test_streaks_skip_days_without_reminders(self):
+        good = {"reminders_sent": 10, "breaks_acknowledged": 9}
+        bad = {"reminders_sent": 10, "breaks_acknowledged": 2}
+        pattern = [good, good, bad, good, {}, good, good]
+        rows = {MONDAY + timedelta(days=i): counts for i, counts in enumerate(pattern)}
+        streaks = build(_table(rows))["streaks"]
+        assert streaks == {"longest": 3, "current": 3}
+
+    def test_weekday_patterns(self):
+        rows = {}
+        for i in range(28):
+            day = MONDAY + timedelta(days=i)
+            breaks = 10 if day.weekday() == 4 else 5
+            rows[day] = {"reminders_sent": 10, "breaks_acknowledged": breaks}
+        weekdays = build(_table(rows))["weekdays"]
+        assert weekdays["Fri"]["compliance"] == 1.0
+        assert weekdays["Mon"]["compliance"] == 0.5
+        assert weekdays["Fri"]["days"] == 4
+
+    def test_focus_percentiles_ignore_missing_days(self):
+        rows = {MONDAY + timedelta(days=2 * i): {"focus_seconds": i * 60} for i in range(101)}
+        pct = build(_table(rows))["focus_percentiles"]
+        assert pct["p50"] == 50 * 60
+        assert pct["p90"] == 90 * 60
+        assert pct["max"] == 100 * 60
+
+    def test_trend_is_positive_when_compliance_improves(self):
+        rows = {
+            MONDAY + timedelta(days=i): {"reminders_sent": 100, "breaks_acknowledged": i // 7}
+            for i in range(70)
+        }
+        trend = build(_table(rows))["trend"]
+        assert abs(trend["all"] - 0.01) < 1e-9
+
+    def test_twenty_years_well_under_a_second(self):
+        start = date.today() - timedelta(days=20 * 365)
+        rows = {
+            start + timedelta(days=i): {
+                "reminders_sent": 20,
+                "breaks_acknowledged": 10 + i % 10,
+                "focus_seconds": 3600 * (i % 8),
+            }
+            for i in range(20 * 365)
+        }
+        table = _table(rows)
+        begin = time.perf_counter()
+        report = build(table)
+        render_text(report)
+        assert time.perf_counter() - begin < 0.25
+        assert report["days"] == 20 * 365
+
+
+class TestReportCommand:
+    def test_json_output(self, tmp_path, monkeypatch, capsys):
+        monkeypatch.setattr("breathebreak.config.CONFIG_FILE", tmp_path / "config.yaml")
+        monkeypatch.setattr("breathebreak.stats.STATS_FILE", tmp_path / "stats.json")
+        store = StatsStore.load()
+        store.record_reminder()
+        store.record_break()
+        main(["report", "--format", "json"])
+        report = json.loads(capsys.readouterr().out)
+        assert report["totals"]["breaks_acknowledged"] == 1
+        assert report["streaks"]["current"] == 1
@@ -0,0 +1,185 @@
+"""Tests for tiered retention of old daily stats."""
+
+import importlib.util
+import json
+import threading
+from datetime import date, timedelta
+
+import pytest
+
+from breathebreak import retention
+from breathebreak.report import build
+from breathebreak.retention import RetentionPolicy, Watermarks, monday, plan
+from breathebreak.stats import StatsStore
+
+TODAY = date(2024, 6, 14)
+POLICY = RetentionPolicy(keep_days=35, keep_weeks=8)
+
+
+def _seed(path, days: int):
+    rows = {
+        (TODAY - timedelta(days=i)).isoformat(): {
+            "reminders_sent": 10 + i % 7,
+            "breaks_acknowledged": i % 5,
+            "focus_seconds": 60 * i,
+        }
+        for i in range(days)
+    }
+    path.write_text(json.dumps(rows))
+
+
+@pytest.fixture
+def stats_file(tmp_path, monkeypatch):
+    path = tmp_path / "stats.json"
+    monkeypatch.setattr("breathebreak.stats.STATS_FILE", path)
+    return path
+
+
+def _run(store, policy=POLICY):
+    while store._retention_step(policy, today=TODAY):
+        pass
+
+
+class TestPlan:
+    def test_inactive_policy_plans_nothing(self):
+        periods, marks, more = plan(Watermarks(), RetentionPolicy(), 1000, 2000)
+        assert (periods, marks, more) == ([], Watermarks(), False)
+
+    def test_weeks_stop_before_the_daily_window(self):
+        today = TODAY.toordinal()
+        first = today - 100
+        periods, marks, more = plan(Watermarks(), RetentionPolicy(35), first, today, limit=99)
+        assert not more
+        assert periods[0][0] == monday(first)
+        assert all(hi - lo == 6 for lo, hi in periods)
+        assert marks.days_from == monday(today - 35)
+        assert periods[-1][1] == marks.days_from - 1
+
+    def test_batches_resume_from_watermarks(self):
+        today = TODAY.toordinal()
+        first = today - 400
+        periods, marks, more = plan(Watermarks(), POLICY, first, today, limit=3)
+        assert more and len(periods) == 3
+        rest, _, _ = plan(marks, POLICY, first, today, limit=3)
+        assert rest[0][0] == periods[-1][1] + 1
+
+    def test_months_only_cover_whole_weekly_months(self):
+        today = TODAY.toordinal()
+        first = today - 400
+        marks = Watermarks()
+        periods = []
+        more = True
+        while more:
+            batch, marks, more = plan(marks, POLICY, first, today)
+            periods += batch
+        months = [p for p in periods if date.fromordinal(p[0]).day == 1 and p[1] - p[0] > 6]
+        assert months
+        assert all(date.fromordinal(hi + 1).day == 1 for _, hi in months)
+        assert months[-1][1] < marks.days_from - 7 * POLICY.keep_weeks
+
+
+class TestApplyRetention:
+    @pytest.mark.parametrize(
+        "storage",
+        [
+            "json",
+            "paged",
+            "sqlite",
+            pytest.param(
+                "encrypted",
+                marks=pytest.mark.skipif(
+                    importlib.util.find_spec("cryptography") is None, reason="needs cryptography"
+                ),
+            ),
+        ],
+    )
+    def test_totals_are_preserved(self, stats_file, storage):
+        _seed(stats_file, 500)
+        store = StatsStore.load(storage=storage)
+        start = TODAY - timedelta(days=600)
+        before = store.totals(start, TODAY)
+        recent = store.totals(TODAY - timedelta(days=20), TODAY)
+        _run(store)
+        assert store.totals(start, TODAY) == before
+        assert store.totals(TODAY - timedelta(days=20), TODAY) == recent
+        store.close()
+        reloaded = StatsStore.load(storage=storage)
+        assert reloaded.totals(start, TODAY) == before
+        reloaded.close()
+
+    def test_old_rows_are_folded(self, stats_file):
+        _seed(stats_file, 500)
+        store = StatsStore.load()
+        _run(store)
+        rows = json.loads(stats_file.read_text())
+        assert len(rows) < 500 - 400
+        daily_from = store.daily_from()
+        assert daily_from is not None and daily_from.weekday() == 0
+        assert daily_from <= TODAY - timedelta(days=35)
+
+    def test_rerun_is_a_no_op(self, stats_file):
+        _seed(stats_file, 300)
+        store = StatsStore.load()
+        _run(store)
+        first = stats_file.read_text()
+        _run(store)
+        assert stats_file.read_text() == first
+
+    def test_marks_are_written_after_the_stats_file(self, stats_file):
+        _seed(stats_file, 300)
+        store = StatsStore.load()
+        store._retention_step(POLICY, today=TODAY)
+        marks = retention.load_marks(stats_file.with_suffix(".retention"))
+        assert marks.days_from > 0
+
+    def test_inactive_policy_leaves_file_alone(self, stats_file):
+        _seed(stats_file, 300)
+        original = stats_file.read_text()
+        store = StatsStore.load()
+        store.apply_retention(RetentionPolicy())
+        assert stats_file.read_text() == original
+        assert store.daily_from() is None
+
+    def test_background_pass_completes(self, stats_file, monkeypatch):
+        monkeypatch.setattr(retention, "BATCH_PAUSE", 0)
+        _seed(stats_file, 2000)
+        store = StatsStore.load()
+        before = store.totals(TODAY - timedelta(days=3000), date.today())
+        store.apply_retention(POLICY, background=True)
+        store._retainer.join(10)
+        assert not store._retainer.is_alive()
+        assert store.totals(TODAY - timedelta(days=3000), date.today()) == before
+        assert store.daily_from() is not None
+
+    def test_close_stops_a_background_pass(self, stats_file, monkeypatch):
+        _seed(stats_file, 2000)
+        store = StatsStore.load()
+        entered, gate = threading.Event(), threading.Event()
+        step = store._retention_step
+        steps = []
+
+        def slow_step(policy, today=None):
+            steps.append(1)
+            entered.set()
+            gate.wait(5)
+            return step(policy, today)
+
+        monkeypatch.setattr(store, "_retention_step", slow_step)
+        store.apply_retention(POLICY, background=True)
+        entered.wait(5)
+        closer = threading.Thread(target=store.close)
+        closer.start()
+        store._retain_stop.wait(5)
+        gate.set()
+        closer.join(5)
+        assert not store._retainer.is_alive()
+        assert len(steps) == 1
+
+    def test_report_keeps_per_day_figures_daily(self, stats_file):
+        _seed(stats_file, 400)
+        store = StatsStore.load()
+        _run(store)
+        report = build(store.days, store.daily_from())
+        assert report["daily_from"] == store.daily_from().isoformat()
+        assert report["days"] == (TODAY - store.daily_from()).days + 1
+        assert sum(w["days"] for w in report["weekdays"].values()) == report["days"]
@@ -0,0 +1,212 @@
+"""Tests for the deadline scheduler."""
+
+import threading
+
+import pytest
+
+from breathebreak.scheduler import SUSPEND_SLACK, Scheduler
+
+
+class FakeClock:
+    """Monotonic and wall clocks that only move when told to."""
+
+    def __init__(self):
+        self.mono = 1000.0
+        self.wall = 1_700_000_000.0
+
+    def monotonic(self):
+        return self.mono
+
+    def time(self):
+        return self.wall
+
+    def advance(self, seconds):
+        self.mono += seconds
+        self.wall += seconds
+
+    def suspend(self, seconds):
+        """Sleep the machine: wall time moves, monotonic time doesn't."""
+        self.wall += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def sched(clock):
+    return Scheduler(clock=clock)
+
+
+class TestOrdering:
+    def test_runs_in_deadline_order(self, clock, sched):
+        fired = []
+        sched.call_later(30, lambda: fired.append("b"))
+        sched.call_later(10, lambda: fired.append("a"))
+        sched.call_later(60, lambda: fired.append("c"))
+        clock.advance(45)
+        assert sched.run_due() == 2
+        assert fired == ["a", "b"]
+        assert sched.next_delay() == 15
+
+    def test_nothing_due_runs_nothing(self, clock, sched):
+        sched.call_later(10, lambda: None)
+        clock.advance(9)
+        assert sched.run_due() == 0
+
+    def test_empty_scheduler_has_no_deadline(self, sched):
+        assert sched.next_delay() is None
+
+    def test_one_shot_jobs_finish(self, clock, sched):
+        job = sched.call_later(1, lambda: None)
+        clock.advance(1)
+        sched.run_due()
+        assert not job.active
+        assert len(sched) == 0
+
+    def test_failing_job_does_not_stop_others(self, clock, sched):
+        fired = []
+        sched.call_later(1, lambda: 1 / 0)
+        sched.call_later(2, lambda: fired.append(1))
+        clock.advance(2)
+        assert sched.run_due() == 2
+        assert fired == [1]
+
+
+class TestPeriodic:
+    def test_no_drift_from_late_wakeups(self, clock, sched):
+        job = sched.every(60, lambda: None)
+        for _ in range(100):
+            clock.advance(sched.next_delay() + 0.7)  # driver always wakes late
+            sched.run_due()
+        assert job.due == pytest.approx(1000 + 101 * 60)
+        assert job.runs == 100
+
+    def test_late_run_keeps_grid(self, clock, sched):
+        job = sched.every(60, lambda: None)
+        clock.advance(75)
+        sched.run_due()
+        assert job.due == 1120
+        assert sched.next_delay() == 45
+
+    def test_missed_periods_coalesce(self, clock, sched):
+        fired = []
+        job = sched.every(60, lambda: fired.append(1))
+        clock.advance(60 * 5 + 10)
+        sched.run_due()
+        assert fired == [1]
+        assert job.missed == 4
+        assert job.due == 1000 + 60 * 6
+
+    def test_cancel(self, clock, sched):
+        fired = []
+        job = sched.every(60, lambda: fired.append(1))
+        sched.cancel(job)
+        sched.cancel(job)
+        clock.advance(600)
+        assert sched.run_due() == 0
+        assert not job.active
+
+    def test_job_can_cancel_itself(self, clock, sched):
+        holder = []
+        holder.append(sched.every(10, lambda: sched.cancel(holder[0])))
+        clock.advance(100)
+        assert sched.run_due() == 1
+        assert sched.next_delay() is None
+
+    def test_reschedule_changes_interval(self, clock, sched):
+        job = sched.every(60, lambda: None)
+        clock.advance(30)
+        sched.reschedule(job, interval=120)
+        assert sched.next_delay() == 120
+        assert len(sched) == 1
+
+    def test_rejects_non_positive_interval(self, sched):
+        with pytest.raises(ValueError):
+            sched.every(0, lambda: None)
+
+    def test_many_timers(self, clock, sched):
+        counts = {}
+        for period in (7, 11, 13):
+            sched.every(period, lambda p=period: counts.__setitem__(p, counts.get(p, 0) + 1))
+        for _ in range(1001):
+            clock.advance(1)
+            sched.run_due()
+        assert counts == {7: 143, 11: 91, 13: 77}
+
+
+class TestSuspend:
+    def test_suspend_brings_deadlines_due(self, clock, sched):
+        fired = []
+        job = sched.every(20 * 60, lambda: fired.append(1))
+        clock.advance(5 * 60)
+        clock.suspend(3600)
+        assert sched.next_delay() == 0
+        sched.run_due()
+        assert fired == [1]
+        assert job.missed == 2
+
+    def test_small_skew_is_ignored(self, clock, sched):
+        sched.call_later(60, lambda: None)
+        clock.suspend(SUSPEND_SLACK / 2)
+        assert sched.next_delay() == 60
+
+    def test_wall_deadline_survives_suspend(self, clock, sched):
+        fired = []
+        sched.call_at_wall(clock.wall + 3600, lambda: fired.append(1))
+        clock.suspend(1800)
+        assert sched.next_delay() == 1800
+        clock.advance(1800)
+        sched.run_due()
+        assert fired == [1]
+
+    def test_wall_deadline_follows_clock_set_back(self, clock, sched):
+        sched.call_at_wall(clock.wall + 600, lambda: None)
+        clock.wall -= 3600
+        assert sched.next_delay() == 4200
+
+    def test_periodic_job_moved_to_wall_time_keeps_its_interval(self, clock, sched):
+        job = sched.every(600, lambda: None)
+        sched.reschedule_at_wall(job, clock.wall + 3600)
+        assert sched.wall_time(job.due) == clock.wall + 3600
+        clock.suspend(1800)
+        assert sched.next_delay() == 1800
+        clock.advance(1800)
+        sched.run_due()
+        assert sched.next_delay() == 600
+        assert job.wall_due is None
+
+
+class TestDrivers:
+    def test_on_change_fires_for_new_deadlines(self, clock):
+        changes = []
+        sched = Scheduler(clock=clock, on_change=lambda: changes.append(1))
+        job = sched.call_later(10, lambda: None)
+        sched.cancel(job)
+        assert len(changes) == 2
+
+    def test_on_change_quiet_while_running(self, clock):
+        changes = []
+        sched = Scheduler(clock=clock, on_change=lambda: changes.append(1))
+        sched.call_later(1, lambda: sched.call_later(5, lambda: None))
+        clock.advance(1)
+        sched.run_due()
+        assert len(changes) == 1
+
+    def test_blocking_run_with_real_clock(self):
+        sched = Scheduler()
+        fired = threading.Event()
+        sched.call_later(0.01, fired.set)
+        sched.call_later(0.02, sched.stop)
+        worker = threading.Thread(target=sched.run)
+        worker.start()
+        worker.join(timeout=5)
+        assert fired.is_set()
+        assert not worker.is_alive()
+
+    def test_stop_before_run_returns_immediately(self):
+        sched = Scheduler()
+        sched.every(3600, lambda: None)
+        sched.stop()
+        sched.run()
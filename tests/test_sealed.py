@@ -0,0 +1,230 @@
+"""Tests for encrypted stats: sealed chunks and the encrypted backend."""
+
+import sys
+from datetime import date, timedelta
+
+import pytest
+
+pytest.importorskip("cryptography")
+
+from breathebreak import sealed  # noqa: E402
+from breathebreak.backends import EncryptedBackend  # noqa: E402
+from breathebreak.config import Config  # noqa: E402
+from breathebreak.daytable import DayTable  # noqa: E402
+from breathebreak.sealed import Sealer, SealError  # noqa: E402
+from breathebreak.stats import StatsStore  # noqa: E402
+
+MARCH = date(2024, 3, 1).toordinal()
+
+
+def _history(days: int, start: date = date(2010, 1, 1), every: int = 1) -> DayTable:
+    rows = {}
+    for i in range(0, days, every):
+        key = (start + timedelta(days=i)).isoformat()
+        rows[key] = {"reminders_sent": i % 30, "focus_seconds": i}
+    return DayTable.from_rows(rows)
+
+
+def _sig(path):
+    st = path.stat()
+    return st.st_ino, st.st_mtime_ns
+
+
+@pytest.fixture
+def stats_file(tmp_path, monkeypatch):
+    path = tmp_path / "stats.json"
+    monkeypatch.setattr("breathebreak.stats.STATS_FILE", path)
+    return path
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    """Months decrypted by Sealer.open, in order."""
+    seen = []
+    real = Sealer.open
+
+    def spy(self, blob, first):
+        if first:
+            seen.append(date.fromordinal(first).strftime("%Y-%m"))
+        return real(self, blob, first)
+
+    monkeypatch.setattr(Sealer, "open", spy)
+    return seen
+
+
+class TestSealer:
+    def test_round_trip_and_tampering(self, tmp_path):
+        sealer = Sealer(tmp_path / "key", create=True)
+        blob = sealer.seal(MARCH, 3, b"x" * 40)
+        assert b"x" * 8 not in blob
+        assert sealer.open(blob, MARCH) == (3, b"x" * 40)
+        flipped = bytearray(blob)
+        flipped[-1] ^= 1
+        with pytest.raises(SealError):
+            sealer.open(bytes(flipped), MARCH)
+        # The month is authenticated, so a chunk can't stand in for another.
+        with pytest.raises(SealError):
+            sealer.open(blob, MARCH + 31)
+        with pytest.raises(SealError):
+            sealer.open(blob[:20], MARCH)
+
+    def test_wrong_key(self, tmp_path):
+        blob = Sealer(tmp_path / "a", create=True).seal(MARCH, 1, b"data")
+        with pytest.raises(SealError):
+            Sealer(tmp_path / "b", create=True).open(blob, MARCH)
+
+    def test_keyfile(self, tmp_path):
+        path = tmp_path / "keys" / "stats.key"
+        with pytest.raises(SealError):
+            Sealer(path)
+        Sealer(path, create=True)
+        assert len(path.read_bytes()) == sealed.KEY_BYTES
+        assert path.stat().st_mode & 0o777 == 0o600
+        path.write_bytes(b"short")
+        with pytest.raises(SealError):
+            Sealer(path)
+
+    def test_missing_package_leaves_no_keyfile(self, tmp_path, monkeypatch):
+        monkeypatch.setitem(sys.modules, "cryptography.hazmat.primitives.ciphers.aead", None)
+        with pytest.raises(SealError, match="cryptography"):
+            Sealer(tmp_path / "stats.key", create=True)
+        assert not (tmp_path / "stats.key").exists()
+
+
+class TestEncryptedBackend:
+    def test_a_write_reseals_only_its_month(self, tmp_path):
+        backend = EncryptedBackend(tmp_path / "stats.json")
+        backend.import_table(_history(400), "json")
+        chunks = sorted(backend.path.glob("*.chunk"))
+        assert len(chunks) == 14
+        before = {path.name: _sig(path) for path in chunks}
+        index = _sig(backend.path / "index")
+
+        backend.apply([{"date": "2010-06-05", "reminders_sent": 1}])
+        after = {path.name: _sig(path) for path in chunks}
+        assert [name for name in before if before[name] != after[name]] == ["2010-06.chunk"]
+        # A day that already had data leaves the index alone.
+        assert _sig(backend.path / "index") == index
+        backend.apply([{"date": "2011-02-20", "reminders_sent": 1}])
+        assert _sig(backend.path / "index") != index
+        assert backend.last_ordinal() == date(2011, 2, 20).toordinal()
+
+    def test_totals_decrypt_only_the_months_in_range(self, tmp_path, opened):
+        table = _history(3000)
+        EncryptedBackend(tmp_path / "stats.json").import_table(table, "json")
+        backend = EncryptedBackend(tmp_path / "stats.json")
+        first, last = date(2012, 5, 30).toordinal(), date(2012, 6, 2).toordinal()
+        assert backend.totals(first, last) == table.totals(first, last)
+        assert opened == ["2012-05", "2012-06"]
+        # Unchanged months are served from memory.
+        backend.totals(first, last)
+        assert len(opened) == 2
+
+    def test_pager_matches_snapshot_table(self, tmp_path, opened):
+        table = _history(500, every=3)
+        backend = EncryptedBackend(tmp_path / "stats.json")
+        backend.import_table(table, "json")
+        fresh = EncryptedBackend(tmp_path / "stats.json")
+        opened.clear()
+        lazy, _ = fresh.load(window_start=date(2011, 4, 1).toordinal())
+        assert lazy.resident_days < len(table)
+        assert len(opened) <= 3
+        assert len(lazy) == len(table)
+        first, last = table.first_ordinal(), table.last_ordinal()
+        assert lazy.first_ordinal() == first
+        assert lazy.totals(first, last) == table.totals(first, last)
+        assert lazy.to_dict() == table.to_dict()
+
+    def test_recent_spans_days_with_data(self, tmp_path):
+        backend = EncryptedBackend(tmp_path / "stats.json")
+        assert backend.recent(7) == (0, 0)
+        assert backend.last_ordinal() is None
+        backend.import_table(_history(90, every=5), "json")
+        assert backend.recent(3) == (date(2010, 3, 17).toordinal(), 3)
+        assert backend.recent(100) == (date(2010, 1, 1).toordinal(), 18)
+
+    def test_rollup_across_a_month_boundary(self, tmp_path):
+        backend = EncryptedBackend(tmp_path / "stats.json")
+        backend.apply([{"date": "2024-03-01", "reminders_sent": 2}])
+        backend.apply([{"date": "2024-03-02", "reminders_sent": 3}])
+        monday = date(2024, 2, 26).toordinal()
+        backend.rollup([(monday, monday + 6)])
+        assert [p.name for p in backend.path.glob("*.chunk")] == ["2024-02.chunk"]
+        assert backend.totals(monday, monday) == backend.totals(monday - 100, monday + 100)
+        assert backend.totals(monday, monday)["reminders_sent"] == 5
+        assert backend.recent(7) == (monday, 1)
+
+
+class TestEncryptedStore:
+    def test_records_survive_reload_without_plaintext(self, stats_file):
+        store = StatsStore.load(storage="encrypted")
+        store.record_reminder()
+        store.record_break(30)
+        assert "Compliance:     100%" in store.summary()
+        store.close()
+        loaded = StatsStore.load(storage="encrypted")
+        today = loaded.days[date.today().isoformat()]
+        assert today.reminders_sent == 1
+        assert today.total_break_seconds == 30
+        loaded.close()
+        assert not stats_file.exists()
+        assert stats_file.with_name("stats.key").exists()
+
+    def test_imports_json_once(self, stats_file):
+        StatsStore(days=_history(60)).compact()
+        store = StatsStore.load(storage="encrypted")
+        assert store.days["2010-01-10"].reminders_sent == 9
+        store.record_reminder()
+        store.close()
+        again = StatsStore.load(storage="encrypted")
+        assert again.days["2010-01-10"].reminders_sent == 9
+        today = date.today()
+        assert again.totals(today, today)["reminders_sent"] == 1
+        assert stats_file.exists()
+
+    def test_keyfile_from_config(self, stats_file, tmp_path):
+        key = tmp_path / "elsewhere" / "stats.key"
+        cfg = Config(stats_storage="encrypted", stats_keyfile=str(key), stats_flush_seconds=0)
+        store = StatsStore.for_config(cfg)
+        assert not store.timeline
+        store.record_reminder()
+        store.close()
+        assert key.exists() and not stats_file.with_name("stats.key").exists()
+
+    def test_wrong_key_refuses_to_load(self, stats_file):
+        store = StatsStore.load(storage="encrypted")
+        store.record_reminder()
+        store.close()
+        chunks = stats_file.with_suffix(".enc")
+        before = {path.name: path.read_bytes() for path in chunks.iterdir()}
+        key = stats_file.with_name("stats.key")
+        key.write_bytes(bytes(sealed.KEY_BYTES))
+        with pytest.raises(SealError):
+            StatsStore.load(storage="encrypted")
+        key.unlink()
+        with pytest.raises(SealError):
+            StatsStore.load(storage="encrypted")
+        assert {path.name: path.read_bytes() for path in chunks.iterdir()} == before
+
+    def test_damaged_chunk_is_moved_aside(self, stats_file):
+        StatsStore(days=_history(60)).compact()
+        StatsStore.load(storage="encrypted").close()
+        chunk = stats_file.with_suffix(".enc") / "2010-01.chunk"
+        damaged = bytearray(chunk.read_bytes())
+        damaged[-1] ^= 1
+        chunk.write_bytes(bytes(damaged))
+        backend = EncryptedBackend(stats_file)
+        january = date(2010, 1, 1).toordinal()
+        assert backend.totals(january, january + 30)["focus_seconds"] == 0
+        backend.apply([{"date": "2010-01-05", "reminders_sent": 1}])
+        assert chunk.with_name("2010-01.chunk.bad").read_bytes() == bytes(damaged)
+        assert backend.totals(january, january + 30)["reminders_sent"] == 1
+
+    def test_lost_index_is_rebuilt(self, stats_file):
+        StatsStore(days=_history(60)).compact()
+        StatsStore.load(storage="encrypted").close()
+        stats_file.unlink()
+        (stats_file.with_suffix(".enc") / "index").unlink()
+        store = StatsStore.load(storage="encrypted")
+        assert len(store.days) == 60
+        assert store.days["2010-02-01"].reminders_sent == 1
@@ -0,0 +1,68 @@
+"""Tests for the accelerated app simulation."""
+
+import json
+import sys
+
+import pytest
+
+from breathebreak import config, metrics, stats
+from breathebreak.cli import main
+from breathebreak.simulate import Behavior, Simulation, run_checks
+
+
+class TestSimulation:
+    def test_checks_pass_and_totals_survive_a_reload(self):
+        report = Simulation(days=14).run()
+        assert run_checks(report) == []
+        totals = report["totals"]
+        # Two working weeks: one session per workday, reminders while at the desk.
+        assert totals["sessions_started"] == 10
+        assert totals["reminders_sent"] > 10 * 10
+        assert 0 < totals["breaks_acknowledged"] < totals["reminders_sent"]
+        assert report["reloaded_totals"] == totals
+        assert report["persisted"]["writes"] > 0
+        assert report["wakeups"] > 0
+
+    def test_same_seed_same_run(self):
+        first = Simulation(days=7, seed=3).run()
+        second = Simulation(days=7, seed=3).run()
+        other = Simulation(days=7, seed=4).run()
+        assert first["totals"] == second["totals"]
+        assert first["script"] == second["script"]
+        assert first["wakeups"] == second["wakeups"]
+        assert other["script"] != first["script"]
+
+    @pytest.mark.parametrize("storage", ["paged", "sqlite"])
+    def test_other_storage_formats(self, storage):
+        cfg = config.Config(stats_storage=storage, stats_journal=storage == "paged")
+        assert run_checks(Simulation(days=7, config=cfg).run()) == []
+
+    def test_interval_changes_and_stats_views_go_through_the_menu(self):
+        behavior = Behavior(interval_change_rate=1.0, stats_view_rate=1.0)
+        report = Simulation(days=7, behavior=behavior).run()
+        assert report["script"]["interval_changes"] == 5
+        assert report["stats_views"] == 5
+        assert run_checks(report) == []
+
+    def test_weekend_only_has_no_sessions(self):
+        report = Simulation(days=7, behavior=Behavior(workdays=frozenset())).run()
+        assert report["totals"]["sessions_started"] == 0
+        assert report["totals"]["reminders_sent"] == 0
+        assert run_checks(report) == []
+
+    def test_sandbox_is_undone(self):
+        paths = (config.CONFIG_DIR, config.CONFIG_FILE, stats.STATS_FILE)
+        had_rumps = "rumps" in sys.modules
+        was_enabled = metrics.enabled()
+        Simulation(days=1).run()
+        assert (config.CONFIG_DIR, config.CONFIG_FILE, stats.STATS_FILE) == paths
+        assert ("rumps" in sys.modules) == had_rumps
+        assert metrics.enabled() == was_enabled
+        if not had_rumps:
+            assert "breathebreak.app" not in sys.modules
+
+    def test_cli_json_report(self, capsys):
+        main(["simulate", "--days", "3", "--format", "json"])
+        report = json.loads(capsys.readouterr().out)
+        assert report["days"] == 3
+        assert all(report["checks"].values())
@@ -0,0 +1,44 @@
+"""Tests that GUI and YAML machinery stay out of the core import path."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _imported_after(code: str) -> set[str]:
+    probe = f"{code}; import sys; print('\\n'.join(sys.modules))"
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    out = subprocess.run(
+        [sys.executable, "-c", probe], capture_output=True, text=True, env=env, check=True
+    ).stdout
+    return set(out.split())
+
+
+@pytest.mark.parametrize(
+    "module",
+    ["breathebreak.config", "breathebreak.stats", "breathebreak.notifier", "breathebreak.headless"],
+)
+def test_core_modules_defer_heavy_imports(module):
+    imported = _imported_after(f"import {module}")
+    assert "yaml" not in imported
+    assert "rumps" not in imported
+
+
+def test_cli_does_not_import_gui_until_launch():
+    imported = _imported_after("import breathebreak.cli; breathebreak.cli.build_parser()")
+    assert "rumps" not in imported
+    assert "breathebreak.app" not in imported
+
+
+def test_loading_defaults_does_not_need_yaml(tmp_path):
+    code = (
+        "import breathebreak.config as c, pathlib; "
+        f"c.CONFIG_FILE = pathlib.Path({str(tmp_path / 'missing.yaml')!r}); "
+        "c.Config.load()"
+    )
+    assert "yaml" not in _imported_after(code)
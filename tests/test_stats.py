@@ -1,7 +1,16 @@
 """Tests for session statistics tracking."""
 
+import json
+import os
+import subprocess
+import sys
+import time
 from datetime import date, datetime, timedelta
 
+import pytest
+
+import breathebreak
+from breathebreak.daytable import DayTable
 from breathebreak.stats import DailyStats, StatsStore
 
 
@@ -107,7 +116,6 @@ class TestStatsSummary:
 class TestStatsPersistence:
     def test_roundtrip(self, tmp_path, monkeypatch):
         stats_file = tmp_path / "stats.json"
-        monkeypatch.setattr("breathebreak.stats.CONFIG_DIR", tmp_path)
         monkeypatch.setattr("breathebreak.stats.STATS_FILE", stats_file)
 
         store = StatsStore()
@@ -129,7 +137,6 @@ class TestStatsPersistence:
 
     def test_file_permissions(self, tmp_path, monkeypatch):
         stats_file = tmp_path / "stats.json"
-        monkeypatch.setattr("breathebreak.stats.CONFIG_DIR", tmp_path)
         monkeypatch.setattr("breathebreak.stats.STATS_FILE", stats_file)
 
         store = StatsStore()
@@ -137,3 +144,358 @@ class TestStatsPersistence:
 
         mode = oct(stats_file.stat().st_mode & 0o777)
         assert mode == "0o600"
+
+
+class TestJournaledPersistence:
+    def _patch(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("breathebreak.stats.STATS_FILE", tmp_path / "stats.json")
+        return tmp_path / "stats.json", tmp_path / "stats.journal"
+
+    def test_events_append_without_rewriting_snapshot(self, tmp_path, monkeypatch):
+        stats_file, journal_file = self._patch(tmp_path, monkeypatch)
+        store = StatsStore(journaled=True)
+        store.record_reminder()
+        store.record_break(20)
+
+        assert not stats_file.exists()
+        assert len(journal_file.read_text().splitlines()) == 2
+
+    def test_load_replays_snapshot_and_journal(self, tmp_path, monkeypatch):
+        self._patch(tmp_path, monkeypatch)
+        store = StatsStore(journaled=True)
+        store.record_reminder()
+        store.compact()
+        store.record_reminder()
+        store.record_break(20)
+
+        loaded = StatsStore.load(journaled=True)
+        today = date.today().isoformat()
+        assert loaded.days[today].reminders_sent == 2
+        assert loaded.days[today].breaks_acknowledged == 1
+
+    def test_compaction_folds_journal(self, tmp_path, monkeypatch):
+        stats_file, journal_file = self._patch(tmp_path, monkeypatch)
+        store = StatsStore(journaled=True)
+        for _ in range(3):
+            store.record_reminder()
+        store.compact()
+
+        assert not journal_file.exists()
+        today = date.today().isoformat()
+        assert json.loads(stats_file.read_text())[today]["reminders_sent"] == 3
+
+    def test_background_compaction_past_threshold(self, tmp_path, monkeypatch):
+        _, journal_file = self._patch(tmp_path, monkeypatch)
+        monkeypatch.setattr("breathebreak.stats.JOURNAL_COMPACT_THRESHOLD", 5)
+        store = StatsStore(journaled=True)
+        for _ in range(5):
+            store.record_reminder()
+        store.wait_for_compaction(timeout=5)
+
+        assert not journal_file.exists()
+        assert StatsStore.load(journaled=True).days[date.today().isoformat()].reminders_sent == 5
+
+    def test_crash_between_snapshot_and_truncate_does_not_double_count(self, tmp_path, monkeypatch):
+        _, journal_file = self._patch(tmp_path, monkeypatch)
+        store = StatsStore(journaled=True)
+        store.record_reminder()
+        store.record_reminder()
+        leftover = journal_file.read_text()
+        store.compact()
+        # Simulate dying after the snapshot rename but before truncation.
+        journal_file.write_text(leftover)
+
+        loaded = StatsStore.load(journaled=True)
+        assert loaded.days[date.today().isoformat()].reminders_sent == 2
+
+    def test_disabling_journal_folds_it_on_next_write(self, tmp_path, monkeypatch):
+        _, journal_file = self._patch(tmp_path, monkeypatch)
+        StatsStore(journaled=True).record_reminder()
+
+        store = StatsStore.load()
+        store.record_reminder()
+
+        assert not journal_file.exists()
+        assert StatsStore.load().days[date.today().isoformat()].reminders_sent == 2
+
+
+class TestWriteBehindPersistence:
+    def _patch(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("breathebreak.stats.STATS_FILE", tmp_path / "stats.json")
+        return tmp_path / "stats.json"
+
+    def test_events_are_buffered_until_flush(self, tmp_path, monkeypatch):
+        stats_file = self._patch(tmp_path, monkeypatch)
+        store = StatsStore(flush_interval=60, max_pending=1000)
+        for _ in range(10):
+            store.record_reminder()
+        assert not stats_file.exists()
+
+        store.flush()
+        assert StatsStore.load().days[date.today().isoformat()].reminders_sent == 10
+        store.close()
+
+    def test_close_flushes_buffered_events(self, tmp_path, monkeypatch):
+        self._patch(tmp_path, monkeypatch)
+        store = StatsStore(journaled=True, flush_interval=60, max_pending=1000)
+        store.record_reminder()
+        store.record_break(20)
+        store.close()
+
+        loaded = StatsStore.load(journaled=True)
+        assert loaded.days[date.today().isoformat()].breaks_acknowledged == 1
+
+    @pytest.mark.parametrize("max_pending", [1, 5, 25])
+    def test_data_at_risk_bounded_by_max_pending(self, tmp_path, monkeypatch, max_pending):
+        self._patch(tmp_path, monkeypatch)
+        store = StatsStore(journaled=True, flush_interval=60, max_pending=max_pending)
+        for _ in range(100):
+            store.record_reminder()
+        # Let the writer catch up, then "kill" the process without closing.
+        deadline = time.monotonic() + 5
+        while len(store._pending) >= max_pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        on_disk = StatsStore.load(journaled=True).days[date.today().isoformat()].reminders_sent
+        assert 100 - on_disk < max_pending
+        store.close()
+
+    def test_data_at_risk_bounded_by_interval(self, tmp_path, monkeypatch):
+        self._patch(tmp_path, monkeypatch)
+        store = StatsStore(journaled=True, flush_interval=0.1, max_pending=1000)
+        store.record_reminder()
+        time.sleep(0.5)
+
+        loaded = StatsStore.load(journaled=True)
+        assert loaded.days[date.today().isoformat()].reminders_sent == 1
+        store.close()
+
+
+class TestRangeAggregates:
+    def _store(self, **days_back):
+        """Build a store with reminders_sent=value on today - N days."""
+        store = StatsStore()
+        store._persist = lambda: None
+        for offset, reminders in days_back.items():
+            key = (date.today() - timedelta(days=int(offset[1:]))).isoformat()
+            store.days[key] = DailyStats(date=key, reminders_sent=reminders)
+        return store
+
+    def test_summary_skips_gaps(self):
+        # Days with data: today, 3 and 10 days ago. Last 2 days with data
+        # are today and 3 days ago, whatever lies between them.
+        store = self._store(d0=1, d3=10, d10=100)
+        assert "Reminders sent: 11" in store.summary(last_n_days=2)
+        assert "Last 2 day(s)" in store.summary(last_n_days=2)
+
+    def test_summary_window_larger_than_history(self):
+        store = self._store(d0=1, d3=10)
+        summary = store.summary(last_n_days=365)
+        assert "Last 2 day(s)" in summary
+        assert "Reminders sent: 11" in summary
+
+    def test_summary_reflects_new_records(self):
+        store = self._store(d1=5)
+        assert "Reminders sent: 5" in store.summary()
+        store.record_reminder()
+        assert "Reminders sent: 6" in store.summary()
+
+    def test_summary_reflects_backfilled_history(self):
+        store = self._store(d0=1)
+        store.summary()
+        key = (date.today() - timedelta(days=400)).isoformat()
+        store.days[key] = DailyStats(date=key, reminders_sent=7)
+        assert "Reminders sent: 8" in store.summary()
+
+    def test_totals_over_calendar_range(self):
+        store = self._store(d0=1, d5=2, d9=4)
+        today = date.today()
+        assert store.totals(today - timedelta(days=5), today)["reminders_sent"] == 3
+        assert store.totals(today + timedelta(days=1), today + timedelta(days=3)) == {
+            name: 0 for name in store.totals(today, today)
+        }
+
+    def test_week_and_month_to_date(self):
+        store = StatsStore()
+        store._persist = lambda: None
+        for key, n in [("2024-05-31", 100), ("2024-06-03", 1), ("2024-06-05", 2)]:
+            store.days[key] = DailyStats(date=key, reminders_sent=n)
+        wednesday = date(2024, 6, 5)
+        assert store.week_to_date(wednesday)["reminders_sent"] == 3
+        assert store.month_to_date(wednesday)["reminders_sent"] == 3
+        assert store.month_to_date(date(2024, 5, 31))["reminders_sent"] == 100
+
+    def test_summary_cost_is_independent_of_history(self):
+        start = date.today() - timedelta(days=20 * 365)
+        rows = {
+            (start + timedelta(days=i)).isoformat(): {"reminders_sent": 1} for i in range(20 * 365)
+        }
+        store = StatsStore(days=DayTable.from_rows(rows))
+        store.summary()  # builds prefix sums once
+
+        def best_of(repeat=50):
+            timings = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                store.summary(last_n_days=7)
+                store.summary(last_n_days=5000)
+                timings.append(time.perf_counter() - t0)
+            return min(timings)
+
+        assert best_of() < 0.001
+
+
+class TestPagedStorage:
+    def _patch(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("breathebreak.stats.STATS_FILE", tmp_path / "stats.json")
+        return tmp_path / "stats.dat"
+
+    def _history(self, years):
+        start = date.today() - timedelta(days=years * 365)
+        return {
+            (start + timedelta(days=i)).isoformat(): {"reminders_sent": 10, "focus_seconds": 60}
+            for i in range(years * 365)
+        }
+
+    def test_roundtrip(self, tmp_path, monkeypatch):
+        pages = self._patch(tmp_path, monkeypatch)
+        store = StatsStore(storage="paged")
+        store.record_reminder()
+        store.record_break(20)
+
+        assert pages.exists()
+        loaded = StatsStore.load(storage="paged")
+        today = date.today().isoformat()
+        assert loaded.days[today].reminders_sent == 1
+        assert loaded.days[today].breaks_acknowledged == 1
+
+    def test_imports_existing_json_once(self, tmp_path, monkeypatch):
+        pages = self._patch(tmp_path, monkeypatch)
+        StatsStore(days=DayTable.from_rows(self._history(1))).compact()
+
+        loaded = StatsStore.load(storage="paged")
+        assert pages.exists()
+        assert len(loaded.days) == 365
+
+    def test_startup_loads_only_recent_window(self, tmp_path, monkeypatch):
+        self._patch(tmp_path, monkeypatch)
+        StatsStore(days=DayTable.from_rows(self._history(10)), storage="paged").compact()
+
+        store = StatsStore.load(storage="paged")
+        assert store.days.resident_days <= 63
+        assert "Last 7 day(s)" in store.summary()
+        assert store.days.resident_days <= 63
+        assert len(store.days) == 3650
+
+    def test_write_after_lazy_load_keeps_old_history(self, tmp_path, monkeypatch):
+        self._patch(tmp_path, monkeypatch)
+        history = self._history(5)
+        StatsStore(days=DayTable.from_rows(history), storage="paged").compact()
+
+        store = StatsStore.load(storage="paged")
+        store.record_reminder()
+        reloaded = StatsStore.load(storage="paged")
+        assert len(reloaded.days) == len(history) + 1
+        oldest = next(iter(history))
+        assert reloaded.days[oldest].reminders_sent == 10
+
+    def test_corrupt_page_file_returns_empty(self, tmp_path, monkeypatch):
+        pages = self._patch(tmp_path, monkeypatch)
+        pages.write_bytes(b"garbage")
+        assert len(StatsStore.load(storage="paged").days) == 0
+
+    def test_time_to_first_menu_is_flat_in_history_size(self, tmp_path, monkeypatch):
+        self._patch(tmp_path, monkeypatch)
+
+        def time_to_first_menu(years):
+            StatsStore(days=DayTable.from_rows(self._history(years)), storage="paged").compact()
+            timings = []
+            for _ in range(5):
+                start = time.perf_counter()
+                StatsStore.load(storage="paged").summary()
+                timings.append(time.perf_counter() - start)
+            return min(timings)
+
+        small = time_to_first_menu(1)
+        large = time_to_first_menu(20)
+        # Twenty times the history must not cost anywhere near twenty times as much.
+        assert large < small * 4
+
+
+_WRITER = """
+import sys
+from pathlib import Path
+
+import breathebreak.stats as stats
+
+root, storage, journaled, count = sys.argv[1:]
+root = Path(root)
+stats.STATS_FILE = root / "stats.json"
+stats.JOURNAL_COMPACT_THRESHOLD = 25
+store = stats.StatsStore.load(journaled=journaled == "1", storage=storage)
+for _ in range(int(count)):
+    store.record_reminder()
+store.close()
+"""
+
+
+class TestConcurrentWriters:
+    def _patch(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("breathebreak.stats.STATS_FILE", tmp_path / "stats.json")
+
+    @pytest.mark.parametrize(
+        "storage,journaled",
+        [("json", False), ("json", True), ("paged", False), ("sqlite", False)],
+    )
+    def test_many_processes_lose_nothing(self, tmp_path, monkeypatch, storage, journaled):
+        self._patch(tmp_path, monkeypatch)
+        yesterday = (date.today() - timedelta(days=1)).isoformat()
+        history = DayTable.from_rows({yesterday: {"reminders_sent": 7}})
+        # sqlite starts from a json snapshot, so the workers race to import it.
+        StatsStore(days=history, storage="json" if storage == "sqlite" else storage).compact()
+
+        procs, per_proc = 8, 40
+        env = {**os.environ, "PYTHONPATH": os.path.dirname(os.path.dirname(breathebreak.__file__))}
+        args = [str(tmp_path), storage, "1" if journaled else "0", str(per_proc)]
+        workers = [
+            subprocess.Popen([sys.executable, "-c", _WRITER, *args], env=env) for _ in range(procs)
+        ]
+        assert [w.wait(timeout=60) for w in workers] == [0] * procs
+
+        loaded = StatsStore.load(journaled=journaled, storage=storage)
+        assert loaded.days[date.today().isoformat()].reminders_sent == procs * per_proc
+        assert loaded.days[yesterday].reminders_sent == 7
+
+    def test_interleaved_stores_merge_instead_of_overwriting(self, tmp_path, monkeypatch):
+        self._patch(tmp_path, monkeypatch)
+        first = StatsStore.load()
+        second = StatsStore.load()
+        first.record_reminder()
+        second.record_reminder()
+        second.record_break(20)
+        first.record_reminder()
+
+        today = date.today().isoformat()
+        assert StatsStore.load().days[today].reminders_sent == 3
+        # Each store also sees the other's counts after its own write.
+        assert first.days[today].breaks_acknowledged == 1
+
+    def test_journal_sequence_is_shared(self, tmp_path, monkeypatch):
+        self._patch(tmp_path, monkeypatch)
+        first = StatsStore.load(journaled=True)
+        second = StatsStore.load(journaled=True)
+        first.record_reminder()
+        second.record_reminder()
+        first.compact()
+        second.record_reminder()
+
+        seqs = [r["seq"] for r in second._get_journal().replay()]
+        assert seqs == [3]
+        assert StatsStore.load(journaled=True).days[date.today().isoformat()].reminders_sent == 3
+
+    def test_lone_writer_skips_the_merge_read(self, tmp_path, monkeypatch):
+        self._patch(tmp_path, monkeypatch)
+        store = StatsStore.load()
+        store.record_reminder()
+        monkeypatch.setattr(StatsStore, "_load_disk", lambda self: pytest.fail("re-read"))
+        store.record_reminder()
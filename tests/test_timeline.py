@@ -0,0 +1,124 @@
+"""Tests for the delta-encoded event timeline."""
+
+from datetime import date, datetime, timedelta
+
+from breathebreak.stats import StatsStore
+from breathebreak.timeline import Event, Timeline, break_latencies, by_hour
+
+
+def _at(day: date, hour: int, minute: int = 0) -> int:
+    return int(datetime.combine(day, datetime.min.time()).timestamp()) + hour * 3600 + minute * 60
+
+
+def _workday(day: date) -> list[Event]:
+    """Reminders every 20 minutes from 9:00 to 18:00, each answered 30s later."""
+    events = [Event(_at(day, 9), "session_start")]
+    for i in range(27):
+        ts = _at(day, 9, 20 * i)
+        events.append(Event(ts, "reminder"))
+        events.append(Event(ts + 30, "break", 20))
+    return events
+
+
+class TestTimeline:
+    def test_roundtrip_across_days(self, tmp_path):
+        timeline = Timeline(tmp_path / "timeline.dat")
+        days = [date(2024, 3, 1) + timedelta(days=i) for i in range(3)]
+        expected = [e for d in days for e in _workday(d)]
+        timeline.append(expected[:10])
+        timeline.append(expected[10:])
+        assert timeline.scan(expected[0].ts, expected[-1].ts) == expected
+        assert timeline.day(days[1]) == _workday(days[1])
+        assert len(timeline) == len(expected)
+
+    def test_scan_decodes_only_touched_chunks(self, tmp_path):
+        timeline = Timeline(tmp_path / "timeline.dat")
+        start = date(2024, 1, 1)
+        timeline.append([e for i in range(60) for e in _workday(start + timedelta(days=i))])
+        target = start + timedelta(days=30)
+        events = timeline.scan(_at(target, 0), _at(target, 23))
+        assert len(events) == len(_workday(target))
+        assert timeline.chunks_decoded == 1
+
+    def test_a_decade_of_reminders_stays_small(self, tmp_path):
+        timeline = Timeline(tmp_path / "timeline.dat")
+        start = date(2015, 1, 1)
+        total = 0
+        for i in range(0, 3650, 365):
+            batch = [e for d in range(365) for e in _workday(start + timedelta(days=i + d))]
+            timeline.append(batch)
+            total += len(batch)
+        assert len(timeline) == total
+        assert timeline.nbytes / total < 4
+
+    def test_values_and_backwards_clock(self, tmp_path):
+        timeline = Timeline(tmp_path / "timeline.dat")
+        day = date(2024, 3, 1)
+        events = [Event(_at(day, 10), "focus_end", 5400), Event(_at(day, 9), "focus_start")]
+        timeline.append(events[:1])
+        timeline.append(events[1:])
+        # Stored in arrival order; scan returns them sorted by time.
+        assert timeline.day(day) == sorted(events, key=lambda e: e.ts)
+
+    def test_torn_writes_are_dropped(self, tmp_path):
+        timeline = Timeline(tmp_path / "timeline.dat")
+        day = date(2024, 3, 1)
+        timeline.append(_workday(day) + [Event(_at(day + timedelta(days=1), 9), "reminder")])
+        with open(timeline.tail_path, "ab") as f:
+            f.write(b"\xff")
+        with open(timeline.path, "ab") as f:
+            f.write(b"\x80")
+        fresh = Timeline(timeline.path)
+        later = Event(_at(day + timedelta(days=2), 9), "reminder")
+        fresh.append([later])
+        events = fresh.scan(_at(day, 0), later.ts)
+        assert len(events) == len(_workday(day)) + 2
+
+    def test_stale_tail_after_crash_mid_seal(self, tmp_path):
+        timeline = Timeline(tmp_path / "timeline.dat")
+        day = date(2024, 3, 1)
+        timeline.append(_workday(day))
+        tail = timeline.tail_path.read_bytes()
+        timeline.append([Event(_at(day + timedelta(days=1), 9), "reminder")])
+        # Sealed, but the crash hit before the tail was replaced.
+        timeline.tail_path.write_bytes(tail)
+        assert Timeline(timeline.path).day(day) == _workday(day)
+
+
+class TestAnalysis:
+    def test_by_hour(self):
+        events = _workday(date(2024, 3, 1))
+        hours = by_hour(events, "reminder")
+        assert hours[9] == 3
+        assert hours[8] == 0
+        assert sum(hours) == 27
+
+    def test_break_latencies_skip_unanswered(self):
+        events = [
+            Event(0, "reminder"),
+            Event(1200, "reminder"),
+            Event(1245, "break"),
+            Event(2400, "reminder"),
+        ]
+        assert break_latencies(events) == [45]
+
+
+class TestStoreTimeline:
+    def test_store_records_events(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("breathebreak.stats.STATS_FILE", tmp_path / "stats.json")
+        store = StatsStore.load(timeline=True, flush_interval=60)
+        store.record_session_start()
+        store.start_focus_session()
+        store.record_reminder()
+        store.record_break(20)
+        store.end_focus_session()
+        now = datetime.now()
+        kinds = [e.kind for e in store.events(now - timedelta(minutes=1), now)]
+        assert kinds == ["session_start", "focus_start", "reminder", "break", "focus_end"]
+        store.close()
+
+    def test_off_by_default(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("breathebreak.stats.STATS_FILE", tmp_path / "stats.json")
+        store = StatsStore.load()
+        store.record_reminder()
+        assert not (tmp_path / "timeline.tail").exists()
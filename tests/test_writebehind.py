@@ -0,0 +1,85 @@
+"""Tests for write-behind flushing."""
+
+import threading
+import time
+
+import pytest
+
+from breathebreak.writebehind import WriteBehind
+
+
+class _Sink:
+    def __init__(self):
+        self.calls = 0
+        self.event = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.event.set()
+
+
+class TestDebouncing:
+    def test_burst_becomes_single_write(self):
+        sink = _Sink()
+        writer = WriteBehind(sink, interval=0.2, max_pending=1000)
+        for n in range(1, 101):
+            writer.mark_dirty(n)
+        assert sink.event.wait(2)
+        time.sleep(0.3)
+        assert sink.calls == 1
+        writer.close()
+
+    def test_nothing_written_before_interval(self):
+        sink = _Sink()
+        writer = WriteBehind(sink, interval=60, max_pending=1000)
+        writer.mark_dirty(1)
+        assert not sink.event.wait(0.1)
+        assert writer.dirty
+        writer.close()
+
+    def test_max_pending_forces_early_write(self):
+        sink = _Sink()
+        writer = WriteBehind(sink, interval=60, max_pending=10)
+        writer.mark_dirty(10)
+        assert sink.event.wait(2)
+        writer.close()
+
+    def test_writes_off_calling_thread(self):
+        threads = []
+        writer = WriteBehind(lambda: threads.append(threading.current_thread()), 0.01, 10)
+        writer.mark_dirty(1)
+        deadline = time.monotonic() + 2
+        while not threads and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert threads and threads[0] is not threading.current_thread()
+        writer.close()
+
+
+class TestFlush:
+    def test_flush_is_noop_when_clean(self):
+        sink = _Sink()
+        WriteBehind(sink, interval=60, max_pending=10).flush()
+        assert sink.calls == 0
+
+    def test_close_always_flushes(self):
+        sink = _Sink()
+        writer = WriteBehind(sink, interval=60, max_pending=1000)
+        writer.mark_dirty(1)
+        writer.close()
+        assert sink.calls == 1
+        assert not writer.dirty
+
+    def test_failed_flush_stays_dirty(self):
+        failures = [OSError("disk full")]
+
+        def flaky():
+            if failures:
+                raise failures.pop()
+
+        writer = WriteBehind(flaky, interval=60, max_pending=1000)
+        writer.mark_dirty(1)
+        with pytest.raises(OSError):
+            writer.flush()
+        assert writer.dirty
+        writer.close()
+        assert not writer.dirty